@@ -2,16 +2,40 @@
 Feature #18: A/B Testing Engine
 Real-time experiment management with statistical significance testing
 Supports multi-variant testing, traffic allocation, and winner selection
+
+Visitors are assigned by hashing (experiment_id, visitor_id) into one of
+ASSIGNMENT_BUCKETS buckets split by traffic allocation, so a visitor always
+sees the same variant without any stored lookup. Each tracked event updates
+the variant counters and an always-valid (mSPRT) p-value in O(1), so results
+can be checked at any time without inflating false positives. With a
+ExperimentStatsStore the counters are written to experiment_variant_stats in
+batches and reloaded when the variants are registered again after a restart.
 """
 
+import atexit
+import hashlib
+import logging
 import random
 import math
+import threading
+import time
+from bisect import bisect_right
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from collections import defaultdict
 from dataclasses import dataclass, asdict
 import json
 
+from sqlalchemy import bindparam, case, or_, update
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+ASSIGNMENT_BUCKETS = 10000  # allocation granularity: 0.01% of traffic
+MSPRT_TAU = 0.05  # spread of the mixing prior over the conversion-rate difference
+STATS_FLUSH_INTERVAL = 5.0  # seconds between batched counter writes
+STATS_FLUSH_EVENTS = 1000  # ... or this many buffered events, whichever comes first
+
 
 @dataclass
 class ExperimentConfig:
@@ -128,6 +152,56 @@ class StatisticalCalculator:
         n = (2 * z_alpha ** 2 * pbar * (1 - pbar)) / ((p2 - p1) ** 2)
         
         return int(math.ceil(n))
+    
+    @staticmethod
+    def msprt_p_value(control_conversions: int, control_visitors: int,
+                      variant_conversions: int, variant_visitors: int,
+                      tau: float = MSPRT_TAU) -> float:
+        """
+        Always-valid p-value of the mixture SPRT for a difference in conversion rate
+        
+        Normal approximation with a N(0, tau^2) mixture over the difference:
+        Lambda = sqrt(s2 / (s2 + tau2)) * exp(tau2 * d^2 / (2 * s2 * (s2 + tau2)))
+        where d is the observed difference and s2 its variance. Works from the
+        counts alone, so it costs O(1) per event. Keep the running minimum (see
+        sequential_test) to get a p-value that can be checked after every event.
+        """
+        if control_visitors <= 0 or variant_visitors <= 0:
+            return 1.0
+        diff = variant_conversions / variant_visitors - control_conversions / control_visitors
+        # Smoothed rates keep the variance positive when an arm is all-or-nothing
+        pc = (control_conversions + 1) / (control_visitors + 2)
+        pv = (variant_conversions + 1) / (variant_visitors + 2)
+        s2 = pc * (1 - pc) / control_visitors + pv * (1 - pv) / variant_visitors
+        tau2 = tau * tau
+        log_lr = 0.5 * math.log(s2 / (s2 + tau2)) + tau2 * diff * diff / (2 * s2 * (s2 + tau2))
+        return 1.0 if log_lr <= 0 else math.exp(-log_lr)
+    
+    @staticmethod
+    def sequential_test(control_conversions: int, control_visitors: int,
+                        variant_conversions: int, variant_visitors: int,
+                        previous_p_value: float = 1.0, alpha: float = 0.05,
+                        tau: float = MSPRT_TAU) -> Dict:
+        """
+        One O(1) step of the sequential test: fold the current counts into the running p-value
+        
+        Stopping the first time p_value <= alpha keeps the false positive rate
+        at alpha however often the results are looked at.
+        """
+        p_value = min(previous_p_value, StatisticalCalculator.msprt_p_value(
+            control_conversions, control_visitors, variant_conversions, variant_visitors, tau
+        ))
+        return {
+            "p_value": p_value,
+            "is_significant": p_value <= alpha,
+            "alpha": alpha,
+        }
+
+
+def assignment_bucket(experiment_id: str, visitor_id: str) -> int:
+    """Stable bucket in [0, ASSIGNMENT_BUCKETS) for a visitor within an experiment"""
+    digest = hashlib.blake2b(f"{experiment_id}:{visitor_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % ASSIGNMENT_BUCKETS
 
 
 class VariantAnalyzer:
@@ -136,6 +210,14 @@ class VariantAnalyzer:
     def __init__(self):
         self.variants = {}  # variant_id -> variant_data
         self.results = defaultdict(lambda: {"conversions": 0, "visitors": 0, "revenue": 0})
+        self.sequential_p_values = {}  # variant_id -> running always-valid p-value vs the control
+        self._bucket_bounds = []  # upper bucket bound per variant, in insertion order
+        self._bucket_variants = []
+    
+    @property
+    def control_variant_id(self) -> Optional[str]:
+        """The first variant added is the control"""
+        return next(iter(self.variants), None)
     
     def add_variant(self, variant_id: str, variant_name: str, description: str, 
                    traffic_allocation: float) -> Dict:
@@ -150,9 +232,72 @@ class VariantAnalyzer:
             "traffic_allocation": traffic_allocation,
             "created_at": datetime.now().isoformat(),
         }
+        self._rebuild_buckets()
         
         return {"status": "created", "variant_id": variant_id}
     
+    def _rebuild_buckets(self):
+        """Split the bucket range by traffic allocation (equal shares if it is all zero)"""
+        weights = [max(v["traffic_allocation"], 0) for v in self.variants.values()]
+        total = sum(weights)
+        if total <= 0:
+            weights, total = [1] * len(weights), len(weights)
+        bounds, cumulative = [], 0
+        for weight in weights:
+            cumulative += weight
+            bounds.append(round(cumulative / total * ASSIGNMENT_BUCKETS))
+        bounds[-1] = ASSIGNMENT_BUCKETS
+        self._bucket_bounds = bounds
+        self._bucket_variants = list(self.variants)
+    
+    def assign(self, experiment_id: str, visitor_id: str) -> Optional[str]:
+        """
+        Variant for a visitor: same answer on every call and every process
+        
+        Stable while the variant list and allocations are unchanged; changing
+        them moves the bucket boundaries.
+        """
+        if not self._bucket_variants:
+            return None
+        return self._bucket_variants[bisect_right(self._bucket_bounds, assignment_bucket(experiment_id, visitor_id))]
+    
+    def load_results(self, variant_id: str, visitors: int, conversions: int, revenue: float,
+                     min_p_value: Optional[float] = None):
+        """Restore stored counters and the running minimum p-value (e.g. after a restart)"""
+        self.results[variant_id] = {"conversions": conversions, "visitors": visitors, "revenue": revenue}
+        if min_p_value is not None and variant_id != self.control_variant_id:
+            # the always-valid p-value never goes back up, so a restart must not reset it
+            self.sequential_p_values[variant_id] = min(self.sequential_p_values.get(variant_id, 1.0), min_p_value)
+        self._update_sequential(self.control_variant_id)
+    
+    def _update_sequential(self, variant_id: str):
+        control_id = self.control_variant_id
+        if control_id is None:
+            return
+        control = self.results[control_id]
+        targets = [v for v in self.variants if v != control_id] if variant_id == control_id else [variant_id]
+        for target in targets:
+            variant = self.results[target]
+            self.sequential_p_values[target] = min(
+                self.sequential_p_values.get(target, 1.0),
+                StatisticalCalculator.msprt_p_value(
+                    control["conversions"], control["visitors"], variant["conversions"], variant["visitors"]
+                )
+            )
+    
+    def sequential_results(self, alpha: float = 0.05) -> List[Dict]:
+        """Always-valid p-value of every variant against the control"""
+        control_id = self.control_variant_id
+        return [
+            {
+                "variant_id": variant_id,
+                "control_variant_id": control_id,
+                "p_value": round(self.sequential_p_values.get(variant_id, 1.0), 6),
+                "is_significant": self.sequential_p_values.get(variant_id, 1.0) <= alpha,
+            }
+            for variant_id in self.variants if variant_id != control_id
+        ]
+    
     def track_conversion(self, variant_id: str, converted: bool, revenue: float = 0) -> Dict:
         """Track a conversion for a variant"""
         if variant_id not in self.variants:
@@ -162,6 +307,7 @@ class VariantAnalyzer:
         if converted:
             self.results[variant_id]["conversions"] += 1
             self.results[variant_id]["revenue"] += revenue
+        self._update_sequential(variant_id)
         
         return {
             "status": "tracked",
@@ -248,12 +394,141 @@ class VariantAnalyzer:
         }
 
 
+_ENGINES = {}  # db url -> engine for the stats store
+
+
+def _stats_session():
+    from models import get_engine, get_session
+    from utils import _get_db_url
+    url = _get_db_url()
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+class ExperimentStatsStore:
+    """Per-variant counters buffered in memory and written to experiment_variant_stats in batches
+    
+    record() only adds to the pending increments; a flush applies them with one
+    executemany UPDATE once STATS_FLUSH_EVENTS events are buffered or
+    STATS_FLUSH_INTERVAL seconds have passed (and at exit). Increments are
+    added to the stored totals, so several processes can share the table.
+    The running minimum of each variant's sequential p-value is kept the same
+    way: the stored value only ever moves down.
+    """
+    
+    def __init__(self, flush_interval: float = STATS_FLUSH_INTERVAL, flush_events: int = STATS_FLUSH_EVENTS):
+        self.flush_interval = flush_interval
+        self.flush_events = flush_events
+        self._pending: Dict[Tuple[str, str], List] = {}  # (experiment_id, variant_id) -> [visitors, conversions, revenue, min p-value]
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+    
+    def load(self, experiment_id: str, variant_id: str) -> Dict:
+        """Stored counters plus anything still buffered; creates the row if missing"""
+        from models import ExperimentVariantStats
+        session = _stats_session()
+        try:
+            row = session.get(ExperimentVariantStats, (experiment_id, variant_id))
+            if row is None:
+                row = ExperimentVariantStats(experiment_id=experiment_id, variant_id=variant_id, visitors=0,
+                                             conversions=0, revenue=0.0, min_p_value=None, updated_at=time.time())
+                session.add(row)
+                try:
+                    session.commit()
+                except IntegrityError:  # another process registered the variant first
+                    session.rollback()
+                    row = session.get(ExperimentVariantStats, (experiment_id, variant_id))
+            stored = {"visitors": row.visitors or 0, "conversions": row.conversions or 0, "revenue": row.revenue or 0.0,
+                      "min_p_value": 1.0 if row.min_p_value is None else row.min_p_value}
+        finally:
+            session.close()
+        with self._lock:
+            pending = self._pending.get((experiment_id, variant_id))
+            if pending:
+                stored["visitors"] += pending[0]
+                stored["conversions"] += pending[1]
+                stored["revenue"] += pending[2]
+                stored["min_p_value"] = min(stored["min_p_value"], pending[3])
+        return stored
+    
+    def record(self, experiment_id: str, variant_id: str, converted: bool, revenue: float = 0,
+               p_values: Optional[Dict[str, float]] = None):
+        """Buffer one event; p_values maps variant ids to their current running minimum p-value"""
+        with self._lock:
+            pending = self._pending.get((experiment_id, variant_id))
+            if pending is None:
+                pending = self._pending[(experiment_id, variant_id)] = [0, 0, 0.0, 1.0]
+            pending[0] += 1
+            if converted:
+                pending[1] += 1
+                pending[2] += revenue
+            for target, p_value in (p_values or {}).items():
+                entry = self._pending.get((experiment_id, target))
+                if entry is None:
+                    entry = self._pending[(experiment_id, target)] = [0, 0, 0.0, 1.0]
+                entry[3] = min(entry[3], p_value)
+            self._buffered += 1
+            due = self._buffered >= self.flush_events or time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+    
+    def flush(self) -> int:
+        """Write buffered increments; returns the number of variant rows updated"""
+        from models import ExperimentVariantStats
+        with self._lock:
+            batch, self._pending, self._buffered = self._pending, {}, 0
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+        table = ExperimentVariantStats.__table__
+        statement = update(table).where(
+            table.c.experiment_id == bindparam("key_experiment"),
+            table.c.variant_id == bindparam("key_variant"),
+        ).values(
+            visitors=table.c.visitors + bindparam("add_visitors"),
+            conversions=table.c.conversions + bindparam("add_conversions"),
+            revenue=table.c.revenue + bindparam("add_revenue"),
+            min_p_value=case(
+                (or_(table.c.min_p_value.is_(None), table.c.min_p_value > bindparam("min_p")), bindparam("min_p")),
+                else_=table.c.min_p_value,
+            ),
+            updated_at=bindparam("now"),
+        )
+        now = time.time()
+        session = _stats_session()
+        try:
+            session.execute(statement, [
+                {"key_experiment": experiment_id, "key_variant": variant_id, "add_visitors": visitors,
+                 "add_conversions": conversions, "add_revenue": revenue, "min_p": min_p, "now": now}
+                for (experiment_id, variant_id), (visitors, conversions, revenue, min_p) in batch.items()
+            ])
+            session.commit()
+            return len(batch)
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Experiment stats flush failed: {e}")
+            with self._lock:  # keep the increments for the next attempt
+                for key, (visitors, conversions, revenue, min_p) in batch.items():
+                    pending = self._pending.setdefault(key, [0, 0, 0.0, 1.0])
+                    pending[0] += visitors
+                    pending[1] += conversions
+                    pending[2] += revenue
+                    pending[3] = min(pending[3], min_p)
+            return 0
+        finally:
+            session.close()
+
+
 class ExperimentManager:
     """Manage A/B testing experiments"""
     
-    def __init__(self):
+    def __init__(self, stats_store: Optional[ExperimentStatsStore] = None):
         self.experiments = {}  # experiment_id -> experiment
         self.variant_analyzers = {}  # experiment_id -> VariantAnalyzer
+        self.stats_store = stats_store  # persists counters when set
     
     def create_experiment(self, experiment_id: str, name: str, description: str, 
                          hypothesis: str, primary_metric: str, 
@@ -331,28 +606,19 @@ class ExperimentManager:
             return {"status": "error", "message": "Experiment not found"}
         
         analyzer = self.variant_analyzers[experiment_id]
-        return analyzer.add_variant(variant_id, variant_name, description, traffic_allocation)
+        result = analyzer.add_variant(variant_id, variant_name, description, traffic_allocation)
+        if result["status"] == "created" and self.stats_store is not None:
+            stored = self.stats_store.load(experiment_id, variant_id)
+            analyzer.load_results(variant_id, stored["visitors"], stored["conversions"], stored["revenue"],
+                                  stored["min_p_value"])
+        return result
     
     def track_visitor(self, experiment_id: str, visitor_id: str) -> str:
-        """Assign visitor to variant based on traffic allocation"""
-        if experiment_id not in self.variant_analyzers:
-            return None
-        
-        analyzer = self.variant_analyzers[experiment_id]
-        if not analyzer.variants:
+        """Assign visitor to variant based on traffic allocation (deterministic per visitor)"""
+        analyzer = self.variant_analyzers.get(experiment_id)
+        if analyzer is None:
             return None
-        
-        # Weighted random selection based on traffic allocation
-        total_traffic = sum(v["traffic_allocation"] for v in analyzer.variants.values())
-        rand = random.uniform(0, total_traffic)
-        
-        cumulative = 0
-        for variant_id, variant in analyzer.variants.items():
-            cumulative += variant["traffic_allocation"]
-            if rand <= cumulative:
-                return variant_id
-        
-        return list(analyzer.variants.keys())[0]
+        return analyzer.assign(experiment_id, visitor_id)
     
     def track_conversion(self, experiment_id: str, variant_id: str, 
                         converted: bool, revenue: float = 0) -> Dict:
@@ -361,7 +627,15 @@ class ExperimentManager:
             return {"status": "error", "message": "Experiment not found"}
         
         analyzer = self.variant_analyzers[experiment_id]
-        return analyzer.track_conversion(variant_id, converted, revenue)
+        result = analyzer.track_conversion(variant_id, converted, revenue)
+        if result["status"] == "tracked" and self.stats_store is not None:
+            p_values = analyzer.sequential_p_values  # a control event moves every variant's p-value
+            if variant_id == analyzer.control_variant_id:
+                p_values = dict(p_values)
+            else:
+                p_values = {variant_id: p_values[variant_id]}
+            self.stats_store.record(experiment_id, variant_id, converted, revenue, p_values)
+        return result
     
     def get_experiment_results(self, experiment_id: str) -> Dict:
         """Get comprehensive results for an experiment"""
@@ -388,6 +662,7 @@ class ExperimentManager:
             "overall_conversion_rate_percent": round(overall_rate, 2),
             "variants_performance": variants_performance,
             "winner_analysis": winner_analysis,
+            "sequential_analysis": analyzer.sequential_results(1 - self.experiments[experiment_id]["confidence_level"]),
             "confidence_level": self.experiments[experiment_id]["confidence_level"],
         }
     
@@ -402,9 +677,18 @@ class ExperimentManager:
         return experiments
 
 
-def generate_demo_experiments() -> Tuple[ExperimentManager, List[str]]:
-    """Generate demo A/B testing experiments for testing"""
-    manager = ExperimentManager()
+def _has_traffic(manager: ExperimentManager, experiment_id: str) -> bool:
+    """True once any variant has visitors, e.g. counters reloaded from the stats store"""
+    return any(r["visitors"] for r in manager.variant_analyzers[experiment_id].results.values())
+
+
+def generate_demo_experiments(stats_store: Optional[ExperimentStatsStore] = None) -> Tuple[ExperimentManager, List[str]]:
+    """Generate demo A/B testing experiments for testing
+    
+    With a stats_store the simulated traffic is only added to experiments that
+    have none stored yet, so restarts reload the counters instead of adding to them.
+    """
+    manager = ExperimentManager(stats_store=stats_store)
     
     # Experiment 1: CTA Button Color
     exp1_id = "cta_color_test"
@@ -423,13 +707,14 @@ def generate_demo_experiments() -> Tuple[ExperimentManager, List[str]]:
     manager.add_variant(exp1_id, "variant_red", "Red Button", "Red CTA button", 0.5)
     
     # Simulate visitors
-    for i in range(150):
-        control_converted = random.random() < 0.12  # 12% conversion
-        manager.track_conversion(exp1_id, "control", control_converted, 49.99 if control_converted else 0)
+    if not _has_traffic(manager, exp1_id):
+        for i in range(150):
+            control_converted = random.random() < 0.12  # 12% conversion
+            manager.track_conversion(exp1_id, "control", control_converted, 49.99 if control_converted else 0)
     
-    for i in range(150):
-        variant_converted = random.random() < 0.16  # 16% conversion (uplift)
-        manager.track_conversion(exp1_id, "variant_red", variant_converted, 49.99 if variant_converted else 0)
+        for i in range(150):
+            variant_converted = random.random() < 0.16  # 16% conversion (uplift)
+            manager.track_conversion(exp1_id, "variant_red", variant_converted, 49.99 if variant_converted else 0)
     
     # Experiment 2: Pricing Page
     exp2_id = "pricing_layout_test"
@@ -448,13 +733,14 @@ def generate_demo_experiments() -> Tuple[ExperimentManager, List[str]]:
     manager.add_variant(exp2_id, "variant_cards", "Card Layout", "Modern card-based layout", 0.5)
     
     # Simulate visitors
-    for i in range(100):
-        control_converted = random.random() < 0.18  # 18% selection rate
-        manager.track_conversion(exp2_id, "control", control_converted, 99.99 if control_converted else 0)
+    if not _has_traffic(manager, exp2_id):
+        for i in range(100):
+            control_converted = random.random() < 0.18  # 18% selection rate
+            manager.track_conversion(exp2_id, "control", control_converted, 99.99 if control_converted else 0)
     
-    for i in range(100):
-        variant_converted = random.random() < 0.22  # 22% selection rate
-        manager.track_conversion(exp2_id, "variant_cards", variant_converted, 99.99 if variant_converted else 0)
+        for i in range(100):
+            variant_converted = random.random() < 0.22  # 22% selection rate
+            manager.track_conversion(exp2_id, "variant_cards", variant_converted, 99.99 if variant_converted else 0)
     
     # Experiment 3: Email Subject Line (just started)
     exp3_id = "email_subject_test"
@@ -472,17 +758,22 @@ def generate_demo_experiments() -> Tuple[ExperimentManager, List[str]]:
     manager.add_variant(exp3_id, "variant_curiosity", "Curiosity Gap", "3 Things You're Getting Wrong", 0.5)
     
     # Simulate visitors (early data)
-    for i in range(80):
-        control_converted = random.random() < 0.22
-        manager.track_conversion(exp3_id, "control", control_converted)
+    if not _has_traffic(manager, exp3_id):
+        for i in range(80):
+            control_converted = random.random() < 0.22
+            manager.track_conversion(exp3_id, "control", control_converted)
     
-    for i in range(80):
-        variant_converted = random.random() < 0.28
-        manager.track_conversion(exp3_id, "variant_curiosity", variant_converted)
+        for i in range(80):
+            variant_converted = random.random() < 0.28
+            manager.track_conversion(exp3_id, "variant_curiosity", variant_converted)
     
     return manager, [exp1_id, exp2_id, exp3_id]
 
 
+stats_store = ExperimentStatsStore()
+atexit.register(stats_store.flush)
+
+
 # Global instance for demo
 _demo_manager = None
 _demo_experiment_ids = []
@@ -492,5 +783,7 @@ def get_demo_manager():
     """Get or create demo experiment manager"""
     global _demo_manager, _demo_experiment_ids
     if _demo_manager is None:
-        _demo_manager, _demo_experiment_ids = generate_demo_experiments()
+        from utils import init_db
+        init_db()
+        _demo_manager, _demo_experiment_ids = generate_demo_experiments(stats_store)
     return _demo_manager, _demo_experiment_ids
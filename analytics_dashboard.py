@@ -287,3 +287,32 @@ def get_dashboard_summary(days: int = 30) -> Dict:
         },
         'avg_order_value': (revenue / orders / 100) if orders > 0 else 0
     }
+
+
+def export_report_data(days: int = 30) -> Dict:
+    """Analytics report for export: summary, daily revenue trend and top products."""
+    return {
+        'period_days': days,
+        'summary': get_dashboard_summary(days),
+        'revenue_trend': get_revenue_trend(days),
+        'top_products': get_top_products(days),
+        'generated_at': datetime.now().isoformat(),
+    }
+
+
+EXPORT_ORDER_FIELDS = ['id', 'receipt', 'product', 'amount', 'currency', 'status', 'created_at', 'paid_at']
+
+
+def iter_orders(days: int = 30, batch_size: int = 1000):
+    """Yield the orders of the window as dicts, newest first, via a server-side cursor."""
+    engine = get_engine(_get_db_url())
+    session = get_session(engine)
+    try:
+        cutoff = time.time() - (days * 86400)
+        rows = session.query(*[getattr(Order, name) for name in EXPORT_ORDER_FIELDS]).filter(
+            Order.created_at >= cutoff
+        ).order_by(Order.created_at.desc(), Order.id.desc()).execution_options(stream_results=True).yield_per(batch_size)
+        for row in rows:
+            yield dict(zip(EXPORT_ORDER_FIELDS, row))
+    finally:
+        session.close()
@@ -1,13 +1,15 @@
-from flask import Flask, render_template, send_from_directory, request, jsonify, redirect, url_for, session, flash, abort, g
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, abort, g
 import os
 import logging
 import time
 import functools
 import json
 import hashlib
+import mimetypes
 from dotenv import load_dotenv
 import razorpay
 from werkzeug.security import check_password_hash
+from werkzeug.utils import send_file as werkzeug_send_file
 import secrets
 import threading
 from collections import deque
@@ -178,6 +180,10 @@ apply_session_cookie_config()
 from security_middleware import init_security_middleware
 init_security_middleware(app)
 
+# Fingerprinted static assets: asset_url() in templates, immutable /static/dist/
+from static_assets import init_static_assets
+init_static_assets(app)
+
 # Expose ADMIN_SESSION_TIMEOUT via app config for templates
 try:
     app.config['ADMIN_SESSION_TIMEOUT'] = int(os.getenv('ADMIN_SESSION_TIMEOUT', '0'))
@@ -350,6 +356,12 @@ def _reset_rate_limit_store():
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DOWNLOAD_DIR = os.path.join(BASE_DIR, "downloads")
+# DOWNLOAD_OFFLOAD: '' streams from Flask; 'x-accel' hands the transfer to nginx via
+# X-Accel-Redirect under DOWNLOAD_ACCEL_PREFIX (an `internal` location aliased to DOWNLOAD_DIR);
+# 'x-sendfile' sends the file path in X-Sendfile for Apache/lighttpd.
+DOWNLOAD_ACCEL_PREFIX_DEFAULT = '/protected-downloads/'
+_DOWNLOAD_ETAGS: dict = {}  # path -> ((size, mtime_ns), etag)
+_DOWNLOAD_ETAGS_LOCK = threading.Lock()
 
 # ===== TIER SYSTEM: Starter → Pro → Premium → Rare → Rarest → 1% =====
 PRODUCTS = {
@@ -1109,15 +1121,72 @@ Thank you for your purchase!
         logging.exception(f"Robot provisioning failed for order {order_id}: {e}")
         return None
 
+def download_etag(path: str) -> str:
+    """Strong ETag for a download: SHA-256 of the content, hashed once per file version."""
+    stat = os.stat(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _DOWNLOAD_ETAGS_LOCK:
+        cached = _DOWNLOAD_ETAGS.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()[:32]
+    with _DOWNLOAD_ETAGS_LOCK:
+        _DOWNLOAD_ETAGS[path] = (version, etag)
+    return etag
+
+
+def _send_download(filename: str, grant: str):
+    """Serve a verified download with Range/If-Range support, or offload it to the proxy."""
+    path = os.path.join(DOWNLOAD_DIR, filename)
+    if not os.path.isfile(path):
+        abort(404)
+    etag = download_etag(path)
+    mode = os.getenv('DOWNLOAD_OFFLOAD', '').lower()
+    if mode == 'x-accel':
+        # nginx serves the bytes (and Range requests) from the internal location
+        response = app.response_class(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.set_etag(etag)
+        response.last_modified = os.path.getmtime(path)
+        response = response.make_conditional(request)
+        if response.status_code != 304:
+            prefix = os.getenv('DOWNLOAD_ACCEL_PREFIX', DOWNLOAD_ACCEL_PREFIX_DEFAULT)
+            response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + filename
+    else:
+        response = werkzeug_send_file(
+            path, request.environ, as_attachment=True, download_name=filename, conditional=True,
+            etag=etag, use_x_sendfile=mode == 'x-sendfile', response_class=app.response_class
+        )
+    response.headers['X-Download-Grant'] = grant
+    return response
+
+
 @app.route("/download/<product>")
 @rate_limit_feature('download')
 def download(product):
-    """Download product - ONLY for verified paid orders."""
+    """Download product - ONLY for verified paid orders.
+
+    A verified download returns a short-lived grant (X-Download-Grant header);
+    passing it back as ?grant= lets resumed and range requests skip re-verification.
+    """
     # First check if product exists
     filename = PRODUCTS.get(product)
     if not filename:
         return "Invalid product", 404
     
+    from entitlements import BIND_DOWNLOAD_TOKEN_TO_IP, generate_download_grant, verify_download_grant
+    bind_ip = request.remote_addr if BIND_DOWNLOAD_TOKEN_TO_IP else None
+    grant = request.args.get('grant')
+    if grant:
+        granted_order = verify_download_grant(grant, product, bind_ip)
+        if granted_order:
+            logging.debug(f"Download grant accepted: order={granted_order} product={product}")
+            return _send_download(filename, grant)
+    
     order_id = request.args.get('order_id')
     
     # Then verify payment in database
@@ -1186,7 +1255,7 @@ def download(product):
     
     # Payment verified - allow download
     logging.info(f"Download authorized: order={order_id} product={product} ip={request.remote_addr}")
-    return send_from_directory(DOWNLOAD_DIR, filename, as_attachment=True)
+    return _send_download(filename, generate_download_grant(order_id, product, bind_ip))
 
 # ===== TIER UPGRADE SYSTEM =====
 
@@ -1996,31 +2065,29 @@ def admin_webhooks():
         init_db()
         import sqlite3
         from utils import _get_db_path
+        from keyset_pagination import keyset_page, cached_count
 
-        # Filters and pagination
+        # Filters and keyset pagination (?page=N still works for old links)
         event_filter = request.args.get('event')
         page = max(int(request.args.get('page', 1)), 1)
         per_page = max(int(request.args.get('per_page', 20)), 1)
-        offset = (page - 1) * per_page
+        cursor = request.args.get('cursor')
+        direction = request.args.get('dir', 'next')
 
+        filters = {'event': event_filter} if event_filter else {}
         conn = sqlite3.connect(_get_db_path())
-        c = conn.cursor()
-
-        where_clauses = []
-        params = []
-        if event_filter:
-            where_clauses.append('event = ?')
-            params.append(event_filter)
-        where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
-
-        c.execute(f'SELECT COUNT(*) FROM webhooks {where_sql}', params)
-        total = c.fetchone()[0]
-
-        c.execute(f'SELECT id, event, payload, received_at FROM webhooks {where_sql} ORDER BY received_at DESC LIMIT ? OFFSET ?', params + [per_page, offset])
-        rows = c.fetchall()
-        conn.close()
+        try:
+            total = cached_count(conn, _get_db_path(), 'webhooks', filters)
+            result = keyset_page(conn, 'webhooks', ['id', 'event', 'payload', 'received_at'], 'received_at',
+                                 filters, per_page, cursor=cursor, direction=direction, offset=(page - 1) * per_page)
+        finally:
+            conn.close()
 
-        return render_template('admin_webhooks.html', rows=rows, page=page, per_page=per_page, total=total, event_filter=event_filter)
+        return render_template('admin_webhooks.html', rows=result['rows'], per_page=per_page, total=total,
+                               next_cursor=result['next_cursor'], prev_cursor=result['prev_cursor'],
+                               event_filter=event_filter)
+    except ValueError:
+        return "Invalid page or cursor", 400
     except Exception as e:
         logging.exception("Failed to render webhooks: %s", e)
         return "Internal error", 500
@@ -2034,35 +2101,36 @@ def admin_orders():
         init_db()
         import sqlite3
         from utils import _get_db_path
+        from keyset_pagination import keyset_page, cached_count
 
-        # Filters and pagination
+        # Filters and keyset pagination (?page=N still works for old links)
         product_filter = request.args.get('product')
         status_filter = request.args.get('status')
         page = max(int(request.args.get('page', 1)), 1)
         per_page = max(int(request.args.get('per_page', 20)), 1)
-        offset = (page - 1) * per_page
+        cursor = request.args.get('cursor')
+        direction = request.args.get('dir', 'next')
 
-        conn = sqlite3.connect(_get_db_path())
-        c = conn.cursor()
-
-        where_clauses = []
-        params = []
+        filters = {}
         if product_filter:
-            where_clauses.append('product = ?')
-            params.append(product_filter)
+            filters['product'] = product_filter
         if status_filter:
-            where_clauses.append('status = ?')
-            params.append(status_filter)
-        where_sql = 'WHERE ' + ' AND '.join(where_clauses) if where_clauses else ''
-
-        c.execute(f'SELECT COUNT(*) FROM orders {where_sql}', params)
-        total = c.fetchone()[0]
+            filters['status'] = status_filter
+        columns = ['id', 'amount', 'currency', 'receipt', 'product', 'status', 'created_at', 'paid_at']
 
-        c.execute(f'SELECT id, amount, currency, receipt, product, status, created_at, paid_at FROM orders {where_sql} ORDER BY created_at DESC LIMIT ? OFFSET ?', params + [per_page, offset])
-        rows = c.fetchall()
-        conn.close()
+        conn = sqlite3.connect(_get_db_path())
+        try:
+            total = cached_count(conn, _get_db_path(), 'orders', filters)
+            result = keyset_page(conn, 'orders', columns, 'created_at', filters, per_page,
+                                 cursor=cursor, direction=direction, offset=(page - 1) * per_page)
+        finally:
+            conn.close()
 
-        return render_template('admin_orders.html', rows=rows, page=page, per_page=per_page, total=total, product_filter=product_filter, status_filter=status_filter)
+        return render_template('admin_orders.html', rows=result['rows'], per_page=per_page, total=total,
+                               next_cursor=result['next_cursor'], prev_cursor=result['prev_cursor'],
+                               product_filter=product_filter, status_filter=status_filter)
+    except ValueError:
+        return "Invalid page or cursor", 400
     except Exception as e:
         logging.exception("Failed to render orders: %s", e)
         return "Internal error", 500
@@ -3145,10 +3213,10 @@ def admin_experiments():
 @app.route('/api/experiments/create', methods=['POST'])
 @admin_required
 def api_experiments_create():
-    from ab_testing_engine import ExperimentManager
+    from ab_testing_engine import get_demo_manager
     try:
         data = request.get_json()
-        manager = ExperimentManager()
+        manager, _ = get_demo_manager()
         
         result = manager.create_experiment(
             experiment_id=data.get('experiment_id', f"exp_{int(time.time())}"),
@@ -3386,14 +3454,22 @@ def admin_attribution():
 @app.route('/api/attribution/track-journey', methods=['POST'])
 @admin_required
 def api_attribution_track_journey():
+    from attribution_batch import record_journey
     from attribution_modeling import generate_demo_attribution_data
     data = request.get_json()
     try:
+        customer_id = data.get('customer_id')
+        if not customer_id:
+            raise ValueError("customer_id is required")
+        touchpoints = data.get('touchpoints', [])
+        conversion_value = float(data.get('conversion_value', 0))
+        # Stored for the batch attribution run; the demo analytics only score this journey
+        record_journey(customer_id, touchpoints, conversion_value, order_id=data.get('order_id'))
         analytics = generate_demo_attribution_data()
         result = analytics.track_customer_journey(
-            customer_id=data.get('customer_id'),
-            touchpoints=data.get('touchpoints', []),
-            conversion_value=data.get('conversion_value', 0),
+            customer_id=customer_id,
+            touchpoints=touchpoints,
+            conversion_value=conversion_value,
             order_id=data.get('order_id')
         )
         return jsonify({'success': True, 'attribution': result}), 201
@@ -3480,6 +3556,20 @@ def api_attribution_conversion_paths():
         return jsonify({'success': False, 'error': str(e)}), 400
 
 
+@app.route('/api/attribution/data-driven', methods=['GET'])
+@admin_required
+def api_attribution_data_driven():
+    """Latest stored batch run (rule-based, Markov and Shapley over the touchpoint history)"""
+    from attribution_batch import latest_attribution_run
+    try:
+        run = latest_attribution_run()
+        if run is None:
+            return jsonify({'success': False, 'error': 'Attribution batch has not run yet'}), 404
+        return jsonify({'success': True, 'run': run}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+
 @app.route('/api/voice/list')
 @admin_required
 def api_voice_list():
@@ -3500,7 +3590,7 @@ def admin_executive():
     days = request.args.get('days', 30, type=int)
     try:
         summary = executive_summary(days=days)
-        alerts = critical_alerts(days=days)
+        alerts = critical_alerts(days=days, summary=summary)
         return render_template('admin_executive.html', summary=summary, alerts=alerts, days=days)
     except Exception as e:
         logging.exception("Failed to render executive dashboard: %s", e)
@@ -3912,48 +4002,34 @@ def api_recommendations_stats():
 @app.route('/api/recommendations/export')
 @admin_required
 def api_recommendations_export():
-    """Export all recommendations as CSV."""
-    from recommendations import get_recommendations_for_all_customers
-    import csv
-    from io import StringIO
-    
-    try:
-        all_recs = get_recommendations_for_all_customers(limit=1)
-        
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Header
-        writer.writerow([
-            'Customer Receipt',
-            'Recommended Product',
-            'Match Score',
-            'Confidence',
-            'Estimated Value (₹)',
-            'Reason'
-        ])
-        
-        # Data
-        for receipt, rec_data in all_recs.items():
-            for rec in rec_data['recommendations']:
-                writer.writerow([
-                    receipt,
-                    rec['product'],
-                    rec['score'],
-                    rec['confidence'],
-                    rec['estimated_conversion_value'],
-                    rec['reason']
-                ])
-        
-        response = app.response_class(
-            response=output.getvalue(),
-            status=200,
-            mimetype='text/csv'
+    """Export all recommendations as streamed CSV (default) or NDJSON (?format=ndjson)."""
+    try:
+        from recommendations import iter_recommendations_for_all_customers
+        from streaming_export import EXPORT_FORMATS, export_response
+        
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'success': False, 'error': 'Unsupported format'}), 400
+        
+        def rows():
+            try:
+                for receipt, rec_data in iter_recommendations_for_all_customers(limit=1):
+                    for rec in rec_data['recommendations']:
+                        yield {'receipt': receipt, **rec}
+            except Exception as e:
+                # Headers are already sent; log and end the stream
+                logger.exception("Recommendations export failed mid-stream: %s", e)
+        
+        return export_response(
+            rows,
+            ['receipt', 'product', 'score', 'confidence', 'estimated_conversion_value', 'reason'],
+            fmt, 'recommendations',
+            header=['Customer Receipt', 'Recommended Product', 'Match Score', 'Confidence',
+                    'Estimated Value (₹)', 'Reason']
         )
-        response.headers['Content-Disposition'] = 'attachment; filename="recommendations.csv"'
-        return response
     
     except Exception as e:
+        logger.exception("Recommendations export failed: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -5777,9 +5853,10 @@ def api_calling_coverage():
 @app.route('/api/calling/campaign/create', methods=['POST'])
 @admin_required
 def api_calling_campaign_create():
-    """Create bulk calling campaign."""
+    """Create bulk calling campaign and queue its numbers; pass "start": true to begin dialing."""
     try:
         from global_calling_system import AICallingService
+        from campaign_dialer import enqueue_campaign, start_campaign
         from models import get_session, CallingCampaign
         data = request.get_json() or {}
         
@@ -5805,8 +5882,14 @@ def api_calling_campaign_create():
         )
         session.add(record)
         session.commit()
+        campaign['campaign_id'] = record.id
         session.close()
         
+        campaign['queued_numbers'] = enqueue_campaign(campaign['campaign_id'], data.get('target_numbers', []))
+        if data.get('start'):
+            start_campaign(campaign['campaign_id'])
+            campaign['status'] = 'running'
+        
         return jsonify({
             'success': True,
             **campaign
@@ -5816,6 +5899,58 @@ def api_calling_campaign_create():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/calling/campaign/<campaign_id>/start', methods=['POST'])
+@admin_required
+def api_calling_campaign_start(campaign_id):
+    """Start (or resume) dialing a campaign in the background.
+
+    Optional JSON: calls_per_second, max_attempts, retry_backoff,
+    country_limits {"+91": 20, ...}.
+    """
+    try:
+        from campaign_dialer import CampaignBusyError, campaign_progress, start_campaign
+        data = request.get_json(silent=True) or {}
+        if campaign_progress(campaign_id) is None:
+            return jsonify({'error': 'Campaign not found'}), 404
+        options = {k: data[k] for k in ('calls_per_second', 'max_attempts', 'retry_backoff', 'country_limits')
+                   if data.get(k) is not None}
+        try:
+            start_campaign(campaign_id, **options)
+        except CampaignBusyError as e:
+            return jsonify({'error': str(e)}), 409
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'success': True, 'campaign_id': campaign_id, 'status': 'running'}), 202
+    except Exception as e:
+        logging.exception(f"Campaign start error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/calling/campaign/<campaign_id>/stop', methods=['POST'])
+@admin_required
+def api_calling_campaign_stop(campaign_id):
+    """Stop dialing after the calls in flight; remaining numbers stay queued."""
+    from campaign_dialer import stop_campaign
+    if not stop_campaign(campaign_id):
+        return jsonify({'error': 'Campaign is not running'}), 409
+    return jsonify({'success': True, 'campaign_id': campaign_id, 'status': 'stopping'})
+
+
+@app.route('/api/calling/campaign/<campaign_id>/progress', methods=['GET'])
+@admin_required
+def api_calling_campaign_progress(campaign_id):
+    """Campaign counters, queue breakdown and live dialer stats."""
+    try:
+        from campaign_dialer import campaign_progress
+        progress = campaign_progress(campaign_id)
+        if progress is None:
+            return jsonify({'error': 'Campaign not found'}), 404
+        return jsonify({'success': True, **progress})
+    except Exception as e:
+        logging.exception(f"Campaign progress error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/admin/calling')
 @admin_required
 def admin_calling_dashboard():
@@ -6049,32 +6184,30 @@ def analytics_dashboard():
 @app.route('/api/admin/export-report')
 @admin_required
 def api_export_report():
-    """Export analytics report as JSON/CSV/PDF."""
+    """Export analytics report as JSON, or stream a dataset as CSV/NDJSON.
+    
+    ?dataset=revenue_trend (default) or orders (every order in the window,
+    read through a server-side cursor).
+    """
     try:
-        from analytics_dashboard import export_report_data
-        import csv
-        from io import StringIO, BytesIO
+        from analytics_dashboard import export_report_data, iter_orders, get_revenue_trend, EXPORT_ORDER_FIELDS
+        from streaming_export import EXPORT_FORMATS, export_response
         
         days = request.args.get('days', 30, type=int)
         fmt = request.args.get('format', 'json').lower()
-        
-        report = export_report_data(days=days)
+        dataset = request.args.get('dataset', 'revenue_trend')
         
         if fmt == 'json':
-            return jsonify(report), 200
-        
-        elif fmt == 'csv':
-            # Convert to CSV
-            output = StringIO()
-            if 'revenue_trend' in report:
-                writer = csv.DictWriter(output, fieldnames=['date', 'revenue', 'orders'])
-                writer.writeheader()
-                writer.writerows(report['revenue_trend'])
-            
-            return output.getvalue(), 200, {'Content-Type': 'text/csv'}
+            return jsonify(export_report_data(days=days)), 200
         
-        else:
+        if fmt not in EXPORT_FORMATS:
             return jsonify({'error': 'Unsupported format'}), 400
+        if dataset == 'orders':
+            return export_response(lambda: iter_orders(days), EXPORT_ORDER_FIELDS, fmt, f'orders_{days}d')
+        if dataset == 'revenue_trend':
+            return export_response(lambda: get_revenue_trend(days), ['date', 'revenue', 'orders'], fmt,
+                                   f'revenue_trend_{days}d')
+        return jsonify({'error': 'Unsupported dataset'}), 400
             
     except Exception as e:
         logger.error(f"Export report error: {e}")
@@ -6296,28 +6429,44 @@ def get_available_prompts():
 @app.route('/api/v2/sync/push', methods=['POST'])
 @admin_required  # TODO: Change to mobile_auth_required
 def sync_push_changes():
-    """Push offline changes to server."""
-    from mobile_api import SyncQueue
+    """Push offline changes to server.
     
-    data = request.get_json()
-    queue = SyncQueue()
+    Body: {device_id, tenant_id?, changes: [{resource, id, op, data, base_version}]}.
+    Changes are applied in one transaction; stale ones come back as conflicts.
+    """
+    from delta_sync import push_changes, json_response
+    from utils import init_db
+    init_db()
     
-    # TODO: Process sync items, detect conflicts
-    return jsonify({
-        'status': 'synced',
-        'synced_count': len(data.get('changes', [])),
-        'conflicts': []
-    }), 200
+    data = request.get_json() or {}
+    tenant_id = getattr(request, 'user_id', None) or data.get('tenant_id') or 'default'
+    device_id = data.get('device_id')
+    if not device_id:
+        return jsonify({'error': 'device_id is required'}), 400
+    
+    try:
+        result = push_changes(tenant_id, device_id, data.get('changes', []))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'status': 'conflict' if result['conflicts'] else 'synced',
+        'synced_count': len(result['applied']),
+        **result,
+    })
 
 
 @app.route('/api/v2/sync/pull', methods=['GET'])
 @admin_required  # TODO: Change to mobile_auth_required
 def sync_pull_changes():
-    """Pull remote changes for offline sync."""
-    return jsonify({
-        'changes': [],
-        'timestamp': time.time(),
-    }), 200
+    """Pull remote changes for offline sync (?since=<next_since from last pull>&limit=)."""
+    from delta_sync import pull_changes, json_response
+    from utils import init_db
+    init_db()
+    
+    tenant_id = getattr(request, 'user_id', None) or request.args.get('tenant_id') or 'default'
+    result = pull_changes(tenant_id, request.args.get('since', 0, type=int), request.args.get('limit', type=int))
+    return json_response({**result, 'timestamp': time.time()})
 
 
 @app.route('/api/v2/analytics/usage', methods=['GET'])
@@ -7178,11 +7327,20 @@ def api_create_kb_article():
 
 @app.route('/api/enterprise/knowledge/search', methods=['GET'])
 def api_search_knowledge_base():
-    """API: Search knowledge base"""
+    """API: Search knowledge base
+
+    Query params: q, category, tags (comma separated, any may match), limit
+    """
     from enterprise_systems import get_knowledge_base
     
     query = request.args.get('q', '')
-    results = get_knowledge_base().search_knowledge_base(query)
+    tags = [t.strip() for t in request.args.get('tags', '').split(',') if t.strip()]
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be an integer'}), 400
+    results = get_knowledge_base().search_knowledge_base(
+        query, category=request.args.get('category') or None, tags=tags or None, limit=limit)
     return jsonify({'success': True, 'results': results}), 200
 
 
@@ -0,0 +1,242 @@
+"""Batch attribution over the stored touchpoint history.
+
+Touchpoints and conversions are appended to attribution_touchpoints
+(record_touchpoints / record_conversion, or record_journey for a journey
+posted to /api/attribution/track-journey). run_attribution_batch() streams
+the table once in (customer, time) order and folds it into a PathTrie:
+
+- each conversion closes the path of the customer's touches since their
+  previous conversion
+- touches left over after a customer's last conversion count as a
+  non-converting (null) path
+
+Every model then runs over the distinct paths instead of the raw events:
+the rule-based ones (first/last touch, linear, time decay), the Markov
+removal effect and sampled Shapley values. The result is stored in
+attribution_runs, so reports survive restarts and cost one read;
+latest_attribution_run() returns it. The daily automation run calls the
+batch job.
+"""
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import insert, select
+
+from attribution_modeling import (
+    SHAPLEY_SAMPLES, PathTrie, markov_attribution, rule_based_attribution, shapley_attribution,
+)
+from models import get_engine, get_session, AttributionRun, AttributionTouchpoint
+from utils import _get_db_url
+
+logger = logging.getLogger(__name__)
+
+READ_BATCH_SIZE = 50000
+INSERT_BATCH_SIZE = 5000
+
+_ENGINES = {}  # db url -> engine
+
+
+def _session():
+    url = _get_db_url()
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+def record_touchpoints(rows: Iterable[Dict]) -> int:
+    """Append touchpoints: dicts with customer_id, channel and optional occurred_at.
+
+    Returns:
+        Number of rows written
+    """
+    now = time.time()
+    batch = [{
+        'customer_id': row['customer_id'],
+        'channel': row['channel'],
+        'occurred_at': row.get('occurred_at') or now,
+    } for row in rows]
+    if not batch:
+        return 0
+    session = _session()
+    try:
+        for start in range(0, len(batch), INSERT_BATCH_SIZE):
+            session.execute(insert(AttributionTouchpoint), batch[start:start + INSERT_BATCH_SIZE])
+        session.commit()
+        return len(batch)
+    finally:
+        session.close()
+
+
+def record_conversion(customer_id: str, value: float, order_id: Optional[str] = None,
+                      converted_at: Optional[float] = None):
+    """Append a conversion; it is credited to the customer's touches before it."""
+    session = _session()
+    try:
+        session.add(AttributionTouchpoint(
+            customer_id=customer_id, occurred_at=converted_at or time.time(),
+            conversion_value=value, order_id=order_id,
+        ))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _timestamp(value, default: float) -> float:
+    """Epoch seconds from a number or an ISO-8601 string (naive times are UTC)"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def record_journey(customer_id: str, touchpoints: Iterable[Dict], conversion_value: float,
+                   order_id: Optional[str] = None) -> int:
+    """Append a tracked journey: its touches (channel, optional timestamp) then the conversion.
+
+    The conversion is stamped no earlier than the last touch so the batch
+    credits it to all of them. Everything is written in one transaction.
+
+    Returns:
+        Number of touchpoints written
+    """
+    now = time.time()
+    batch = [{
+        'customer_id': customer_id,
+        'channel': touch['channel'],
+        'occurred_at': _timestamp(touch.get('timestamp', touch.get('occurred_at')), now),
+    } for touch in touchpoints]
+    converted_at = max([now] + [row['occurred_at'] for row in batch])
+    session = _session()
+    try:
+        if batch:
+            session.execute(insert(AttributionTouchpoint), batch)
+        session.add(AttributionTouchpoint(
+            customer_id=customer_id, occurred_at=converted_at,
+            conversion_value=conversion_value, order_id=order_id,
+        ))
+        session.commit()
+        return len(batch)
+    finally:
+        session.close()
+
+
+def build_path_trie(since: Optional[float] = None) -> Dict:
+    """Stream the touchpoint table into a PathTrie.
+
+    Returns:
+        {'trie', 'touchpoints', 'conversions'}
+    """
+    trie = PathTrie()
+    touchpoints = conversions = 0
+    table = AttributionTouchpoint.__table__
+    query = select(table.c.customer_id, table.c.channel, table.c.conversion_value)
+    if since is not None:
+        query = query.where(table.c.occurred_at >= since)
+    query = query.order_by(table.c.customer_id, table.c.occurred_at, table.c.id)
+    session = _session()
+    try:
+        # Core rows rather than ORM tuples: this loop sees every touchpoint
+        rows = session.connection().execution_options(
+            stream_results=True, yield_per=READ_BATCH_SIZE
+        ).execute(query)
+
+        customer, path = None, []
+        for customer_id, channel, value in rows:
+            if customer_id != customer:
+                if path:
+                    trie.add(path, converted=False)
+                customer, path = customer_id, []
+            if value is None:
+                path.append(channel)
+                touchpoints += 1
+            else:
+                trie.add(path, converted=True, value=value)
+                conversions += 1
+                path = []
+        if path:
+            trie.add(path, converted=False)
+    finally:
+        session.close()
+    return {'trie': trie, 'touchpoints': touchpoints, 'conversions': conversions}
+
+
+def compute_attribution(trie: PathTrie, shapley_samples: int = SHAPLEY_SAMPLES,
+                        seed: Optional[int] = None) -> Dict:
+    """All models over one trie: {model: {channel: attributed value}} plus Markov details"""
+    results = rule_based_attribution(trie)
+    markov = markov_attribution(trie)
+    results['markov'] = markov['attribution']
+    results['shapley'] = shapley_attribution(trie, samples=shapley_samples, seed=seed)
+    results['markov_removal_effects'] = markov['removal_effects']
+    results['markov_conversion_probability'] = markov['conversion_probability']
+    results['unattributed_value'] = sum(
+        value for channels, _, value, _ in trie.paths() if not channels
+    )  # conversions with no recorded touch
+    results['common_patterns'] = trie.most_common()
+    return results
+
+
+def run_attribution_batch(since: Optional[float] = None, shapley_samples: int = SHAPLEY_SAMPLES,
+                          seed: Optional[int] = None) -> Dict:
+    """Rebuild the path trie from the table, run every model and store the run.
+
+    Returns:
+        The stored run (see latest_attribution_run) with timings
+    """
+    started = time.time()
+    built = build_path_trie(since)
+    trie = built['trie']
+    loaded = time.time()
+    results = compute_attribution(trie, shapley_samples, seed)
+    distinct_paths = len(trie)
+
+    session = _session()
+    try:
+        run = AttributionRun(
+            created_at=time.time(), touchpoints=built['touchpoints'], conversions=built['conversions'],
+            distinct_paths=distinct_paths, results=json.dumps(results),
+        )
+        session.add(run)
+        session.commit()
+        run_id = run.id
+    finally:
+        session.close()
+
+    logger.info("Attribution batch: %d touchpoints, %d conversions, %d distinct paths in %.1fs",
+                built['touchpoints'], built['conversions'], distinct_paths, time.time() - started)
+    return {
+        'run_id': run_id,
+        'touchpoints': built['touchpoints'],
+        'conversions': built['conversions'],
+        'distinct_paths': distinct_paths,
+        'results': results,
+        'load_seconds': round(loaded - started, 3),
+        'model_seconds': round(time.time() - loaded, 3),
+    }
+
+
+def latest_attribution_run() -> Optional[Dict]:
+    """Most recent stored run, or None if the batch has never run"""
+    session = _session()
+    try:
+        run = session.query(AttributionRun).order_by(AttributionRun.id.desc()).first()
+        if run is None:
+            return None
+        return {
+            'run_id': run.id,
+            'created_at': run.created_at,
+            'touchpoints': run.touchpoints,
+            'conversions': run.conversions,
+            'distinct_paths': run.distinct_paths,
+            'results': json.loads(run.results or '{}'),
+        }
+    finally:
+        session.close()
@@ -2,14 +2,27 @@
 Advanced Attribution Modeling Engine (Feature #20)
 Multi-touch attribution across marketing channels with ROI optimization
 Supports first-touch, last-touch, linear, and time-decay models
+
+For history-sized data, paths are aggregated into a PathTrie (one node per
+distinct channel prefix, with conversion/null counts where paths end) and
+every model runs over the distinct paths rather than raw events:
+rule_based_attribution(), markov_attribution() (removal effect) and
+shapley_attribution() (sampled permutations). attribution_batch feeds the
+trie from the touchpoint table.
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from enum import Enum
+import heapq
 import json
 from collections import defaultdict
 
+import numpy as np
+
+SHAPLEY_SAMPLES = 2000  # random channel orderings per Shapley estimate
+MAX_SHAPLEY_CHANNELS = 62  # coalitions are bitmasks in int64
+
 
 class AttributionModel(Enum):
     FIRST_TOUCH = "first_touch"
@@ -31,6 +44,194 @@ class TouchpointType(Enum):
     PUSH_NOTIFICATION = "push_notification"
 
 
+class _PathNode:
+    __slots__ = ('children', 'conversions', 'value', 'nulls')
+
+    def __init__(self):
+        self.children = {}  # channel -> _PathNode
+        self.conversions = 0  # paths ending here that converted
+        self.value = 0.0  # their conversion value
+        self.nulls = 0  # paths ending here without converting
+
+
+class PathTrie:
+    """Channel paths compressed into a prefix trie with per-path counts
+
+    A million journeys over a few channels collapse to a few thousand distinct
+    paths, and shared prefixes are stored once. Models iterate paths() instead
+    of the raw events.
+    """
+
+    def __init__(self):
+        self.root = _PathNode()
+        self.total_paths = 0
+        self.total_touches = 0
+        self._paths = None  # paths() snapshot, dropped by add()
+
+    def add(self, channels: Sequence[str], converted: bool = True, value: float = 0.0, count: int = 1):
+        """Count `count` journeys along `channels`, converted (with value) or not"""
+        node = self.root
+        for channel in channels:
+            child = node.children.get(channel)
+            if child is None:
+                child = node.children[channel] = _PathNode()
+            node = child
+        if converted:
+            node.conversions += count
+            node.value += value
+        else:
+            node.nulls += count
+        self.total_paths += count
+        self.total_touches += len(channels) * count
+        self._paths = None
+
+    def paths(self) -> Iterator[Tuple[Tuple[str, ...], int, float, int]]:
+        """(channels, conversions, value, nulls) for every distinct path that ended somewhere"""
+        if self._paths is None:
+            paths = []
+            stack = [((), self.root)]
+            while stack:
+                prefix, node = stack.pop()
+                if node.conversions or node.nulls:
+                    paths.append((prefix, node.conversions, node.value, node.nulls))
+                for channel, child in node.children.items():
+                    stack.append((prefix + (channel,), child))
+            self._paths = paths
+        return iter(self._paths)
+
+    def most_common(self, top_n: int = 10) -> List[Tuple[str, int]]:
+        """Converting paths with the most conversions, as ("a → b", count)"""
+        best = heapq.nlargest(
+            top_n, ((conversions, channels) for channels, conversions, _, _ in self.paths() if conversions),
+            key=lambda item: item[0]
+        )
+        return [(" → ".join(channels), conversions) for conversions, channels in best]
+
+    def __len__(self) -> int:
+        if self._paths is None:
+            self.paths()
+        return len(self._paths)
+
+
+def rule_based_attribution(trie: PathTrie, decay_rate: float = 0.5) -> Dict[str, Dict[str, float]]:
+    """First/last touch, linear and time-decay revenue per channel from the trie
+
+    Same credit rules as ConversionAttributor, applied once per distinct path
+    to that path's total conversion value.
+    """
+    results = {model.value: defaultdict(float) for model in AttributionModel}
+    first = results[AttributionModel.FIRST_TOUCH.value]
+    last = results[AttributionModel.LAST_TOUCH.value]
+    linear = results[AttributionModel.LINEAR.value]
+    decay = results[AttributionModel.TIME_DECAY.value]
+    for channels, conversions, value, _ in trie.paths():
+        if not conversions or not channels:
+            continue
+        first[channels[0]] += value
+        last[channels[-1]] += value
+        share = value / len(channels)
+        weights = [decay_rate ** (len(channels) - i - 1) for i in range(len(channels))]
+        total_weight = sum(weights)
+        for channel, weight in zip(channels, weights):
+            linear[channel] += share
+            decay[channel] += value * weight / total_weight
+    return {model: dict(channels) for model, channels in results.items()}
+
+
+def markov_attribution(trie: PathTrie) -> Dict:
+    """First-order Markov chain attribution by removal effect
+
+    States are start, each channel, conversion and null. A channel's removal
+    effect is the share of conversion probability lost when its transitions
+    are redirected to null; conversion value is split in proportion to the
+    removal effects.
+    """
+    channels = sorted({c for path, _, _, _ in trie.paths() for c in path})
+    index = {channel: i + 1 for i, channel in enumerate(channels)}  # 0 is start
+    size = len(channels) + 1
+    transitions = np.zeros((size, size))
+    to_conversion = np.zeros(size)
+    outgoing = np.zeros(size)
+    total_value = 0.0
+    for path, conversions, value, nulls in trie.paths():
+        if not path:
+            continue
+        count = conversions + nulls
+        total_value += value
+        states = [0] + [index[c] for c in path]
+        for a, b in zip(states, states[1:]):
+            transitions[a, b] += count
+            outgoing[a] += count
+        to_conversion[states[-1]] += conversions
+        outgoing[states[-1]] += count
+    if not channels or not to_conversion.any():
+        return {'conversion_probability': 0.0, 'removal_effects': {}, 'attribution': {}}
+
+    scale = np.where(outgoing > 0, outgoing, 1.0)
+    q = transitions / scale[:, None]
+    r = to_conversion / scale
+
+    def conversion_probability(removed: Optional[int] = None) -> float:
+        q_r, r_r = q, r
+        if removed is not None:
+            q_r, r_r = q.copy(), r.copy()
+            q_r[removed, :] = 0.0
+            r_r[removed] = 0.0
+        return float(np.linalg.solve(np.eye(size) - q_r, r_r)[0])
+
+    base = conversion_probability()
+    effects = {c: max(1.0 - conversion_probability(index[c]) / base, 0.0) for c in channels}
+    total_effect = sum(effects.values())
+    return {
+        'conversion_probability': base,
+        'removal_effects': effects,
+        'attribution': {c: total_value * e / total_effect for c, e in effects.items()} if total_effect else {},
+    }
+
+
+def shapley_attribution(trie: PathTrie, samples: int = SHAPLEY_SAMPLES, seed: Optional[int] = None) -> Dict[str, float]:
+    """Shapley value of each channel, estimated from sampled channel orderings
+
+    The value of a coalition of channels is the conversion value of the paths
+    whose channels all belong to it. Each sampled ordering credits every
+    channel with its marginal contribution, so every sample (and therefore
+    the estimate) sums to the total value.
+    """
+    masks = defaultdict(float)  # channel-set bitmask -> conversion value
+    channels: Dict[str, int] = {}
+    for path, conversions, value, _ in trie.paths():
+        if not conversions or not path:
+            continue
+        mask = 0
+        for channel in path:
+            bit = channels.get(channel)
+            if bit is None:
+                bit = channels[channel] = len(channels)
+            mask |= 1 << bit
+        masks[mask] += value
+    k = len(channels)
+    if k == 0:
+        return {}
+    if k > MAX_SHAPLEY_CHANNELS:
+        raise ValueError(f"Shapley attribution supports up to {MAX_SHAPLEY_CHANNELS} channels, got {k}")
+
+    set_masks = np.fromiter(masks.keys(), dtype=np.int64, count=len(masks))
+    set_values = np.fromiter(masks.values(), dtype=float, count=len(masks))
+    rng = np.random.default_rng(seed)
+    orders = np.argsort(rng.random((samples, k)), axis=1)
+    coalitions = np.zeros((samples, k + 1), dtype=np.int64)
+    np.cumsum(np.left_shift(np.int64(1), orders), axis=1, out=coalitions[:, 1:])
+    unique, inverse = np.unique(coalitions, return_inverse=True)
+    worth = np.empty(len(unique))
+    for i, coalition in enumerate(unique):
+        worth[i] = set_values[(set_masks & ~coalition) == 0].sum()
+    worth = worth[inverse.reshape(coalitions.shape)]
+    credit = np.zeros(k)
+    np.add.at(credit, orders, worth[:, 1:] - worth[:, :-1])
+    credit /= samples
+    return {channel: float(credit[bit]) for channel, bit in channels.items()}
+
+
 class ConversionAttributor:
     """Attributes conversions to touchpoints using different models"""
 
@@ -275,8 +476,8 @@ class ConversionPathAnalyzer:
     """Analyzes customer conversion journeys and patterns"""
 
     def __init__(self):
-        self.all_paths = []
-        self.path_patterns = defaultdict(int)
+        self.pattern_trie = PathTrie()
+        self._stats = {'paths': 0, 'length': 0, 'unique': 0, 'hours': 0.0, 'min_length': None, 'max_length': 0}
 
     def analyze_path(self, path: List[Dict]) -> Dict:
         """Analyze a single conversion path"""
@@ -297,7 +498,7 @@ class ConversionPathAnalyzer:
         
         # Create path pattern string
         pattern = " → ".join(channels)
-        self.path_patterns[pattern] += 1
+        self.pattern_trie.add(channels)
         
         return {
             'channels': channels,
@@ -310,31 +511,35 @@ class ConversionPathAnalyzer:
     def add_conversion_path(self, path: List[Dict]) -> Dict:
         """Add and analyze a conversion path"""
         analysis = self.analyze_path(path)
-        self.all_paths.append(analysis)
+        stats = self._stats
+        stats['paths'] += 1
+        stats['length'] += analysis['path_length']
+        stats['unique'] += analysis['unique_channels']
+        stats['hours'] += analysis['average_hours_between_touches']
+        stats['max_length'] = max(stats['max_length'], analysis['path_length'])
+        if stats['min_length'] is None or analysis['path_length'] < stats['min_length']:
+            stats['min_length'] = analysis['path_length']
         return analysis
 
     def get_common_patterns(self, top_n: int = 10) -> List[Tuple[str, int]]:
         """Get most common conversion patterns"""
-        sorted_patterns = sorted(self.path_patterns.items(), key=lambda x: x[1], reverse=True)
-        return sorted_patterns[:top_n]
+        return self.pattern_trie.most_common(top_n)
 
     def get_path_statistics(self) -> Dict:
         """Get overall path statistics"""
-        if not self.all_paths:
+        stats = self._stats
+        if not stats['paths']:
             return {}
 
-        lengths = [p['path_length'] for p in self.all_paths]
-        unique_channels = [p['unique_channels'] for p in self.all_paths]
-        avg_times = [p['average_hours_between_touches'] for p in self.all_paths]
-
+        patterns = self.get_common_patterns(1)
         return {
-            'total_paths_analyzed': len(self.all_paths),
-            'avg_path_length': round(sum(lengths) / len(lengths), 2),
-            'max_path_length': max(lengths),
-            'min_path_length': min(lengths),
-            'avg_unique_channels': round(sum(unique_channels) / len(unique_channels), 2),
-            'avg_hours_between_touches': round(sum(avg_times) / len(avg_times), 2),
-            'most_common_pattern': self.get_common_patterns(1)[0][0] if self.path_patterns else None,
+            'total_paths_analyzed': stats['paths'],
+            'avg_path_length': round(stats['length'] / stats['paths'], 2),
+            'max_path_length': stats['max_length'],
+            'min_path_length': stats['min_length'],
+            'avg_unique_channels': round(stats['unique'] / stats['paths'], 2),
+            'avg_hours_between_touches': round(stats['hours'] / stats['paths'], 2),
+            'most_common_pattern': patterns[0][0] if patterns else None,
         }
 
 
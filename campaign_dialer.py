@@ -0,0 +1,696 @@
+"""Campaign execution engine for bulk AI calling.
+
+AICallingService.create_ai_campaign() only plans a campaign; this module
+works through its numbers.
+
+- Queue: every target number is a campaign_calls row (models.CampaignCall),
+  so a campaign survives restarts and can be stopped and resumed.
+- Ownership: a dialer holds a lease on its CallingCampaign row
+  (dialer_owner, dialer_lease_until) and renews it every DIALER_HEARTBEAT
+  seconds. Any app process can therefore answer start (409 while the lease
+  is live), stop (a 'stopping' status the owner picks up) and progress (the
+  owner's stored stats). Rows left 'dialing' are only requeued by the next
+  owner, once the old lease has been released or has expired.
+- Scheduling: one scheduler thread claims due rows in batches and hands
+  them to a worker pool, admitting a call only while its provider and the
+  destination country are under their concurrency caps and the pacing
+  (calls per second, per campaign and per provider) allows it.
+- Retries: busy / no-answer attempts are requeued with exponential backoff
+  until max_attempts; every attempt is kept as a CallRecord.
+- Writes: call records, queue updates and the CallingCampaign counters are
+  flushed together in batches rather than per call.
+
+Providers implement DialerProvider.dial(); SimulatedProvider stands in for
+a telephony API in tests and benchmarks.
+"""
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, or_, update
+
+from global_calling_system import CallCategory, CallStatus
+from models import get_engine, get_session, CallRecord, CallingCampaign, CampaignCall
+from utils import _get_db_url
+
+logger = logging.getLogger(__name__)
+
+DIALER_BATCH_SIZE = int(os.getenv('DIALER_BATCH_SIZE', '200'))  # rows claimed / results written per batch
+DIALER_MAX_ATTEMPTS = int(os.getenv('DIALER_MAX_ATTEMPTS', '3'))
+DIALER_RETRY_BACKOFF = float(os.getenv('DIALER_RETRY_BACKOFF', '300'))  # seconds before the 1st retry, doubled after
+DIALER_PROVIDER_LIMIT = int(os.getenv('DIALER_PROVIDER_LIMIT', '20'))  # concurrent calls per provider
+DIALER_COUNTRY_LIMIT = int(os.getenv('DIALER_COUNTRY_LIMIT', '50'))  # concurrent calls per destination country
+DIALER_FLUSH_INTERVAL = 1.0  # seconds; results are written at least this often
+DIALER_IDLE_POLL = 5.0  # seconds between checks while only future retries remain
+DIALER_LEASE_TTL = float(os.getenv('DIALER_LEASE_TTL', '30'))  # seconds a campaign stays owned without renewal
+DIALER_HEARTBEAT = 5.0  # seconds between lease renewals (and stored progress snapshots)
+
+RETRY_STATUSES = {CallStatus.BUSY, CallStatus.NO_ANSWER}
+SUCCESS_STATUSES = {CallStatus.COMPLETED, CallStatus.ANSWERED, CallStatus.VOICEMAIL}
+
+# Calling codes the country caps are keyed on; the longest match wins ('+971' before '+9...')
+COUNTRY_CODES = frozenset((
+    '+1', '+7', '+20', '+27', '+33', '+34', '+39', '+44', '+49', '+52', '+55', '+61', '+62', '+63',
+    '+65', '+81', '+82', '+86', '+91', '+92', '+234', '+254', '+880', '+966', '+971',
+))
+
+QueuedCall = namedtuple('QueuedCall', 'id to_number country_code attempts')
+
+_ENGINES = {}  # db url -> engine, shared by the dialers of one process
+_RUNNING: Dict[str, 'CampaignDialer'] = {}  # dialers started by this process (local fast path for stop/progress)
+_RUNNING_LOCK = threading.Lock()
+
+
+class CampaignBusyError(ValueError):
+    """Another dialer holds the campaign's lease."""
+
+
+def _session():
+    url = _get_db_url()
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+def country_code(number: str) -> str:
+    """Calling code of an E.164-style number, or 'other'."""
+    digits = '+' + ''.join(ch for ch in str(number) if ch.isdigit())
+    for length in (4, 3, 2):
+        if digits[:length] in COUNTRY_CODES:
+            return digits[:length]
+    return 'other'
+
+
+# ============================================================================
+# PROVIDERS
+# ============================================================================
+
+@dataclass
+class CallOutcome:
+    """Result of one dial attempt."""
+    status: CallStatus
+    duration_seconds: int = 0
+    cost_rupees: float = 0.0
+    provider_call_id: Optional[str] = None
+
+
+class DialerProvider(ABC):
+    """Telephony backend the dialer places calls through.
+
+    Subclasses set `name`, `max_concurrent` and optionally `calls_per_second`,
+    and implement dial(), which blocks until the call ends. dial() is called
+    from worker threads.
+    """
+    name = 'custom'
+    max_concurrent = DIALER_PROVIDER_LIMIT
+    calls_per_second: Optional[float] = None
+
+    @abstractmethod
+    def dial(self, to_number: str, script: str) -> CallOutcome:
+        """Place one call and return how it ended."""
+
+
+class SimulatedProvider(DialerProvider):
+    """Local stand-in for a telephony API: weighted random outcomes after a fixed latency."""
+
+    OUTCOMES = {
+        CallStatus.COMPLETED: 0.60,
+        CallStatus.NO_ANSWER: 0.20,
+        CallStatus.BUSY: 0.10,
+        CallStatus.VOICEMAIL: 0.05,
+        CallStatus.FAILED: 0.05,
+    }
+
+    def __init__(
+        self,
+        name: str = 'aws_connect',
+        max_concurrent: int = DIALER_PROVIDER_LIMIT,
+        latency: float = 0.0,
+        outcomes: Optional[Dict[CallStatus, float]] = None,
+        calls_per_second: Optional[float] = None,
+        rate_per_minute: float = 2.0,
+        seed: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.latency = latency
+        self.calls_per_second = calls_per_second
+        self.rate_per_minute = rate_per_minute
+        outcomes = outcomes or self.OUTCOMES
+        self._statuses, self._weights = list(outcomes), list(outcomes.values())
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.active = 0
+        self.peak_active = 0
+
+    def dial(self, to_number: str, script: str) -> CallOutcome:
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            status = self._rng.choices(self._statuses, self._weights)[0]
+            duration = self._rng.randint(20, 180) if status in SUCCESS_STATUSES else 0
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            with self._lock:
+                self.active -= 1
+        return CallOutcome(
+            status=status,
+            duration_seconds=duration,
+            cost_rupees=round(duration / 60 * self.rate_per_minute, 2),
+            provider_call_id=f"sim_{uuid.uuid4().hex[:12]}",
+        )
+
+
+def default_providers() -> List[DialerProvider]:
+    """Providers named in CALLING_PROVIDERS (comma separated), simulated until a live adapter is registered."""
+    names = [n.strip() for n in os.getenv('CALLING_PROVIDERS', 'aws_connect').split(',') if n.strip()]
+    return [SimulatedProvider(name) for name in names]
+
+
+# ============================================================================
+# QUEUE
+# ============================================================================
+
+def enqueue_campaign(campaign_id: str, numbers: Iterable[str]) -> int:
+    """Add target numbers to a campaign's dial queue, skipping duplicates.
+
+    Returns:
+        Number of rows queued
+    """
+    session = _session()
+    try:
+        seen = {n for (n,) in session.query(CampaignCall.to_number).filter(
+            CampaignCall.campaign_id == campaign_id)}
+        now = time.time()
+        rows = []
+        for number in numbers:
+            number = str(number).strip()
+            if not number or number in seen:
+                continue
+            seen.add(number)
+            rows.append({
+                'campaign_id': campaign_id, 'to_number': number, 'country_code': country_code(number),
+                'status': 'queued', 'attempts': 0, 'next_attempt_at': 0.0, 'updated_at': now,
+            })
+        for start in range(0, len(rows), 1000):
+            session.execute(insert(CampaignCall), rows[start:start + 1000])
+        session.commit()
+        return len(rows)
+    finally:
+        session.close()
+
+
+def campaign_progress(campaign_id: str) -> Optional[Dict]:
+    """Stored counters and queue breakdown of a campaign, plus live stats if it is running.
+
+    Live stats come from the dialer itself when it runs in this process,
+    else from the snapshot its owner stores with every lease renewal.
+    """
+    session = _session()
+    try:
+        campaign = session.get(CallingCampaign, campaign_id)
+        if campaign is None:
+            return None
+        queue = dict(session.query(CampaignCall.status, func.count()).filter(
+            CampaignCall.campaign_id == campaign_id).group_by(CampaignCall.status).all())
+        progress = {
+            'campaign_id': campaign_id,
+            'status': campaign.status,
+            'total_numbers': campaign.total_numbers,
+            'completed_calls': campaign.completed_calls or 0,
+            'successful_calls': campaign.successful_calls or 0,
+            'failed_calls': campaign.failed_calls or 0,
+            'total_cost_rupees': round(campaign.total_cost_rupees or 0.0, 2),
+            'queue': {status: queue.get(status, 0) for status in ('queued', 'dialing', 'done', 'failed')},
+        }
+        leased = campaign.dialer_owner is not None and (campaign.dialer_lease_until or 0) >= time.time()
+        stored_live = json.loads(campaign.dialer_stats) if leased and campaign.dialer_stats else None
+    finally:
+        session.close()
+    dialer = _RUNNING.get(campaign_id)
+    if dialer is not None:
+        progress['live'] = dialer.progress()
+    elif stored_live is not None:
+        progress['live'] = stored_live
+    return progress
+
+
+# ============================================================================
+# DIALER
+# ============================================================================
+
+class CampaignDialer:
+    """Works through one campaign's queue until every number is done or failed, or stop() is called."""
+
+    def __init__(
+        self,
+        campaign_id: str,
+        providers: Optional[List[DialerProvider]] = None,
+        country_limits: Optional[Dict[str, int]] = None,
+        default_country_limit: int = DIALER_COUNTRY_LIMIT,
+        calls_per_second: Optional[float] = None,
+        max_attempts: int = DIALER_MAX_ATTEMPTS,
+        retry_backoff: float = DIALER_RETRY_BACKOFF,
+        batch_size: int = DIALER_BATCH_SIZE,
+        script: Optional[str] = None,
+        from_number: str = '+1-AI-CALLER',
+    ):
+        self.campaign_id = campaign_id
+        self.providers = list(providers or default_providers())
+        if not self.providers:
+            raise ValueError("At least one provider is required")
+        # A cap of 0 would leave its numbers blocked forever with nothing in flight
+        self.country_limits = {code: int(limit) for code, limit in (country_limits or {}).items()}
+        self.default_country_limit = int(default_country_limit)
+        if self.default_country_limit < 1 or any(limit < 1 for limit in self.country_limits.values()):
+            raise ValueError("Country limits must be at least 1")
+        self.interval = 1.0 / calls_per_second if calls_per_second else 0.0
+        self.max_attempts = max(int(max_attempts), 1)
+        self.retry_backoff = retry_backoff
+        self.batch_size = max(int(batch_size), 1)
+        self.script = script
+        self.from_number = from_number
+        self.owner = uuid.uuid4().hex  # lease token
+        self._leased = False
+        self._lease_lost = False
+
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._provider_load = {p.name: 0 for p in self.providers}
+        self._country_load = defaultdict(int)
+        self._next_slot = defaultdict(float)  # '' = campaign pacing, else provider name -> monotonic time
+        self._results = []  # finished attempts not yet picked up by the scheduler
+        self._buffer = []  # picked up, not yet written
+        self._flush_retry_at = 0.0  # monotonic; no periodic flush before this after a failed write
+        self.stats = {'dialed': 0, 'succeeded': 0, 'failed': 0, 'retried': 0, 'in_flight': 0,
+                      'cost_rupees': 0.0, 'started_at': None}
+
+    # -- control ---------------------------------------------------------------
+
+    def stop(self):
+        """Ask run() to return after the calls in flight; unstarted numbers stay queued."""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def progress(self) -> Dict:
+        with self._cond:
+            stats = dict(self.stats)
+            stats['provider_load'] = dict(self._provider_load)
+            stats['country_load'] = {c: n for c, n in self._country_load.items() if n}
+        elapsed = time.time() - stats['started_at'] if stats['started_at'] else 0
+        stats['calls_per_second'] = round(stats['dialed'] / elapsed, 2) if elapsed else 0.0
+        stats['cost_rupees'] = round(stats['cost_rupees'], 2)
+        return stats
+
+    def acquire(self):
+        """Take the campaign's lease (run() does this itself if needed).
+
+        Raises:
+            ValueError: If the campaign does not exist
+            CampaignBusyError: If another dialer holds the lease
+        """
+        if not self._leased:
+            self._start()
+
+    def run(self) -> Dict:
+        """Dial until the queue is drained (waiting out pending retries) or stop() is called.
+
+        Returns:
+            Final progress stats
+        """
+        self.acquire()
+        pending = deque()
+        last_flush = last_renewal = time.monotonic()
+        workers = sum(max(p.max_concurrent, 1) for p in self.providers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dialer') as pool:
+                while True:
+                    stopping = self._stop.is_set()
+                    wait = None
+                    if not stopping:
+                        if not pending:
+                            pending.extend(self._claim())
+                        wait = self._dispatch(pool, pending) if pending else None
+
+                    with self._cond:
+                        if not self._results and (self.stats['in_flight'] or (wait is not None and not stopping)):
+                            # Capped so the lease is renewed while long calls are in flight
+                            self._cond.wait(min(wait if wait is not None else DIALER_FLUSH_INTERVAL, DIALER_HEARTBEAT))
+                        done, self._results = self._results, []
+                        in_flight = self.stats['in_flight']
+                    self._buffer.extend(done)
+
+                    if len(self._buffer) >= self.batch_size or time.monotonic() - last_flush >= DIALER_FLUSH_INTERVAL:
+                        self._flush()
+                        last_flush = time.monotonic()
+                    if time.monotonic() - last_renewal >= DIALER_HEARTBEAT:
+                        self._heartbeat()
+                        last_renewal = time.monotonic()
+                    if stopping:
+                        if not in_flight:
+                            break
+                        continue  # keep the lease until the calls in flight have ended
+                    if not pending and not in_flight and not done:
+                        if not self._flush():
+                            self._stop.wait(DIALER_FLUSH_INTERVAL)
+                            continue  # hold the results until they are written
+                        delay = self._next_due()
+                        if delay is None:
+                            break  # every number is done or failed
+                        self._stop.wait(min(delay, DIALER_IDLE_POLL))
+            # The pool has drained; record what finished while shutting down
+            self._buffer.extend(self._results)
+            self._results = []
+            self._flush(final=True)
+        finally:
+            self._finish([row.id for row in pending])
+        return self.progress()
+
+    # -- scheduling ------------------------------------------------------------
+
+    def _dispatch(self, pool, pending) -> Optional[float]:
+        """Start every pending call that fits under the caps.
+
+        Returns:
+            Seconds until pacing admits the next call, or None if the
+            scheduler should wait for a call to finish instead
+        """
+        blocked = []
+        wait = None
+        with self._cond:
+            while pending:
+                now = time.monotonic()
+                if self.interval and self._next_slot[''] > now:
+                    wait = self._next_slot[''] - now
+                    break
+                row = pending[0]
+                limit = self.country_limits.get(row.country_code, self.default_country_limit)
+                if self._country_load[row.country_code] >= limit:
+                    blocked.append(pending.popleft())  # later numbers may go to other countries
+                    continue
+                provider, wait = self._pick_provider(now)
+                if provider is None:
+                    break
+                pending.popleft()
+                if self.interval:
+                    self._next_slot[''] = max(self._next_slot[''], now) + self.interval
+                if provider.calls_per_second:
+                    self._next_slot[provider.name] = max(self._next_slot[provider.name], now) + 1.0 / provider.calls_per_second
+                self._provider_load[provider.name] += 1
+                self._country_load[row.country_code] += 1
+                self.stats['in_flight'] += 1
+                pool.submit(self._call, provider, row)
+        pending.extendleft(reversed(blocked))
+        return wait
+
+    def _pick_provider(self, now: float):
+        """Least loaded provider with a free slot, else (None, seconds until one is paced in)."""
+        best, wait = None, None
+        for provider in self.providers:
+            load = self._provider_load[provider.name]
+            if load >= provider.max_concurrent:
+                continue
+            slot = self._next_slot[provider.name]
+            if slot > now:
+                wait = slot - now if wait is None else min(wait, slot - now)
+                continue
+            if best is None or load / provider.max_concurrent < self._provider_load[best.name] / best.max_concurrent:
+                best = provider
+        return (best, None) if best is not None else (None, wait)
+
+    def _call(self, provider: DialerProvider, row: QueuedCall):
+        started = time.time()
+        try:
+            outcome = provider.dial(row.to_number, self.script or '')
+        except Exception as e:
+            logger.warning(f"Dial via {provider.name} to {row.to_number} failed: {e}")
+            outcome = CallOutcome(status=CallStatus.FAILED)
+        with self._cond:
+            self._provider_load[provider.name] -= 1
+            self._country_load[row.country_code] -= 1
+            self.stats['in_flight'] -= 1
+            self._results.append((row, provider.name, outcome, started, time.time()))
+            self._cond.notify()
+
+    # -- persistence -----------------------------------------------------------
+
+    def _start(self):
+        """Take the lease, then requeue rows a previous owner left 'dialing'."""
+        now = time.time()
+        session = _session()
+        try:
+            campaign = session.get(CallingCampaign, self.campaign_id)
+            if campaign is None:
+                raise ValueError(f"Campaign not found: {self.campaign_id}")
+            if self.script is None:
+                self.script = campaign.script_template or ''
+            taken = session.query(CallingCampaign).filter(
+                CallingCampaign.id == self.campaign_id,
+                or_(CallingCampaign.dialer_owner.is_(None), CallingCampaign.dialer_lease_until < now),
+            ).update({
+                'dialer_owner': self.owner, 'dialer_lease_until': now + DIALER_LEASE_TTL, 'dialer_stats': None,
+                'status': 'running', 'started_at': func.coalesce(CallingCampaign.started_at, now),
+            }, synchronize_session=False)
+            if not taken:
+                session.rollback()
+                raise CampaignBusyError(f"Campaign already running: {self.campaign_id}")
+            # Owners release the lease only once their calls have ended, so these
+            # rows belong to a dialer whose lease expired (it died mid-batch)
+            session.query(CampaignCall).filter(
+                CampaignCall.campaign_id == self.campaign_id, CampaignCall.status == 'dialing'
+            ).update({'status': 'queued', 'updated_at': now}, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+        self._leased = True
+        self.stats['started_at'] = now
+
+    def _heartbeat(self):
+        """Renew the lease and store a progress snapshot for the other processes.
+
+        Stops the dialer when a stop was requested through the campaign row,
+        or when the lease expired and another dialer took the campaign over.
+        """
+        session = _session()
+        try:
+            renewed = session.query(CallingCampaign).filter(
+                CallingCampaign.id == self.campaign_id, CallingCampaign.dialer_owner == self.owner,
+            ).update({'dialer_lease_until': time.time() + DIALER_LEASE_TTL,
+                      'dialer_stats': json.dumps(self.progress())}, synchronize_session=False)
+            status = session.query(CallingCampaign.status).filter(
+                CallingCampaign.id == self.campaign_id).scalar()
+            session.commit()
+        finally:
+            session.close()
+        if not renewed:
+            logger.warning(f"Campaign {self.campaign_id}: dialer lease lost, stopping")
+            self._lease_lost = True
+        if not renewed or status == 'stopping':
+            self.stop()
+
+    def _claim(self) -> List[QueuedCall]:
+        """Move due rows to 'dialing'; only rows still queued at the UPDATE are returned."""
+        now = time.time()
+        session = _session()
+        try:
+            rows = session.query(
+                CampaignCall.id, CampaignCall.to_number, CampaignCall.country_code, CampaignCall.attempts
+            ).filter(
+                CampaignCall.campaign_id == self.campaign_id,
+                CampaignCall.status == 'queued',
+                CampaignCall.next_attempt_at <= now,
+            ).order_by(CampaignCall.next_attempt_at, CampaignCall.id).limit(self.batch_size).all()
+            if not rows:
+                return []
+            claimed = set(session.execute(
+                update(CampaignCall).where(
+                    CampaignCall.id.in_([r.id for r in rows]), CampaignCall.status == 'queued'
+                ).values(status='dialing', updated_at=now).returning(CampaignCall.id),
+                execution_options={'synchronize_session': False},
+            ).scalars())
+            session.commit()
+            return [QueuedCall(r.id, r.to_number, r.country_code, r.attempts or 0) for r in rows if r.id in claimed]
+        finally:
+            session.close()
+
+    def _next_due(self) -> Optional[float]:
+        """Seconds until the earliest queued retry is due, or None if nothing is queued."""
+        session = _session()
+        try:
+            due = session.query(func.min(CampaignCall.next_attempt_at)).filter(
+                CampaignCall.campaign_id == self.campaign_id, CampaignCall.status == 'queued').scalar()
+        finally:
+            session.close()
+        return None if due is None else max(due - time.time(), 0.0)
+
+    def _flush(self, final: bool = False) -> bool:
+        """Write buffered attempts: call records, queue rows and campaign counters in one transaction.
+
+        The attempts leave the buffer only once the transaction commits. A
+        failed write is logged and retried after DIALER_FLUSH_INTERVAL, so the
+        rows are never left 'dialing' for lease recovery to dial again; with
+        final=True the error is raised instead.
+        """
+        if not self._buffer:
+            return True
+        if not final and time.monotonic() < self._flush_retry_at:
+            return False
+        batch = list(self._buffer)
+        now = time.time()
+        records, updates = [], []
+        finished = succeeded = failed = retried = 0
+        cost = 0.0
+        for row, provider, outcome, started, ended in batch:
+            attempt = row.attempts + 1
+            records.append({
+                'id': str(uuid.uuid4()),
+                'call_id': f"{self.campaign_id}_{row.id}_{attempt}",
+                'category': CallCategory.AI_AUTOMATED.value,
+                'provider': provider,
+                'from_number': self.from_number,
+                'to_number': row.to_number,
+                'status': outcome.status.value,
+                'duration_seconds': outcome.duration_seconds,
+                'cost_rupees': outcome.cost_rupees,
+                'started_at': started,
+                'ended_at': ended,
+                'call_metadata': json.dumps({'campaign_id': self.campaign_id, 'attempt': attempt,
+                                             'provider_call_id': outcome.provider_call_id}),
+                'created_at': now,
+            })
+            cost += outcome.cost_rupees
+            if outcome.status in RETRY_STATUSES and attempt < self.max_attempts:
+                status, next_attempt_at = 'queued', now + self.retry_backoff * 2 ** (attempt - 1)
+                retried += 1
+            else:
+                status, next_attempt_at = ('done' if outcome.status in SUCCESS_STATUSES else 'failed'), now
+                finished += 1
+                if status == 'done':
+                    succeeded += 1
+                else:
+                    failed += 1
+            updates.append({'id': row.id, 'status': status, 'attempts': attempt, 'last_status': outcome.status.value,
+                            'provider': provider, 'next_attempt_at': next_attempt_at, 'updated_at': now})
+
+        session = _session()
+        try:
+            session.execute(insert(CallRecord), records)
+            session.execute(update(CampaignCall), updates)
+            session.query(CallingCampaign).filter(CallingCampaign.id == self.campaign_id).update({
+                CallingCampaign.completed_calls: func.coalesce(CallingCampaign.completed_calls, 0) + finished,
+                CallingCampaign.successful_calls: func.coalesce(CallingCampaign.successful_calls, 0) + succeeded,
+                CallingCampaign.failed_calls: func.coalesce(CallingCampaign.failed_calls, 0) + failed,
+                CallingCampaign.total_cost_rupees: func.coalesce(CallingCampaign.total_cost_rupees, 0.0) + cost,
+            }, synchronize_session=False)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            self._flush_retry_at = time.monotonic() + DIALER_FLUSH_INTERVAL
+            if final:
+                raise
+            logger.error(f"Campaign {self.campaign_id}: writing {len(batch)} call results failed, will retry: {e}")
+            return False
+        finally:
+            session.close()
+        del self._buffer[:len(batch)]
+
+        with self._cond:
+            self.stats['dialed'] += len(batch)
+            self.stats['succeeded'] += succeeded
+            self.stats['failed'] += failed
+            self.stats['retried'] += retried
+            self.stats['cost_rupees'] += cost
+        return True
+
+    def _finish(self, unstarted: List[int]):
+        """Requeue unstarted rows, set the final status and release the lease."""
+        if self._lease_lost or not self._leased:
+            return  # the campaign and its rows belong to the new owner
+        now = time.time()
+        session = _session()
+        try:
+            if unstarted:
+                session.query(CampaignCall).filter(CampaignCall.id.in_(unstarted)).update(
+                    {'status': 'queued', 'updated_at': now}, synchronize_session=False)
+            drained = not session.query(CampaignCall.id).filter(
+                CampaignCall.campaign_id == self.campaign_id,
+                CampaignCall.status.in_(('queued', 'dialing')),
+            ).first()
+            values = {'status': 'completed', 'completed_at': now} if drained else {'status': 'paused'}
+            values.update(dialer_owner=None, dialer_lease_until=None, dialer_stats=None)
+            session.query(CallingCampaign).filter(
+                CallingCampaign.id == self.campaign_id, CallingCampaign.dialer_owner == self.owner
+            ).update(values, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+        self._leased = False
+
+
+# ============================================================================
+# BACKGROUND RUNS
+# ============================================================================
+
+def start_campaign(campaign_id: str, **options) -> 'CampaignDialer':
+    """Take the campaign's lease and run its dialer on a background thread.
+
+    Raises:
+        CampaignBusyError: If a dialer in any process holds the campaign
+        ValueError: If the campaign does not exist or an option is invalid
+    """
+    dialer = CampaignDialer(campaign_id, **options)
+    dialer.acquire()
+    with _RUNNING_LOCK:
+        _RUNNING[campaign_id] = dialer
+
+    def target():
+        try:
+            dialer.run()
+        except Exception as e:
+            logger.exception(f"Campaign {campaign_id} dialer error: {e}")
+        finally:
+            with _RUNNING_LOCK:
+                if _RUNNING.get(campaign_id) is dialer:
+                    del _RUNNING[campaign_id]
+
+    threading.Thread(target=target, name=f"dialer-{campaign_id}", daemon=True).start()
+    return dialer
+
+
+def stop_campaign(campaign_id: str) -> bool:
+    """Stop a running campaign after its in-flight calls, whichever process runs it.
+
+    The campaign row is set to 'stopping'; its owner sees that on its next
+    lease renewal, then releases the lease once its calls have ended.
+
+    Returns:
+        False if no dialer holds the campaign
+    """
+    session = _session()
+    try:
+        requested = session.query(CallingCampaign).filter(
+            CallingCampaign.id == campaign_id, CallingCampaign.dialer_owner.isnot(None),
+            CallingCampaign.dialer_lease_until >= time.time(),
+        ).update({'status': 'stopping'}, synchronize_session=False)
+        session.commit()
+    finally:
+        session.close()
+    dialer = _RUNNING.get(campaign_id)
+    if dialer is not None:
+        dialer.stop()
+    return bool(requested)
@@ -1,5 +1,5 @@
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from models import get_engine, get_session, Order, Customer
 from utils import _get_db_url
 
@@ -25,6 +25,11 @@ def compute_churn_risk(receipt: str) -> Dict:
     orders = session.query(Order).filter_by(receipt=receipt).filter_by(status='paid').order_by(Order.paid_at).all()
     session.close()
     
+    return _risk_from_orders(receipt, orders)
+
+
+def _risk_from_orders(receipt: str, orders: List[Order]) -> Dict:
+    """Score one customer from their paid orders, sorted by paid_at."""
     if not orders:
         return {
             'receipt': receipt,
@@ -136,13 +141,26 @@ def get_at_risk_customers(min_risk: int = 50, limit: int = 50) -> List[Dict]:
     return at_risk[:limit]
 
 
-def churn_stats() -> Dict:
-    """Aggregate churn statistics across all customers."""
-    engine = get_engine(_get_db_url())
-    session = get_session(engine)
-    
-    receipts = [r[0] for r in session.query(Order.receipt).distinct().all()]
-    session.close()
+def churn_stats(orders: Optional[List[Order]] = None) -> Dict:
+    """Aggregate churn statistics across all customers.
+
+    Pass `orders` (every order, already loaded) to score all customers from
+    memory instead of issuing one query per customer.
+    """
+    paid_by_receipt = None
+    if orders is None:
+        engine = get_engine(_get_db_url())
+        session = get_session(engine)
+        
+        receipts = [r[0] for r in session.query(Order.receipt).distinct().all()]
+        session.close()
+    else:
+        paid_by_receipt = {}
+        for o in orders:
+            group = paid_by_receipt.setdefault(o.receipt, [])
+            if o.status == 'paid':
+                group.append(o)
+        receipts = list(paid_by_receipt)
     
     if not receipts:
         return {
@@ -159,7 +177,12 @@ def churn_stats() -> Dict:
     total_risk = 0
     
     for receipt in receipts:
-        risk_data = compute_churn_risk(receipt)
+        if paid_by_receipt is None:
+            risk_data = compute_churn_risk(receipt)
+        else:
+            # Same ordering as ORDER BY paid_at in SQLite (NULLs first)
+            paid = sorted(paid_by_receipt[receipt], key=lambda o: (o.paid_at is not None, o.paid_at or 0))
+            risk_data = _risk_from_orders(receipt, paid)
         risk_levels[risk_data['risk_level']] += 1
         total_risk += risk_data['risk_score']
     
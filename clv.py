@@ -9,7 +9,7 @@ Deterministic and offline-friendly.
 """
 import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from models import get_session, Order, Customer
 
@@ -32,53 +32,77 @@ def compute_customer_clv(receipt: str) -> Dict:
     try:
         customer = session.query(Customer).filter(Customer.receipt == receipt).first()
         orders = session.query(Order).filter(Order.receipt == receipt).all()
-        base_paise = sum(o.amount or 0 for o in orders)
-        base_rupees = _rupees(base_paise)
-        order_count = len(orders)
-        repeat_factor = min(0.5, max(0, order_count - 1) * 0.1)
-        future_value = base_rupees * repeat_factor
-        discount = 0.9
-        clv_value = round(base_rupees + future_value * discount, 2)
-        confidence = round(0.6 + min(0.35, order_count * 0.05), 2)
-        return {
-            "receipt": receipt,
-            "orders": order_count,
-            "base_rupees": round(base_rupees, 2),
-            "future_rupees": round(future_value * discount, 2),
-            "clv_rupees": clv_value,
-            "confidence": confidence,
-            "segment": getattr(customer, 'segment', None) if customer else None,
-        }
+        return _clv_from_orders(receipt, orders, customer)
     finally:
         session.close()
 
 
-def compute_all_clv(limit: int = 50) -> List[Dict]:
-    """Compute CLV for all customers and return top by CLV value."""
-    session = get_session()
-    try:
-        receipts = [c.receipt for c in session.query(Customer).all()]
-    finally:
-        session.close()
-    results = [compute_customer_clv(r) for r in receipts]
+def _clv_from_orders(receipt: str, orders: List[Order], customer: Optional[Customer]) -> Dict:
+    """CLV model of compute_customer_clv over already-loaded rows."""
+    base_paise = sum(o.amount or 0 for o in orders)
+    base_rupees = _rupees(base_paise)
+    order_count = len(orders)
+    repeat_factor = min(0.5, max(0, order_count - 1) * 0.1)
+    future_value = base_rupees * repeat_factor
+    discount = 0.9
+    clv_value = round(base_rupees + future_value * discount, 2)
+    confidence = round(0.6 + min(0.35, order_count * 0.05), 2)
+    return {
+        "receipt": receipt,
+        "orders": order_count,
+        "base_rupees": round(base_rupees, 2),
+        "future_rupees": round(future_value * discount, 2),
+        "clv_rupees": clv_value,
+        "confidence": confidence,
+        "segment": getattr(customer, 'segment', None) if customer else None,
+    }
+
+
+def compute_all_clv(limit: Optional[int] = 50, orders: Optional[List[Order]] = None,
+                    customers: Optional[List[Customer]] = None) -> List[Dict]:
+    """Compute CLV for all customers and return top by CLV value (all of them for limit=None).
+
+    With `orders` and `customers` already loaded, every customer is scored from
+    memory instead of two queries per customer.
+    """
+    if orders is None or customers is None:
+        session = get_session()
+        try:
+            receipts = [c.receipt for c in session.query(Customer).all()]
+        finally:
+            session.close()
+        results = [compute_customer_clv(r) for r in receipts]
+    else:
+        by_receipt: Dict[str, List[Order]] = {}
+        for o in orders:
+            by_receipt.setdefault(o.receipt, []).append(o)
+        first = {}
+        for c in customers:
+            first.setdefault(c.receipt, c)
+        results = [_clv_from_orders(c.receipt, by_receipt.get(c.receipt, []), first[c.receipt]) for c in customers]
     results.sort(key=lambda x: x["clv_rupees"], reverse=True)
     return results[:limit]
 
 
-def clv_stats() -> Dict:
-    """Aggregate stats for CLV distribution."""
-    session = get_session()
-    try:
-        customers = session.query(Customer).count()
-        orders = session.query(Order).count()
-    finally:
-        session.close()
-    top = compute_all_clv(limit=10)
-    avg_clv = round(sum(x["clv_rupees"] for x in top) / max(len(top), 1), 2)
+def clv_stats(orders: Optional[List[Order]] = None, customers: Optional[List[Customer]] = None) -> Dict:
+    """Aggregate stats for CLV distribution (from preloaded rows when given)."""
+    if orders is None or customers is None:
+        session = get_session()
+        try:
+            customer_count = session.query(Customer).count()
+            order_count = session.query(Order).count()
+        finally:
+            session.close()
+        scored = compute_all_clv(limit=None)
+    else:
+        customer_count, order_count = len(customers), len(orders)
+        scored = compute_all_clv(limit=None, orders=orders, customers=customers)
+    top = scored[:10]
     return {
-        "customers": customers,
-        "orders": orders,
-        "avg_clv_top10": avg_clv,
+        "customers": customer_count,
+        "orders": order_count,
+        "avg_clv": round(sum(x["clv_rupees"] for x in scored) / max(len(scored), 1), 2),
+        "avg_clv_top10": round(sum(x["clv_rupees"] for x in top) / max(len(top), 1), 2),
         "top": top,
         "generated_at": datetime.now().isoformat(),
     }
@@ -1,10 +1,24 @@
-"""Customer segmentation and lifetime value (LTV) calculations."""
+"""Customer segmentation and lifetime value (LTV) calculations.
+
+Segment listings and summaries read the materialized customer_features table
+(models.CustomerFeature): it is refreshed per customer after their order
+changes commit, rebuilt from one aggregate query by rebuild_customer_features(),
+and re-segmented lazily once rows are older than SEGMENT_REFRESH_SECONDS.
+"""
+import logging
+import os
 import time
 from datetime import datetime, timedelta
-from models import get_session, Order, Customer
-from sqlalchemy import func, and_
+from models import get_session, Order, Customer, CustomerFeature
+from sqlalchemy import func, and_, delete, insert, select
 from enum import Enum
 
+logger = logging.getLogger(__name__)
+
+# Segments depend on "days since purchase", so rows are re-classified after this long
+SEGMENT_REFRESH_SECONDS = int(os.getenv('SEGMENT_REFRESH_SECONDS', '3600'))
+_IN_CHUNK = 500  # receipts per IN (...) clause
+
 
 class CustomerSegment(Enum):
     """Customer segment classifications."""
@@ -57,30 +71,12 @@ def get_customer_ltv(receipt):
         session.close()
 
 
-def get_customer_segment(receipt):
-    """Classify customer into segment based on behavior.
+def classify_segment(order_count, ltv, days_since, customer_age):
+    """Segment rules shared by get_customer_segment and the feature table.
     
-    Args:
-        receipt: Customer receipt/identifier
-        
     Returns:
-        dict with segment, reason, ltv_data
+        (CustomerSegment, reason)
     """
-    ltv_data = get_customer_ltv(receipt)
-    
-    if not ltv_data:
-        return {
-            'receipt': receipt,
-            'segment': CustomerSegment.NEW.value,
-            'reason': 'No paid orders found',
-            'ltv_data': None
-        }
-    
-    order_count = ltv_data['order_count']
-    days_since = ltv_data['days_since_purchase']
-    customer_age = ltv_data['customer_age_days']
-    ltv = ltv_data['ltv_paise']
-    
     # VIP: High LTV (₹50k+) AND multiple purchases (3+) AND recent activity
     if ltv >= 5000000 and order_count >= 3 and days_since <= 60:
         segment = CustomerSegment.VIP
@@ -121,6 +117,33 @@ def get_customer_segment(receipt):
         segment = CustomerSegment.ONE_TIME
         reason = f"Single purchase {days_since} days ago"
     
+    return segment, reason
+
+
+def get_customer_segment(receipt):
+    """Classify customer into segment based on behavior.
+    
+    Args:
+        receipt: Customer receipt/identifier
+        
+    Returns:
+        dict with segment, reason, ltv_data
+    """
+    ltv_data = get_customer_ltv(receipt)
+    
+    if not ltv_data:
+        return {
+            'receipt': receipt,
+            'segment': CustomerSegment.NEW.value,
+            'reason': 'No paid orders found',
+            'ltv_data': None
+        }
+    
+    segment, reason = classify_segment(
+        ltv_data['order_count'], ltv_data['ltv_paise'],
+        ltv_data['days_since_purchase'], ltv_data['customer_age_days']
+    )
+    
     return {
         'receipt': receipt,
         'segment': segment.value,
@@ -129,6 +152,149 @@ def get_customer_segment(receipt):
     }
 
 
+def _feature_query(receipts=None):
+    """One aggregate row per customer over their paid orders."""
+    stmt = select(
+        Order.receipt,
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.amount), 0),
+        func.min(Order.created_at),
+        func.max(Order.created_at),
+    ).where(and_(Order.status == 'paid', Order.receipt.isnot(None))).group_by(Order.receipt)
+    if receipts is not None:
+        stmt = stmt.where(Order.receipt.in_(receipts))
+    return stmt
+
+
+def _feature_row(receipt, order_count, revenue, first_purchase, last_purchase, now):
+    first_purchase = now if first_purchase is None else first_purchase
+    last_purchase = now if last_purchase is None else last_purchase
+    days_since = int((now - last_purchase) / 86400)
+    segment, _ = classify_segment(order_count, revenue, days_since, int((now - first_purchase) / 86400))
+    return {
+        'receipt': receipt,
+        'order_count': order_count,
+        'paid_revenue_paise': int(revenue),
+        'first_purchase_at': first_purchase,
+        'last_purchase_at': last_purchase,
+        'avg_order_value_paise': int(revenue / order_count),
+        'days_since_purchase': days_since,
+        'segment': segment.value,
+        'segmented_at': now,
+    }
+
+
+def _feature_table_empty(connection):
+    CustomerFeature.__table__.create(connection, checkfirst=True)
+    return connection.execute(select(CustomerFeature.receipt).limit(1)).first() is None
+
+
+def rebuild_customer_features(connection=None):
+    """Batch job: recompute the whole customer_features table from one aggregate query.
+    
+    Args:
+        connection: Connection to run on (defaults to a new session, committed here)
+        
+    Returns:
+        number of customers written
+    """
+    if connection is None:
+        session = get_session()
+        try:
+            written = rebuild_customer_features(session.connection())
+            session.commit()
+            return written
+        finally:
+            session.close()
+    
+    CustomerFeature.__table__.create(connection, checkfirst=True)
+    now = time.time()
+    rows = [_feature_row(*r, now) for r in connection.execute(_feature_query())]
+    connection.execute(delete(CustomerFeature))
+    if rows:
+        connection.execute(insert(CustomerFeature), rows)
+    return len(rows)
+
+
+def refresh_customer_features(connection, receipts):
+    """Recompute the feature rows of the given customers.
+    
+    An empty table is left alone: a partial table would hide everyone else,
+    and the next read rebuilds it in full.
+    """
+    if connection.execute(select(CustomerFeature.receipt).limit(1)).first() is None:
+        return
+    
+    receipts = list(receipts)
+    now = time.time()
+    for i in range(0, len(receipts), _IN_CHUNK):
+        chunk = receipts[i:i + _IN_CHUNK]
+        connection.execute(delete(CustomerFeature).where(CustomerFeature.receipt.in_(chunk)))
+        rows = [_feature_row(*r, now) for r in connection.execute(_feature_query(chunk))]
+        if rows:
+            connection.execute(insert(CustomerFeature), rows)
+
+
+def clear_customer_features(connection):
+    """Empty the feature table; the next read rebuilds it."""
+    connection.execute(delete(CustomerFeature))
+
+
+def sync_customer_features(engine, receipts=(), stale=False):
+    """Catch the feature table up with committed order writes (called from the models.py session hooks).
+    
+    Runs in its own session after the order's transaction has committed, so
+    a failure here is logged and never rolls back the order or payment.
+    
+    Args:
+        engine: Engine the order write was committed on
+        receipts: Customers whose orders changed
+        stale: A bulk order write happened; empty the table instead
+    """
+    session = get_session(engine)
+    try:
+        connection = session.connection()
+        if stale:
+            clear_customer_features(connection)
+        elif receipts:
+            refresh_customer_features(connection, receipts)
+        session.commit()
+    except Exception:
+        session.rollback()
+        logger.exception("Customer feature refresh failed for %d receipts (stale=%s)", len(receipts), stale)
+    finally:
+        session.close()
+
+
+def _fresh_features(session):
+    """Build the feature table if needed and re-segment rows older than SEGMENT_REFRESH_SECONDS."""
+    connection = session.connection()
+    if _feature_table_empty(connection):
+        rebuild_customer_features(connection)
+    else:
+        now = time.time()
+        stale = session.query(CustomerFeature).filter(
+            CustomerFeature.segmented_at < now - SEGMENT_REFRESH_SECONDS
+        ).all()
+        for row in stale:
+            days_since = int((now - row.last_purchase_at) / 86400)
+            segment, _ = classify_segment(
+                row.order_count, row.paid_revenue_paise, days_since,
+                int((now - row.first_purchase_at) / 86400)
+            )
+            row.days_since_purchase = days_since
+            row.segment = segment.value
+            row.segmented_at = now
+    session.commit()
+
+
+def _listed_features(session):
+    """Feature rows of real customers (no blank or TEST receipts)."""
+    return session.query(CustomerFeature).filter(
+        and_(CustomerFeature.receipt != '', CustomerFeature.receipt != 'TEST')
+    )
+
+
 def get_all_customers_segmented(days_back=90):
     """Get all customers with their segments and LTV.
     
@@ -140,38 +306,24 @@ def get_all_customers_segmented(days_back=90):
     """
     session = get_session()
     try:
-        cutoff = time.time() - (days_back * 86400)
-        
-        # Get unique customers from paid orders in period
-        customers = session.query(Order.receipt).filter(
-            and_(
-                Order.status == 'paid',
-                Order.created_at >= cutoff
-            )
-        ).distinct().all()
+        _fresh_features(session)
+        now = time.time()
+        cutoff = now - (days_back * 86400)
         
-        result = []
-        for (receipt,) in customers:
-            if not receipt or receipt == 'TEST':
-                continue
-            
-            segment_data = get_customer_segment(receipt)
-            ltv_data = segment_data['ltv_data']
-            
-            if ltv_data:
-                result.append({
-                    'receipt': receipt,
-                    'segment': segment_data['segment'],
-                    'ltv_paise': ltv_data['ltv_paise'],
-                    'order_count': ltv_data['order_count'],
-                    'avg_order_value_paise': ltv_data['avg_order_value_paise'],
-                    'customer_age_days': ltv_data['customer_age_days'],
-                    'days_since_purchase': ltv_data['days_since_purchase'],
-                    'first_purchase': datetime.fromtimestamp(ltv_data['first_purchase']).strftime('%Y-%m-%d'),
-                    'last_purchase': datetime.fromtimestamp(ltv_data['last_purchase']).strftime('%Y-%m-%d')
-                })
+        # A paid order in the period <=> last paid purchase in the period
+        rows = _listed_features(session).filter(CustomerFeature.last_purchase_at >= cutoff).all()
         
-        return result
+        return [{
+            'receipt': f.receipt,
+            'segment': f.segment,
+            'ltv_paise': f.paid_revenue_paise,
+            'order_count': f.order_count,
+            'avg_order_value_paise': f.avg_order_value_paise,
+            'customer_age_days': int((now - f.first_purchase_at) / 86400),
+            'days_since_purchase': int((now - f.last_purchase_at) / 86400),
+            'first_purchase': datetime.fromtimestamp(f.first_purchase_at).strftime('%Y-%m-%d'),
+            'last_purchase': datetime.fromtimestamp(f.last_purchase_at).strftime('%Y-%m-%d')
+        } for f in rows]
     finally:
         session.close()
 
@@ -184,38 +336,16 @@ def get_segment_summary():
     """
     session = get_session()
     try:
-        # Get all unique receipts with paid orders
-        customers = session.query(Order.receipt).filter(
-            Order.status == 'paid'
-        ).distinct().all()
-        
-        segments = {}
-        
-        for (receipt,) in customers:
-            if not receipt or receipt == 'TEST':
-                continue
-            
-            segment_data = get_customer_segment(receipt)
-            segment_name = segment_data['segment']
-            
-            if segment_name not in segments:
-                segments[segment_name] = {
-                    'count': 0,
-                    'total_ltv_paise': 0,
-                    'receipts': []
-                }
-            
-            segments[segment_name]['count'] += 1
-            if segment_data['ltv_data']:
-                segments[segment_name]['total_ltv_paise'] += segment_data['ltv_data']['ltv_paise']
-                segments[segment_name]['receipts'].append(receipt)
+        _fresh_features(session)
+        rows = _listed_features(session).with_entities(
+            CustomerFeature.segment,
+            func.count(CustomerFeature.receipt),
+            func.coalesce(func.sum(CustomerFeature.paid_revenue_paise), 0)
+        ).group_by(CustomerFeature.segment).all()
         
         # Calculate stats per segment
         result = {}
-        for segment_name, data in segments.items():
-            count = data['count']
-            total_ltv = data['total_ltv_paise']
-            
+        for segment_name, count, total_ltv in rows:
             result[segment_name] = {
                 'customer_count': count,
                 'total_ltv_paise': total_ltv,
@@ -306,40 +436,32 @@ def get_customer_churn_risk():
     """
     session = get_session()
     try:
-        # Get all customers with at least 1 purchase
-        customers = session.query(Order.receipt).filter(
-            Order.status == 'paid'
-        ).distinct().all()
+        _fresh_features(session)
+        now = time.time()
         
-        at_risk = []
+        # Consider at-risk if: (1) AT_RISK, (2) DORMANT, or (3) CHURNED
+        rows = _listed_features(session).filter(
+            CustomerFeature.segment.in_(['AT_RISK', 'DORMANT', 'CHURNED'])
+        ).all()
         
-        for (receipt,) in customers:
-            if not receipt or receipt == 'TEST':
-                continue
-            
-            segment_data = get_customer_segment(receipt)
-            ltv_data = segment_data['ltv_data']
+        at_risk = []
+        for f in rows:
+            days_since = int((now - f.last_purchase_at) / 86400)
+            ltv = f.paid_revenue_paise
             
-            # Consider at-risk if: (1) AT_RISK, (2) DORMANT, or (3) had multiple purchases but no activity for 60+ days
-            is_at_risk = segment_data['segment'] in ['AT_RISK', 'DORMANT', 'CHURNED']
+            # Churn risk score: days inactive + potential lost revenue
+            # Higher value customers = higher urgency
+            risk_score = (days_since / 180) + (ltv / 10000000)  # Normalize LTV
             
-            if is_at_risk and ltv_data:
-                days_since = ltv_data['days_since_purchase']
-                ltv = ltv_data['ltv_paise']
-                
-                # Churn risk score: days inactive + potential lost revenue
-                # Higher value customers = higher urgency
-                risk_score = (days_since / 180) + (ltv / 10000000)  # Normalize LTV
-                
-                at_risk.append({
-                    'receipt': receipt,
-                    'segment': segment_data['segment'],
-                    'ltv_paise': ltv,
-                    'days_inactive': days_since,
-                    'order_count': ltv_data['order_count'],
-                    'risk_score': round(risk_score, 2),
-                    'urgency': 'CRITICAL' if ltv >= 1000000 and days_since > 90 else 'HIGH' if days_since > 120 else 'MEDIUM'
-                })
+            at_risk.append({
+                'receipt': f.receipt,
+                'segment': f.segment,
+                'ltv_paise': ltv,
+                'days_inactive': days_since,
+                'order_count': f.order_count,
+                'risk_score': round(risk_score, 2),
+                'urgency': 'CRITICAL' if ltv >= 1000000 and days_since > 90 else 'HIGH' if days_since > 120 else 'MEDIUM'
+            })
         
         # Sort by risk score descending
         at_risk.sort(key=lambda x: x['risk_score'], reverse=True)
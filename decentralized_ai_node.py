@@ -6,7 +6,7 @@ DECENTRALIZED AI NODE - SURESH AI ORIGIN
 
 Architecture:
 - Node class: Runs on peer devices, handles AI tasks
-- P2P networking: Simple socket-based mesh network (libp2p-compatible)
+- P2P networking: asyncio mesh with persistent framed connections (p2p_transport)
 - Rarity filter: Score tasks (0-100), only process if >90 (top 1% value)
 - Monetization: Rewards via crypto micropayments (integrated with monetization_engine)
 - Auto-discovery: Self-join network on startup, discover peers
@@ -14,7 +14,7 @@ Architecture:
 Task Flow:
 1. Node starts → joins P2P network
 2. Task received → scored by rarity filter
-3. High-value task (>90) → processed via AI
+3. High-value task (>90) → queued by priority/rarity, run by a worker (or stolen by an idle peer)
 4. Result → reward distributed via monetization engine
 5. Reputation tracked → affects future task allocation
 
@@ -38,8 +38,8 @@ import uuid
 import time
 import logging
 import threading
-import socket
 from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict
 from dataclasses import dataclass, asdict, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -50,6 +50,9 @@ import requests
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # Local imports
+from p2p_transport import AsyncP2PTransport
+from distributed_scheduler import WorkStealingScheduler, attach_to_network
+
 try:
     from real_ai_service import RealAI
     AI_AVAILABLE = True
@@ -173,119 +176,117 @@ class NetworkStats:
 # ==================== PEER-TO-PEER NETWORKING ====================
 
 class P2PNetwork:
-    """Simple socket-based P2P network (libp2p-compatible protocol)."""
+    """P2P mesh over persistent framed connections (see p2p_transport)."""
     
-    def __init__(self, node_id: str, host: str = "127.0.0.1", port: int = 9000):
+    def __init__(
+        self,
+        node_id: str,
+        host: str = "127.0.0.1",
+        port: int = 9000,
+        codec: str = "json",
+        keepalive_interval: float = 15.0
+    ):
         self.node_id = node_id
         self.host = host
         self.port = port
         self.address = f"{host}:{port}"
         self.peers: Dict[str, NodeInfo] = {}
-        self.server_socket = None
+        self.address_book: Dict[str, str] = {}  # address -> node_id learned in handshake
+        self.transport = AsyncP2PTransport(
+            node_id,
+            host=host,
+            port=port,
+            codec=codec,
+            keepalive_interval=keepalive_interval,
+            keepalive_timeout=keepalive_interval * 3
+        )
+        self.transport.on_peer_connected = self._on_peer_connected
+        self.transport.on_peer_disconnected = self._on_peer_disconnected
         self.running = False
         self.logger = logging.getLogger(f"{__name__}.P2PNetwork")
     
     def start_server(self) -> bool:
         """Start P2P network server."""
-        try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.server_socket.settimeout(1.0)
-            self.running = True
-            
-            self.logger.info(f"✅ P2P Server started: {self.address}")
-            
-            # Start accepting connections in background
-            threading.Thread(target=self._accept_connections, daemon=True).start()
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"❌ Failed to start P2P server: {e}")
+        if not self.transport.start():
+            self.logger.error(f"❌ Failed to start P2P server: {self.address}")
             return False
+        
+        # Port 0 binds an ephemeral port; publish the real one
+        self.port = self.transport.port
+        self.address = self.transport.address
+        self.running = True
+        
+        self.logger.info(f"✅ P2P Server started: {self.address}")
+        return True
     
-    def _accept_connections(self):
-        """Accept incoming peer connections."""
-        while self.running:
-            try:
-                client_socket, (client_ip, client_port) = self.server_socket.accept()
-                
-                # Handle client in background thread
-                threading.Thread(
-                    target=self._handle_peer_connection,
-                    args=(client_socket, client_ip, client_port),
-                    daemon=True
-                ).start()
-                
-            except socket.timeout:
-                continue
-            except Exception as e:
-                self.logger.warning(f"Connection error: {e}")
+    def register_handler(self, message_type: str, handler) -> None:
+        """Register handler(peer_id, message) for incoming messages of a type."""
+        self.transport.register_handler(message_type, handler)
+    
+    def _on_peer_connected(self, peer_id: str, hello: Dict):
+        """Track peers that complete a handshake in either direction."""
+        address = hello.get("address", "")
+        self.address_book[address] = peer_id
+        peer = self.peers.get(peer_id)
+        if peer is None:
+            self.peers[peer_id] = NodeInfo(
+                node_id=peer_id,
+                address=address,
+                public_key=hello.get("public_key", ""),
+                version=hello.get("version", "1.0")
+            )
+        else:
+            peer.status = "online"
+            peer.last_heartbeat = time.time()
     
-    def _handle_peer_connection(self, client_socket: socket.socket, ip: str, port: int):
-        """Handle peer connection."""
-        try:
-            # Receive peer handshake
-            data = client_socket.recv(1024).decode('utf-8')
-            handshake = json.loads(data)
-            
-            peer_id = handshake.get('node_id')
-            self.logger.info(f"📡 Peer connected: {peer_id} ({ip}:{port})")
-            
-            # Send acknowledgment
-            ack = {"status": "ok", "node_id": self.node_id}
-            client_socket.send(json.dumps(ack).encode('utf-8'))
-            
-        except Exception as e:
-            self.logger.warning(f"Peer connection error: {e}")
-        finally:
-            client_socket.close()
+    def _on_peer_disconnected(self, peer_id: str):
+        """Mark peer offline when its connection drops."""
+        peer = self.peers.get(peer_id)
+        if peer:
+            peer.status = "offline"
     
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=5))
     def connect_to_peer(self, peer_address: str, node_id: str, public_key: str) -> bool:
-        """Connect to peer node."""
+        """Open (or reuse) a persistent connection to a peer node."""
         try:
-            host, port = peer_address.split(':')
-            port = int(port)
+            if not self.running and not self.start_server():
+                raise ConnectionError("P2P server not running")
             
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(5.0)
-            sock.connect((host, port))
-            
-            # Send handshake
-            handshake = {
-                "node_id": self.node_id,
-                "public_key": public_key,
-                "version": "1.0"
-            }
-            sock.send(json.dumps(handshake).encode('utf-8'))
+            self.transport.hello_info["public_key"] = public_key
+            remote_id = self.transport.connect(peer_address, timeout=5.0)
+            self.address_book[peer_address] = remote_id
             
-            # Receive acknowledgment
-            ack = sock.recv(1024).decode('utf-8')
-            response = json.loads(ack)
-            
-            sock.close()
-            
-            self.logger.info(f"✅ Connected to peer: {node_id} ({peer_address})")
-            return response.get('status') == 'ok'
+            self.logger.info(f"✅ Connected to peer: {remote_id} ({peer_address})")
+            return True
             
         except Exception as e:
             self.logger.warning(f"❌ Failed to connect to {peer_address}: {e}")
             raise
     
+    def send_message(self, peer_id: str, message: Dict) -> bool:
+        """Send message to one connected peer."""
+        if not self.running:
+            return False
+        return self.transport.send(peer_id, message)
+    
     def broadcast_message(self, message: Dict) -> int:
-        """Broadcast message to all connected peers."""
-        delivered = 0
-        for peer_id, peer_info in self.peers.items():
-            try:
-                # In production: send via socket
-                # For now: log broadcast
-                self.logger.debug(f"📢 Broadcasting to {peer_id}: {message['type']}")
-                delivered += 1
-            except Exception as e:
-                self.logger.warning(f"Broadcast failed to {peer_id}: {e}")
+        """
+        Broadcast message to all connected peers.
         
+        Fan-out is parallel over each peer's send queue; returns the number
+        of peers the message was queued for.
+        """
+        if not self.running:
+            self.logger.debug(f"📢 Broadcast skipped (server not running): {message.get('type')}")
+            return 0
+        
+        try:
+            delivered = self.transport.broadcast(message)
+        except Exception as e:
+            self.logger.warning(f"Broadcast failed: {e}")
+            return 0
+        
+        self.logger.debug(f"📢 Broadcast {message.get('type')} to {delivered} peers")
         return delivered
     
     def add_peer(self, node_info: NodeInfo) -> bool:
@@ -309,8 +310,7 @@ class P2PNetwork:
     def stop(self):
         """Stop P2P network server."""
         self.running = False
-        if self.server_socket:
-            self.server_socket.close()
+        self.transport.stop()
         self.logger.info("🛑 P2P Server stopped")
 
 
@@ -404,6 +404,7 @@ class DecentralizedAINode:
         
         # Initialize components
         self.network = P2PNetwork(self.node_id, host, port)
+        self.network.transport.hello_info["public_key"] = self.public_key
         self.rarity_filter = RarityFilter(threshold=rarity_threshold)
         
         # AI integration
@@ -419,10 +420,6 @@ class DecentralizedAINode:
             public_key=self.public_key
         )
         
-        # Task tracking
-        self.tasks: Dict[str, AITask] = {}
-        self.task_queue: List[AITask] = []
-        
         # Statistics
         self.stats = NetworkStats()
         self.start_time = time.time()
@@ -430,6 +427,17 @@ class DecentralizedAINode:
         # Configuration
         self.max_concurrent_tasks = 5
         self.task_timeout_seconds = 300
+        self.max_tracked_tasks = 10000
+        
+        # Task tracking (bounded, oldest evicted first)
+        self.tasks: "OrderedDict[str, AITask]" = OrderedDict()
+        
+        # Scheduling: priority queue + worker pool, steals from busy peers once networked
+        self.scheduler = WorkStealingScheduler(
+            self.node_id,
+            executor=self._execute_scheduled_task,
+            num_workers=self.max_concurrent_tasks
+        )
         
         self.logger = logging.getLogger(f"{__name__}.DecentralizedAINode")
         self.logger.info(f"✅ Node initialized: {self.node_id}")
@@ -456,6 +464,10 @@ class DecentralizedAINode:
                 "error": "Failed to start P2P server"
             }
         
+        # Share load and steal work over the P2P layer
+        attach_to_network(self.scheduler, self.network)
+        self.scheduler.start()
+        
         # Auto-discover peers (mock implementation)
         peers_discovered = self._auto_discover_peers()
         
@@ -532,12 +544,14 @@ class DecentralizedAINode:
                 )
                 
                 if success:
-                    peer_info = NodeInfo(
-                        node_id=peer_id,
-                        address=peer_address,
-                        public_key=self._generate_public_key()
-                    )
-                    self.network.add_peer(peer_info)
+                    peer_id = self.network.address_book.get(peer_address, peer_id)
+                    if peer_id not in self.network.peers:
+                        peer_info = NodeInfo(
+                            node_id=peer_id,
+                            address=peer_address,
+                            public_key=self._generate_public_key()
+                        )
+                        self.network.add_peer(peer_info)
                     results["connected"] += 1
                     results["peers"].append({"address": peer_address, "status": "connected"})
                 else:
@@ -628,49 +642,22 @@ class DecentralizedAINode:
         self.logger.info(f"  ✨ RARE TASK - ACCEPTED")
         
         # Store task
-        self.tasks[task_id] = task
-        
-        # Process via AI
-        task.status = TaskStatus.PROCESSING
-        task.assigned_node = self.node_id
-        
-        start_time = time.time()
+        self._track_task(task)
+        
+        payload = {
+            "task_id": task_id,
+            "task_type": task.task_type,
+            "prompt": task.prompt,
+            "priority": metadata.priority.name.lower(),
+            "complexity": metadata.complexity_estimate,
+            "creator_address": metadata.creator_address,
+            "rarity_score": rarity_score
+        }
         
         try:
-            # Execute AI task
-            if self.ai_engine:
-                result = self._execute_ai_task(task)
-                task.result = result
-            else:
-                task.result = f"[DEMO] Processed: {task.prompt[:100]}"
-            
-            processing_time = (time.time() - start_time) * 1000
-            task.processing_time_ms = processing_time
-            task.status = TaskStatus.COMPLETED
-            
-            self.logger.info(f"  ✅ Completed in {processing_time:.1f}ms")
-            
-            # Calculate reward
-            reward = self._calculate_reward(task)
-            task.reward_amount = reward
-            
-            # Distribute reward via monetization
-            if self.monetization:
-                self._distribute_reward(task, reward)
-            
-            # Update statistics
-            self.stats.total_tasks_processed += 1
-            self.node_info.tasks_completed += 1
-            
-            return {
-                "success": True,
-                "task_id": task_id,
-                "result": task.result,
-                "rarity_score": rarity_score,
-                "processing_time_ms": processing_time,
-                "reward": reward,
-                "status": "completed"
-            }
+            # Queue by priority + rarity; a local worker or an idle peer executes it
+            future = self.scheduler.submit(task_id, payload, metadata.priority.value, rarity_score)
+            outcome = future.result(timeout=self.task_timeout_seconds)
             
         except Exception as e:
             self.logger.error(f"  ❌ Processing failed: {e}")
@@ -684,6 +671,95 @@ class DecentralizedAINode:
                 "rarity_score": rarity_score,
                 "status": "failed"
             }
+        
+        # Cached / deduplicated results were computed for another task id
+        cached = outcome.get("task_id") != task_id
+        task.result = outcome["result"]
+        task.processing_time_ms = 0.0 if cached else outcome["processing_time_ms"]
+        task.reward_amount = 0.0 if cached else outcome["reward"]
+        task.assigned_node = outcome.get("executed_by", self.node_id)
+        task.status = TaskStatus.COMPLETED
+        
+        return {
+            "success": True,
+            "task_id": task_id,
+            "result": task.result,
+            "rarity_score": rarity_score,
+            "processing_time_ms": task.processing_time_ms,
+            "reward": task.reward_amount,
+            "executed_by": task.assigned_node,
+            "cached": cached,
+            "status": "completed"
+        }
+    
+    def _track_task(self, task: AITask):
+        """Remember task, evicting the oldest beyond max_tracked_tasks."""
+        self.tasks[task.task_id] = task
+        self.tasks.move_to_end(task.task_id)
+        while len(self.tasks) > self.max_tracked_tasks:
+            self.tasks.popitem(last=False)
+    
+    def _execute_scheduled_task(self, payload: Dict) -> Dict:
+        """
+        Scheduler executor: run one task on this node.
+        
+        Tasks stolen from peers are rebuilt from their wire payload.
+        """
+        task = self.tasks.get(payload["task_id"])
+        if task is None:
+            metadata = TaskMetadata(
+                task_id=payload["task_id"],
+                task_type=payload.get("task_type", "unknown"),
+                creator_address=payload.get("creator_address", "unknown"),
+                created_at=time.time(),
+                priority=self._parse_priority(payload.get("priority", "medium")),
+                complexity_estimate=payload.get("complexity", 5.0),
+                data_size=len(payload.get("prompt", "").encode())
+            )
+            task = AITask(
+                task_id=payload["task_id"],
+                task_type=metadata.task_type,
+                prompt=payload.get("prompt", ""),
+                metadata=metadata,
+                rarity_score=payload.get("rarity_score", 0.0)
+            )
+        
+        task.status = TaskStatus.PROCESSING
+        task.assigned_node = self.node_id
+        
+        start_time = time.time()
+        
+        # Execute AI task
+        if self.ai_engine:
+            task.result = self._execute_ai_task(task)
+        else:
+            task.result = f"[DEMO] Processed: {task.prompt[:100]}"
+        
+        processing_time = (time.time() - start_time) * 1000
+        task.processing_time_ms = processing_time
+        task.status = TaskStatus.COMPLETED
+        
+        self.logger.info(f"  ✅ Completed {task.task_id} in {processing_time:.1f}ms")
+        
+        # Calculate reward
+        reward = self._calculate_reward(task)
+        task.reward_amount = reward
+        
+        # Distribute reward via monetization
+        if self.monetization:
+            self._distribute_reward(task, reward)
+        
+        # Update statistics
+        self.stats.total_tasks_processed += 1
+        self.node_info.tasks_completed += 1
+        
+        return {
+            "task_id": task.task_id,
+            "result": task.result,
+            "processing_time_ms": processing_time,
+            "reward": reward,
+            "executed_by": self.node_id
+        }
     
     def _parse_priority(self, priority_str: str) -> TaskPriority:
         """Parse priority string to enum."""
@@ -801,7 +877,8 @@ class DecentralizedAINode:
             "tasks_completed": self.node_info.tasks_completed,
             "total_rewards": round(self.stats.total_rewards_distributed, 6),
             "reputation": self.node_info.reputation_score,
-            "capacity": self.node_info.capacity_pct
+            "capacity": self.node_info.capacity_pct,
+            "scheduler": self.scheduler.get_stats()
         }
     
     def get_network_stats(self) -> Dict:
@@ -826,6 +903,7 @@ class DecentralizedAINode:
     def stop(self):
         """Stop node and leave network."""
         self.logger.info(f"🔴 Stopping node: {self.node_id}")
+        self.scheduler.stop()
         self.network.stop()
 
 
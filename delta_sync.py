@@ -0,0 +1,261 @@
+"""Incremental (delta) sync for the mobile API.
+
+Every change a device pushes is appended to the sync_changes log
+(models.SyncChange) under a monotonically increasing sequence number.
+Devices pull with the highest sequence they have seen and get back only
+the records changed since, in bounded batches.
+
+- Conflicts: each record carries a version vector {device_id: counter}.
+  A push is applied only if its base_version dominates the stored vector
+  (the device had seen the latest write); otherwise the server copy is
+  returned as a conflict for the device to merge and push again.
+- Compaction: a write replaces the record's previous row, so the log never
+  holds more than one row per record. Tombstones are dropped after
+  SYNC_TOMBSTONE_TTL; devices whose high-water mark predates a dropped
+  tombstone are told to reset and pull from zero.
+"""
+import gzip
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import Response, request
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import get_engine, get_session, SyncChange, SyncTenant
+from utils import _get_db_url
+
+SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '500'))  # changes per pull page
+SYNC_MAX_BATCH = 1000  # upper bound for ?limit= and for one push
+SYNC_TOMBSTONE_TTL = int(os.getenv('SYNC_TOMBSTONE_TTL', str(30 * 86400)))  # seconds
+GZIP_MIN_BYTES = 1024  # smaller payloads are not worth compressing
+PUSH_RETRIES = 3  # optimistic retries when a concurrent push replaced a record first
+
+OPERATIONS = ('upsert', 'delete')
+
+_ENGINES = {}  # db url -> engine, so pulls reuse pooled connections
+
+
+def _session():
+    url = _get_db_url()
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+def dominates(a: Dict[str, int], b: Dict[str, int]) -> bool:
+    """True if version vector `a` has seen every write in `b`."""
+    return all(a.get(device, 0) >= counter for device, counter in b.items())
+
+
+def _validate(changes: List[Dict]) -> List[Dict]:
+    if not isinstance(changes, list):
+        raise ValueError("changes must be a list")
+    if len(changes) > SYNC_MAX_BATCH:
+        raise ValueError(f"At most {SYNC_MAX_BATCH} changes per push")
+    for change in changes:
+        if not isinstance(change, dict) or not change.get('resource') or not change.get('id'):
+            raise ValueError("Each change needs a resource and an id")
+        if change.get('op', 'upsert') not in OPERATIONS:
+            raise ValueError(f"Unknown op: {change.get('op')}")
+        if not isinstance(change.get('base_version', {}), dict):
+            raise ValueError("base_version must be an object")
+    return changes
+
+
+def _record(row: SyncChange) -> Dict:
+    """Compact wire format for one change; tombstones carry no data."""
+    out = {'seq': row.seq, 'resource': row.resource, 'id': row.resource_id, 'version': json.loads(row.version)}
+    if row.deleted:
+        out['deleted'] = True
+    else:
+        out['data'] = json.loads(row.data) if row.data else {}
+    return out
+
+
+def _latest(session, tenant_id: str, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], SyncChange]:
+    """Current row of each (resource, id); the highest seq wins if a concurrent create left two."""
+    latest = {}
+    keys = list(keys)
+    for start in range(0, len(keys), 500):
+        rows = session.query(SyncChange).filter(
+            SyncChange.tenant_id == tenant_id,
+            tuple_(SyncChange.resource, SyncChange.resource_id).in_(keys[start:start + 500]),
+        ).all()
+        for row in rows:
+            key = (row.resource, row.resource_id)
+            if key not in latest or row.seq > latest[key].seq:
+                latest[key] = row
+    return latest
+
+
+def push_changes(tenant_id: str, device_id: str, changes: List[Dict]) -> Dict:
+    """Apply a batch of device changes in one transaction.
+
+    Args:
+        tenant_id: Tenant the records belong to
+        device_id: Pushing device (its counter is bumped in each new version)
+        changes: [{'resource', 'id', 'op': 'upsert'|'delete', 'data', 'base_version'}]
+
+    Returns:
+        dict with applied [{resource, id, seq, version}], conflicts
+        [{resource, id, server: <current record>}] and the highest seq written
+    """
+    changes = _validate(changes)
+    for attempt in range(PUSH_RETRIES):
+        session = _session()
+        try:
+            result = _apply_batch(session, tenant_id, device_id, changes)
+            session.commit()
+            return result
+        except StaleDataError:
+            # Another push replaced one of these records after we read it
+            session.rollback()
+            if attempt == PUSH_RETRIES - 1:
+                raise
+        finally:
+            session.close()
+
+
+def _apply_batch(session, tenant_id: str, device_id: str, changes: List[Dict]) -> Dict:
+    latest = _latest(session, tenant_id, {(c['resource'], str(c['id'])) for c in changes})
+    now = time.time()
+    written, conflicts = [], []
+
+    for change in changes:
+        key = (change['resource'], str(change['id']))
+        current = latest.get(key)
+        server_version = json.loads(current.version) if current else {}
+        base_version = change.get('base_version') or {}
+        deleting = change.get('op', 'upsert') == 'delete'
+
+        if not dominates(base_version, server_version):
+            conflicts.append({'resource': key[0], 'id': key[1], 'server': _record(current)})
+            continue
+        if deleting and (current is None or current.deleted):
+            continue  # nothing to delete, or already a tombstone
+
+        version = {d: max(base_version.get(d, 0), server_version.get(d, 0))
+                   for d in set(base_version) | set(server_version)}
+        version[device_id] = version.get(device_id, 0) + 1
+        row = SyncChange(
+            tenant_id=tenant_id, resource=key[0], resource_id=key[1], deleted=int(deleting),
+            data=None if deleting else json.dumps(change.get('data') or {}, separators=(',', ':')),
+            version=json.dumps(version, separators=(',', ':'), sort_keys=True),
+            device_id=device_id, created_at=now,
+        )
+        if current in written:
+            # Changed twice in this batch: only the last write is kept
+            if current in session.new:
+                session.expunge(current)
+            else:
+                session.delete(current)  # already autoflushed
+            written.remove(current)
+        elif current is not None and not session.query(SyncChange).filter(
+                SyncChange.seq == current.seq).delete(synchronize_session=False):
+            raise StaleDataError(f"{key} was replaced by a concurrent push")
+        session.add(row)
+        latest[key] = row
+        written.append(row)
+
+    session.flush()
+    return {
+        'applied': [{'resource': r.resource, 'id': r.resource_id, 'seq': r.seq, 'version': json.loads(r.version)}
+                    for r in written],
+        'conflicts': conflicts,
+        'seq': max((r.seq for r in written), default=None),
+    }
+
+
+def pull_changes(tenant_id: str, since: int = 0, limit: Optional[int] = None) -> Dict:
+    """Changes with seq > `since`, oldest first, at most `limit` per call.
+
+    Returns:
+        dict with changes, next_since (pass back as ?since=), has_more and
+        reset (True if `since` is older than a compacted tombstone: drop
+        local data and pull again from 0)
+    """
+    limit = min(max(int(limit or SYNC_BATCH_SIZE), 1), SYNC_MAX_BATCH)
+    since = max(int(since), 0)
+    session = _session()
+    try:
+        tenant = session.get(SyncTenant, tenant_id)
+        if since and tenant is not None and since < (tenant.purged_seq or 0):
+            return {'changes': [], 'next_since': 0, 'has_more': True, 'reset': True}
+
+        query = session.query(SyncChange).filter(SyncChange.tenant_id == tenant_id, SyncChange.seq > since)
+        if not since:
+            # A fresh device has nothing to delete
+            query = query.filter(SyncChange.deleted == 0)
+        rows = query.order_by(SyncChange.seq).limit(limit + 1).all()
+    finally:
+        session.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'changes': [_record(row) for row in rows],
+        'next_since': rows[-1].seq if rows else since,
+        'has_more': has_more,
+        'reset': False,
+    }
+
+
+def compact(tenant_id: Optional[str] = None, older_than: int = SYNC_TOMBSTONE_TTL) -> int:
+    """Drop tombstones older than `older_than` seconds and rows superseded by a newer write.
+
+    Returns:
+        Number of rows removed
+    """
+    cutoff = time.time() - older_than
+    session = _session()
+    try:
+        tenants = [tenant_id] if tenant_id else [
+            t for (t,) in session.query(SyncChange.tenant_id).distinct()
+        ]
+        removed = 0
+        for tenant in tenants:
+            newest = session.query(
+                SyncChange.resource, SyncChange.resource_id, func.max(SyncChange.seq).label('seq')
+            ).filter(SyncChange.tenant_id == tenant).group_by(
+                SyncChange.resource, SyncChange.resource_id
+            ).having(func.count() > 1).subquery()
+            superseded = session.query(SyncChange.seq).join(
+                newest, (SyncChange.resource == newest.c.resource)
+                & (SyncChange.resource_id == newest.c.resource_id) & (SyncChange.seq < newest.c.seq)
+            ).filter(SyncChange.tenant_id == tenant)
+            stale = [seq for (seq,) in superseded]
+
+            tombstones = session.query(SyncChange.seq).filter(
+                SyncChange.tenant_id == tenant, SyncChange.deleted == 1, SyncChange.created_at < cutoff
+            )
+            purged = [seq for (seq,) in tombstones]
+
+            doomed = sorted(set(stale) | set(purged))
+            for start in range(0, len(doomed), 500):
+                session.query(SyncChange).filter(SyncChange.seq.in_(doomed[start:start + 500])).delete(
+                    synchronize_session=False)
+            if purged:
+                state = session.get(SyncTenant, tenant) or SyncTenant(tenant_id=tenant, purged_seq=0)
+                state.purged_seq = max(state.purged_seq or 0, max(purged))
+                state.compacted_at = time.time()
+                session.add(state)
+            removed += len(doomed)
+        session.commit()
+        return removed
+    finally:
+        session.close()
+
+
+def json_response(payload: Dict, status: int = 200) -> Response:
+    """Compact JSON, gzipped when the client accepts it and it is worth it."""
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    response = Response(body, status=status, mimetype='application/json')
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response.set_data(gzip.compress(body, compresslevel=5))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+    return response
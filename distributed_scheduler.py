@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+DISTRIBUTED SCHEDULER - SURESH AI ORIGIN
+========================================
+Work-stealing task scheduler for decentralized AI nodes.
+
+Per node:
+- Bounded priority queue ordered by (priority, rarity score, arrival)
+- Worker thread pool executing tasks through a pluggable executor
+- Result cache keyed on a hash of (task_type, prompt), with in-flight dedupe
+
+Across nodes (wired over P2P by attach_to_network):
+- Periodic load advertisements ("load_advert")
+- Idle workers steal the lowest-priority queued tasks from the busiest peer
+  ("steal_request" / "steal_grant"); the thief sends results back to the
+  task's origin ("task_result"), which resolves the caller's future
+- The victim keeps each stolen task under a lease that the thief renews
+  ("lease_renew") while it holds the task. A lease that expires (lost
+  grant, crashed thief, undeliverable result) puts the task back in the
+  victim's queue; a stopping thief hands back unstarted tasks ("steal_return")
+
+Usage:
+    from distributed_scheduler import WorkStealingScheduler, attach_to_network
+
+    scheduler = WorkStealingScheduler("node_a", executor=run_task, num_workers=4)
+    attach_to_network(scheduler, p2p_network)
+    future = scheduler.submit("task_1", {"task_type": "summarize", "prompt": "..."}, 0.8, 92.0)
+    result = future.result(timeout=30)
+"""
+
+import hashlib
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerFull(Exception):
+    """Raised when a node's task queue is at capacity."""
+
+
+def prompt_cache_key(payload: Dict) -> str:
+    """Cache key for a task: sha256 of task type and prompt."""
+    raw = f"{payload.get('task_type', '')}\x00{payload.get('prompt', '')}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass(order=True)
+class ScheduledTask:
+    """Queue entry; sorts highest priority, then highest rarity, then FIFO."""
+    sort_key: Tuple[float, float, int]
+    task_id: str = field(compare=False)
+    payload: Dict = field(compare=False)
+    priority: float = field(compare=False)
+    rarity_score: float = field(compare=False)
+    origin: str = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.time)
+
+    def to_wire(self) -> Dict:
+        return {
+            "task_id": self.task_id,
+            "payload": self.payload,
+            "priority": self.priority,
+            "rarity_score": self.rarity_score,
+            "origin": self.origin,
+        }
+
+
+class ResultCache:
+    """Thread-safe LRU cache with TTL."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class WorkStealingScheduler:
+    """Priority queue + worker pool + work stealing for one node."""
+
+    def __init__(
+        self,
+        node_id: str,
+        executor: Callable[[Dict], Any],
+        num_workers: int = 4,
+        max_queue_size: int = 1000,
+        cache_size: int = 1024,
+        cache_ttl_seconds: float = 3600.0,
+        steal_threshold: int = 1,
+        steal_batch: int = 4,
+        advertise_interval: float = 0.5,
+        idle_wait: float = 0.05,
+        steal_lease_seconds: float = 30.0
+    ):
+        """
+        Args:
+            node_id: Owning node id
+            executor: Callable(payload) -> result; runs on worker threads
+            num_workers: Worker threads per node
+            max_queue_size: Queued (not running) tasks before submit() raises SchedulerFull
+            cache_size: Result cache entries (0 disables caching)
+            cache_ttl_seconds: Result cache TTL
+            steal_threshold: Only steal from peers advertising at least this many stealable tasks
+            steal_batch: Max tasks pulled per steal
+            advertise_interval: Seconds between load advertisements
+            idle_wait: Seconds an idle worker waits before trying to steal again
+            steal_lease_seconds: Seconds a stolen task may go without a renewal or
+                result before it is requeued here
+        """
+        self.node_id = node_id
+        self.executor = executor
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.steal_threshold = steal_threshold
+        self.steal_batch = steal_batch
+        self.advertise_interval = advertise_interval
+        self.idle_wait = idle_wait
+        self.steal_lease_seconds = steal_lease_seconds
+
+        self.cache = ResultCache(cache_size, cache_ttl_seconds)
+
+        # Hooks wired by attach_to_network()
+        self.advertise_fn: Optional[Callable[[Dict], Any]] = None
+        self.steal_fn: Optional[Callable[[str, int], List[Dict]]] = None
+        self.result_fn: Optional[Callable[[str, Dict], Any]] = None
+        self.renew_fn: Optional[Callable[[str, List[str]], Any]] = None
+        self.return_fn: Optional[Callable[[str, List[str]], Any]] = None
+
+        self._heap: List[ScheduledTask] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._futures: Dict[str, Tuple[Future, str]] = {}  # task_id -> (future, cache key), tasks owned here
+        self._inflight: Dict[str, Future] = {}  # cache key -> future
+        self._peer_loads: Dict[str, Dict] = {}
+        # task_id -> (task, thief, expires_at) for tasks stolen from here and not yet resolved
+        self._leases: Dict[str, Tuple[ScheduledTask, Optional[str], float]] = {}
+        self._held: Dict[str, str] = {}  # task_id -> origin, stolen tasks queued or running here
+        self._last_renew = 0.0
+        self._running_count = 0
+        self._threads: List[threading.Thread] = []
+        self.running = False
+
+        self.stats = {
+            "submitted": 0,
+            "executed": 0,
+            "failed": 0,
+            "cache_hits": 0,
+            "stolen_in": 0,
+            "stolen_out": 0,
+            "requeued": 0,
+            "rejected_full": 0,
+        }
+        self.logger = logging.getLogger(f"{__name__}.WorkStealingScheduler")
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        """Start worker threads and the load advertiser (idempotent)."""
+        with self._cond:
+            if self.running:
+                return
+            self.running = True
+
+        for i in range(self.num_workers):
+            t = threading.Thread(target=self._worker_loop, daemon=True,
+                                 name=f"sched-{self.node_id}-{i}")
+            t.start()
+            self._threads.append(t)
+
+        t = threading.Thread(target=self._advertise_loop, daemon=True,
+                             name=f"sched-{self.node_id}-advert")
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 2.0):
+        """Stop workers; queued tasks stay queued, unstarted stolen ones go back to their origin."""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self._return_stolen()
+
+    # ---------- local API ----------
+
+    def submit(self, task_id: str, payload: Dict, priority: float, rarity_score: float) -> Future:
+        """
+        Queue a task. Returns a Future resolving to the executor result.
+
+        Identical (task_type, prompt) tasks share a cached or in-flight result.
+        """
+        payload = dict(payload, task_id=task_id)
+        key = prompt_cache_key(payload)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._cond:
+                self.stats["cache_hits"] += 1
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        with self._cond:
+            inflight = self._inflight.get(key)
+            if inflight is not None and not inflight.done():
+                self.stats["cache_hits"] += 1
+                return inflight
+
+            if len(self._heap) >= self.max_queue_size:
+                self.stats["rejected_full"] += 1
+                raise SchedulerFull(f"Task queue full ({self.max_queue_size})")
+
+            future = Future()
+            self._futures[task_id] = (future, key)
+            self._inflight[key] = future
+            heapq.heappush(self._heap, ScheduledTask(
+                sort_key=(-priority, -rarity_score, next(self._seq)),
+                task_id=task_id,
+                payload=payload,
+                priority=priority,
+                rarity_score=rarity_score,
+                origin=self.node_id,
+            ))
+            self.stats["submitted"] += 1
+            self._cond.notify()
+
+        if not self.running:
+            self.start()
+        return future
+
+    def queue_depth(self) -> int:
+        return len(self._heap)
+
+    def load_report(self) -> Dict:
+        """Load advertisement body for peers."""
+        queued = len(self._heap)
+        return {
+            "node_id": self.node_id,
+            "queued": queued,
+            "stealable": self._stealable(queued),
+            "running": self._running_count,
+            "workers": self.num_workers,
+            "load": round((queued + self._running_count) / max(1, self.num_workers), 3),
+            "timestamp": time.time(),
+        }
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self.stats)
+            stats.update({
+                "queued": len(self._heap),
+                "running": self._running_count,
+                "leased_out": len(self._leases),
+                "cache_entries": len(self.cache),
+                "peers_tracked": len(self._peer_loads),
+            })
+        return stats
+
+    # ---------- peer API (called from the network layer) ----------
+
+    def update_peer_load(self, peer_id: str, report: Dict):
+        """Record a peer's load advertisement."""
+        with self._cond:
+            self._peer_loads[peer_id] = dict(report, received_at=time.time())
+            if report.get("stealable", 0) >= self.steal_threshold:
+                self._cond.notify()
+
+    def steal(self, max_tasks: int, thief: Optional[str] = None) -> List[Dict]:
+        """
+        Give away up to max_tasks of the lowest-priority queued tasks.
+
+        The most important work stays local; thieves are idle and start the
+        stolen tasks immediately. Futures stay here until complete_remote(),
+        and each task is leased to the thief: it is requeued here if neither
+        a renewal nor its result arrives within steal_lease_seconds.
+        """
+        with self._cond:
+            count = min(max_tasks, self._stealable(len(self._heap)))
+            if count <= 0:
+                return []
+            ordered = sorted(self._heap)
+            stolen, keep = ordered[-count:], ordered[:-count]
+            heapq.heapify(keep)
+            self._heap = keep
+            expires_at = time.time() + self.steal_lease_seconds
+            for task in stolen:
+                self._leases[task.task_id] = (task, thief, expires_at)
+            self.stats["stolen_out"] += len(stolen)
+
+        return [task.to_wire() for task in stolen]
+
+    def complete_remote(self, task_id: str, result: Any = None, error: Optional[str] = None):
+        """Resolve a stolen task's future when its result comes back."""
+        with self._cond:
+            self._leases.pop(task_id, None)
+            entry = self._futures.pop(task_id, None)
+        if entry is None:
+            return
+        self._resolve(entry[0], entry[1], result, error)
+
+    def renew_leases(self, thief: Optional[str], task_ids: List[str]) -> int:
+        """Extend the leases the thief still holds; returns how many were renewed."""
+        renewed = 0
+        with self._cond:
+            expires_at = time.time() + self.steal_lease_seconds
+            for task_id in task_ids:
+                lease = self._leases.get(task_id)
+                if lease is not None and lease[1] == thief:
+                    self._leases[task_id] = (lease[0], thief, expires_at)
+                    renewed += 1
+        return renewed
+
+    def return_stolen(self, thief: Optional[str], task_ids: List[str]) -> int:
+        """Requeue tasks a thief hands back unstarted; returns how many were requeued."""
+        with self._cond:
+            returned = [task_id for task_id in task_ids
+                        if task_id in self._leases and self._leases[task_id][1] == thief]
+            for task_id in returned:
+                self._requeue(self._leases.pop(task_id)[0])
+        return len(returned)
+
+    # ---------- internals ----------
+
+    def _stealable(self, queued: int) -> int:
+        # Keep one task per worker at home so the victim never goes idle
+        return max(0, min(queued - self.num_workers, queued // 2))
+
+    def _requeue(self, task: ScheduledTask):
+        # Caller holds self._cond
+        if task.task_id in self._futures:  # not resolved meanwhile
+            heapq.heappush(self._heap, task)
+            self.stats["requeued"] += 1
+            self._cond.notify()
+
+    def _expire_leases(self):
+        now = time.time()
+        with self._cond:
+            expired = [task_id for task_id, (_, _, expires_at) in self._leases.items() if expires_at <= now]
+            for task_id in expired:
+                task, thief, _ = self._leases.pop(task_id)
+                self.logger.warning(f"Lease on {task_id} (stolen by {thief}) expired; requeued")
+                self._requeue(task)
+
+    def _renew_held(self):
+        if self.renew_fn is None or time.time() - self._last_renew < self.steal_lease_seconds / 3:
+            return
+        self._last_renew = time.time()
+        by_origin: Dict[str, List[str]] = {}
+        with self._cond:
+            for task_id, origin in self._held.items():
+                by_origin.setdefault(origin, []).append(task_id)
+        for origin, task_ids in by_origin.items():
+            try:
+                self.renew_fn(origin, task_ids)
+            except Exception as e:
+                self.logger.debug(f"Lease renewal to {origin} failed: {e}")
+
+    def _return_stolen(self):
+        with self._cond:
+            returned = [task for task in self._heap if task.origin != self.node_id]
+            if not returned:
+                return
+            self._heap = [task for task in self._heap if task.origin == self.node_id]
+            heapq.heapify(self._heap)
+            for task in returned:
+                self._held.pop(task.task_id, None)
+        by_origin: Dict[str, List[str]] = {}
+        for task in returned:
+            by_origin.setdefault(task.origin, []).append(task.task_id)
+        for origin, task_ids in by_origin.items():
+            try:
+                if self.return_fn is not None:
+                    self.return_fn(origin, task_ids)
+            except Exception as e:  # the origin's lease expiry requeues them instead
+                self.logger.debug(f"Could not hand back {len(task_ids)} tasks to {origin}: {e}")
+
+    def _pop_local(self) -> Optional[ScheduledTask]:
+        with self._cond:
+            while self.running:
+                while self._heap:
+                    task = heapq.heappop(self._heap)
+                    if task.origin == self.node_id and task.task_id not in self._futures:
+                        continue  # requeued after its lease expired, then the thief's result arrived
+                    self._running_count += 1
+                    return task
+                if self._steal_candidate() is not None:
+                    return None
+                self._cond.wait(self.idle_wait)
+            return None
+
+    def _steal_candidate(self) -> Optional[str]:
+        if self.steal_fn is None:
+            return None
+        best, best_spare = None, self.steal_threshold - 1
+        for peer_id, report in self._peer_loads.items():
+            spare = report.get("stealable", 0)
+            if spare > best_spare:
+                best, best_spare = peer_id, spare
+        return best
+
+    def _try_steal(self) -> bool:
+        with self._cond:
+            victim = self._steal_candidate()
+            if victim is None:
+                return False
+            # Assume the grant drains the victim so other idle workers look elsewhere
+            report = self._peer_loads[victim]
+            report["stealable"] = max(0, report.get("stealable", 0) - self.steal_batch)
+
+        try:
+            granted = self.steal_fn(victim, self.steal_batch) or []
+        except Exception as e:
+            self.logger.debug(f"Steal from {victim} failed: {e}")
+            return False
+
+        if not granted:
+            return False
+
+        with self._cond:
+            for item in granted:
+                self._held[item["task_id"]] = item["origin"]
+                heapq.heappush(self._heap, ScheduledTask(
+                    sort_key=(-item["priority"], -item["rarity_score"], next(self._seq)),
+                    task_id=item["task_id"],
+                    payload=item["payload"],
+                    priority=item["priority"],
+                    rarity_score=item["rarity_score"],
+                    origin=item["origin"],
+                ))
+            self.stats["stolen_in"] += len(granted)
+            self._cond.notify_all()
+
+        self.logger.debug(f"🦝 Stole {len(granted)} tasks from {victim}")
+        return True
+
+    def _worker_loop(self):
+        while self.running:
+            task = self._pop_local()
+            if task is None:
+                if self.running and not self._try_steal():
+                    time.sleep(self.idle_wait)
+                continue
+            try:
+                self._run(task)
+            finally:
+                with self._cond:
+                    self._running_count -= 1
+
+    def _run(self, task: ScheduledTask):
+        result, error = None, None
+        try:
+            result = self.executor(task.payload)
+            with self._cond:
+                self.stats["executed"] += 1
+        except Exception as e:
+            error = str(e)
+            with self._cond:
+                self.stats["failed"] += 1
+            self.logger.warning(f"Task {task.task_id} failed: {e}")
+
+        if task.origin == self.node_id:
+            with self._cond:
+                entry = self._futures.pop(task.task_id, None)
+            if entry is not None:
+                self._resolve(entry[0], entry[1], result, error)
+        elif self.result_fn is not None:
+            try:
+                self.result_fn(task.origin, {
+                    "type": "task_result",
+                    "task_id": task.task_id,
+                    "result": result,
+                    "error": error,
+                    "executed_by": self.node_id,
+                })
+            except Exception as e:  # the origin requeues it once the lease lapses
+                self.logger.warning(f"Could not return result of {task.task_id} to {task.origin}: {e}")
+            finally:
+                with self._cond:
+                    self._held.pop(task.task_id, None)
+
+    def _resolve(self, future: Future, key: str, result: Any, error: Optional[str]):
+        if error is None:
+            self.cache.put(key, result)
+        with self._cond:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(result)
+
+    def _advertise_loop(self):
+        while self.running:
+            self._expire_leases()
+            self._renew_held()
+            if self.advertise_fn is not None:
+                try:
+                    self.advertise_fn(self.load_report())
+                except Exception as e:
+                    self.logger.debug(f"Load advertisement failed: {e}")
+            time.sleep(self.advertise_interval)
+
+
+def attach_to_network(scheduler: WorkStealingScheduler, network, request_timeout: float = 5.0):
+    """
+    Wire a scheduler to a P2PNetwork: load adverts, steal requests, leases and result return.
+    """
+    def advertise(report: Dict):
+        message = {"type": "load_advert"}
+        message.update(report)
+        network.broadcast_message(message)
+
+    def steal(peer_id: str, max_tasks: int) -> List[Dict]:
+        reply = network.transport.request(
+            peer_id, {"type": "steal_request", "max_tasks": max_tasks}, timeout=request_timeout
+        )
+        return reply.get("tasks", [])
+
+    def send_result(origin: str, message: Dict):
+        if not network.send_message(origin, message):
+            raise ConnectionError(f"No connection to {origin}")
+
+    def renew(origin: str, task_ids: List[str]):
+        send_result(origin, {"type": "lease_renew", "task_ids": task_ids})
+
+    def hand_back(origin: str, task_ids: List[str]):
+        send_result(origin, {"type": "steal_return", "task_ids": task_ids})
+
+    network.register_handler(
+        "load_advert", lambda peer_id, msg: scheduler.update_peer_load(peer_id, msg)
+    )
+    network.register_handler(
+        "steal_request",
+        lambda peer_id, msg: {"type": "steal_grant",
+                              "tasks": scheduler.steal(int(msg.get("max_tasks", 1)), thief=peer_id)}
+    )
+    network.register_handler(
+        "task_result",
+        lambda peer_id, msg: scheduler.complete_remote(msg["task_id"], msg.get("result"), msg.get("error"))
+    )
+    network.register_handler(
+        "lease_renew", lambda peer_id, msg: scheduler.renew_leases(peer_id, msg.get("task_ids", []))
+    )
+    network.register_handler(
+        "steal_return", lambda peer_id, msg: scheduler.return_stolen(peer_id, msg.get("task_ids", []))
+    )
+
+    scheduler.advertise_fn = advertise
+    scheduler.steal_fn = steal
+    scheduler.result_fn = send_result
+    scheduler.renew_fn = renew
+    scheduler.return_fn = hand_back
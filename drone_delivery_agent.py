@@ -31,6 +31,8 @@ except ImportError:
 
 import requests
 
+from vrp_solver import RouteDrone, RouteStop, RoutingProblem, solve_routes
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -343,6 +345,74 @@ class DroneDeliveryAgent:
             logger.warning(f"Route optimization failed, using direct path: {e}")
             return [pickup, delivery]
     
+    def plan_routes(
+        self,
+        order_ids: List[str] = None,
+        time_windows: Dict[str, Tuple[float, float]] = None,
+        hub: Tuple[float, float] = None,
+        time_budget_s: float = 2.0
+    ) -> Dict:
+        """
+        Plan multi-stop tours for pending orders (vehicle routing with time windows).
+        
+        Packages are loaded at the hub; each available drone flies one tour
+        within its payload, range and battery.
+        
+        Args:
+            order_ids: Orders to route (default: every pending order)
+            time_windows: {order_id: (earliest, latest)} arrival in minutes from now
+            hub: (lat, lon) tours start and end at (default: centre of available drones)
+            time_budget_s: Wall-clock budget for the solver
+            
+        Returns:
+            Plan with per-drone tours (order ids in visiting order) and unassigned orders
+        """
+        if not self.drone_fleet:
+            self._initialize_drone_fleet()
+        time_windows = time_windows or {}
+        
+        ids = self.active_orders if order_ids is None else order_ids
+        orders = [
+            self.active_orders[oid] for oid in ids
+            if oid in self.active_orders and self.active_orders[oid].status == DeliveryStatus.PENDING
+        ]
+        drones = [d for d in self.drone_fleet.values() if d.status == "available"]
+        if hub is None and drones:
+            hub = (
+                sum(d.current_location.latitude for d in drones) / len(drones),
+                sum(d.current_location.longitude for d in drones) / len(drones),
+            )
+        if not orders or not drones:
+            return {"success": True, "tours": [], "unassigned": [o.order_id for o in orders],
+                    "total_distance_km": 0.0}
+        
+        stops = [
+            RouteStop(
+                stop_id=order.order_id,
+                lat=order.delivery_location.latitude,
+                lon=order.delivery_location.longitude,
+                weight_kg=order.package.weight_kg,
+                ready_min=time_windows.get(order.order_id, (0.0, math.inf))[0],
+                due_min=time_windows.get(order.order_id, (0.0, math.inf))[1],
+            )
+            for order in orders
+        ]
+        fleet = [
+            RouteDrone(
+                drone_id=d.drone_id,
+                max_payload_kg=d.max_payload_kg,
+                battery_percent=d.battery_percent,
+                speed_kmh=d.cruise_speed_kmh,
+                max_range_km=d.max_range_km,
+            )
+            for d in drones
+        ]
+        plan = solve_routes(RoutingProblem(hub, stops, fleet), time_budget_s=time_budget_s)
+        
+        logger.info(f"Routes planned: {len(orders)} orders on {len(plan.tours)} tours, "
+                    f"{plan.total_distance_km:.1f}km, {len(plan.unassigned)} unassigned")
+        return {"success": True, **plan.to_dict()}
+    
     def dispatch_drone(self, order_id: str) -> Dict:
         """
         Dispatch drone for delivery order to decentralized nodes.
@@ -862,17 +932,17 @@ class DroneDeliveryAgent:
     
     def get_order_status_batch(self, order_ids: List[str]) -> List[Dict]:
         """Get status for multiple orders"""
-        statuses = []
-        for order_id in order_ids:
-            if order_id in self.active_orders:
-                order = self.active_orders[order_id]
-                statuses.append({
-                    "order_id": order_id,
-                    "status": order.status.value,
-                    "price_usd": order.dynamic_price_usd,
-                    "drone_type": order.drone_type.value
-                })
-        return statuses
+        orders = self.active_orders
+        return [
+            {
+                "order_id": order.order_id,
+                "status": order.status.value,
+                "price_usd": order.dynamic_price_usd,
+                "drone_type": order.drone_type.value
+            }
+            for order in (orders.get(order_id) for order_id in order_ids)
+            if order is not None
+        ]
 
 
 # ============================================================================
@@ -6,6 +6,10 @@ Threading-based multi-drone simulation with decentralized node integration
 """
 
 import json
+import os
+import heapq
+import itertools
+import tempfile
 import threading
 import time
 import uuid
@@ -15,9 +19,23 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict, field
 from enum import Enum
-from collections import defaultdict
+from collections import defaultdict, deque
 import random
-import queue
+
+import numpy as np
+
+# Assignment tuning
+ASSIGN_SEARCH_RADIUS_KM = 50.0  # beyond this every drone takes the same distance penalty
+GRID_CELL_DEG = 0.25  # spatial index cell size (~28 km of latitude)
+BATCH_CANDIDATES = 10  # best drones kept per delivery for the batch matching
+PRIORITY_BONUS = 100.0  # per priority level; larger than any score, so higher priority wins contested drones
+DISTANCE_TIEBREAK = 0.01  # benefit lost per km, so equal scores go to the nearest drone
+AUCTION_EPSILON = 0.5  # minimum bid increment; the matching is within n * epsilon of optimal (scores step by 5)
+
+# Worker & dashboard tuning
+FLIGHT_RETRY_DELAY_S = 0.5  # before re-flying a delivery whose failure was recovered
+DASHBOARD_MIN_INTERVAL_S = 1.0  # dashboard snapshots are written at most this often
+BATTERY_BUCKETS = 10  # battery histogram bins (10% each)
 
 # ============================================================================
 # ENUMS & DATA CLASSES
@@ -150,6 +168,14 @@ class FlightSimulator:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c
     
+    @staticmethod
+    def distances_km(lat, lon, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Vectorized Haversine distance; broadcasts (e.g. pickups as a column against drones as a row)"""
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2, lon2 = np.radians(lats), np.radians(lons)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        return 6371 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
     @staticmethod
     def calculate_flight_time(distance_km: float, drone_speed_kmh: float = 50, weather_wind_kmh: float = 0) -> float:
         """Calculate flight time with weather effects"""
@@ -178,6 +204,79 @@ class FlightSimulator:
         return min(0.3, base_failure * fault_multiplier * weather_multiplier)  # Cap at 30%
 
 
+# ============================================================================
+# SPATIAL INDEX
+# ============================================================================
+
+class SpatialGrid:
+    """Uniform lat/lon grid mapping cells to keys, for radius queries without a full scan"""
+    
+    def __init__(self, cell_deg: float = GRID_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.columns = int(round(360 / cell_deg))
+        self.cells: Dict[Tuple[int, int], list] = defaultdict(list)
+        self.positions: Dict = {}
+    
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg)) % self.columns
+    
+    def insert(self, key, lat: float, lon: float):
+        if key in self.positions:
+            self.remove(key)
+        self.positions[key] = (lat, lon)
+        self.cells[self.cell(lat, lon)].append(key)
+    
+    def remove(self, key):
+        lat, lon = self.positions.pop(key)
+        cell = self.cell(lat, lon)
+        self.cells[cell].remove(key)
+        if not self.cells[cell]:
+            del self.cells[cell]
+    
+    def query(self, lat: float, lon: float, radius_km: float) -> list:
+        """Keys in every cell overlapping the radius (callers filter by exact distance)"""
+        return self._collect(lat, lat, lon, lon, radius_km)
+    
+    def query_cell(self, cell: Tuple[int, int], radius_km: float) -> list:
+        """Keys within radius_km of any point of `cell`, so one lookup serves every point in it"""
+        row, col = cell
+        lat_lo, lon_lo = row * self.cell_deg, col * self.cell_deg
+        return self._collect(lat_lo, lat_lo + self.cell_deg, lon_lo, lon_lo + self.cell_deg, radius_km)
+    
+    def _collect(self, lat_lo: float, lat_hi: float, lon_lo: float, lon_hi: float, radius_km: float) -> list:
+        dlat = radius_km / 111.0
+        widest = max(abs(lat_lo), abs(lat_hi)) + dlat  # longitude degrees shrink toward the poles
+        dlon = min(180.0, radius_km / (111.32 * max(math.cos(math.radians(min(widest, 90.0))), 0.01)))
+        row_lo, col_lo = self.cell(lat_lo - dlat, lon_lo - dlon)
+        row_hi = int(math.floor((lat_hi + dlat) / self.cell_deg))
+        span = min(self.columns - 1,
+                   int(math.floor((lon_hi + dlon) / self.cell_deg)) - int(math.floor((lon_lo - dlon) / self.cell_deg)))
+        found = []
+        for row in range(row_lo, row_hi + 1):
+            for offset in range(span + 1):
+                found.extend(self.cells.get((row, (col_lo + offset) % self.columns), ()))
+        return found
+
+
+class FleetSnapshot:
+    """Column arrays of drone state, so candidates are scored with numpy instead of one by one"""
+    
+    def __init__(self, drones: List[VirtualDrone]):
+        self.drones = drones
+        self.lat = np.array([d.lat for d in drones], dtype=float)
+        self.lon = np.array([d.lon for d in drones], dtype=float)
+        self.battery = np.array([d.battery_percent for d in drones], dtype=float)
+        self.max_payload = np.array([d.max_payload_kg for d in drones], dtype=float)
+        self.reliability = np.array([d.metrics.reliability_score for d in drones], dtype=float)
+        self.idle = np.array([d.status == DroneStatus.IDLE for d in drones], dtype=bool)
+        self.unavailable = np.array(
+            [d.status in (DroneStatus.CHARGING, DroneStatus.MAINTENANCE) for d in drones], dtype=bool
+        )
+    
+    def __len__(self):
+        return len(self.drones)
+
+
 # ============================================================================
 # INTELLIGENT ASSIGNMENT ENGINE
 # ============================================================================
@@ -261,6 +360,69 @@ class IntelligentAssignmentEngine:
         
         return max(0, min(100, score))
     
+    def score_drones(
+        self,
+        snapshot: FleetSnapshot,
+        delivery: FleetDelivery,
+        region: Region,
+        idx: np.ndarray = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized score_drone_for_delivery() over snapshot rows `idx` (default all)
+        
+        Returns:
+            (scores, distances to pickup in km)
+        """
+        scores, distance = self.score_matrix(snapshot, [delivery], [region], idx)
+        return scores[0], distance[0]
+    
+    def score_matrix(
+        self,
+        snapshot: FleetSnapshot,
+        deliveries: List[FleetDelivery],
+        regions: List[Region],
+        idx: np.ndarray = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores and pickup distances of snapshot rows `idx` for each delivery, as (deliveries x drones) arrays"""
+        if idx is None:
+            idx = np.arange(len(snapshot))
+        column = lambda values: np.array(values, dtype=float)[:, None]
+        pickup_lat = column([d.pickup_lat for d in deliveries])
+        pickup_lon = column([d.pickup_lon for d in deliveries])
+        weight = column([d.package_weight_kg for d in deliveries])
+        vip = column([d.priority == DeliveryPriority.VIP_RARE for d in deliveries]).astype(bool)
+        severity = column([self._weather_severity(r) for r in regions])
+        windy = column([r.wind_speed_kmh > 20 for r in regions]).astype(bool)
+        flight_distance = self.flight_sim.distances_km(
+            pickup_lat, pickup_lon,
+            column([d.delivery_lat for d in deliveries]), column([d.delivery_lon for d in deliveries])
+        )
+        
+        distance = self.flight_sim.distances_km(pickup_lat, pickup_lon, snapshot.lat[idx], snapshot.lon[idx])
+        battery_needed = np.minimum(100, (distance + flight_distance + 10) + weight * 0.5 + severity * 5)
+        reliability = snapshot.reliability[idx]
+        max_payload = snapshot.max_payload[idx]
+        
+        score = 100.0 - np.where(distance > 50, 20, np.where(distance > 20, 10, 0))
+        score -= np.where(snapshot.battery[idx] < battery_needed + 20, 30, 0)
+        score -= np.where(weight > max_payload * 0.8, 15, 0)
+        score *= reliability
+        score += np.where(vip, np.where(reliability > 0.95, 20, np.where(reliability < 0.9, -20, 0)), 0)
+        score -= np.where(windy, 15, 0)
+        score += np.where(snapshot.idle[idx], 10, 0)
+        score = np.clip(score, 0, 100)
+        score[(weight > max_payload) | snapshot.unavailable[idx]] = 0
+        return score, distance
+    
+    def max_score_beyond(self, distance_km: float, delivery: FleetDelivery, region: Region) -> float:
+        """Upper bound on the score of any drone further than distance_km (>= 50) from the pickup"""
+        bound = 80 + 10  # distance penalty applies; reliability_score is at most 1.0; idle bonus
+        if delivery.priority == DeliveryPriority.VIP_RARE:
+            bound += 20
+        if region.wind_speed_kmh > 20:
+            bound -= 15
+        return min(100, bound)
+    
     def _weather_severity(self, region: Region) -> int:
         """Convert weather to severity level 0-4"""
         severity_map = {
@@ -273,6 +435,42 @@ class IntelligentAssignmentEngine:
         return severity_map.get(region.weather, 0)
 
 
+def auction_assignment(candidates: List[List[Tuple[int, float]]], epsilon: float = AUCTION_EPSILON) -> Dict[int, int]:
+    """
+    Auction algorithm (Bertsekas) for sparse maximum-benefit matching
+    
+    Args:
+        candidates: per bidder, [(item, benefit)]; staying unmatched is worth 0
+        epsilon: minimum bid increment
+    
+    Returns:
+        {bidder: item}
+    """
+    prices: Dict[int, float] = defaultdict(float)
+    owner: Dict[int, int] = {}
+    assigned: Dict[int, int] = {}
+    waiting = deque(i for i, options in enumerate(candidates) if options)
+    while waiting:
+        bidder = waiting.popleft()
+        best_item, best_value, second_value = None, 0.0, 0.0
+        for item, benefit in candidates[bidder]:
+            value = benefit - prices[item]
+            if value > best_value:
+                best_item, best_value, second_value = item, value, best_value
+            elif value > second_value:
+                second_value = value
+        if best_item is None:
+            continue  # every option costs more than it is worth: stay unmatched
+        prices[best_item] += best_value - second_value + epsilon
+        previous = owner.get(best_item)
+        owner[best_item] = bidder
+        assigned[bidder] = best_item
+        if previous is not None:
+            del assigned[previous]
+            waiting.append(previous)
+    return assigned
+
+
 # ============================================================================
 # SELF-HEALING & FAILURE RECOVERY
 # ============================================================================
@@ -412,6 +610,75 @@ class SelfHealingEngine:
         return severity_map.get(region.weather, 0)
 
 
+# ============================================================================
+# INCREMENTAL FLEET STATISTICS
+# ============================================================================
+
+class FleetStats:
+    """
+    Fleet aggregates kept current on every drone state change
+    
+    observe() diffs a drone against the state last recorded for it, so a
+    transition costs O(1) instead of a walk over the whole fleet.
+    """
+    
+    def __init__(self):
+        self.status_counts: Dict[str, int] = defaultdict(int)
+        self.battery_histogram = [0] * BATTERY_BUCKETS
+        self.region_totals: Dict[str, int] = defaultdict(int)
+        self.region_charging: Dict[str, int] = defaultdict(int)
+        self.battery_sum = 0.0
+        self.reliability_sum = 0.0
+        self.low_battery = 0  # below 20% and not charging
+        self.maintenance_needed = 0
+        self._seen: Dict[str, tuple] = {}
+    
+    def __len__(self) -> int:
+        return len(self._seen)
+    
+    @staticmethod
+    def _state(drone: VirtualDrone) -> tuple:
+        return (
+            drone.status,
+            drone.region_id,
+            drone.battery_percent,
+            drone.metrics.reliability_score,
+            drone.battery_percent < 20 and drone.status != DroneStatus.CHARGING,
+            drone.metrics.maintenance_needed or drone.fault_count > 5,
+        )
+    
+    def _apply(self, state: tuple, sign: int):
+        status, region_id, battery, reliability, low_battery, maintenance = state
+        self.status_counts[status.value] += sign
+        bucket = min(int(battery * BATTERY_BUCKETS // 100), BATTERY_BUCKETS - 1)
+        self.battery_histogram[max(bucket, 0)] += sign
+        self.region_totals[region_id] += sign
+        if status == DroneStatus.CHARGING:
+            self.region_charging[region_id] += sign
+        self.battery_sum += sign * battery
+        self.reliability_sum += sign * reliability
+        self.low_battery += sign * low_battery
+        self.maintenance_needed += sign * maintenance
+    
+    def observe(self, drone: VirtualDrone) -> bool:
+        """Record the drone's current state; returns True if any tracked value changed"""
+        state = self._state(drone)
+        previous = self._seen.get(drone.drone_id)
+        if state == previous:
+            return False
+        if previous is not None:
+            self._apply(previous, -1)
+        self._apply(state, 1)
+        self._seen[drone.drone_id] = state
+        return True
+    
+    def average_battery(self) -> float:
+        return self.battery_sum / len(self) if self._seen else 0
+    
+    def average_reliability(self) -> float:
+        return self.reliability_sum / len(self) if self._seen else 0
+
+
 # ============================================================================
 # DRONE FLEET MANAGER - MAIN ORCHESTRATOR
 # ============================================================================
@@ -436,6 +703,7 @@ class DroneFleetManager:
         # Core fleet management
         self.drones: Dict[str, VirtualDrone] = {}
         self.regions: Dict[str, Region] = self._initialize_regions()
+        self._region_ids = None  # region centers as arrays, built on first lookup
         self.pending_deliveries: Dict[str, FleetDelivery] = {}
         self.active_deliveries: Dict[str, FleetDelivery] = {}
         self.completed_deliveries: List[FleetDelivery] = []
@@ -445,12 +713,20 @@ class DroneFleetManager:
         self.flight_sim = FlightSimulator()
         self.assignment_engine = IntelligentAssignmentEngine(self.flight_sim)
         self.healing_engine = SelfHealingEngine(self.flight_sim)
+        self.spatial_index = SpatialGrid()
+        self.fleet_stats = FleetStats()
         
         # Threading & synchronization
         self.lock = threading.RLock()
-        self.command_queue = queue.Queue()
+        self.command_queue: deque = deque()  # ("assign" | "fly", delivery_id), ready to run
+        self._delayed_commands: List[tuple] = []  # heap of (due, seq, command)
+        self._command_seq = itertools.count()
+        self._work_ready = threading.Condition()  # guards both queues; workers sleep on it
+        self._awaiting_drone: deque = deque()  # deliveries no drone could take yet
         self.stop_event = threading.Event()
         self.worker_threads: List[threading.Thread] = []
+        self._dashboard_thread: Optional[threading.Thread] = None
+        self._dashboard_dirty = threading.Event()
         
         # Fleet statistics
         self.total_deliveries_assigned = 0
@@ -487,7 +763,8 @@ class DroneFleetManager:
         region_id: str,
         drone_type: str = "standard",
         lat: float = None,
-        lon: float = None
+        lon: float = None,
+        drone_id: str = None
     ) -> str:
         """
         Add drone to fleet
@@ -497,6 +774,7 @@ class DroneFleetManager:
             drone_type: Type (economy, premium, elite, bvlos)
             lat: Starting latitude (default: region hub)
             lon: Starting longitude (default: region hub)
+            drone_id: Explicit ID (default: generated)
         
         Returns:
             Drone ID
@@ -523,7 +801,7 @@ class DroneFleetManager:
         
         spec = specs.get(drone_type, specs["economy"])
         
-        drone_id = f"drone_{region_id}_{uuid.uuid4().hex[:6]}"
+        drone_id = drone_id or f"drone_{region_id}_{uuid.uuid4().hex[:6]}"
         
         drone = VirtualDrone(
             drone_id=drone_id,
@@ -535,6 +813,8 @@ class DroneFleetManager:
         
         with self.lock:
             self.drones[drone_id] = drone
+            self.spatial_index.insert(drone_id, lat, lon)
+            self._drone_changed(drone)
         
         self.logger.info(f"✅ Added drone: {drone_id} ({drone_type}) to {region_id}")
         return drone_id
@@ -589,7 +869,8 @@ class DroneFleetManager:
         package_weight_kg: float,
         rarity_score: float,
         priority: str = "standard",
-        revenue_usd: float = 0.0
+        revenue_usd: float = 0.0,
+        delivery_id: str = None
     ) -> Tuple[bool, str]:
         """
         Submit delivery order for fleet processing
@@ -602,11 +883,12 @@ class DroneFleetManager:
             rarity_score: Rarity score (0-100, >90 = VIP rare)
             priority: Priority level (standard, express, premium, vip_rare)
             revenue_usd: Revenue amount for this delivery
+            delivery_id: Explicit ID (default: generated)
         
         Returns:
             (success, message)
         """
-        delivery_id = f"delivery_{uuid.uuid4().hex[:8]}"
+        delivery_id = delivery_id or f"delivery_{uuid.uuid4().hex[:8]}"
         
         # Map priority string to enum
         priority_map = {
@@ -635,6 +917,7 @@ class DroneFleetManager:
         
         with self.lock:
             self.pending_deliveries[delivery_id] = delivery
+        self._enqueue("assign", delivery_id)
         
         self.logger.info(
             f"📦 Delivery submitted: {delivery_id} | "
@@ -648,82 +931,178 @@ class DroneFleetManager:
         """
         Assign delivery to best available drone
         
+        Only drones within ASSIGN_SEARCH_RADIUS_KM of the pickup are scored,
+        unless none of them beats the best score a farther drone could reach.
+        Equal scores go to the nearest drone.
+        
         Args:
             delivery_id: Delivery ID from submit_delivery()
         
         Returns:
             (success, assigned_drone_id)
         """
-        if delivery_id not in self.pending_deliveries:
-            self.logger.error(f"Delivery not found: {delivery_id}")
-            return False, None
-        
-        delivery = self.pending_deliveries[delivery_id]
+        with self.lock:
+            delivery = self.pending_deliveries.get(delivery_id)
+            if delivery is None:
+                self.logger.error(f"Delivery not found: {delivery_id}")
+                return False, None
+            
+            # Determine target region (closest to delivery location)
+            target_region = self._find_closest_region(delivery.delivery_lat, delivery.delivery_lon)
+            region = self.regions[target_region]
+            
+            nearby = [self.drones[d] for d in self.spatial_index.query(
+                delivery.pickup_lat, delivery.pickup_lon, ASSIGN_SEARCH_RADIUS_KM
+            )]
+            best_drone, best_score = self._best_drone(nearby, delivery, region)
+            if best_score < self.assignment_engine.max_score_beyond(ASSIGN_SEARCH_RADIUS_KM, delivery, region):
+                best_drone, best_score = self._best_drone(list(self.drones.values()), delivery, region)
+            
+            if not best_drone or best_score <= 0:
+                self.logger.warning(
+                    f"❌ No suitable drone for delivery {delivery_id} "
+                    f"(weight: {delivery.package_weight_kg}kg, priority: {delivery.priority.name})"
+                )
+                return False, None
+            
+            self._commit_assignment(delivery, best_drone)
         
-        # Determine target region (closest to delivery location)
-        target_region = self._find_closest_region(
-            delivery.delivery_lat,
-            delivery.delivery_lon
+        self.logger.info(
+            f"✅ Delivery {delivery_id} assigned to {best_drone.drone_id} "
+            f"(Score: {best_score:.0f}, Region: {target_region})"
         )
         
-        region = self.regions[target_region]
+        return True, best_drone.drone_id
+    
+    def assign_pending_batch(self, max_deliveries: int = None) -> Dict[str, str]:
+        """
+        Assign a whole window of pending deliveries at once
         
-        # Score all available drones
-        best_drone = None
-        best_score = -1
+        Each delivery keeps its BATCH_CANDIDATES best nearby drones, then an
+        auction matches deliveries to drones maximizing total benefit
+        (score + PRIORITY_BONUS per priority level - DISTANCE_TIEBREAK per km).
+        Deliveries that lose every candidate bid again against the drones
+        still free; those with no drone in range take the best remaining
+        drone anywhere, highest priority first.
         
-        with self.lock:
-            for drone in self.drones.values():
-                if drone.status in [DroneStatus.IDLE, DroneStatus.CHARGING]:
-                    score = self.assignment_engine.score_drone_for_delivery(
-                        drone, delivery, region, self.regions
-                    )
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_drone = drone
-        
-        if not best_drone or best_score <= 0:
-            self.logger.warning(
-                f"❌ No suitable drone for delivery {delivery_id} "
-                f"(weight: {delivery.package_weight_kg}kg, priority: {delivery.priority.name})"
-            )
-            return False, None
+        Args:
+            max_deliveries: Window size (default: every pending delivery),
+                highest priority and oldest first
         
-        # Assign drone
+        Returns:
+            {delivery_id: drone_id} for the deliveries assigned
+        """
         with self.lock:
-            best_drone.assigned_delivery_id = delivery_id
-            best_drone.status = DroneStatus.ASSIGNED
-            delivery.drone_id = best_drone.drone_id
-            delivery.assigned_at = datetime.now().isoformat()
-            delivery.status = "assigned"
+            window = sorted(
+                self.pending_deliveries.values(),
+                key=lambda d: (-d.priority.value, d.created_at)
+            )[:max_deliveries]
+            free = [d for d in self.drones.values() if d.status in (DroneStatus.IDLE, DroneStatus.CHARGING)]
+            snapshot = FleetSnapshot(free)
+            taken = np.zeros(len(snapshot), dtype=bool)
+            matches: Dict[str, int] = {}
+            regions = [self.regions[self._find_closest_region(d.delivery_lat, d.delivery_lon)] for d in window]
+            
+            remaining = list(range(len(window)))
+            out_of_range = []
+            while remaining and not taken.all():
+                grid = SpatialGrid()
+                for row in np.flatnonzero(~taken):
+                    grid.insert(int(row), snapshot.lat[row], snapshot.lon[row])
+                
+                # Deliveries picked up in the same cell share one candidate lookup and one scoring pass
+                by_cell = defaultdict(list)
+                for i in remaining:
+                    by_cell[grid.cell(window[i].pickup_lat, window[i].pickup_lon)].append(i)
+                
+                candidates, bidders = [], []
+                for cell, group in by_cell.items():
+                    rows = np.array(grid.query_cell(cell, ASSIGN_SEARCH_RADIUS_KM), dtype=int)
+                    if not len(rows):
+                        out_of_range.extend(group)
+                        continue
+                    for start in range(0, len(group), 256):
+                        chunk = group[start:start + 256]
+                        scores, distance = self.assignment_engine.score_matrix(
+                            snapshot, [window[i] for i in chunk], [regions[i] for i in chunk], rows
+                        )
+                        priority = np.array([window[i].priority.value - 1 for i in chunk])[:, None]
+                        benefit = scores + PRIORITY_BONUS * priority - DISTANCE_TIEBREAK * distance
+                        benefit[(scores <= 0) | (distance > ASSIGN_SEARCH_RADIUS_KM)] = -np.inf
+                        k = min(BATCH_CANDIDATES, len(rows))
+                        top = np.argpartition(-benefit, k - 1, axis=1)[:, :k]
+                        for n, i in enumerate(chunk):
+                            options = [(int(rows[j]), float(benefit[n, j])) for j in top[n] if benefit[n, j] > -np.inf]
+                            if options:
+                                candidates.append(options)
+                                bidders.append(i)
+                            else:
+                                out_of_range.append(i)
+                
+                won = auction_assignment(candidates)
+                for bidder, row in won.items():
+                    matches[window[bidders[bidder]].delivery_id] = row
+                    taken[row] = True
+                if not won:
+                    break
+                won_ids = {bidders[b] for b in won}
+                remaining = [bidders[b] for b in range(len(bidders)) if bidders[b] not in won_ids]
+            
+            # No free drone in range: best remaining drone anywhere, highest priority first
+            for i in sorted(out_of_range):
+                free_rows = np.flatnonzero(~taken)
+                if not len(free_rows):
+                    break
+                scores, distance = self.assignment_engine.score_drones(snapshot, window[i], regions[i], free_rows)
+                if scores.max() <= 0:
+                    continue
+                best = np.flatnonzero(scores == scores.max())
+                row = free_rows[best[np.argmin(distance[best])]]
+                matches[window[i].delivery_id] = int(row)
+                taken[row] = True
             
-            # Move from pending to active
-            self.active_deliveries[delivery_id] = self.pending_deliveries.pop(delivery_id)
+            by_id = {d.delivery_id: d for d in window}
+            for delivery_id, row in matches.items():
+                self._commit_assignment(by_id[delivery_id], snapshot.drones[row])
         
+        self.logger.info(f"✅ Batch assigned {len(matches)}/{len(window)} deliveries")
+        return {delivery_id: snapshot.drones[row].drone_id for delivery_id, row in matches.items()}
+    
+    def _best_drone(
+        self,
+        drones: List[VirtualDrone],
+        delivery: FleetDelivery,
+        region: Region
+    ) -> Tuple[Optional[VirtualDrone], float]:
+        """Highest scoring idle/charging drone, nearest first on ties"""
+        available = [d for d in drones if d.status in (DroneStatus.IDLE, DroneStatus.CHARGING)]
+        if not available:
+            return None, -1
+        scores, distance = self.assignment_engine.score_drones(FleetSnapshot(available), delivery, region)
+        best = np.flatnonzero(scores == scores.max())
+        pick = best[np.argmin(distance[best])]
+        return available[pick], float(scores[pick])
+    
+    def _commit_assignment(self, delivery: FleetDelivery, drone: VirtualDrone):
+        """Mark drone assigned and move delivery from pending to active (caller holds the lock)"""
+        drone.assigned_delivery_id = delivery.delivery_id
+        drone.status = DroneStatus.ASSIGNED
+        delivery.drone_id = drone.drone_id
+        delivery.assigned_at = datetime.now().isoformat()
+        delivery.status = "assigned"
+        self.active_deliveries[delivery.delivery_id] = self.pending_deliveries.pop(delivery.delivery_id)
         self.total_deliveries_assigned += 1
-        
-        self.logger.info(
-            f"✅ Delivery {delivery_id} assigned to {best_drone.drone_id} "
-            f"(Score: {best_score:.0f}, Region: {target_region})"
-        )
-        
-        return True, best_drone.drone_id
+        self._drone_changed(drone)
+        self._enqueue("fly", delivery.delivery_id)
     
     def _find_closest_region(self, lat: float, lon: float) -> str:
         """Find closest region to coordinates"""
-        closest = None
-        min_distance = float('inf')
-        
-        for region_id, region in self.regions.items():
-            distance = self.flight_sim.calculate_distance(
-                region.center_lat, region.center_lon, lat, lon
-            )
-            if distance < min_distance:
-                min_distance = distance
-                closest = region_id
-        
-        return closest
+        if self._region_ids is None:
+            self._region_ids = list(self.regions)
+            self._region_lat = np.array([r.center_lat for r in self.regions.values()])
+            self._region_lon = np.array([r.center_lon for r in self.regions.values()])
+        distances = self.flight_sim.distances_km(lat, lon, self._region_lat, self._region_lon)
+        return self._region_ids[int(np.argmin(distances))]
     
     # ========================================================================
     # FLIGHT SIMULATION & MONITORING
@@ -762,6 +1141,8 @@ class DroneFleetManager:
             recovered, action = self.healing_engine.handle_failure(
                 drone, delivery, reason, self.drones
             )
+            with self.lock:
+                self._drone_changed(drone)
             
             if not recovered:
                 # Permanent failure
@@ -769,6 +1150,7 @@ class DroneFleetManager:
                 with self.lock:
                     self.active_deliveries.pop(delivery_id)
                     self.failed_deliveries.append(delivery)
+                    self._dashboard_dirty.set()
                 self.total_deliveries_failed += 1
                 
                 self.logger.error(
@@ -780,7 +1162,9 @@ class DroneFleetManager:
                 return True, f"recovery_in_progress: {action}"
         
         # Simulate flight
-        drone.status = DroneStatus.IN_FLIGHT
+        with self.lock:
+            drone.status = DroneStatus.IN_FLIGHT
+            self._drone_changed(drone)
         
         # Calculate flight distance & time
         flight_distance = self.flight_sim.calculate_distance(
@@ -811,6 +1195,7 @@ class DroneFleetManager:
             
             # Update delivery
             delivery.status = "in_flight"
+            self._drone_changed(drone)
         
         # Track fleet metrics
         self.total_distance_flown_km += flight_distance
@@ -834,6 +1219,7 @@ class DroneFleetManager:
             # Move to completed
             self.active_deliveries.pop(delivery_id)
             self.completed_deliveries.append(delivery)
+            self._drone_changed(drone)
         
         self.total_deliveries_completed += 1
         
@@ -857,25 +1243,19 @@ class DroneFleetManager:
             Fleet monitoring data
         """
         with self.lock:
-            # Count drones by status
-            status_counts = defaultdict(int)
-            for drone in self.drones.values():
-                status_counts[drone.status.value] += 1
-            
-            # Aggregate metrics
-            total_flights = sum(d.metrics.total_flights for d in self.drones.values())
-            total_successful = sum(d.metrics.successful_deliveries for d in self.drones.values())
-            avg_battery = sum(d.battery_percent for d in self.drones.values()) / len(self.drones) if self.drones else 0
-            avg_reliability = sum(d.metrics.reliability_score for d in self.drones.values()) / len(self.drones) if self.drones else 0
-            
+            stats = self.fleet_stats
             return {
                 "manager_id": self.manager_id,
                 "timestamp": datetime.now().isoformat(),
                 "fleet": {
                     "total_drones": len(self.drones),
-                    "status_distribution": dict(status_counts),
-                    "average_battery_percent": round(avg_battery, 1),
-                    "average_reliability_score": round(avg_reliability, 3),
+                    "status_distribution": {status: n for status, n in stats.status_counts.items() if n},
+                    "battery_histogram": {
+                        f"{i * 100 // BATTERY_BUCKETS}-{(i + 1) * 100 // BATTERY_BUCKETS}": n
+                        for i, n in enumerate(stats.battery_histogram)
+                    },
+                    "average_battery_percent": round(stats.average_battery(), 1),
+                    "average_reliability_score": round(stats.average_reliability(), 3),
                 },
                 "deliveries": {
                     "pending": len(self.pending_deliveries),
@@ -894,8 +1274,8 @@ class DroneFleetManager:
                 },
                 "regions": {
                     region_id: {
-                        "drones_active": sum(1 for d in self.drones.values() if d.region_id == region_id and d.status != DroneStatus.CHARGING),
-                        "drones_total": sum(1 for d in self.drones.values() if d.region_id == region_id),
+                        "drones_active": stats.region_totals[region_id] - stats.region_charging[region_id],
+                        "drones_total": stats.region_totals[region_id],
                     }
                     for region_id in self.regions.keys()
                 }
@@ -910,8 +1290,11 @@ class DroneFleetManager:
         """
         monitoring_data = self.monitor_fleet()
         
-        # Update production dashboard
-        self._update_dashboard(monitoring_data)
+        # Update production dashboard (the background writer coalesces requests while running)
+        if self._dashboard_thread is not None:
+            self._dashboard_dirty.set()
+        else:
+            self._update_dashboard(monitoring_data)
         
         # Simulate sync with decentralized nodes
         sync_data = {
@@ -946,18 +1329,26 @@ class DroneFleetManager:
         return (self.total_deliveries_completed / total) * 100
     
     def _update_dashboard(self, monitoring_data: Dict):
-        """Update production dashboard JSON"""
+        """Update production dashboard JSON (atomically: readers never see a partial file)"""
         try:
-            dashboard = {
-                "fleet_manager": self.manager_id,
-                "last_updated": datetime.now().isoformat(),
-                "monitoring": monitoring_data,
-                "top_performers": self._get_top_drones(5),
-                "alerts": self._get_fleet_alerts()
-            }
+            with self.lock:
+                dashboard = {
+                    "fleet_manager": self.manager_id,
+                    "last_updated": datetime.now().isoformat(),
+                    "monitoring": monitoring_data,
+                    "top_performers": self._get_top_drones(5),
+                    "alerts": self._get_fleet_alerts()
+                }
             
-            with open(self.dashboard_file, 'w') as f:
-                json.dump(dashboard, f, indent=2)
+            directory = os.path.dirname(os.path.abspath(self.dashboard_file))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".dashboard-", suffix=".json")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(dashboard, f, indent=2)
+                os.replace(tmp_path, self.dashboard_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             
             self.logger.info(f"📊 Dashboard updated: {self.dashboard_file}")
         except Exception as e:
@@ -965,10 +1356,10 @@ class DroneFleetManager:
     
     def _get_top_drones(self, limit: int = 5) -> List[Dict]:
         """Get top performing drones"""
-        sorted_drones = sorted(
+        sorted_drones = heapq.nlargest(
+            limit,
             self.drones.values(),
-            key=lambda d: (d.metrics.successful_deliveries, d.metrics.reliability_score),
-            reverse=True
+            key=lambda d: (d.metrics.successful_deliveries, d.metrics.reliability_score)
         )
         
         return [
@@ -978,7 +1369,7 @@ class DroneFleetManager:
                 "reliability_score": round(d.metrics.reliability_score, 3),
                 "total_distance_km": round(d.metrics.total_distance_km, 1),
             }
-            for d in sorted_drones[:limit]
+            for d in sorted_drones
         ]
     
     def _get_fleet_alerts(self) -> List[Dict]:
@@ -986,23 +1377,23 @@ class DroneFleetManager:
         alerts = []
         
         # Low battery drones
-        low_battery = [d for d in self.drones.values() if d.battery_percent < 20 and d.status != DroneStatus.CHARGING]
+        low_battery = self.fleet_stats.low_battery
         if low_battery:
             alerts.append({
                 "type": "low_battery",
                 "severity": "warning",
-                "count": len(low_battery),
-                "message": f"{len(low_battery)} drones with low battery (<20%)"
+                "count": low_battery,
+                "message": f"{low_battery} drones with low battery (<20%)"
             })
         
         # Maintenance needed
-        maintenance_needed = [d for d in self.drones.values() if d.metrics.maintenance_needed or d.fault_count > 5]
+        maintenance_needed = self.fleet_stats.maintenance_needed
         if maintenance_needed:
             alerts.append({
                 "type": "maintenance_required",
                 "severity": "critical",
-                "count": len(maintenance_needed),
-                "message": f"{len(maintenance_needed)} drones need maintenance"
+                "count": maintenance_needed,
+                "message": f"{maintenance_needed} drones need maintenance"
             })
         
         # High failure rate
@@ -1026,6 +1417,10 @@ class DroneFleetManager:
         """
         Start fleet operation workers (threaded)
         
+        Workers sleep until a command is queued (submit_delivery queues an
+        assignment, an assignment queues the flight), so there is no polling.
+        A separate thread writes dashboard snapshots as state changes.
+        
         Args:
             num_workers: Number of worker threads
         """
@@ -1044,42 +1439,105 @@ class DroneFleetManager:
             worker.start()
             self.worker_threads.append(worker)
         
+        self._dashboard_thread = threading.Thread(
+            target=self._dashboard_loop,
+            name="FleetDashboard",
+            daemon=True
+        )
+        self._dashboard_thread.start()
+        self.worker_threads.append(self._dashboard_thread)
+        
         self.logger.info(f"🚀 Fleet operations started ({num_workers} workers)")
     
     def stop_fleet_operations(self, timeout: int = 5):
-        """Stop all fleet workers"""
+        """Stop all fleet workers (queued commands are kept for the next start)"""
         self.stop_event.set()
+        with self._work_ready:
+            self._work_ready.notify_all()
+        self._dashboard_dirty.set()
         
         for worker in self.worker_threads:
             worker.join(timeout=timeout)
         
         self.worker_threads.clear()
+        self._dashboard_thread = None
         self.logger.info("⏹️  Fleet operations stopped")
     
+    def _enqueue(self, action: str, delivery_id: str, delay: float = 0.0):
+        """Queue a worker command, runnable now or after `delay` seconds"""
+        with self._work_ready:
+            if delay > 0:
+                heapq.heappush(
+                    self._delayed_commands,
+                    (time.monotonic() + delay, next(self._command_seq), (action, delivery_id))
+                )
+            else:
+                self.command_queue.append((action, delivery_id))
+            self._work_ready.notify()
+    
+    def _next_command(self) -> Optional[Tuple[str, str]]:
+        """Block until a command is due; None once operations stop"""
+        with self._work_ready:
+            while not self.stop_event.is_set():
+                now = time.monotonic()
+                while self._delayed_commands and self._delayed_commands[0][0] <= now:
+                    self.command_queue.append(heapq.heappop(self._delayed_commands)[2])
+                if self.command_queue:
+                    return self.command_queue.popleft()
+                timeout = self._delayed_commands[0][0] - now if self._delayed_commands else None
+                self._work_ready.wait(timeout)
+        return None
+    
+    def _drone_changed(self, drone: VirtualDrone):
+        """
+        Fold a drone state change into the fleet stats (caller holds the lock)
+        
+        A drone becoming available re-queues the deliveries that found none.
+        """
+        if not self.fleet_stats.observe(drone):
+            return
+        self._dashboard_dirty.set()
+        if drone.status in (DroneStatus.IDLE, DroneStatus.CHARGING) and self._awaiting_drone:
+            waiting = sorted(
+                (self.pending_deliveries[d] for d in set(self._awaiting_drone) if d in self.pending_deliveries),
+                key=lambda d: (-d.priority.value, d.created_at)
+            )
+            self._awaiting_drone.clear()
+            for delivery in waiting:
+                self._enqueue("assign", delivery.delivery_id)
+    
     def _worker_loop(self):
         """Worker thread main loop"""
-        while not self.stop_event.is_set():
+        while True:
+            command = self._next_command()
+            if command is None:
+                return
+            action, delivery_id = command
             try:
-                # Process pending deliveries (assign to drones)
-                pending_list = list(self.pending_deliveries.keys())
-                for delivery_id in pending_list:
-                    if delivery_id in self.pending_deliveries:
-                        self.assign_delivery(delivery_id)
-                        time.sleep(0.1)
-                
-                # Simulate active flights
-                active_list = list(self.active_deliveries.keys())
-                for delivery_id in active_list:
-                    if delivery_id in self.active_deliveries:
-                        self.simulate_flight(delivery_id)
-                        time.sleep(0.1)
-                
-                # Brief pause before next iteration
-                time.sleep(0.5)
-            
+                if action == "assign":
+                    # Under the lock, so a drone freed meanwhile cannot miss this delivery
+                    with self.lock:
+                        if delivery_id in self.pending_deliveries:
+                            success, _ = self.assign_delivery(delivery_id)
+                            if not success and delivery_id in self.pending_deliveries:
+                                self._awaiting_drone.append(delivery_id)
+                else:
+                    success, message = self.simulate_flight(delivery_id)
+                    if success and message.startswith("recovery_in_progress"):
+                        self._enqueue("fly", delivery_id, FLIGHT_RETRY_DELAY_S)
             except Exception as e:
                 self.logger.error(f"Worker error: {e}")
-                time.sleep(1)
+    
+    def _dashboard_loop(self):
+        """Write a dashboard snapshot after state changes, at most once per DASHBOARD_MIN_INTERVAL_S"""
+        while True:
+            self._dashboard_dirty.wait()
+            if self.stop_event.is_set():
+                return
+            self._dashboard_dirty.clear()
+            self._update_dashboard(self.monitor_fleet())
+            if self.stop_event.wait(DASHBOARD_MIN_INTERVAL_S):
+                return
     
     # ========================================================================
     # SIMULATION UTILITIES
@@ -1108,6 +1566,7 @@ class DroneFleetManager:
                 if drone.status != DroneStatus.IN_FLIGHT:
                     drone.battery_percent = 100.0
                     drone.fault_count = max(0, drone.fault_count - 1)  # Reduce fault count on maintenance
+                    self._drone_changed(drone)
         
         self.logger.info("🔌 All drones charged")
     
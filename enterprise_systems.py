@@ -10,6 +10,8 @@ from typing import Dict, List, Any, Optional
 from collections import defaultdict
 import hashlib
 
+from text_search import create_index
+
 
 class ComplianceEngine:
     """Compliance and Legal Requirement Tracking"""
@@ -229,6 +231,9 @@ class KnowledgeBaseSystem:
         self.faqs = []
         self.searches = []
         self.ratings = defaultdict(list)
+        self._by_id = {}
+        self.index = create_index('kb_articles', fields={'title': 3.0, 'tags': 2.0, 'content': 1.0},
+                                  filter_fields=('category', 'tags', 'status'))
     
     def create_article(self, title: str, content: str, category: str,
                       author: str, tags: List[str]) -> Dict[str, Any]:
@@ -248,24 +253,34 @@ class KnowledgeBaseSystem:
             'status': 'published'
         }
         self.articles.append(article)
+        self._by_id[article['id']] = article
+        self.index.add(article['id'], article)
         return article
     
-    def search_knowledge_base(self, query: str) -> List[Dict[str, Any]]:
-        """Search articles"""
-        results = []
-        query_lower = query.lower()
+    def search_knowledge_base(self, query: str, category: Optional[str] = None,
+                              tags: Optional[List[str]] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Search articles, best BM25 match first (title and tag hits weigh more than body text)"""
+        filters = {}
+        if category:
+            filters['category'] = category
+        if tags:
+            filters['tags'] = tags
+        hits = self.index.search(query, filters=filters, limit=limit)
         
-        for article in self.articles:
-            if (query_lower in article['title'].lower() or 
-                query_lower in article['content'].lower() or
-                query_lower in ' '.join(article['tags']).lower()):
-                results.append({
-                    'id': article['id'],
-                    'title': article['title'],
-                    'category': article['category'],
-                    'relevance': 0.85,
-                    'views': article['views']
-                })
+        results = []
+        top = hits[0][1] if hits and hits[0][1] > 0 else 1.0
+        for article_id, score in hits:
+            # Another worker may have created it when the index is shared
+            article = self._by_id.get(article_id) or self.index.get(article_id)
+            if article is None:
+                continue
+            results.append({
+                'id': article['id'],
+                'title': article['title'],
+                'category': article['category'],
+                'relevance': round(score / top, 3),
+                'views': article.get('views', 0)
+            })
         
         # Log search
         self.searches.append({
@@ -274,17 +289,17 @@ class KnowledgeBaseSystem:
             'timestamp': time.time()
         })
         
-        return sorted(results, key=lambda x: x['views'], reverse=True)
+        return results
     
     def rate_article(self, article_id: str, rating: int, user_id: str):
         """Rate article (1-5 stars)"""
-        for article in self.articles:
-            if article['id'] == article_id:
-                if rating >= 4:
-                    article['helpful'] += 1
-                else:
-                    article['unhelpful'] += 1
-                self.ratings[article_id].append(rating)
+        article = self._by_id.get(article_id)
+        if article is not None:
+            if rating >= 4:
+                article['helpful'] += 1
+            else:
+                article['unhelpful'] += 1
+            self.ratings[article_id].append(rating)
     
     def get_kb_metrics(self) -> Dict[str, Any]:
         """Get knowledge base metrics"""
@@ -11,6 +11,7 @@ from collections import deque
 ENFORCE_ENTITLEMENTS = os.getenv('ENFORCE_ENTITLEMENTS', 'False').lower() in ('1', 'true', 'yes')
 ENFORCE_IDEMPOTENCY = os.getenv('ENFORCE_IDEMPOTENCY', 'False').lower() in ('1', 'true', 'yes')
 DOWNLOAD_TOKEN_TTL = int(os.getenv('DOWNLOAD_TOKEN_TTL', '900'))  # seconds
+DOWNLOAD_GRANT_TTL = int(os.getenv('DOWNLOAD_GRANT_TTL', '600'))  # seconds; resumable window after a verified download
 BIND_DOWNLOAD_TOKEN_TO_IP = os.getenv('BIND_DOWNLOAD_TOKEN_TO_IP', 'False').lower() in ('1', 'true', 'yes')
 
 # Simple token buckets per feature+key (IP/user) with runtime-configurable limits
@@ -189,15 +190,19 @@ def _hmac_payload(secret: str, payload: str) -> str:
     return hmac.new(secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
 
+def _token_secret() -> str:
+    try:
+        from flask import current_app
+        return current_app.config.get('SECRET_KEY') or os.getenv('FLASK_SECRET_KEY', 'dev-secret')
+    except Exception:
+        return os.getenv('FLASK_SECRET_KEY', 'dev-secret')
+
+
 def generate_download_token(product: str, ip: str | None = None, ttl: int | None = None) -> str:
     """Create a signed token for premium downloads with expiry.
     Format: expires_epoch.hmac(product|expires|ip?)
     """
-    try:
-        from flask import current_app
-        secret = current_app.config.get('SECRET_KEY') or os.getenv('FLASK_SECRET_KEY', 'dev-secret')
-    except Exception:
-        secret = os.getenv('FLASK_SECRET_KEY', 'dev-secret')
+    secret = _token_secret()
     ttl = ttl if ttl is not None else DOWNLOAD_TOKEN_TTL
     expires = int(time.time()) + max(1, ttl)
     base = f"{product}|{expires}"
@@ -219,11 +224,7 @@ def verify_download_token(token: str, product: str, ip: str | None = None) -> bo
         sig = parts[1]
         if expires < int(time.time()):
             return False
-        try:
-            from flask import current_app
-            secret = current_app.config.get('SECRET_KEY') or os.getenv('FLASK_SECRET_KEY', 'dev-secret')
-        except Exception:
-            secret = os.getenv('FLASK_SECRET_KEY', 'dev-secret')
+        secret = _token_secret()
         base = f"{product}|{expires}"
         if ip:
             base = base + f"|{ip}"
@@ -233,6 +234,39 @@ def verify_download_token(token: str, product: str, ip: str | None = None) -> bo
         return False
 
 
+def generate_download_grant(order_id: str, product: str, ip: str | None = None, ttl: int | None = None) -> str:
+    """Short-lived token issued after a download passed the order and entitlement checks.
+    Repeat requests (resumed or parallel range requests) present it instead of being re-verified.
+    Format: expires_epoch.order_id.hmac(grant|order_id|product|expires|ip?)
+    """
+    ttl = ttl if ttl is not None else DOWNLOAD_GRANT_TTL
+    expires = int(time.time()) + max(1, ttl)
+    base = f"grant|{order_id}|{product}|{expires}"
+    if ip:
+        base = base + f"|{ip}"
+    return f"{expires}.{order_id}.{_hmac_payload(_token_secret(), base)}"
+
+
+def verify_download_grant(token: str, product: str, ip: str | None = None) -> str | None:
+    """Verify a download grant.
+    Returns the order ID it was issued for, or None if invalid or expired.
+    """
+    try:
+        expires_text, _, rest = token.partition('.')
+        order_id, _, sig = rest.rpartition('.')
+        expires = int(expires_text)
+        if not order_id or expires < int(time.time()):
+            return None
+        base = f"grant|{order_id}|{product}|{expires}"
+        if ip:
+            base = base + f"|{ip}"
+        if hmac.compare_digest(_hmac_payload(_token_secret(), base), sig):
+            return order_id
+        return None
+    except Exception:
+        return None
+
+
 def emit_alert(event: str, data: dict):
     """Emit alert as structured log; placeholder for external alerting.
     """
@@ -1,5 +1,83 @@
+import hashlib
+import json
+import os
+import threading
 import time
-from typing import Dict, List
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Per-section cache TTLs (seconds): fast-moving money numbers refresh often,
+# model-heavy sections (CLV, churn, forecasts) much less.
+SECTION_TTLS = {
+    'revenue': 60,
+    'subscriptions': 300,
+    'clv': 900,
+    'churn': 900,
+    'market': 600,
+    'payments': 120,
+    'campaigns': 900,
+    'voice': 300,
+    'growth': 1800,
+    'social': 600,
+    'websites': 3600,
+    'analytics': 60,
+    'ab_testing': 300,
+    'journeys': 300,
+}
+# What a section reports when its data is unavailable (error or timeout).
+SECTION_DEFAULTS = {
+    'revenue': {'total_revenue_rupees': 0, 'total_orders': 0, 'paid_orders': 0, 'conversion_rate': 0},
+    'subscriptions': {'active_subscriptions': 0, 'mrr_rupees': 0, 'arr_rupees': 0},
+    'clv': {'avg_clv_rupees': 0, 'total_customers': 0},
+    'churn': {'at_risk_count': 0, 'avg_risk_score': 0},
+    'market': {'total_revenue_rupees': 0, 'top_recommendation': None},
+    'payments': {'pay_rate_percent': 0, 'failed_orders': 0},
+    'campaigns': {'avg_effectiveness': 0, 'campaign_count': 0},
+    'voice': {'avg_sentiment': 0, 'analysis_count': 0},
+    'growth': {'recommended_scenario': 'baseline', 'growth_rate': 0},
+    'social': {'scheduled_posts': 0, 'platforms': 0},
+    'websites': {
+        'total_websites_generated': 0,
+        'breakthrough_tier': 0,
+        'elite_tier': 0,
+        'avg_performance_score': 0,
+        'avg_conversion_lift': 0,
+        'estimated_revenue_impact': '$0/month',
+    },
+    'analytics': {
+        'active_visitors': 0,
+        'total_visitors': 0,
+        'conversion_rate_percent': 0,
+        'bounce_rate_percent': 0,
+        'avg_time_on_site_seconds': 0,
+        'top_traffic_source': 'unknown',
+        'overall_funnel_conversion': 0,
+        'critical_alerts_count': 0,
+    },
+    'ab_testing': {
+        'total_experiments': 0,
+        'running_experiments': 0,
+        'completed_experiments': 0,
+        'total_visitors_tested': 0,
+        'winners_found': 0,
+        'average_conversion_rate': 0,
+        'avg_experiment_uplift': 0,
+    },
+    'journeys': {
+        'total_journeys': 0,
+        'published_journeys': 0,
+        'total_enrolled_customers': 0,
+        'completed_customers': 0,
+        'active_customers_now': 0,
+        'completion_rate': 0,
+        'best_performing_channel': 'email',
+        'avg_channel_ctr': 0,
+    },
+}
+SECTION_TIMEOUT = float(os.getenv('EXECUTIVE_SECTION_TIMEOUT', '5'))  # seconds per section
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
 
 
 def _safe_import(module_name: str, func_name: str, *args, **kwargs):
@@ -12,73 +90,141 @@ def _safe_import(module_name: str, func_name: str, *args, **kwargs):
         return None
 
 
+class DataSnapshot:
+    """Rows shared by every section of one executive summary.
+
+    Each dataset is loaded at most once, on first use, so sections no longer
+    re-scan Order/Subscription/Customer on their own. Windowed datasets
+    (orders_since, payments_since) are filtered in SQL. Every dataset has its
+    own lock, so sections that need different tables load them in parallel.
+    Safe to use from the section worker threads.
+    """
+
+    def __init__(self):
+        self._rows: Dict[str, list] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _load(self, name: str, query: Callable) -> list:
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._rows:
+                from models import get_engine, get_session
+                from utils import _get_db_url
+                session = get_session(get_engine(_get_db_url()))
+                try:
+                    self._rows[name] = query(session).all()
+                finally:
+                    session.close()
+            return self._rows[name]
+
+    @property
+    def orders(self) -> list:
+        from models import Order
+        return self._load('orders', lambda s: s.query(Order))
+
+    @property
+    def customers(self) -> list:
+        from models import Customer
+        return self._load('customers', lambda s: s.query(Customer))
+
+    @property
+    def active_subscriptions(self) -> list:
+        from models import Subscription
+        return self._load('subscriptions', lambda s: s.query(Subscription).filter(Subscription.status == 'ACTIVE'))
+
+    def orders_since(self, days: int) -> list:
+        from models import Order
+        since = time.time() - days * 86400.0
+        return self._load(f'orders:{days}', lambda s: s.query(Order).filter(Order.created_at >= since))
+
+    def payments_since(self, days: int) -> list:
+        from models import Payment
+        since = time.time() - days * 86400.0
+        return self._load(f'payments:{days}', lambda s: s.query(Payment).filter(Payment.received_at >= since))
+
+
+def _snapshot_rows(snapshot: Optional[DataSnapshot], pick: Callable[[DataSnapshot], Dict]) -> Optional[Dict]:
+    """Keyword arguments drawn from the snapshot ({} without one, None if loading fails)."""
+    if snapshot is None:
+        return {}
+    try:
+        return pick(snapshot)
+    except Exception:
+        return None
+
+
 def aggregate_revenue_metrics(days: int = 30) -> Dict:
-    """Revenue from orders and payments."""
+    """Revenue from orders and payments, aggregated in SQL over the window."""
+    from sqlalchemy import case, func
+    from models import get_engine, get_session, Order
+    from utils import _get_db_url
     try:
-        from models import get_engine, get_session, Order
-        from utils import _get_db_url
-        engine = get_engine(_get_db_url())
-        session = get_session(engine)
         since = time.time() - days * 86400.0
-        orders = session.query(Order).filter(Order.created_at >= since).all()
-        total_revenue = sum(int(o.amount or 0) for o in orders if (o.status or '').lower() == 'paid')
-        total_orders = len(orders)
-        paid_orders = sum(1 for o in orders if (o.status or '').lower() == 'paid')
-        session.close()
+        is_paid = func.lower(Order.status) == 'paid'
+        session = get_session(get_engine(_get_db_url()))
+        try:
+            total_orders, paid_orders, total_revenue = session.query(
+                func.count(Order.id),
+                func.sum(case((is_paid, 1), else_=0)),
+                func.sum(case((is_paid, Order.amount), else_=0)),
+            ).filter(Order.created_at >= since).one()
+        finally:
+            session.close()
+        total_orders, paid_orders = total_orders or 0, int(paid_orders or 0)
         return {
-            'total_revenue_rupees': round(total_revenue / 100.0, 2),
+            'total_revenue_rupees': round(int(total_revenue or 0) / 100.0, 2),
             'total_orders': total_orders,
             'paid_orders': paid_orders,
             'conversion_rate': round((paid_orders / max(total_orders, 1)) * 100, 2),
         }
     except Exception:
-        return {'total_revenue_rupees': 0, 'total_orders': 0, 'paid_orders': 0, 'conversion_rate': 0}
+        return dict(SECTION_DEFAULTS['revenue'])
 
 
-def aggregate_subscription_metrics(days: int = 30) -> Dict:
+def aggregate_subscription_metrics(days: int = 30, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """MRR and subscription health."""
     try:
-        from models import get_engine, get_session, Subscription
-        from utils import _get_db_url
-        engine = get_engine(_get_db_url())
-        session = get_session(engine)
-        active = session.query(Subscription).filter(Subscription.status == 'ACTIVE').all()
+        active = (snapshot or DataSnapshot()).active_subscriptions
         monthly_rev = sum(s.amount_paise / 100.0 if s.billing_cycle == 'monthly' else (s.amount_paise / 100.0 / 12.0) for s in active)
-        session.close()
         return {
             'active_subscriptions': len(active),
             'mrr_rupees': round(monthly_rev, 2),
             'arr_rupees': round(monthly_rev * 12, 2),
         }
     except Exception:
-        return {'active_subscriptions': 0, 'mrr_rupees': 0, 'arr_rupees': 0}
+        return dict(SECTION_DEFAULTS['subscriptions'])
 
 
-def aggregate_clv_insights(days: int = 90) -> Dict:
+def aggregate_clv_insights(days: int = 90, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """Customer lifetime value summary."""
-    clv_stats = _safe_import('clv', 'clv_stats', days_back=days)
+    rows = _snapshot_rows(snapshot, lambda snap: {'orders': snap.orders, 'customers': snap.customers})
+    clv_stats = _safe_import('clv', 'clv_stats', **rows) if rows is not None else None
     if clv_stats:
         return {
-            'avg_clv_rupees': clv_stats.get('avg_clv_rupees', 0),
-            'total_customers': clv_stats.get('customer_count', 0),
+            'avg_clv_rupees': clv_stats.get('avg_clv', 0),
+            'total_customers': clv_stats.get('customers', 0),
         }
-    return {'avg_clv_rupees': 0, 'total_customers': 0}
+    return dict(SECTION_DEFAULTS['clv'])
 
 
-def aggregate_churn_alerts(days: int = 90) -> Dict:
+def aggregate_churn_alerts(days: int = 90, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """Churn risk summary."""
-    churn_stats = _safe_import('churn_prediction', 'churn_stats', days_back=days)
+    rows = _snapshot_rows(snapshot, lambda snap: {'orders': snap.orders})
+    churn_stats = _safe_import('churn_prediction', 'churn_stats', **rows) if rows is not None else None
     if churn_stats:
         return {
-            'at_risk_count': churn_stats.get('at_risk_count', 0),
-            'avg_risk_score': churn_stats.get('avg_risk_score', 0),
+            'at_risk_count': churn_stats.get('customers_needing_attention', 0),
+            'avg_risk_score': round(churn_stats.get('avg_risk_score', 0) / 100.0, 3),  # 0-1 scale
         }
-    return {'at_risk_count': 0, 'avg_risk_score': 0}
+    return dict(SECTION_DEFAULTS['churn'])
 
 
-def aggregate_market_signals(days: int = 90) -> Dict:
+def aggregate_market_signals(days: int = 90, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """Market intelligence summary."""
-    market_summary = _safe_import('market_intelligence', 'market_summary', days=days)
+    rows = _snapshot_rows(snapshot, lambda snap: {'rows': snap.orders_since(days)})
+    market_summary = _safe_import('market_intelligence', 'market_summary', days=days, **rows) if rows is not None else None
     if market_summary:
         insights = market_summary.get('insights', [])
         top_rec = insights[0] if insights else None
@@ -86,18 +232,19 @@ def aggregate_market_signals(days: int = 90) -> Dict:
             'total_revenue_rupees': market_summary.get('total_revenue_rupees', 0),
             'top_recommendation': top_rec,
         }
-    return {'total_revenue_rupees': 0, 'top_recommendation': None}
+    return dict(SECTION_DEFAULTS['market'])
 
 
-def aggregate_payment_health(days: int = 90) -> Dict:
+def aggregate_payment_health(days: int = 90, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """Payment intelligence summary."""
-    metrics = _safe_import('payment_intelligence', 'compute_payment_metrics', days_back=days)
+    rows = _snapshot_rows(snapshot, lambda snap: {'orders': snap.orders_since(days), 'payments': snap.payments_since(days)})
+    metrics = _safe_import('payment_intelligence', 'compute_payment_metrics', days_back=days, **rows) if rows is not None else None
     if metrics:
         return {
             'pay_rate_percent': metrics.get('pay_rate_percent', 0),
             'failed_orders': metrics.get('failed_orders', 0),
         }
-    return {'pay_rate_percent': 0, 'failed_orders': 0}
+    return dict(SECTION_DEFAULTS['payments'])
 
 
 def aggregate_campaign_performance(days: int = 90) -> Dict:
@@ -108,7 +255,7 @@ def aggregate_campaign_performance(days: int = 90) -> Dict:
             'avg_effectiveness': stats.get('avg_effectiveness', 0),
             'campaign_count': stats.get('campaign_count', 0),
         }
-    return {'avg_effectiveness': 0, 'campaign_count': 0}
+    return dict(SECTION_DEFAULTS['campaigns'])
 
 
 def aggregate_voice_sentiment(days: int = 90) -> Dict:
@@ -119,7 +266,7 @@ def aggregate_voice_sentiment(days: int = 90) -> Dict:
             'avg_sentiment': metrics.get('avg_sentiment', 0),
             'analysis_count': metrics.get('count', 0),
         }
-    return {'avg_sentiment': 0, 'analysis_count': 0}
+    return dict(SECTION_DEFAULTS['voice'])
 
 
 def aggregate_growth_forecast() -> Dict:
@@ -130,42 +277,171 @@ def aggregate_growth_forecast() -> Dict:
             'recommended_scenario': summary.get('recommended_scenario', 'baseline'),
             'growth_rate': summary.get('growth_rate', 0),
         }
-    return {'recommended_scenario': 'baseline', 'growth_rate': 0}
+    return dict(SECTION_DEFAULTS['growth'])
 
 
-def aggregate_social_schedule(days: int = 30) -> Dict:
+def aggregate_social_schedule(days: int = 30, snapshot: Optional[DataSnapshot] = None) -> Dict:
     """Social auto-share summary."""
-    schedule = _safe_import('social_auto_share', 'generate_schedule', days_back=days)
+    rows = _snapshot_rows(snapshot, lambda snap: {'rows': snap.orders_since(days)})
+    signals = _safe_import('market_intelligence', 'compute_signals', days, **rows) if rows else None
+    schedule = _safe_import('social_auto_share', 'generate_schedule', days_back=days, signals=signals)
     if schedule and isinstance(schedule, list):
         return {
             'scheduled_posts': len(schedule),
             'platforms': len(set(s['platform'] for s in schedule)),
         }
-    return {'scheduled_posts': 0, 'platforms': 0}
+    return dict(SECTION_DEFAULTS['social'])
 
 
-def executive_summary(days: int = 30) -> Dict:
-    """Aggregate all 18 systems into executive summary."""
+def _sections() -> Dict[str, Tuple[Callable, bool]]:
+    """Section name -> (aggregator, takes the shared snapshot)."""
     return {
-        'period_days': days,
-        'revenue': aggregate_revenue_metrics(days),
-        'subscriptions': aggregate_subscription_metrics(days),
-        'clv': aggregate_clv_insights(days),
-        'churn': aggregate_churn_alerts(days),
-        'market': aggregate_market_signals(days),
-        'payments': aggregate_payment_health(days),
-        'campaigns': aggregate_campaign_performance(days),
-        'voice': aggregate_voice_sentiment(days),
-        'growth': aggregate_growth_forecast(),
-        'social': aggregate_social_schedule(days),
-        'websites': aggregate_website_metrics(days),  # Feature #16
-        'analytics': aggregate_realtime_analytics(days),  # Feature #17
-        'ab_testing': aggregate_ab_testing_metrics(days),  # Feature #18
-        'journeys': aggregate_journey_orchestration_metrics(days),  # Feature #19
-        'generated_at': time.time(),
+        'revenue': (aggregate_revenue_metrics, False),
+        'subscriptions': (aggregate_subscription_metrics, True),
+        'clv': (aggregate_clv_insights, True),
+        'churn': (aggregate_churn_alerts, True),
+        'market': (aggregate_market_signals, True),
+        'payments': (aggregate_payment_health, True),
+        'campaigns': (aggregate_campaign_performance, False),
+        'voice': (aggregate_voice_sentiment, False),
+        'growth': (lambda days: aggregate_growth_forecast(), False),
+        'social': (aggregate_social_schedule, True),
+        'websites': (aggregate_website_metrics, False),  # Feature #16
+        'analytics': (aggregate_realtime_analytics, False),  # Feature #17
+        'ab_testing': (aggregate_ab_testing_metrics, False),  # Feature #18
+        'journeys': (aggregate_journey_orchestration_metrics, False),  # Feature #19
     }
 
 
+def _executor() -> ThreadPoolExecutor:
+    # Twice the section count: _submit_section keeps at most one run per section
+    # key in flight, so sections abandoned after a timeout can hold at most half
+    # the workers and never the slots later requests need.
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=2 * len(SECTION_TTLS), thread_name_prefix='executive')
+        return _EXECUTOR
+
+
+def _section_cache_key(name: str, days: int) -> str:
+    from utils import _get_db_url
+    db = hashlib.md5(_get_db_url().encode()).hexdigest()[:12]
+    return f"cache:executive:{name}:{days}:{db}"
+
+
+class _SectionRun:
+    """One section on the pool; `started` is set when a worker picks it up."""
+
+    def __init__(self, func: Callable, days: int, snapshot: Optional[DataSnapshot]):
+        self.submitted = time.perf_counter()
+        self.started: Optional[float] = None
+        self.future = _executor().submit(self._run, func, days, snapshot)
+
+    def _run(self, func: Callable, days: int, snapshot: Optional[DataSnapshot]) -> Tuple[Dict, float]:
+        self.started = time.perf_counter()
+        result = func(days, snapshot=snapshot) if snapshot is not None else func(days)
+        return result, (time.perf_counter() - self.started) * 1000.0
+
+    def deadline(self, timeout: float) -> float:
+        # Each section gets `timeout` from its own start; time queued for a
+        # worker is bounded by one more `timeout`.
+        return (self.started if self.started is not None else self.submitted) + timeout
+
+
+_INFLIGHT: Dict[str, _SectionRun] = {}  # section cache key -> run not finished yet
+
+
+def _submit_section(key: str, func: Callable, days: int, snapshot: Optional[DataSnapshot]) -> _SectionRun:
+    """Start a section, or join the run already in flight for the same key.
+
+    A section that hangs past its timeout is therefore never submitted again
+    while it still holds a worker.
+    """
+    with _EXECUTOR_LOCK:
+        run = _INFLIGHT.get(key)
+        if run is not None and not run.future.done():
+            return run
+    run = _SectionRun(func, days, snapshot)
+    with _EXECUTOR_LOCK:
+        _INFLIGHT[key] = run
+
+    def finished(_):
+        with _EXECUTOR_LOCK:
+            if _INFLIGHT.get(key) is run:
+                del _INFLIGHT[key]
+    run.future.add_done_callback(finished)
+    return run
+
+
+def executive_summary(days: int = 30, use_cache: bool = True, timeout: Optional[float] = None,
+                      sections: Optional[List[str]] = None) -> Dict:
+    """Aggregate all 18 systems into executive summary.
+
+    Sections run concurrently on one shared DataSnapshot, each with its own
+    timeout (`timeout`, default SECTION_TIMEOUT) measured from when it starts,
+    and its own cache TTL (SECTION_TTLS).
+    'timings' reports per-section milliseconds and status (ok, cached, timeout, error).
+    """
+    from cache_layer import cache
+
+    timeout = SECTION_TIMEOUT if timeout is None else timeout
+    registry = _sections()
+    names = [n for n in registry if sections is None or n in sections]
+    snapshot = DataSnapshot()
+    started = time.perf_counter()
+
+    summary: Dict = {'period_days': days}
+    timings: Dict[str, Dict] = {}
+    pending: Dict[str, _SectionRun] = {}
+    for name in names:
+        func, shared = registry[name]
+        key = _section_cache_key(name, days)
+        if use_cache:
+            hit = cache.get(key)
+            if hit is not None:
+                summary[name] = json.loads(hit)
+                timings[name] = {'ms': 0.0, 'status': 'cached'}
+                continue
+        pending[name] = _submit_section(key, func, days, snapshot if shared else None)
+
+    while pending:
+        now = time.perf_counter()
+        for name, run in list(pending.items()):
+            future = run.future
+            if not future.done():
+                if now >= run.deadline(timeout):
+                    del pending[name]
+                    summary[name] = dict(SECTION_DEFAULTS.get(name, {}))
+                    timings[name] = {'ms': round((now - (run.started or run.submitted)) * 1000.0, 1),
+                                     'status': 'timeout'}
+                continue
+            del pending[name]
+            try:
+                result, elapsed_ms = future.result()
+            except Exception as e:
+                summary[name] = dict(SECTION_DEFAULTS.get(name, {}))
+                timings[name] = {'ms': 0.0, 'status': 'error', 'error': str(e)}
+                continue
+            summary[name] = result
+            timings[name] = {'ms': round(elapsed_ms, 1), 'status': 'ok'}
+            if use_cache:
+                try:
+                    cache.set(_section_cache_key(name, days), json.dumps(result), ttl=SECTION_TTLS.get(name, 300))
+                except (TypeError, ValueError):
+                    pass
+        if pending:
+            next_deadline = min(run.deadline(timeout) for run in pending.values())
+            wait([run.future for run in pending.values()], timeout=max(0.0, next_deadline - time.perf_counter()),
+                 return_when=FIRST_COMPLETED)
+
+    summary = {'period_days': days, **{name: summary[name] for name in names}}
+    summary['timings'] = timings
+    summary['total_ms'] = round((time.perf_counter() - started) * 1000.0, 1)
+    summary['generated_at'] = time.time()
+    return summary
+
+
 def aggregate_ab_testing_metrics(days: int = 30) -> Dict:
     """A/B testing and experimentation metrics."""
     try:
@@ -195,15 +471,7 @@ def aggregate_ab_testing_metrics(days: int = 30) -> Dict:
             'avg_experiment_uplift': round(sum(e['winner_analysis'].get('uplift_percent', 0) for e in completed_exps) / max(len(completed_exps), 1), 2),
         }
     except Exception:
-        return {
-            'total_experiments': 0,
-            'running_experiments': 0,
-            'completed_experiments': 0,
-            'total_visitors_tested': 0,
-            'winners_found': 0,
-            'average_conversion_rate': 0,
-            'avg_experiment_uplift': 0,
-        }
+        return dict(SECTION_DEFAULTS['ab_testing'])
 
 
 def aggregate_journey_orchestration_metrics(days: int = 30) -> Dict:
@@ -237,16 +505,7 @@ def aggregate_journey_orchestration_metrics(days: int = 30) -> Dict:
             'avg_channel_ctr': round(sum(ch.get('ctr', 0) for ch in channel_perf.values()) / max(len(channel_perf), 1), 4),
         }
     except Exception:
-        return {
-            'total_journeys': 0,
-            'published_journeys': 0,
-            'total_enrolled_customers': 0,
-            'completed_customers': 0,
-            'active_customers_now': 0,
-            'completion_rate': 0,
-            'best_performing_channel': 'email',
-            'avg_channel_ctr': 0,
-        }
+        return dict(SECTION_DEFAULTS['journeys'])
 
 
 def aggregate_realtime_analytics(days: int = 30) -> Dict:
@@ -271,22 +530,18 @@ def aggregate_realtime_analytics(days: int = 30) -> Dict:
             'critical_alerts_count': len(kpis.get('critical_alerts', [])),
         }
     except Exception:
-        return {
-            'active_visitors': 0,
-            'total_visitors': 0,
-            'conversion_rate_percent': 0,
-            'bounce_rate_percent': 0,
-            'avg_time_on_site_seconds': 0,
-            'top_traffic_source': 'unknown',
-            'overall_funnel_conversion': 0,
-            'critical_alerts_count': 0,
-        }
-def critical_alerts(days: int = 30) -> List[Dict]:
-    """Generate critical alerts from all systems."""
+        return dict(SECTION_DEFAULTS['analytics'])
+def critical_alerts(days: int = 30, summary: Optional[Dict] = None) -> List[Dict]:
+    """Generate critical alerts from all systems.
+
+    Reuses the sections of an already-built executive `summary` when given.
+    """
     alerts: List[Dict] = []
+    if summary is None:
+        summary = executive_summary(days, sections=['churn', 'payments', 'market', 'voice'])
     
     # Churn alerts
-    churn = aggregate_churn_alerts(days)
+    churn = summary['churn']
     if churn['at_risk_count'] > 0:
         alerts.append({
             'priority': 'HIGH',
@@ -296,7 +551,7 @@ def critical_alerts(days: int = 30) -> List[Dict]:
         })
     
     # Payment health
-    payments = aggregate_payment_health(days)
+    payments = summary['payments']
     if payments['pay_rate_percent'] < 70:
         alerts.append({
             'priority': 'HIGH',
@@ -306,7 +561,7 @@ def critical_alerts(days: int = 30) -> List[Dict]:
         })
     
     # Market recommendation
-    market = aggregate_market_signals(days)
+    market = summary['market']
     if market['top_recommendation']:
         rec = market['top_recommendation']
         alerts.append({
@@ -317,7 +572,7 @@ def critical_alerts(days: int = 30) -> List[Dict]:
         })
     
     # Voice sentiment
-    voice = aggregate_voice_sentiment(days)
+    voice = summary['voice']
     if voice['avg_sentiment'] < 0.4 and voice['analysis_count'] > 0:
         alerts.append({
             'priority': 'MEDIUM',
@@ -345,11 +600,4 @@ def aggregate_website_metrics(days: int = 30) -> Dict:
             'estimated_revenue_impact': '$180k/month',
         }
     except Exception:
-        return {
-            'total_websites_generated': 0,
-            'breakthrough_tier': 0,
-            'elite_tier': 0,
-            'avg_performance_score': 0,
-            'avg_conversion_lift': 0,
-            'estimated_revenue_impact': '$0/month',
-        }
\ No newline at end of file
+        return dict(SECTION_DEFAULTS['websites'])
\ No newline at end of file
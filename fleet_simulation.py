@@ -0,0 +1,434 @@
+"""Deterministic discrete-event simulation of the drone fleet.
+
+A virtual clock advances from one timestamped event to the next (EventLoop,
+a heap ordered by time then insertion), so a simulated day takes seconds and
+no worker threads or sleeps are involved. Everything random comes from one
+seeded random.Random, and IDs and timestamps are derived from the seed and
+the virtual clock, so the same seed reproduces a run bit for bit.
+
+FleetSimulation drives the real components:
+- DroneFleetManager for the fleet, spatial index, incremental stats and
+  assignment (assign_delivery per arrival, or assign_pending_batch on a
+  timer, selected by `policy`)
+- FlightSimulator for distances, flight times, battery use and failure odds
+- DroneOpsDashboard._calculate_metrics / get_kpis over the delivery records
+  the run produces
+
+Each delivery's life: arrive -> assigned -> fly to pickup and drop-off ->
+delivered (or failed) -> drone flies home -> charges -> idle. Charging drones
+are held back from assignment, as in the fleet manager. A drone without the
+battery for its trip (typically one borrowed from another region when the
+local fleet is busy) fails the order pre-flight as battery_critical.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import math
+import random
+from collections import Counter, deque
+from dataclasses import asdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from drone_fleet_manager import DeliveryPriority, DroneFleetManager, DroneStatus, FlightSimulator
+from drone_ops_dashboard import DeliveryRecord, DroneOpsDashboard
+
+POLICIES = ("immediate", "batch")
+DAY_S = 86400
+START_EPOCH = 1_700_000_000  # virtual time 0, for record timestamps
+DRONE_SPEED_KMH = 50  # the fleet manager's standard speed
+CHARGE_RATE_PER_MIN = 2.0  # battery percent
+RETRY_SCAN = 16  # waiting deliveries tried when a drone frees up (immediate policy)
+SERVICE_AREA_DEG = 0.03  # pickups within this of a hub, drop-offs within this of the pickup
+
+DRONE_MIX = {"economy": 0.4, "premium": 0.35, "elite": 0.15, "bvlos": 0.1}  # as build_global_fleet()
+PRIORITY_MIX = {"standard": 0.7, "express": 0.2, "premium": 0.1}
+REVENUE_USD = {"standard": 25.0, "express": 45.0, "premium": 80.0, "vip_rare": 500.0}
+
+
+class EventLoop:
+    """Priority queue of timestamped events on a virtual clock (seconds)"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.processed = 0
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()  # equal times run in scheduling order
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def schedule(self, delay: float, action: Callable, *args):
+        self.schedule_at(self.now + max(delay, 0.0), action, *args)
+
+    def schedule_at(self, at: float, action: Callable, *args):
+        heapq.heappush(self._queue, (at, next(self._seq), action, args))
+
+    def run(self, until: float = math.inf) -> int:
+        """Process events due at or before `until`; returns how many ran"""
+        ran = 0
+        while self._queue and self._queue[0][0] <= until:
+            at, _, action, args = heapq.heappop(self._queue)
+            self.now = at
+            action(*args)
+            ran += 1
+        self.processed += ran
+        if until != math.inf:
+            self.now = max(self.now, until)
+        return ran
+
+
+class FleetSimulation:
+    """
+    One seeded run of demand against the fleet
+
+    Args:
+        seed: Seeds demand, fleet layout and flight failures
+        deliveries: Orders arriving uniformly over `horizon_s`
+        drones_per_region: Fleet size per region (types drawn as build_global_fleet())
+        policy: "immediate" assigns each order on arrival and when a drone frees up;
+            "batch" runs assign_pending_batch() every `batch_interval_s`
+        horizon_s: Arrival window; the run continues until every order settles
+        batch_interval_s: Dispatch period for the batch policy
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        deliveries: int = 10000,
+        drones_per_region: int = 40,
+        policy: str = "immediate",
+        horizon_s: float = DAY_S,
+        batch_interval_s: float = 60.0
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.seed = seed
+        self.policy = policy
+        self.horizon_s = horizon_s
+        self.batch_interval_s = batch_interval_s
+        self.rng = random.Random(seed)
+        self.loop = EventLoop()
+
+        self.manager = DroneFleetManager(manager_id=f"sim_{seed}")
+        self.manager.logger.setLevel(logging.ERROR)
+        self.manager.command_queue = deque(maxlen=0)  # no worker threads here; the event loop flies the drones
+        self.home: Dict[str, tuple] = {}
+        self.charging: Dict[str, tuple] = {}  # drone_id -> (since, battery then)
+        self.epoch: Dict[str, int] = {}  # bumped on every drone state change; stale events are dropped
+        self.waiting: List[tuple] = []  # heap of (-priority, arrival seq, delivery_id)
+        self.arrival_seq: Dict[str, int] = {}
+        self.arrived_at: Dict[str, float] = {}
+        self.assigned_at: Dict[str, float] = {}
+        self.revenue: Dict[str, float] = {}
+        self.records: List[DeliveryRecord] = []
+        self.failure_reasons: Counter = Counter()
+
+        self._build_fleet(drones_per_region)
+        self._schedule_demand(deliveries)
+        if policy == "batch":
+            self.loop.schedule(0.0, self._dispatch_tick)
+
+    # ------------------------------------------------------------------
+    # Setup
+    # ------------------------------------------------------------------
+
+    def _build_fleet(self, drones_per_region: int):
+        types, weights = list(DRONE_MIX), list(DRONE_MIX.values())
+        for region_id, region in self.manager.regions.items():
+            for k in range(drones_per_region):
+                lat = region.center_lat + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG)
+                lon = region.center_lon + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG)
+                drone_id = self.manager.add_drone(
+                    region_id, self.rng.choices(types, weights)[0], lat, lon, drone_id=f"drone_{region_id}_{k:04d}"
+                )
+                self.home[drone_id] = (lat, lon)
+                self.epoch[drone_id] = 0
+
+    def _schedule_demand(self, deliveries: int):
+        regions = list(self.manager.regions.values())
+        priorities, weights = list(PRIORITY_MIX), list(PRIORITY_MIX.values())
+        times = sorted(self.rng.uniform(0, self.horizon_s) for _ in range(deliveries))
+        for n, at in enumerate(times):
+            region = self.rng.choice(regions)
+            pickup_lat = region.center_lat + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG)
+            pickup_lon = region.center_lon + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG)
+            order = {
+                "delivery_id": f"sim_{n:06d}",
+                "order_id": f"order_{n:06d}",
+                "pickup_lat": pickup_lat,
+                "pickup_lon": pickup_lon,
+                "delivery_lat": pickup_lat + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG),
+                "delivery_lon": pickup_lon + self.rng.uniform(-SERVICE_AREA_DEG, SERVICE_AREA_DEG),
+                "package_weight_kg": self.rng.choice([0.5, 1.0, 2.0, 3.0, 4.0]),
+                "rarity_score": self.rng.uniform(0, 100),
+                "priority": self.rng.choices(priorities, weights)[0],
+            }
+            self.loop.schedule_at(at, self._arrive, n, order)
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def _stamp(self) -> str:
+        return datetime.fromtimestamp(START_EPOCH + self.loop.now, tz=timezone.utc).isoformat()
+
+    def _arrive(self, n: int, order: Dict):
+        priority = "vip_rare" if order["rarity_score"] > 90 else order["priority"]
+        self.manager.submit_delivery(revenue_usd=REVENUE_USD[priority], **order)
+        delivery_id = order["delivery_id"]
+        delivery = self.manager.pending_deliveries[delivery_id]
+        delivery.created_at = self._stamp()
+        self.arrival_seq[delivery_id] = n
+        self.arrived_at[delivery_id] = self.loop.now
+        self.revenue[delivery_id] = REVENUE_USD[priority]
+        if self.policy == "immediate" and not self._try_assign(delivery_id):
+            self._wait(delivery)
+
+    def _wait(self, delivery):
+        heapq.heappush(self.waiting, (-delivery.priority.value, self.arrival_seq[delivery.delivery_id],
+                                      delivery.delivery_id))
+
+    def _dispatch_tick(self):
+        self._settle_charging()
+        assigned = self.manager.assign_pending_batch()
+        for delivery_id, drone_id in assigned.items():
+            self._launch(delivery_id, drone_id)
+        # Keep ticking while orders can still arrive or a drone is out (it may free one up)
+        busy = self.manager.active_deliveries or self.charging
+        if self.loop.now < self.horizon_s or (self.manager.pending_deliveries and (busy or assigned)):
+            self.loop.schedule(self.batch_interval_s, self._dispatch_tick)
+
+    def _try_assign(self, delivery_id: str) -> bool:
+        self._settle_charging()
+        success, drone_id = self.manager.assign_delivery(delivery_id)
+        if success:
+            self._launch(delivery_id, drone_id)
+        return success
+
+    def _settle_charging(self):
+        """Bring charging drones' battery up to the current virtual time"""
+        for drone_id, (since, battery) in self.charging.items():
+            drone = self.manager.drones[drone_id]
+            drone.battery_percent = min(100.0, battery + CHARGE_RATE_PER_MIN * (self.loop.now - since) / 60)
+            self.manager._drone_changed(drone)
+
+    def _launch(self, delivery_id: str, drone_id: str):
+        manager = self.manager
+        delivery = manager.active_deliveries[delivery_id]
+        drone = manager.drones[drone_id]
+        region = manager.regions[drone.region_id]
+        severity = manager.assignment_engine._weather_severity(region)
+
+        to_pickup = FlightSimulator.calculate_distance(drone.lat, drone.lon, delivery.pickup_lat, delivery.pickup_lon)
+        leg = FlightSimulator.calculate_distance(
+            delivery.pickup_lat, delivery.pickup_lon, delivery.delivery_lat, delivery.delivery_lon
+        )
+        minutes = (FlightSimulator.calculate_flight_time(to_pickup, DRONE_SPEED_KMH, region.wind_speed_kmh)
+                   + FlightSimulator.calculate_flight_time(leg, DRONE_SPEED_KMH, region.wind_speed_kmh))
+        battery_used = FlightSimulator.battery_consumption(to_pickup + leg, delivery.package_weight_kg, severity)
+
+        self.charging.pop(drone_id, None)
+        self.epoch[drone_id] += 1
+        self.assigned_at[delivery_id] = self.loop.now
+        delivery.assigned_at = self._stamp()
+        with manager.lock:
+            drone.status = DroneStatus.IN_FLIGHT
+            drone.current_payload_kg = delivery.package_weight_kg
+            delivery.status = "in_flight"
+            manager._drone_changed(drone)
+
+        if battery_used >= drone.battery_percent:
+            self.loop.schedule(0.0, self._fail, delivery_id, drone_id, 0.0, "battery_critical")
+        elif self.rng.random() < FlightSimulator.simulate_failure_probability(drone.fault_count, severity):
+            self.loop.schedule(minutes * 30, self._fail, delivery_id, drone_id, (to_pickup + leg) / 2, "random_failure")
+        else:
+            self.loop.schedule(minutes * 60, self._deliver, delivery_id, drone_id, to_pickup + leg, battery_used)
+
+    def _deliver(self, delivery_id: str, drone_id: str, km: float, battery_used: float):
+        manager = self.manager
+        delivery = manager.active_deliveries[delivery_id]
+        drone = manager.drones[drone_id]
+        with manager.lock:
+            drone.battery_percent = max(0.0, drone.battery_percent - battery_used)
+            drone.lat, drone.lon = delivery.delivery_lat, delivery.delivery_lon
+            drone.current_payload_kg = 0
+            drone.metrics.total_flights += 1
+            drone.metrics.total_distance_km += km
+            drone.metrics.successful_deliveries += 1
+            delivery.status = "completed"
+            delivery.completed_at = self._stamp()
+            manager.completed_deliveries.append(manager.active_deliveries.pop(delivery_id))
+            manager.total_deliveries_completed += 1
+            manager.total_distance_flown_km += km
+            manager.total_revenue_usd += self.revenue[delivery_id]
+            if delivery.priority == DeliveryPriority.VIP_RARE:
+                manager.rare_orders_completed += 1
+        self._record(delivery, drone, "completed")
+        self._fly_home(drone_id)
+
+    def _fail(self, delivery_id: str, drone_id: str, km: float, reason: str):
+        manager = self.manager
+        delivery = manager.active_deliveries[delivery_id]
+        drone = manager.drones[drone_id]
+        region = manager.regions[drone.region_id]
+        with manager.lock:
+            drone.battery_percent = max(0.0, drone.battery_percent - FlightSimulator.battery_consumption(
+                km, delivery.package_weight_kg, manager.assignment_engine._weather_severity(region)))
+            drone.current_payload_kg = 0
+            drone.metrics.total_flights += 1
+            drone.metrics.failed_deliveries += 1
+            drone.metrics.total_distance_km += km
+            drone.fault_count += reason == "random_failure"
+            delivery.status = "failed"
+            delivery.completed_at = self._stamp()
+            manager.failed_deliveries.append(manager.active_deliveries.pop(delivery_id))
+            manager.total_deliveries_failed += 1
+            manager.total_distance_flown_km += km
+        self.failure_reasons[reason] += 1
+        self._record(delivery, drone, "failed")
+        self._fly_home(drone_id)
+
+    def _fly_home(self, drone_id: str):
+        drone = self.manager.drones[drone_id]
+        region = self.manager.regions[drone.region_id]
+        km = FlightSimulator.calculate_distance(drone.lat, drone.lon, *self.home[drone_id])
+        with self.manager.lock:
+            drone.status = DroneStatus.RETURNING
+            self.manager._drone_changed(drone)
+        self.epoch[drone_id] += 1
+        minutes = FlightSimulator.calculate_flight_time(km, DRONE_SPEED_KMH, region.wind_speed_kmh)
+        self.loop.schedule(minutes * 60, self._land, drone_id, km, self.epoch[drone_id])
+
+    def _land(self, drone_id: str, km: float, epoch: int):
+        if epoch != self.epoch[drone_id]:
+            return
+        manager = self.manager
+        drone = manager.drones[drone_id]
+        severity = manager.assignment_engine._weather_severity(manager.regions[drone.region_id])
+        with manager.lock:
+            drone.lat, drone.lon = self.home[drone_id]
+            drone.battery_percent = max(0.0, drone.battery_percent - FlightSimulator.battery_consumption(km, 0, severity))
+            drone.metrics.total_distance_km += km
+            drone.assigned_delivery_id = None
+            drone.status = DroneStatus.CHARGING
+            manager.spatial_index.insert(drone_id, drone.lat, drone.lon)
+            manager.total_distance_flown_km += km
+            manager._drone_changed(drone)
+        self.charging[drone_id] = (self.loop.now, drone.battery_percent)
+        self.epoch[drone_id] += 1
+        full_in = (100.0 - drone.battery_percent) / CHARGE_RATE_PER_MIN * 60
+        self.loop.schedule(full_in, self._charged, drone_id, self.epoch[drone_id])
+        self._drone_available()
+
+    def _charged(self, drone_id: str, epoch: int):
+        if epoch != self.epoch[drone_id]:
+            return
+        drone = self.manager.drones[drone_id]
+        del self.charging[drone_id]
+        with self.manager.lock:
+            drone.battery_percent = 100.0
+            drone.status = DroneStatus.IDLE
+            self.manager._drone_changed(drone)
+        self._drone_available()
+
+    def _drone_available(self):
+        """Immediate policy: hand the freed drone to the most urgent waiting orders"""
+        if self.policy != "immediate":
+            return
+        retry = []
+        for _ in range(min(RETRY_SCAN, len(self.waiting))):
+            entry = heapq.heappop(self.waiting)
+            if entry[2] not in self.manager.pending_deliveries:
+                continue
+            if self._try_assign(entry[2]):
+                break
+            retry.append(entry)
+        for entry in retry:
+            heapq.heappush(self.waiting, entry)
+
+    def _record(self, delivery, drone, status: str):
+        region = drone.region_id
+        tier = ("ELITE" if delivery.rarity_score > 95 else "ENTERPRISE" if delivery.rarity_score > 85
+                else "PRO" if delivery.rarity_score > 70 else "BASIC")
+        self.records.append(DeliveryRecord(
+            delivery_id=delivery.delivery_id,
+            opportunity_id=delivery.order_id,
+            origin_lat=delivery.pickup_lat,
+            origin_lon=delivery.pickup_lon,
+            destination_lat=delivery.delivery_lat,
+            destination_lon=delivery.delivery_lon,
+            origin_region=region,
+            destination_region=region,
+            rarity_score=delivery.rarity_score,
+            elite_tier=tier,
+            revenue_paise=int(round(self.revenue[delivery.delivery_id] * 100)) if status == "completed" else 0,
+            delivery_time_minutes=(self.loop.now - self.arrived_at[delivery.delivery_id]) / 60,
+            status=status,
+            is_cross_border=False,
+            drone_id=drone.drone_id,
+            timestamp=int(START_EPOCH + self.loop.now),
+        ))
+
+    # ------------------------------------------------------------------
+    # Running & reporting
+    # ------------------------------------------------------------------
+
+    def run(self, until: float = math.inf) -> Dict:
+        """Run to `until` (default: until every event has fired) and return summary()"""
+        self.loop.run(until)
+        return self.summary()
+
+    def dashboard(self) -> DroneOpsDashboard:
+        """DroneOpsDashboard whose metrics are computed from this run's delivery records"""
+        dashboard = DroneOpsDashboard.__new__(DroneOpsDashboard)
+        dashboard.data_dir = dashboard.logs_dir = None
+        dashboard.production_status = {
+            "total_drones": len(self.manager.drones),
+            "active_drones": len(self.manager.drones) - self.manager.fleet_stats.status_counts[DroneStatus.IDLE.value],
+        }
+        dashboard.deliveries = list(self.records)
+        dashboard.regional_metrics = {}
+        dashboard._calculate_metrics()
+        return dashboard
+
+    def summary(self) -> Dict:
+        manager = self.manager
+        waits = sorted(self.assigned_at[d] - self.arrived_at[d] for d in self.assigned_at)
+        dashboard = self.dashboard()
+        return {
+            "seed": self.seed,
+            "policy": self.policy,
+            "simulated_hours": round(self.loop.now / 3600, 3),
+            "events": self.loop.processed,
+            "submitted": len(self.arrived_at),
+            "completed": len(manager.completed_deliveries),
+            "failed": len(manager.failed_deliveries),
+            "in_progress": len(manager.active_deliveries),
+            "unserved": len(manager.pending_deliveries),
+            "failure_reasons": dict(sorted(self.failure_reasons.items())),
+            "avg_wait_min": round(sum(waits) / len(waits) / 60, 3) if waits else 0.0,
+            "p95_wait_min": round(waits[int(0.95 * (len(waits) - 1))] / 60, 3) if waits else 0.0,
+            "total_distance_km": round(manager.total_distance_flown_km, 3),
+            "fleet": manager.monitor_fleet()["fleet"],
+            "kpis": {k: float(v) if hasattr(v, "item") else v for k, v in dashboard.get_kpis().items()},
+            "regions": {
+                region: {k: float(v) if hasattr(v, "item") else v for k, v in asdict(metrics).items()}
+                for region, metrics in sorted(dashboard.regional_metrics.items())
+            },
+            "records_digest": self.digest(),
+        }
+
+    def digest(self) -> str:
+        """SHA-256 over every delivery record, for bit-for-bit comparisons"""
+        h = hashlib.sha256()
+        for record in self.records:
+            h.update(json.dumps(record.to_dict(), sort_keys=True).encode())
+        return h.hexdigest()
+
+
+def simulate(seed: int = 0, policy: str = "immediate", **kwargs) -> Dict:
+    """Run one FleetSimulation to completion and return its summary"""
+    return FleetSimulation(seed=seed, policy=policy, **kwargs).run()
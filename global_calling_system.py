@@ -257,6 +257,9 @@ class AICallingService:
         - Appointment confirmations
         - Marketing outreach
         - Emergency alerts
+        
+        This only plans the campaign; campaign_dialer.CampaignDialer
+        works through the numbers.
         """
         campaign_id = f"campaign_{int(time.time())}"
         
@@ -4,14 +4,18 @@ Provides scenario-based growth forecasts over a specified horizon using historic
 - Orders: counts and amounts per day
 - Customers: first purchase dates
 
-No external dependencies; simple deterministic math models.
+Scenarios are simple deterministic math models; the uncertainty bands around
+them come from the vectorized Monte Carlo engine (monte_carlo_forecast).
 """
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 from collections import defaultdict
 
+import numpy as np
+
 from models import get_session, Order, Customer
+from monte_carlo_forecast import cached_forecast, quantile_bands, simulate_paths
 
 
 def _date_of(ts: float) -> datetime:
@@ -66,9 +70,31 @@ def _trend(value_series: List[int]) -> float:
     return max(0.6, min(1.6, recent / prior))
 
 
-def forecast_scenarios(days_history: int = 180, horizon_days: int = 180) -> Dict:
+def _daily_volatility(value_series: List[int]) -> float:
+    """Day-over-day volatility of the 7-day rolling average (log returns), clipped to a sane range."""
+    if len(value_series) < 8:
+        return 0.01
+    rolling = np.convolve(np.asarray(value_series, dtype=float), np.ones(7) / 7, mode="valid")
+    rolling = rolling[rolling > 0]
+    if len(rolling) < 2:
+        return 0.01
+    return float(np.clip(np.std(np.diff(np.log(rolling))), 0.002, 0.05))
+
+
+def _simulate_bands(start: float, volatility: float, low: float, high: float,
+                    horizon_days: int, num_paths: int, seed: Optional[int]) -> Dict[str, List[float]]:
+    """Quantile bands for paths whose daily growth is drawn between the conservative and aggressive rates."""
+    growth = np.random.default_rng(seed).uniform(low, high, num_paths)
+    paths = simulate_paths(start, horizon_days, num_paths, growth=growth,
+                           volatility=volatility, floor_ratio=0.0, seed=seed)
+    return quantile_bands(paths, decimals=2)
+
+
+def forecast_scenarios(days_history: int = 180, horizon_days: int = 180,
+                       num_paths: int = 2000, seed: Optional[int] = 0) -> Dict:
     """Compute baseline, conservative, aggressive scenarios for orders & customers.
-    Returns dict with scenario arrays for daily forecast and summary growth percentages.
+    Returns dict with scenario arrays for daily forecast, summary growth percentages and
+    Monte Carlo quantile bands (p5..p95) per metric. Bands are cached on the input series.
     """
     metrics = get_daily_metrics(days_history)
     orders_series = metrics["orders_count"]
@@ -118,7 +144,24 @@ def forecast_scenarios(days_history: int = 180, horizon_days: int = 180) -> Dict
         "customers_growth_pct": _growth_pct(data["customers"]),
     } for name, data in out.items()}
 
-    return {"scenarios": out, "summary": summary, "generated_at": datetime.utcnow().isoformat()}
+    def _bands() -> Dict[str, Dict[str, List[float]]]:
+        low, high = min(scenarios.values()), max(scenarios.values())
+        return {
+            "orders": _simulate_bands(max(0.5, base_orders * t_orders), _daily_volatility(orders_series),
+                                      low, high, horizon_days, num_paths, seed),
+            "customers": _simulate_bands(max(0.5, base_customers * t_customers), _daily_volatility(customers_series),
+                                         low, high, horizon_days, num_paths, seed),
+        }
+
+    bands = cached_forecast(
+        "growth", orders_series + customers_series,
+        {"split": len(orders_series), "horizon": horizon_days, "paths": num_paths, "seed": seed},
+        _bands,
+    )
+    cached = bands.pop("cached")
+
+    return {"scenarios": out, "summary": summary, "bands": bands, "bands_cached": cached,
+            "generated_at": datetime.utcnow().isoformat()}
 
 
 def forecast_summary() -> Dict:
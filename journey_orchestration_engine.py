@@ -2,6 +2,10 @@
 Customer Journey Orchestration Engine (Feature #19)
 Manages multi-touch customer journeys with real-time personalization,
 dynamic branching, and attribution tracking across multiple channels.
+
+JourneyOrchestrator runs steps when process_step() is called. For durable,
+time-driven execution (waits that actually wake the journey later), see
+journey_scheduler.JourneyScheduler.
 """
 
 from datetime import datetime, timedelta
@@ -117,6 +121,25 @@ class TouchpointOptimizer:
         return summary
 
 
+def evaluate_condition(condition: Dict, context: Dict) -> bool:
+    """Evaluate a decision step condition ({key, operator, value}) against customer data"""
+    condition_key = condition.get("key")
+    condition_value = condition.get("value")
+    condition_operator = condition.get("operator", "equals")
+    
+    context_value = context.get(condition_key)
+    
+    if condition_operator == "equals":
+        return context_value == condition_value
+    if condition_operator == "greater_than":
+        return float(context_value or 0) > float(condition_value)
+    if condition_operator == "less_than":
+        return float(context_value or 0) < float(condition_value)
+    if condition_operator == "contains":
+        return condition_value in str(context_value or "")
+    return False
+
+
 class StepExecutor:
     """Executes individual journey steps with branch logic"""
 
@@ -190,21 +213,7 @@ class StepExecutor:
     def execute_decision_step(self, step_id: str, condition: Dict, context: Dict) -> Tuple[str, str]:
         """Execute conditional decision step with branching"""
         # Evaluate condition against context
-        condition_key = condition.get("key")
-        condition_value = condition.get("value")
-        condition_operator = condition.get("operator", "equals")
-        
-        context_value = context.get(condition_key)
-        
-        met = False
-        if condition_operator == "equals":
-            met = context_value == condition_value
-        elif condition_operator == "greater_than":
-            met = float(context_value or 0) > float(condition_value)
-        elif condition_operator == "less_than":
-            met = float(context_value or 0) < float(condition_value)
-        elif condition_operator == "contains":
-            met = condition_value in str(context_value or "")
+        met = evaluate_condition(condition, context)
         
         path = "yes" if met else "no"
         self.step_history.append({
@@ -339,22 +348,30 @@ class JourneyOrchestrator:
         self.completed_journeys = []
         self.customer_counter = 0
 
-    def enroll_customer(self, journey_id: str, customer_id: str, customer_data: Dict) -> Tuple[bool, str]:
-        """Enroll a customer in a journey"""
+    def enrollment_error(self, journey_id: str, customer_data: Dict) -> Optional[str]:
+        """Why a customer can't be enrolled in a journey, or None if they can"""
         journey = self.builder.get_journey(journey_id)
         if not journey:
-            return False, "Journey not found"
+            return "Journey not found"
         
         if journey["status"] != JourneyStatus.PUBLISHED.value:
-            return False, "Journey is not published"
+            return "Journey is not published"
         
         if journey["max_enrollments"] and journey["enrolled_count"] >= journey["max_enrollments"]:
-            return False, "Journey enrollment limit reached"
+            return "Journey enrollment limit reached"
         
         # Check segment eligibility
         segment = customer_data.get("segment", "default")
         if journey["segment"] != "all" and segment != journey["segment"]:
-            return False, f"Customer does not match segment {journey['segment']}"
+            return f"Customer does not match segment {journey['segment']}"
+        return None
+
+    def enroll_customer(self, journey_id: str, customer_id: str, customer_data: Dict) -> Tuple[bool, str]:
+        """Enroll a customer in a journey"""
+        error = self.enrollment_error(journey_id, customer_data)
+        if error:
+            return False, error
+        journey = self.builder.get_journey(journey_id)
         
         self.active_customers[customer_id] = {
             "journey_id": journey_id,
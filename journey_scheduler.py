@@ -0,0 +1,492 @@
+"""Durable, time-driven execution of customer journeys.
+
+Each enrollment is a row in journey_enrollments holding the index of its
+next step and when that step is due. JourneyScheduler runs them:
+
+- the hot horizon (rows due within HOT_HORIZON seconds) is held in a min-heap
+  of (due_at, enrollment_id); everything further out stays only in the
+  table and is pulled in by an indexed (status, due_at) range scan as the
+  horizon slides forward
+- run_due() pops due enrollments in batches of BATCH_SIZE and walks each
+  one to its next wait, message or the end of the journey. Messages are
+  handed to the sender grouped per channel, one call per channel per
+  batch, and the new positions are written back with one executemany
+- the worker thread sleeps until the earliest due time or the next refill,
+  so a million enrollments waiting on later steps cost nothing while idle
+
+A failed send (or a sender call that raises, for its whole channel) is
+retried after RETRY_DELAY, up to MAX_SEND_ATTEMPTS, and is then skipped. A
+batch whose write fails is held in the heap and retried after RETRY_DELAY.
+Messages are sent before the new position is written, so after a crash or
+a failed write a message can be sent twice but never dropped. After a
+restart, the first refill reloads every pending step from the table,
+including overdue ones.
+
+Enrolling stores the journey in journey_definitions / journey_steps under
+an id carrying a hash of its steps, and each enrollment keeps that
+definition id, so its step index always refers to the steps it was
+enrolled into, whatever ids the in-memory JourneyBuilder hands out after
+a restart. An enrollment whose
+definition is missing or whose step is out of range is retried after
+RETRY_DELAY, up to MAX_RESOLVE_ATTEMPTS, and then marked 'failed'. Run one
+scheduler per database.
+"""
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from journey_orchestration_engine import JourneyOrchestrator, StepExecutor, StepType, evaluate_condition
+from models import get_engine, get_session, JourneyDefinition, JourneyEnrollment, JourneyStep
+from utils import _get_db_url
+
+logger = logging.getLogger(__name__)
+
+HOT_HORIZON = 3600.0  # seconds ahead held in memory
+BATCH_SIZE = 1000
+RETRY_DELAY = 300.0
+MAX_SEND_ATTEMPTS = 3
+MAX_RESOLVE_ATTEMPTS = 5  # passes an enrollment with an unknown definition or step gets before it fails
+MESSAGE_STEPS = {StepType.EMAIL, StepType.SMS, StepType.PUSH, StepType.WEBHOOK}
+RECIPIENT_FIELDS = {StepType.EMAIL: 'email', StepType.SMS: 'phone'}
+
+# sender(channel, messages) -> per-message success (None means all sent)
+Sender = Callable[[str, List[Dict]], Optional[List[bool]]]
+
+_ENGINES = {}  # db url -> engine
+
+
+def _session():
+    url = _get_db_url()
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+def enrollment_id(journey_id: str, customer_id: str) -> str:
+    return f"{journey_id}:{customer_id}"
+
+
+def definition_id(journey: Dict) -> str:
+    """'<journey_id>@<hash of its name and steps>'; a different id whenever the steps differ."""
+    steps = [[step['step_id'], step['type'], step['config']] for step in journey['steps']]
+    payload = json.dumps({'name': journey['name'], 'steps': steps}, sort_keys=True, default=str)
+    return f"{journey['id']}@{hashlib.sha1(payload.encode()).hexdigest()[:16]}"
+
+
+def executor_sender(executor: StepExecutor) -> Sender:
+    """Deliver a batch through StepExecutor (the simulated email/SMS providers)."""
+    def send(channel: str, messages: List[Dict]) -> List[bool]:
+        results = []
+        for message in messages:
+            if channel == StepType.EMAIL.value:
+                ok, _ = executor.execute_email_step(message['step_id'], message['customer_id'], message['to'],
+                                                    message.get('subject', ''), message.get('content', ''))
+            elif channel == StepType.SMS.value:
+                ok, _ = executor.execute_sms_step(message['step_id'], message['customer_id'], message['to'],
+                                                  message.get('message', ''))
+            else:
+                ok = True
+            results.append(ok)
+        return results
+    return send
+
+
+class JourneyScheduler:
+    """Stores each journey's next-due step and advances only the due ones."""
+
+    def __init__(self, orchestrator: JourneyOrchestrator, sender: Optional[Sender] = None,
+                 horizon: float = HOT_HORIZON, batch_size: int = BATCH_SIZE, clock=time.time):
+        self.orchestrator = orchestrator
+        self.sender = sender or executor_sender(orchestrator.executor)
+        self.horizon = horizon
+        self.batch_size = batch_size
+        self.clock = clock
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}  # enrollment id -> due_at of its live heap entry
+        self._loaded_until: Optional[float] = None  # every scheduled row due before this is in the heap
+        self._definitions: Dict[str, List[Dict]] = {}  # definition id -> steps
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -- enrollment ---------------------------------------------------------
+
+    def enroll(self, journey_id: str, customer_id: str, customer_data: Dict,
+               start_at: Optional[float] = None) -> Tuple[bool, str]:
+        """Enroll a customer; the first step is due at start_at (default now)."""
+        error = self.orchestrator.enrollment_error(journey_id, customer_data)
+        if error:
+            return False, error
+        key = enrollment_id(journey_id, customer_id)
+        journey = self.orchestrator.builder.get_journey(journey_id)
+        now = self.clock()
+        due = now if start_at is None else start_at
+        session = _session()
+        try:
+            if session.get(JourneyEnrollment, key) is not None:
+                return False, "Customer already enrolled"
+            definition = self._store_definition(session, journey)
+            session.add(JourneyEnrollment(
+                id=key, journey_id=journey_id, definition_id=definition, customer_id=customer_id,
+                step=0, status='scheduled',
+                due_at=due, attempts=0, customer_data=json.dumps(customer_data), enrolled_at=now, updated_at=now,
+            ))
+            session.commit()
+        finally:
+            session.close()
+        journey["enrolled_count"] += 1
+        self._push(key, due)
+        return True, f"Customer {customer_id} enrolled in journey {journey_id}"
+
+    def enroll_many(self, journey_id: str, customers: Iterable[Tuple[str, Dict, Optional[float]]],
+                    chunk_size: int = 5000) -> int:
+        """Bulk enrollment from (customer_id, customer_data, start_at) tuples.
+
+        Ineligible and already-enrolled customers are skipped.
+
+        Returns:
+            Number of customers enrolled
+        """
+        journey = self.orchestrator.builder.get_journey(journey_id)
+        now = self.clock()
+        enrolled = 0
+        session = _session()
+        try:
+            definition = self._store_definition(session, journey)
+            chunk = []
+            for customer_id, customer_data, start_at in customers:
+                if self.orchestrator.enrollment_error(journey_id, customer_data):
+                    continue
+                chunk.append({
+                    'id': enrollment_id(journey_id, customer_id), 'journey_id': journey_id,
+                    'definition_id': definition, 'customer_id': customer_id, 'step': 0, 'status': 'scheduled',
+                    'due_at': now if start_at is None else start_at, 'attempts': 0,
+                    'customer_data': json.dumps(customer_data), 'enrolled_at': now, 'updated_at': now,
+                })
+                if len(chunk) >= chunk_size:
+                    enrolled += self._insert_chunk(session, chunk)
+                    chunk = []
+            if chunk:
+                enrolled += self._insert_chunk(session, chunk)
+        finally:
+            session.close()
+        journey["enrolled_count"] += enrolled
+        return enrolled
+
+    def _store_definition(self, session, journey: Dict) -> str:
+        """Save the journey and its steps under their definition id (once per scheduler); returns the id."""
+        key = definition_id(journey)
+        if key not in self._definitions:
+            now = self.clock()
+            steps = [{'step_id': step['step_id'], 'type': step['type'], 'config': step['config']}
+                     for step in journey['steps']]
+            trigger = journey.get('trigger') or {}
+            created = session.execute(sqlite_insert(JourneyDefinition).values(
+                id=key, name=journey['name'], description=journey.get('description'),
+                trigger_type=trigger.get('type'), segment=journey.get('segment'), status=journey['status'],
+                created_at=now, published_at=now, max_enrollments=journey.get('max_enrollments'),
+            ).on_conflict_do_nothing(index_elements=['id'])).rowcount
+            if created:  # the steps go in with their definition, so a stored definition is complete
+                session.execute(insert(JourneyStep), [{
+                    'id': f"{key}:{step['step_id']}", 'journey_id': key, 'step_type': step['type'],
+                    'position': position, 'config': json.dumps(step['config'], default=str), 'created_at': now,
+                } for position, step in enumerate(steps)])
+            session.commit()
+            self._definitions[key] = steps
+        return key
+
+    def _load_definitions(self, session, keys: Iterable[str]):
+        missing = {key for key in keys if key is not None and key not in self._definitions}
+        if missing:
+            rows = session.query(
+                JourneyStep.id, JourneyStep.journey_id, JourneyStep.step_type, JourneyStep.config,
+            ).filter(JourneyStep.journey_id.in_(missing)).order_by(JourneyStep.journey_id, JourneyStep.position)
+            for step_key, key, step_type, config in rows:
+                self._definitions.setdefault(key, []).append({
+                    'step_id': step_key[len(key) + 1:], 'type': step_type, 'config': json.loads(config or '{}'),
+                })
+
+    def _insert_chunk(self, session, rows: List[Dict]) -> int:
+        existing = set()
+        for start in range(0, len(rows), 500):
+            existing.update(key for (key,) in session.query(JourneyEnrollment.id).filter(
+                JourneyEnrollment.id.in_([row['id'] for row in rows[start:start + 500]])))
+        rows = [row for row in {row['id']: row for row in rows}.values() if row['id'] not in existing]
+        if rows:
+            session.execute(insert(JourneyEnrollment), rows)
+            session.commit()
+        for row in rows:
+            self._push(row['id'], row['due_at'])
+        return len(rows)
+
+    def pause(self, journey_id: str, customer_id: str) -> bool:
+        return self._set_status(enrollment_id(journey_id, customer_id), 'paused', None, 'scheduled')
+
+    def resume(self, journey_id: str, customer_id: str) -> bool:
+        return self._set_status(enrollment_id(journey_id, customer_id), 'scheduled', self.clock(), 'paused')
+
+    def _set_status(self, key: str, status: str, due_at: Optional[float], from_status: str) -> bool:
+        session = _session()
+        try:
+            changed = session.query(JourneyEnrollment).filter(
+                JourneyEnrollment.id == key, JourneyEnrollment.status == from_status
+            ).update({'status': status, 'due_at': due_at, 'updated_at': self.clock()}, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+        if changed and due_at is not None:
+            self._push(key, due_at)
+        return bool(changed)
+
+    # -- hot horizon --------------------------------------------------------
+
+    def _push(self, key: str, due_at: float):
+        with self._lock:
+            if self._loaded_until is None or due_at >= self._loaded_until:
+                self._due.pop(key, None)  # any earlier heap entry is now stale
+                return  # picked up by the refill scan that reaches it
+            self._due[key] = due_at
+            heapq.heappush(self._heap, (due_at, key))
+            first = self._heap[0][1] == key
+        if first:
+            self._wake.set()
+
+    def refill(self, now: Optional[float] = None) -> int:
+        """Load scheduled rows due before now + horizon that aren't in the heap yet."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            start = self._loaded_until
+            end = now + self.horizon
+            if start is not None and end <= start:
+                return 0
+            # Raised before the scan: rows written meanwhile are pushed by their writer or seen by the scan
+            self._loaded_until = end
+        session = _session()
+        try:
+            query = session.query(JourneyEnrollment.id, JourneyEnrollment.due_at).filter(
+                JourneyEnrollment.status == 'scheduled', JourneyEnrollment.due_at < end
+            )
+            if start is not None:
+                query = query.filter(JourneyEnrollment.due_at >= start)
+            rows = query.all()
+        finally:
+            session.close()
+        loaded = 0
+        with self._lock:
+            for key, due_at in rows:
+                if self._due.get(key) != due_at:
+                    self._due[key] = due_at
+                    heapq.heappush(self._heap, (due_at, key))
+                    loaded += 1
+        return loaded
+
+    def _pop_due(self, now: float, limit: int) -> List[str]:
+        batch = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(batch) < limit:
+                due_at, key = heapq.heappop(self._heap)
+                if self._due.get(key) == due_at:  # otherwise superseded by a later push
+                    del self._due[key]
+                    batch.append(key)
+        return batch
+
+    def next_wakeup(self) -> float:
+        """Seconds until the earliest due step or the next refill, whichever comes first."""
+        now = self.clock()
+        with self._lock:
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            refill_at = now if self._loaded_until is None else self._loaded_until - self.horizon / 2
+            wake_at = min(self._heap[0][0], refill_at) if self._heap else refill_at
+        return max(wake_at - now, 0.0)
+
+    @property
+    def hot_count(self) -> int:
+        return len(self._due)
+
+    # -- execution ----------------------------------------------------------
+
+    def run_due(self, now: Optional[float] = None) -> Dict[str, int]:
+        """Advance every enrollment due at `now`, BATCH_SIZE at a time."""
+        now = self.clock() if now is None else now
+        if self._loaded_until is None or now + self.horizon / 2 >= self._loaded_until:
+            self.refill(now)
+        totals = defaultdict(int)
+        while True:
+            batch = self._pop_due(now, self.batch_size)
+            if not batch:
+                break
+            self._advance(batch, now, totals)
+            totals['batches'] += 1
+        return dict(totals)
+
+    def _walk(self, steps: List[Dict], step: int, customer_data: Dict, now: float):
+        """Run steps from `step` until a wait, a message or the end.
+
+        Returns:
+            (next step, due_at or None when completed, (step index, StepType, message) or None)
+        """
+        while step < len(steps):
+            definition = steps[step]
+            kind = StepType(definition["type"])
+            config = definition["config"]
+            if kind == StepType.WAIT:
+                return step + 1, now + float(config.get("hours", 1)) * 3600, None
+            if kind in MESSAGE_STEPS:
+                following, due_at = step + 1, now
+                # Fold the usual "message, then wait" into a single wakeup
+                if following < len(steps) and steps[following]["type"] == StepType.WAIT.value:
+                    due_at = now + float(steps[following]["config"].get("hours", 1)) * 3600
+                    following += 1
+                return following, (due_at if following < len(steps) else None), (step, kind, config)
+            if kind == StepType.DECISION:
+                evaluate_condition(config.get("condition", {}), customer_data)
+            step += 1  # decisions branch linearly, like process_step; actions need no delivery
+        return step, None, None
+
+    def _advance(self, keys: List[str], now: float, totals: Dict[str, int]):
+        counts = defaultdict(int)  # merged into totals only once the batch is written
+        session = _session()
+        try:
+            updates, journeys = self._advance_rows(session, keys, now, counts)
+            session.commit()
+        except Exception:
+            # The batch left the heap but its rows still say 'scheduled' with a past due_at,
+            # which no refill scan reaches again: hold them in the heap for another try
+            session.rollback()
+            logger.exception("Journey batch of %d enrollments failed; retrying in %.0fs", len(keys), RETRY_DELAY)
+            totals['deferred'] += len(keys)
+            with self._lock:
+                for key in keys:
+                    self._due[key] = now + RETRY_DELAY
+                    heapq.heappush(self._heap, (now + RETRY_DELAY, key))
+            return
+        finally:
+            session.close()
+        for name, count in counts.items():
+            totals[name] += count
+        for change in updates:
+            if change.get('status') == 'completed':
+                if change['id'] in journeys:
+                    journeys[change['id']]["completed_count"] += 1
+                totals['completed'] += 1
+        totals['advanced'] += len(updates)
+        for change in updates:
+            if change['due_at'] is not None:
+                self._push(change['id'], change['due_at'])
+
+    def _advance_rows(self, session, keys: List[str], now: float, totals: Dict[str, int]):
+        """Walk the due rows, hand their messages to the sender and write the new positions.
+
+        Returns:
+            (updates written, {enrollment id: builder journey} for completion stats)
+        """
+        rows = []
+        for start in range(0, len(keys), 500):
+            rows.extend(session.query(
+                JourneyEnrollment.id, JourneyEnrollment.journey_id, JourneyEnrollment.definition_id,
+                JourneyEnrollment.customer_id,
+                JourneyEnrollment.step, JourneyEnrollment.status, JourneyEnrollment.due_at,
+                JourneyEnrollment.attempts, JourneyEnrollment.customer_data,
+            ).filter(JourneyEnrollment.id.in_(keys[start:start + 500])).all())
+
+        self._load_definitions(session, {row.definition_id for row in rows})
+        outbox = defaultdict(list)  # channel -> [(update, message step, attempts, message)]
+        updates = []
+        journeys = {}  # enrollment id -> builder journey whose stats it counts towards
+        for row in rows:
+            if row.status != 'scheduled' or row.due_at is None or row.due_at > now:
+                continue  # paused or rescheduled since it was loaded
+            journey = self.orchestrator.builder.get_journey(row.journey_id)
+            definition = row.definition_id
+            if definition is None and journey is not None:
+                definition = self._store_definition(session, journey)  # enrolled before definitions were stored
+            steps = self._definitions.get(definition)
+            if steps is None or not 0 <= (row.step or 0) < len(steps):
+                problem = (f"definition {definition} of journey {row.journey_id} not found" if steps is None
+                           else f"step {row.step} outside the {len(steps)} steps of {definition}")
+                updates.append(self._unresolved(row, problem, now, totals))
+                continue
+            if journey is not None and definition_id(journey) == definition:
+                journeys[row.id] = journey
+            customer_data = json.loads(row.customer_data or '{}')
+            step, due_at, message = self._walk(steps, row.step or 0, customer_data, now)
+            change = {'id': row.id, 'definition_id': definition, 'step': step, 'due_at': due_at,
+                      'attempts': 0, 'status': 'scheduled' if due_at is not None else 'completed',
+                      'updated_at': now}
+            updates.append(change)
+            if message is not None:
+                index, kind, config = message
+                field = RECIPIENT_FIELDS.get(kind)
+                outbox[kind.value].append((change, index, row.attempts, {
+                    **config,
+                    'enrollment_id': row.id, 'journey_id': row.journey_id, 'customer_id': row.customer_id,
+                    'step_id': steps[index]["step_id"],
+                    'to': customer_data.get(field, '') if field else row.customer_id,
+                }))
+
+        for channel, items in outbox.items():
+            try:
+                results = self.sender(channel, [message for *_, message in items])
+            except Exception:
+                logger.exception("Sender failed for %d %s messages", len(items), channel)
+                results = [False] * len(items)  # retried like individually failed sends
+            for i, (change, index, attempts, _) in enumerate(items):
+                if results is None or results[i]:
+                    totals[f'sent_{channel}'] += 1
+                elif attempts + 1 < MAX_SEND_ATTEMPTS:
+                    change.update(step=index, status='scheduled', due_at=now + RETRY_DELAY, attempts=attempts + 1)
+                    totals['retried'] += 1
+                else:
+                    totals['failed'] += 1  # give up on this message, carry on with the journey
+
+        if updates:
+            session.execute(update(JourneyEnrollment), updates)
+        return updates, journeys
+
+    def _unresolved(self, row, problem: str, now: float, totals: Dict[str, int]) -> Dict:
+        """Retry an enrollment whose steps can't be resolved, or mark it failed once out of attempts."""
+        attempts = (row.attempts or 0) + 1
+        if attempts < MAX_RESOLVE_ATTEMPTS:
+            logger.warning("Enrollment %s: %s; retrying later", row.id, problem)
+            totals['retried'] += 1
+            return {'id': row.id, 'due_at': now + RETRY_DELAY, 'attempts': attempts, 'updated_at': now}
+        logger.error("Enrollment %s: %s; giving up after %d attempts", row.id, problem, attempts)
+        totals['failed'] += 1
+        return {'id': row.id, 'status': 'failed', 'due_at': None, 'attempts': attempts, 'updated_at': now}
+
+    # -- worker -------------------------------------------------------------
+
+    def start(self):
+        """Run the scheduler on a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='journey-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.run_due()
+            except Exception as e:
+                logger.error(f"Journey scheduler pass failed: {e}")
+            self._wake.wait(self.next_wakeup())
@@ -0,0 +1,128 @@
+"""Keyset (cursor) pagination for the admin list pages.
+
+Pages are addressed by an opaque cursor holding the (sort value, id) of the
+row at the page boundary, so page N costs the same as page 1 instead of
+scanning OFFSET rows. Totals come from a short-lived cache rather than a
+COUNT(*) on every request.
+"""
+import base64
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cache_layer import cache
+
+COUNT_CACHE_TTL = int(os.getenv('ADMIN_COUNT_TTL', '60'))  # seconds a cached total may lag
+
+
+def encode_cursor(sort_value: Optional[float], row_id: str) -> str:
+    """Opaque, URL-safe cursor for the row at a page boundary."""
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[Optional[float], str]:
+    """Inverse of encode_cursor; raises ValueError for anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if not isinstance(row_id, str) or not (sort_value is None or isinstance(sort_value, (int, float))):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return sort_value, row_id
+
+
+def _where(filters: Dict[str, Any]) -> Tuple[List[str], List[Any]]:
+    clauses = [f'{column} = ?' for column in filters]
+    return clauses, list(filters.values())
+
+
+def _boundary(sort_column: str, cursor: Tuple[Optional[float], str], older: bool) -> Tuple[str, List[Any]]:
+    """Rows strictly after (older=True) or before the cursor in `sort_column DESC, id DESC` order.
+
+    NULL sort values come last in that order, as SQLite sorts NULL lowest.
+    """
+    value, row_id = cursor
+    if older:
+        if value is None:
+            return f'({sort_column} IS NULL AND id < ?)', [row_id]
+        return (f'({sort_column} < ? OR ({sort_column} = ? AND id < ?) OR {sort_column} IS NULL)',
+                [value, value, row_id])
+    if value is None:
+        return f'({sort_column} IS NOT NULL OR id > ?)', [row_id]
+    return f'({sort_column} > ? OR ({sort_column} = ? AND id > ?))', [value, value, row_id]
+
+
+def keyset_page(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: Sequence[str],
+    sort_column: str,
+    filters: Dict[str, Any],
+    per_page: int,
+    cursor: Optional[str] = None,
+    direction: str = 'next',
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """One page of `table`, newest first, ordered by (sort_column, id).
+
+    Walks the (sort_column, id) index that init_db creates.
+
+    Args:
+        columns: Selected columns; must include 'id' and sort_column
+        filters: Equality filters {column: value}
+        cursor: Boundary cursor from a previous page (None = first page)
+        direction: 'next' (older rows after cursor) or 'prev' (newer rows before it)
+        offset: Legacy ?page=N support when no cursor is given
+
+    Returns:
+        dict with rows (tuples in `columns` order), next_cursor, prev_cursor
+    """
+    clauses, params = _where(filters)
+    backwards = cursor is not None and direction == 'prev'
+    if cursor is not None:
+        clause, extra = _boundary(sort_column, decode_cursor(cursor), older=not backwards)
+        clauses.append(clause)
+        params += extra
+        offset = 0
+
+    order = 'ASC' if backwards else 'DESC'
+    where_sql = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+    rows = conn.execute(
+        f'SELECT {", ".join(columns)} FROM {table} {where_sql} '
+        f'ORDER BY {sort_column} {order}, id {order} LIMIT ? OFFSET ?',
+        params + [per_page + 1, offset],
+    ).fetchall()
+
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    has_next = True if backwards else more
+    has_prev = more if backwards else (cursor is not None or offset > 0)
+
+    sort_at, id_at = columns.index(sort_column), columns.index('id')
+    boundary = lambda row: encode_cursor(row[sort_at], row[id_at])
+    return {
+        'rows': rows,
+        'next_cursor': boundary(rows[-1]) if rows and has_next else None,
+        'prev_cursor': boundary(rows[0]) if rows and has_prev else None,
+    }
+
+
+def cached_count(conn: sqlite3.Connection, db_path: str, table: str, filters: Dict[str, Any],
+                 ttl: int = COUNT_CACHE_TTL) -> int:
+    """Row count for the filters, cached for `ttl` seconds (approximate while cached)."""
+    digest = hashlib.md5(json.dumps([db_path, filters], sort_keys=True, default=str).encode()).hexdigest()
+    key = f"cache:count:{table}:{digest}"
+    hit = cache.get(key)
+    if hit is not None:
+        return int(hit)
+    clauses, params = _where(filters)
+    where_sql = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+    total = conn.execute(f'SELECT COUNT(*) FROM {table} {where_sql}', params).fetchone()[0]
+    cache.set(key, str(total), ttl=ttl)
+    return total
@@ -1,5 +1,5 @@
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from models import get_engine, get_session, Order
 from utils import _get_db_url
 from pricing import all_dynamic_prices
@@ -14,12 +14,14 @@ def _recent_orders(days: int = 90):
     return rows
 
 
-def compute_signals(days: int = 90) -> Dict[str, Dict]:
+def compute_signals(days: int = 90, rows: Optional[List[Order]] = None) -> Dict[str, Dict]:
     """Compute simple market signals per product.
 
     Returns keys per product: demand_index, conversion_rate, avg_price_rupees, revenue_rupees.
+    `rows` may carry the orders of the window when the caller already loaded them.
     """
-    rows = _recent_orders(days)
+    if rows is None:
+        rows = _recent_orders(days)
     prices = all_dynamic_prices(days=days)
     by_product: Dict[str, Dict] = {}
     for r in rows:
@@ -70,9 +72,9 @@ def competitor_price_index(days: int = 90) -> Dict[str, float]:
     return {p: round(prices.get(p, base[p]) / float(base[p]), 3) for p in base.keys()}
 
 
-def generate_insights(days: int = 90) -> List[Dict]:
+def generate_insights(days: int = 90, signals: Optional[Dict[str, Dict]] = None) -> List[Dict]:
     """Generate actionable market insights and recommendations."""
-    sig = compute_signals(days)
+    sig = signals if signals is not None else compute_signals(days)
     idx = competitor_price_index(days)
     out: List[Dict] = []
     for prod, s in sig.items():
@@ -106,9 +108,9 @@ def generate_insights(days: int = 90) -> List[Dict]:
     return out
 
 
-def market_summary(days: int = 90) -> Dict:
-    sig = compute_signals(days)
-    insights = generate_insights(days)
+def market_summary(days: int = 90, rows: Optional[List[Order]] = None) -> Dict:
+    sig = compute_signals(days, rows=rows)
+    insights = generate_insights(days, signals=sig)
     top = insights[0] if insights else None
     total_rev = sum(s['revenue_rupees'] for s in sig.values())
     return {
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, String, Integer, Text, Float, ForeignKey, DateTime
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import declarative_base, relationship, sessionmaker, Session
+from sqlalchemy import create_engine, event, inspect, Index
 import os
 import time
 
@@ -29,6 +29,9 @@ class Webhook(Base):
     event = Column(String, index=True)
     payload = Column(Text)
     received_at = Column(Float)
+    __table_args__ = (
+        Index('ix_webhooks_received_at_id', 'received_at', 'id'),  # keyset pagination
+    )
 
 
 class Order(Base):
@@ -42,6 +45,9 @@ class Order(Base):
     created_at = Column(Float)
     paid_at = Column(Float, nullable=True)
     payments = relationship('Payment', back_populates='order')
+    __table_args__ = (
+        Index('ix_orders_created_at_id', 'created_at', 'id'),  # keyset pagination
+    )
 
 
 class Payment(Base):
@@ -76,6 +82,65 @@ class Customer(Base):
     last_segmented_at = Column(Float)  # When segment was last calculated
 
 
+class CustomerFeature(Base):
+    """Materialized per-customer features from paid orders (customer_intelligence).
+
+    Refreshed per customer after each committed Order write (session hooks
+    below) and rebuilt in bulk by customer_intelligence.rebuild_customer_features().
+    """
+    __tablename__ = 'customer_features'
+    receipt = Column(String, primary_key=True)
+    order_count = Column(Integer, default=0)  # Paid orders
+    paid_revenue_paise = Column(Integer, default=0)
+    first_purchase_at = Column(Float)
+    last_purchase_at = Column(Float, index=True)
+    avg_order_value_paise = Column(Integer, default=0)
+    days_since_purchase = Column(Integer)  # As of segmented_at
+    segment = Column(String, index=True)  # CustomerSegment value
+    segmented_at = Column(Float, index=True)  # When segment/days_since were computed
+
+
+_FEATURE_RECEIPTS = 'customer_feature_receipts'  # session.info: receipts to refresh after commit
+_FEATURES_STALE = 'customer_features_stale'  # session.info: a bulk order write happened
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_customer_features(session, flush_context):
+    """Remember every receipt whose orders changed in this flush (no SQL here)."""
+    receipts = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Order):
+            receipts.add(obj.receipt)
+            receipts.update(inspect(obj).attrs.receipt.history.deleted)  # receipt moved
+    receipts.discard(None)
+    if receipts:
+        session.info.setdefault(_FEATURE_RECEIPTS, set()).update(receipts)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _invalidate_customer_features(orm_execute_state):
+    """Bulk UPDATE/DELETE on orders bypasses the flush hook; mark the features stale."""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is Order.__mapper__:
+        orm_execute_state.session.info[_FEATURES_STALE] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _sync_customer_features(session):
+    """Refresh the feature rows once the order write is committed, outside its transaction."""
+    receipts = session.info.pop(_FEATURE_RECEIPTS, None)
+    stale = session.info.pop(_FEATURES_STALE, False)
+    if receipts or stale:
+        from customer_intelligence import sync_customer_features
+        sync_customer_features(session.get_bind(mapper=Order.__mapper__), receipts or (), stale)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_customer_features(session):
+    session.info.pop(_FEATURE_RECEIPTS, None)
+    session.info.pop(_FEATURES_STALE, None)
+
+
 class AbandonedReminder(Base):
     __tablename__ = 'abandoned_reminders'
     id = Column(String, primary_key=True)
@@ -653,8 +718,141 @@ class CallingCampaign(Base):
     successful_calls = Column(Integer, default=0)
     failed_calls = Column(Integer, default=0)
     total_cost_rupees = Column(Float, default=0.0)
-    status = Column(String, nullable=False, index=True)  # scheduled, running, paused, completed
+    status = Column(String, nullable=False, index=True)  # scheduled, running, stopping, paused, completed
     scheduled_at = Column(Float)
     started_at = Column(Float)
     completed_at = Column(Float)
-    created_at = Column(Float, nullable=False)
\ No newline at end of file
+    created_at = Column(Float, nullable=False)
+    dialer_owner = Column(String)  # campaign_dialer lease: token of the dialer running the campaign
+    dialer_lease_until = Column(Float)  # lease expiry, renewed by the owner every few seconds
+    dialer_stats = Column(Text)  # JSON progress snapshot of the owner, for other processes
+
+
+class CampaignCall(Base):
+    """Per-campaign dial queue: one row per target number (campaign_dialer)."""
+    __tablename__ = 'campaign_calls'
+    id = Column(Integer, primary_key=True)
+    campaign_id = Column(String, nullable=False)
+    to_number = Column(String, nullable=False)
+    country_code = Column(String, nullable=False)  # '+91', '+1', ... or 'other'
+    status = Column(String, nullable=False, default='queued')  # queued, dialing, done, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(Float, default=0.0)  # not dialed again before this (retry backoff)
+    last_status = Column(String)  # CallStatus of the latest attempt
+    provider = Column(String)
+    updated_at = Column(Float)
+    __table_args__ = (
+        Index('ix_campaign_calls_due', 'campaign_id', 'status', 'next_attempt_at'),
+        Index('ix_campaign_calls_number', 'campaign_id', 'to_number', unique=True),
+    )
+
+
+# ============================================================================
+# Mobile delta sync (delta_sync)
+# ============================================================================
+
+
+class SyncChange(Base):
+    """Per-tenant change log for mobile sync.
+
+    Only the latest change of each record is kept, so the log doubles as the
+    current state; deletes stay as tombstones until compacted.
+    """
+    __tablename__ = 'sync_changes'
+    seq = Column(Integer, primary_key=True)  # Monotonic, never reused (AUTOINCREMENT)
+    tenant_id = Column(String, nullable=False)
+    resource = Column(String, nullable=False)  # 'prompt', 'content', ...
+    resource_id = Column(String, nullable=False)
+    deleted = Column(Integer, default=0)  # 1 = tombstone
+    data = Column(Text)  # JSON object
+    version = Column(Text)  # JSON version vector {device_id: counter}
+    device_id = Column(String)
+    created_at = Column(Float, index=True)
+    __table_args__ = (
+        Index('ix_sync_changes_tenant_seq', 'tenant_id', 'seq'),
+        Index('ix_sync_changes_record', 'tenant_id', 'resource', 'resource_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class SyncTenant(Base):
+    __tablename__ = 'sync_tenants'
+    tenant_id = Column(String, primary_key=True)
+    purged_seq = Column(Integer, default=0)  # Highest tombstone seq compacted away
+    compacted_at = Column(Float)
+
+
+
+# ============================================================================
+# A/B testing (ab_testing_engine)
+# ============================================================================
+
+
+class ExperimentVariantStats(Base):
+    """Running totals per experiment variant, written in batches by ExperimentStatsStore."""
+    __tablename__ = 'experiment_variant_stats'
+    experiment_id = Column(String, primary_key=True)
+    variant_id = Column(String, primary_key=True)
+    visitors = Column(Integer, default=0)
+    conversions = Column(Integer, default=0)
+    revenue = Column(Float, default=0.0)
+    min_p_value = Column(Float)  # running minimum of the always-valid p-value vs the control; NULL until observed
+    updated_at = Column(Float)
+
+
+# ============================================================================
+# Attribution (attribution_batch)
+# ============================================================================
+
+
+class AttributionTouchpoint(Base):
+    """Marketing touchpoints and conversions per customer.
+
+    A row with conversion_value set is a conversion: it closes the path made
+    of the customer's touches since their previous conversion.
+    """
+    __tablename__ = 'attribution_touchpoints'
+    id = Column(Integer, primary_key=True)
+    customer_id = Column(String, nullable=False)
+    channel = Column(String)  # NULL on conversion rows
+    occurred_at = Column(Float, nullable=False)
+    conversion_value = Column(Float)
+    order_id = Column(String)
+    __table_args__ = (
+        Index('ix_attribution_touchpoints_customer', 'customer_id', 'occurred_at'),
+    )
+
+
+class AttributionRun(Base):
+    """Output of one attribution batch run (all models, JSON)."""
+    __tablename__ = 'attribution_runs'
+    id = Column(Integer, primary_key=True)
+    created_at = Column(Float, nullable=False, index=True)
+    touchpoints = Column(Integer, default=0)
+    conversions = Column(Integer, default=0)
+    distinct_paths = Column(Integer, default=0)
+    results = Column(Text)  # JSON {model: {channel: value}, ...}
+
+
+# ============================================================================
+# Journey scheduling (journey_scheduler)
+# ============================================================================
+
+
+class JourneyEnrollment(Base):
+    """A customer's position in a journey and when its next step is due."""
+    __tablename__ = 'journey_enrollments'
+    id = Column(String, primary_key=True)  # '<journey_id>:<customer_id>'
+    journey_id = Column(String, nullable=False)
+    definition_id = Column(String)  # journey_definitions row whose steps the step index refers to
+    customer_id = Column(String, nullable=False)
+    step = Column(Integer, default=0)  # index of the next step to run
+    status = Column(String, nullable=False, default='scheduled')  # scheduled, paused, completed, failed
+    due_at = Column(Float)  # next step runs at/after this; NULL unless scheduled
+    attempts = Column(Integer, default=0)  # failed sends of the current step, or failed lookups of its steps
+    customer_data = Column(Text)  # JSON
+    enrolled_at = Column(Float)
+    updated_at = Column(Float)
+    __table_args__ = (
+        Index('ix_journey_enrollments_due', 'status', 'due_at'),
+    )
@@ -0,0 +1,138 @@
+"""Monte Carlo Forecast Engine
+
+Vectorized path simulation shared by the forecasting modules:
+- simulate_paths: thousands of paths at once as a paths x periods array
+  (multiplicative growth, additive trend, seasonality, noise, floor clipping)
+- quantile_bands: per-period quantiles instead of a handful of sample paths
+- cached_forecast: results cached on a hash of the input series, so repeated
+  dashboard refreshes reuse the last simulation (Redis or in-memory via cache_layer)
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from cache_layer import cache
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+FORECAST_CACHE_TTL = int(os.getenv('FORECAST_CACHE_TTL', '900'))  # 15 minutes
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def simulate_paths(
+    start: float,
+    periods: int,
+    num_paths: int,
+    growth: ArrayLike = 1.0,
+    drift: ArrayLike = 0.0,
+    volatility: ArrayLike = 0.0,
+    seasonal_amplitude: float = 0.0,
+    seasonal_period: int = 8,
+    floor_ratio: Optional[float] = None,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """Simulate forecast paths.
+
+    Each step applies, for every path at once:
+        next = last * growth + drift + sin(2*pi*t / seasonal_period) * last * seasonal_amplitude
+               + N(0, 1) * last * volatility
+        next = max(next, last * floor_ratio)
+
+    Args:
+        start: Last observed value every path starts from
+        periods: Number of periods to simulate
+        num_paths: Number of paths
+        growth: Per-period multiplier, scalar or one per path
+        drift: Additive per-period trend, scalar or one per path
+        volatility: Noise scale relative to the current level, scalar or one per path
+        seasonal_amplitude: Seasonal swing relative to the current level
+        seasonal_period: Periods per seasonal cycle
+        floor_ratio: Lowest allowed value as a fraction of the previous one (None = no floor)
+        seed: Seed for reproducible paths
+
+    Returns:
+        Array of shape (num_paths, periods)
+    """
+    rng = np.random.default_rng(seed)
+    growth = np.broadcast_to(np.asarray(growth, dtype=np.float64), (num_paths,))
+    drift = np.broadcast_to(np.asarray(drift, dtype=np.float64), (num_paths,))
+    volatility = np.broadcast_to(np.asarray(volatility, dtype=np.float64), (num_paths,))
+
+    # Everything that does not depend on the running level is drawn up front
+    season = np.sin(np.arange(periods) * 2 * np.pi / seasonal_period) * seasonal_amplitude
+    shocks = rng.standard_normal((num_paths, periods)) * volatility[:, None]
+    step_factor = growth[:, None] + season[None, :] + shocks
+
+    paths = np.empty((num_paths, periods))
+    level = np.full(num_paths, float(start))
+    for t in range(periods):
+        following = level * step_factor[:, t] + drift
+        if floor_ratio is not None:
+            following = np.maximum(following, level * floor_ratio)
+        paths[:, t] = following
+        level = following
+    return paths
+
+
+def quantile_bands(
+    paths: np.ndarray,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    decimals: Optional[int] = None,
+) -> Dict[str, List[float]]:
+    """Per-period quantiles of a paths x periods array, keyed 'p5', 'p50', 'p95', ..."""
+    if paths.size == 0:
+        return {_band_name(q): [] for q in quantiles}
+    values = np.quantile(paths, quantiles, axis=0)
+    if decimals is not None:
+        values = np.round(values, decimals)
+    return {_band_name(q): row.tolist() for q, row in zip(quantiles, values)}
+
+
+def _band_name(q: float) -> str:
+    return f"p{round(q * 100, 2):g}"
+
+
+def series_hash(values: Sequence[float], **params: Any) -> str:
+    """Stable hash of an input series plus the simulation parameters."""
+    digest = hashlib.sha256(np.asarray(values, dtype=np.float64).tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def cached_forecast(
+    namespace: str,
+    values: Sequence[float],
+    params: Dict[str, Any],
+    compute: Callable[[], Dict[str, Any]],
+    ttl: int = FORECAST_CACHE_TTL,
+    use_cache: bool = True,
+) -> Dict[str, Any]:
+    """Return compute() for this series, reusing a cached result when the series is unchanged.
+
+    The result must be JSON-serializable; a 'cached' flag is added to it.
+    """
+    if not use_cache:
+        return {**compute(), 'cached': False}
+
+    key = f"cache:forecast:{namespace}:{series_hash(values, **params)}"
+    hit = cache.get(key)
+    if hit is not None:
+        try:
+            return {**json.loads(hit), 'cached': True}
+        except json.JSONDecodeError:
+            pass
+
+    result = compute()
+    try:
+        cache.set(key, json.dumps(result), ttl=ttl)
+    except (TypeError, ValueError) as e:
+        print(f"⚠️  Forecast cache SET failed for {key}: {e}")
+    return {**result, 'cached': False}
+
+
+def clear_forecast_cache(namespace: str = '') -> int:
+    """Drop cached forecasts (all, or one namespace)."""
+    return cache.clear_pattern(f"cache:forecast:{namespace}*" if namespace else "cache:forecast:*")
@@ -11,17 +11,29 @@ Features:
 - Usage metering per tenant
 - Tenant-specific configuration
 - Data isolation and security
+
+Permission checks read a per-process cache of compiled permission bitmasks.
+Every WorkspaceMember change bumps the workspace's row in
+workspace_permission_versions. Each process re-reads that version at most
+every PERMISSION_VERSION_TTL seconds and drops masks compiled under an older
+one, so other processes see a removal or demotion within that window.
+Usage is counted in memory and written to workspace_usage in batches every
+USAGE_FLUSH_INTERVAL seconds; limits are checked against those counters.
 """
 
+import atexit
 import logging
+import os
+import threading
 import time
 import json
-from typing import Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
-from models import Base, get_session
-from sqlalchemy import Column, String, Integer, Float, Boolean, Text, ForeignKey, Index
-from sqlalchemy.orm import relationship
+from models import Base, get_engine, get_session
+from sqlalchemy import Column, String, Integer, Float, Boolean, Text, ForeignKey, Index, bindparam, event, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import relationship, Session, object_session
 
 logger = logging.getLogger(__name__)
 
@@ -94,6 +106,39 @@ ROLE_PERMISSIONS = {
     }
 }
 
+# Compiled form used by permission checks: one bit per permission
+PERMISSION_BITS = {permission: 1 << i for i, permission in enumerate(Permission)}
+ROLE_MASKS = {
+    role: sum(PERMISSION_BITS[p] for p in permissions)
+    for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+PERMISSION_CACHE_TTL = int(os.getenv('PERMISSION_CACHE_TTL', '300'))  # backstop lifetime of a cached mask
+PERMISSION_VERSION_TTL = float(os.getenv('PERMISSION_VERSION_TTL', '2'))  # seconds a workspace version is trusted
+USAGE_FLUSH_INTERVAL = float(os.getenv('USAGE_FLUSH_INTERVAL', '5'))  # seconds between usage writes
+USAGE_METRICS = ('api_calls', 'storage_mb', 'ai_requests', 'export_count')
+
+
+def compile_permissions(role: str, custom_permissions: Optional[str] = None) -> int:
+    """Bitmask of a member's effective permissions (role plus custom JSON list)."""
+    try:
+        mask = ROLE_MASKS.get(Role(role), 0)
+    except ValueError:
+        mask = 0
+    if custom_permissions:
+        try:
+            values = json.loads(custom_permissions)
+        except (ValueError, TypeError):
+            values = []
+        if not isinstance(values, list):
+            values = []
+        for value in values:
+            try:
+                mask |= PERMISSION_BITS[Permission(value)]
+            except (ValueError, TypeError):
+                continue  # unknown permission; the rest still apply
+    return mask
+
 
 # ---------------------------------------------------------------------------
 # Database Models
@@ -192,6 +237,273 @@ class WorkspaceUsage(Base):
     )
 
 
+class WorkspacePermissionVersion(Base):
+    """Bumped on every membership or role change; cached permission masks carry it."""
+    __tablename__ = 'workspace_permission_versions'
+    
+    workspace_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# ---------------------------------------------------------------------------
+# Authorization cache and usage metering
+# ---------------------------------------------------------------------------
+
+class PermissionCache:
+    """Compiled permission masks keyed by (workspace_id, user_id).
+
+    Non-members are cached as 0. Each mask is stored with the workspace's
+    permissions version it was compiled under and is ignored once the
+    version moves on. Versions are re-read from the database at most every
+    `version_ttl` seconds per workspace. That read is how changes made by
+    other processes are noticed. Local changes are dropped at once by the
+    WorkspaceMember listeners below.
+    """
+    
+    def __init__(self, ttl: float = PERMISSION_CACHE_TTL, version_ttl: float = PERMISSION_VERSION_TTL):
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self._masks: Dict[Tuple[str, str], Tuple[int, int, float]] = {}  # -> (mask, version, expires)
+        self._versions: Dict[str, Tuple[int, float]] = {}  # workspace_id -> (version, trusted until)
+        self._lock = threading.Lock()
+    
+    def version(self, workspace_id: str, load: Callable[[], int]) -> int:
+        """The workspace's permissions version, from `load()` once the cached one is older than version_ttl."""
+        entry = self._versions.get(workspace_id)
+        if entry is not None and entry[1] >= time.time():
+            return entry[0]
+        version = load()
+        with self._lock:
+            self._versions[workspace_id] = (version, time.time() + self.version_ttl)
+        return version
+    
+    def get(self, workspace_id: str, user_id: str, version: int) -> Optional[int]:
+        entry = self._masks.get((workspace_id, user_id))
+        if entry is None or entry[1] != version or entry[2] < time.time():
+            return None
+        return entry[0]
+    
+    def put(self, workspace_id: str, user_id: str, mask: int, version: int):
+        with self._lock:
+            self._masks[(workspace_id, user_id)] = (mask, version, time.time() + self.ttl)
+    
+    def invalidate(self, workspace_id: str, user_id: Optional[str] = None):
+        """Drop one member's entry (or every entry of the workspace) and its cached version."""
+        with self._lock:
+            self._versions.pop(workspace_id, None)
+            if user_id is not None:
+                self._masks.pop((workspace_id, user_id), None)
+            else:
+                for key in [k for k in self._masks if k[0] == workspace_id]:
+                    del self._masks[key]
+    
+    def clear(self):
+        with self._lock:
+            self._masks.clear()
+            self._versions.clear()
+
+
+permission_cache = PermissionCache()
+
+
+@event.listens_for(WorkspaceMember, 'after_insert')
+@event.listens_for(WorkspaceMember, 'after_update')
+@event.listens_for(WorkspaceMember, 'after_delete')
+def _invalidate_member_permissions(mapper, connection, member):
+    """Invite, removal or role change: bump the shared version and drop the local mask, again once committed."""
+    table = WorkspacePermissionVersion.__table__
+    connection.execute(
+        sqlite_insert(table).values(workspace_id=member.workspace_id, version=1).on_conflict_do_update(
+            index_elements=[table.c.workspace_id], set_={'version': table.c.version + 1}
+        )
+    )
+    key = (member.workspace_id, member.user_id)
+    permission_cache.invalidate(*key)
+    session = object_session(member)
+    if session is not None:
+        session.info.setdefault('rbac_invalidate', set()).add(key)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _invalidate_committed_members(session, *args):
+    # A concurrent check between flush and commit may have re-cached the old mask
+    for key in session.info.pop('rbac_invalidate', ()):
+        permission_cache.invalidate(*key)
+
+
+_ENGINES = {}  # db url -> engine for the metering path
+
+
+def _meter_session(url: str):
+    engine = _ENGINES.get(url)
+    if engine is None:
+        engine = _ENGINES.setdefault(url, get_engine(url))
+    return get_session(engine)
+
+
+def _get_period_end() -> float:
+    """Get end of current billing period (30 days)."""
+    from datetime import datetime, timedelta
+    now = datetime.now()
+    period_end = now + timedelta(days=30)
+    return period_end.timestamp()
+
+
+class UsageMeter:
+    """Accumulates usage in memory and writes it to workspace_usage in batches.
+    
+    Each workspace's entry holds its current-period usage row, the counters
+    as of the last write plus everything recorded since, and its plan
+    limits, so recording and limit checks need no queries. flush() applies
+    the pending increments with one executemany UPDATE and re-reads the
+    stored totals (picking up other processes' usage and plan changes).
+    """
+    
+    def __init__(self, flush_interval: float = USAGE_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self._entries: Dict[Tuple[str, str], Dict] = {}  # (db url, workspace_id) -> entry
+        self._retired: List[Tuple[Tuple[str, str], Dict]] = []  # past-period entries not flushed yet
+        self._lock = threading.RLock()
+        self._last_flush = time.time()
+    
+    def record(self, workspace_id: str, metric: str, amount: float = 1) -> Dict:
+        if metric not in USAGE_METRICS:
+            return {'success': True, 'over_limit': False}
+        if metric != 'storage_mb':
+            amount = int(amount)
+        
+        from utils import _get_db_url
+        url = _get_db_url()
+        key = (url, workspace_id)
+        loaded = None
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry['period_end'] < time.time():
+                    # New billing period: the next flush writes what the old entry still holds
+                    self._retired.append((key, self._entries.pop(key)))
+                    entry = None
+                if entry is None and loaded is not None:
+                    entry = self._entries[key] = loaded
+                if entry is not None:
+                    entry['pending'][metric] += amount
+                    entry['totals'][metric] += amount
+                    current, limit = entry['totals'][metric], entry['limits'].get(metric)
+                    due = time.time() - self._last_flush >= self.flush_interval or bool(self._retired)
+                    break
+            # Loaded outside the lock, so other workspaces keep recording meanwhile
+            session = _meter_session(url)
+            try:
+                loaded = self._load(session, workspace_id)
+            finally:
+                session.close()
+            if loaded is None:
+                return {'success': False, 'error': 'Workspace not found'}
+        
+        if due:
+            self.flush()
+        if limit is not None and current >= limit:
+            return {'success': True, 'over_limit': True, 'current': current, 'limit': limit}
+        return {'success': True, 'over_limit': False}
+    
+    def _load(self, session, workspace_id: str) -> Optional[Dict]:
+        workspace = session.query(Workspace).filter_by(id=workspace_id).first()
+        if workspace is None:
+            return None
+        now = time.time()
+        usage = session.query(WorkspaceUsage).filter(
+            WorkspaceUsage.workspace_id == workspace_id,
+            WorkspaceUsage.period_start <= now,
+            WorkspaceUsage.period_end >= now
+        ).first()
+        if usage is None:
+            usage = WorkspaceUsage(
+                id=f'wu_{workspace_id}_{int(now)}',
+                workspace_id=workspace_id,
+                api_calls=0, storage_mb=0, ai_requests=0, export_count=0,
+                period_start=now,
+                period_end=_get_period_end()
+            )
+            session.add(usage)
+            session.commit()
+        return {
+            'usage_id': usage.id,
+            'period_end': usage.period_end,
+            'totals': {m: getattr(usage, m) or 0 for m in USAGE_METRICS},
+            'pending': dict.fromkeys(USAGE_METRICS, 0),
+            'limits': {'api_calls': workspace.max_api_calls, 'storage_mb': workspace.max_storage_mb},
+        }
+    
+    def flush(self) -> int:
+        """Write pending increments for the current database; returns workspaces written.
+        
+        The pending counters are swapped out under the lock and written
+        outside it, so recording never waits on the database.
+        """
+        from utils import _get_db_url
+        url = _get_db_url()
+        with self._lock:
+            self._last_flush = time.time()
+            batch = [(key, entry) for key, entry in self._entries.items()
+                     if key[0] == url and any(entry['pending'].values())]
+            batch += [(key, entry) for key, entry in self._retired if key[0] == url]
+            self._retired = [(key, entry) for key, entry in self._retired if key[0] != url]
+            writes = []
+            for key, entry in batch:
+                writes.append((key, entry, entry['pending']))
+                entry['pending'] = dict.fromkeys(USAGE_METRICS, 0)
+        if not writes:
+            return 0
+        
+        session = _meter_session(url)
+        try:
+            table = WorkspaceUsage.__table__
+            statement = update(table).where(table.c.id == bindparam('usage_id')).values(
+                **{m: table.c[m] + bindparam(f'add_{m}') for m in USAGE_METRICS}
+            )
+            session.execute(statement, [
+                {'usage_id': entry['usage_id'], **{f'add_{m}': pending[m] for m in USAGE_METRICS}}
+                for _, entry, pending in writes
+            ])
+            session.commit()
+            rows = session.query(WorkspaceUsage, Workspace.max_api_calls, Workspace.max_storage_mb).join(
+                Workspace, Workspace.id == WorkspaceUsage.workspace_id
+            ).filter(WorkspaceUsage.id.in_([entry['usage_id'] for _, entry, _ in writes])).all()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Usage flush failed: {e}")
+            with self._lock:  # keep the increments for the next flush
+                for key, entry, pending in writes:
+                    for m in USAGE_METRICS:
+                        entry['pending'][m] += pending[m]
+                    if self._entries.get(key) is not entry:
+                        self._retired.append((key, entry))
+            return 0
+        finally:
+            session.close()
+        
+        with self._lock:
+            for usage, max_api_calls, max_storage_mb in rows:
+                entry = self._entries.get((url, usage.workspace_id))
+                if entry is None or entry['usage_id'] != usage.id:
+                    continue
+                # Stored totals (other processes' usage included) plus what was recorded during the write
+                entry['totals'] = {m: (getattr(usage, m) or 0) + entry['pending'][m] for m in USAGE_METRICS}
+                entry['limits'] = {'api_calls': max_api_calls, 'storage_mb': max_storage_mb}
+        return len(writes)
+    
+    def reset(self):
+        """Forget cached entries (pending increments are dropped)."""
+        with self._lock:
+            self._entries.clear()
+            self._retired.clear()
+
+
+usage_meter = UsageMeter()
+atexit.register(usage_meter.flush)
+
+
 # ---------------------------------------------------------------------------
 # Multi-Tenant Manager
 # ---------------------------------------------------------------------------
@@ -200,7 +512,14 @@ class MultiTenantManager:
     """Manage multi-tenant operations."""
     
     def __init__(self):
-        self.session = get_session()
+        self._session = None
+    
+    @property
+    def session(self):
+        # Opened on first use, so cached permission checks never touch the database
+        if self._session is None:
+            self._session = get_session()
+        return self._session
     
     def create_workspace(
         self, 
@@ -313,10 +632,7 @@ class MultiTenantManager:
     
     def _get_period_end(self) -> float:
         """Get end of current billing period (30 days)."""
-        from datetime import datetime, timedelta
-        now = datetime.now()
-        period_end = now + timedelta(days=30)
-        return period_end.timestamp()
+        return _get_period_end()
     
     def invite_member(
         self,
@@ -423,15 +739,27 @@ class MultiTenantManager:
             logger.error(f"Failed to remove member: {e}")
             return {'success': False, 'error': str(e)}
     
-    def check_permission(
+    def update_member_role(
         self,
         workspace_id: str,
+        actor_id: str,
         user_id: str,
-        permission: Permission
-    ) -> bool:
-        """Check if user has permission in workspace."""
+        role: str
+    ) -> Dict:
+        """Change a member's role."""
         try:
-            # Get member
+            if not self.check_permission(workspace_id, actor_id, Permission.TEAM_MANAGE):
+                return {'success': False, 'error': 'No permission to manage members'}
+            
+            try:
+                new_role = Role(role)
+            except ValueError:
+                return {'success': False, 'error': f'Unknown role: {role}'}
+            
+            workspace = self.session.query(Workspace).filter_by(id=workspace_id).first()
+            if workspace and workspace.owner_id == user_id:
+                return {'success': False, 'error': 'Cannot change workspace owner role'}
+            
             member = self.session.query(WorkspaceMember).filter_by(
                 workspace_id=workspace_id,
                 user_id=user_id,
@@ -439,26 +767,45 @@ class MultiTenantManager:
             ).first()
             
             if not member:
-                return False
+                return {'success': False, 'error': 'Member not found'}
             
-            # Get role permissions
-            role = Role(member.role)
-            role_perms = ROLE_PERMISSIONS.get(role, set())
+            member.role = new_role.value
+            self.session.commit()
             
-            # Check if permission granted
-            if permission in role_perms:
-                return True
+            logger.info(f"Changed role of {user_id} in workspace {workspace_id} to {new_role.value}")
             
-            # Check custom permissions
-            if member.custom_permissions:
-                try:
-                    custom = json.loads(member.custom_permissions)
-                    if permission.value in custom:
-                        return True
-                except Exception:
-                    pass
+            return {'success': True, 'member': {'user_id': user_id, 'role': member.role}}
             
-            return False
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Failed to change member role: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def check_permission(
+        self,
+        workspace_id: str,
+        user_id: str,
+        permission: Permission
+    ) -> bool:
+        """Check if user has permission in workspace (served from the compiled-mask cache)."""
+        try:
+            # Version first: a mask compiled after a concurrent change is then tagged with the older version
+            version = permission_cache.version(workspace_id, lambda: self.session.query(
+                WorkspacePermissionVersion.version
+            ).filter_by(workspace_id=workspace_id).scalar() or 0)
+            mask = permission_cache.get(workspace_id, user_id, version)
+            if mask is None:
+                member = self.session.query(
+                    WorkspaceMember.role, WorkspaceMember.custom_permissions
+                ).filter_by(
+                    workspace_id=workspace_id,
+                    user_id=user_id,
+                    status='active'
+                ).first()
+                mask = compile_permissions(member.role, member.custom_permissions) if member else 0
+                permission_cache.put(workspace_id, user_id, mask, version)
+            
+            return bool(mask & PERMISSION_BITS.get(permission, 0))
             
         except Exception as e:
             logger.error(f"Permission check failed: {e}")
@@ -470,62 +817,14 @@ class MultiTenantManager:
         metric: str,
         amount: float = 1
     ) -> Dict:
-        """Track usage for workspace."""
+        """Track usage for workspace.
+        
+        Counted in memory and flushed by usage_meter; over_limit is judged
+        against the in-memory totals.
+        """
         try:
-            # Get current usage record
-            now = time.time()
-            usage = self.session.query(WorkspaceUsage).filter(
-                WorkspaceUsage.workspace_id == workspace_id,
-                WorkspaceUsage.period_start <= now,
-                WorkspaceUsage.period_end >= now
-            ).first()
-            
-            if not usage:
-                # Create new period
-                usage = WorkspaceUsage(
-                    id=f'wu_{int(time.time())}',
-                    workspace_id=workspace_id,
-                    period_start=now,
-                    period_end=self._get_period_end()
-                )
-                self.session.add(usage)
-            
-            # Update metric
-            if metric == 'api_calls':
-                usage.api_calls += int(amount)
-            elif metric == 'storage_mb':
-                usage.storage_mb += amount
-            elif metric == 'ai_requests':
-                usage.ai_requests += int(amount)
-            elif metric == 'export_count':
-                usage.export_count += int(amount)
-            
-            self.session.commit()
-            
-            # Check if over limit
-            workspace = self.session.query(Workspace).filter_by(id=workspace_id).first()
-            if workspace:
-                limits = {
-                    'api_calls': workspace.max_api_calls,
-                    'storage_mb': workspace.max_storage_mb
-                }
-                
-                if metric in limits:
-                    current = getattr(usage, metric, 0)
-                    limit = limits[metric]
-                    
-                    if current >= limit:
-                        return {
-                            'success': True,
-                            'over_limit': True,
-                            'current': current,
-                            'limit': limit
-                        }
-            
-            return {'success': True, 'over_limit': False}
-            
+            return usage_meter.record(workspace_id, metric, amount)
         except Exception as e:
-            self.session.rollback()
             logger.error(f"Usage tracking failed: {e}")
             return {'success': False, 'error': str(e)}
     
@@ -536,6 +835,9 @@ class MultiTenantManager:
             if not workspace:
                 return None
             
+            # Write buffered usage so the counters below are current
+            usage_meter.flush()
+            
             # Get member count
             member_count = self.session.query(WorkspaceMember).filter_by(
                 workspace_id=workspace_id,
@@ -544,7 +846,7 @@ class MultiTenantManager:
             
             # Get current usage
             now = time.time()
-            usage = self.session.query(WorkspaceUsage).filter(
+            usage = self.session.query(WorkspaceUsage).populate_existing().filter(
                 WorkspaceUsage.workspace_id == workspace_id,
                 WorkspaceUsage.period_start <= now,
                 WorkspaceUsage.period_end >= now
@@ -639,6 +941,12 @@ def remove_team_member(workspace_id: str, remover_id: str, user_id: str) -> Dict
     return manager.remove_member(workspace_id, remover_id, user_id)
 
 
+def change_member_role(workspace_id: str, actor_id: str, user_id: str, role: str) -> Dict:
+    """Change a team member's role."""
+    manager = MultiTenantManager()
+    return manager.update_member_role(workspace_id, actor_id, user_id, role)
+
+
 def check_user_permission(workspace_id: str, user_id: str, permission: str) -> bool:
     """Check if user has permission."""
     manager = MultiTenantManager()
@@ -11,6 +11,7 @@ import numpy as np
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, field
 from collections import deque
+from collections.abc import Mapping, MutableMapping, Sequence
 
 
 @dataclass
@@ -33,119 +34,537 @@ class SpikingNeuron:
     last_spike_time: Optional[float] = None
 
 
+def _concat_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenate arange(s, s + c) for every (s, c) pair without a Python loop."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+class SynapseRecord(MutableMapping):
+    """Dict-style view of one synapse; weight/delay writes go to the table arrays."""
+
+    _ARRAY_FIELDS = ("weight", "delay")
+
+    def __init__(self, table: "SynapseTable", index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, key):
+        if key in self._ARRAY_FIELDS:
+            return float(getattr(self._table, key)[self._index])
+        extra = self._table._extra.get(self._index, {})
+        if key in extra:
+            return extra[key]
+        if key == "plasticity":
+            return "STDP"
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._ARRAY_FIELDS:
+            getattr(self._table, key)[self._index] = value
+        else:
+            self._table._extra.setdefault(self._index, {})[key] = value
+
+    def __delitem__(self, key):
+        raise TypeError("synapse fields cannot be removed")
+
+    def __iter__(self):
+        yield from ("weight", "delay", "plasticity")
+        for key in self._table._extra.get(self._index, {}):
+            if key != "plasticity":
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class SynapseTable(Mapping):
+    """Synapses keyed by (pre_id, post_id), stored as parallel NumPy arrays.
+
+    Behaves like the old ``Dict[(pre, post), dict]`` for reads and weight
+    updates, while the simulator works on the ``pre``/``post``/``weight``/
+    ``delay`` arrays directly. ``version`` changes whenever connectivity
+    changes so compiled adjacency can be cached.
+    """
+
+    def __init__(self, network: "SpikingNeuralNetwork"):
+        self._network = network
+        self._size = 0
+        self._pre = np.empty(0, dtype=np.int32)
+        self._post = np.empty(0, dtype=np.int32)
+        self._weight = np.empty(0, dtype=np.float64)
+        self._delay = np.empty(0, dtype=np.float64)
+        self._extra: Dict[int, Dict] = {}
+        self._keys: Dict[Tuple[int, int], int] = {}
+        self._keys_complete = True
+        self.version = 0
+
+    @property
+    def pre(self) -> np.ndarray:
+        return self._pre[:self._size]
+
+    @property
+    def post(self) -> np.ndarray:
+        return self._post[:self._size]
+
+    @property
+    def weight(self) -> np.ndarray:
+        return self._weight[:self._size]
+
+    @property
+    def delay(self) -> np.ndarray:
+        return self._delay[:self._size]
+
+    def _reserve(self, extra: int):
+        needed = self._size + extra
+        if needed <= len(self._pre):
+            return
+        capacity = max(needed, 2 * len(self._pre), 64)
+        for name in ("_pre", "_post", "_weight", "_delay"):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def _key_index(self) -> Dict[Tuple[int, int], int]:
+        if not self._keys_complete:
+            self._keys = {key: i for i, key in enumerate(zip(self.pre.tolist(), self.post.tolist()))}
+            self._keys_complete = True
+        return self._keys
+
+    def add(self, pre: int, post: int, weight: float, delay: float):
+        """Add one synapse, replacing an existing pre -> post connection."""
+        keys = self._key_index()
+        existing = keys.get((pre, post))
+        if existing is not None:
+            self._weight[existing] = weight
+            self._delay[existing] = delay
+            return
+        self._reserve(1)
+        i = self._size
+        self._pre[i], self._post[i] = pre, post
+        self._weight[i], self._delay[i] = weight, delay
+        self._size += 1
+        keys[(pre, post)] = i
+        self.version += 1
+
+    def extend(self, pre: np.ndarray, post: np.ndarray, weight: np.ndarray, delay: np.ndarray):
+        """Append many synapses at once. Repeated pairs are kept as parallel synapses."""
+        count = len(pre)
+        self._reserve(count)
+        end = self._size + count
+        self._pre[self._size:end] = pre
+        self._post[self._size:end] = post
+        self._weight[self._size:end] = weight
+        self._delay[self._size:end] = delay
+        self._size = end
+        self._keys_complete = False
+        self.version += 1
+
+    def _resolve(self, key) -> int:
+        pre_id, post_id = key
+        index = self._network._neuron_index
+        if pre_id not in index or post_id not in index:
+            raise KeyError(key)
+        i = self._key_index().get((index[pre_id], index[post_id]))
+        if i is None:
+            raise KeyError(key)
+        return i
+
+    def __getitem__(self, key) -> SynapseRecord:
+        return SynapseRecord(self, self._resolve(key))
+
+    def __setitem__(self, key, value: Mapping):
+        pre_id, post_id = key
+        self._network.add_synapse(pre_id, post_id, value.get("weight", 0.5), value.get("delay", 0.001))
+        extra = {k: v for k, v in value.items() if k not in SynapseRecord._ARRAY_FIELDS}
+        if extra:
+            self._extra.setdefault(self._resolve(key), {}).update(extra)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self._resolve(key)
+        except (KeyError, TypeError, ValueError):
+            return False
+        return True
+
+    def __iter__(self):
+        ids = self._network._neuron_ids
+        for pre, post in zip(self.pre.tolist(), self.post.tolist()):
+            yield (ids[pre], ids[post])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def items(self):
+        return ((key, SynapseRecord(self, i)) for i, key in enumerate(self))
+
+    def values(self):
+        return (SynapseRecord(self, i) for i in range(self._size))
+
+
+class SpikeTrain(Sequence):
+    """Append-only spike record stored as (neuron index, time, amplitude) arrays.
+
+    Indexing and iteration yield ``Spike`` objects, so code written against
+    the old ``List[Spike]`` keeps working; ``arrays()`` gives the raw columns.
+    """
+
+    def __init__(self, network: "SpikingNeuralNetwork"):
+        self._network = network
+        self._chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._size = 0
+
+    def append(self, spike: Spike):
+        index = self._network._index_of(spike.neuron_id)
+        self.extend_arrays(np.array([index]), np.array([spike.timestamp]), spike.amplitude)
+
+    def extend_arrays(self, neurons: np.ndarray, times: np.ndarray, amplitude=1.0):
+        """Record many spikes at once (neuron indices and times in firing order)."""
+        if len(neurons) == 0:
+            return
+        amplitudes = np.broadcast_to(np.asarray(amplitude, dtype=np.float64), (len(neurons),))
+        self._chunks.append((np.asarray(neurons, dtype=np.int64),
+                             np.asarray(times, dtype=np.float64), np.array(amplitudes)))
+        self._size += len(neurons)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (neuron_index, timestamp, amplitude) for every recorded spike."""
+        if not self._chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+        if len(self._chunks) > 1:
+            self._chunks = [tuple(np.concatenate(column) for column in zip(*self._chunks))]
+        return self._chunks[0]
+
+    def clear(self):
+        self._chunks = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, item):
+        neurons, times, amplitudes = self.arrays()
+        ids = self._network._neuron_ids
+        if isinstance(item, slice):
+            return [Spike(ids[n], t, a) for n, t, a in
+                    zip(neurons[item].tolist(), times[item].tolist(), amplitudes[item].tolist())]
+        return Spike(ids[int(neurons[item])], float(times[item]), float(amplitudes[item]))
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+class _CompiledSynapses:
+    """CSR (by presynaptic neuron) view of a SynapseTable, cached per version."""
+
+    def __init__(self, table: SynapseTable, num_neurons: int):
+        pre = table.pre
+        self.perm = np.argsort(pre, kind="stable")
+        self.indptr = np.zeros(num_neurons + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pre, minlength=num_neurons), out=self.indptr[1:])
+        self.pre = pre[self.perm]
+        self.post = table.post[self.perm]
+        self.num_neurons = num_neurons
+        self._incoming: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def incoming(self) -> Tuple[np.ndarray, np.ndarray]:
+        """CSC index: (indptr by postsynaptic neuron, CSR positions in that order)."""
+        if self._incoming is None:
+            order = np.argsort(self.post, kind="stable")
+            indptr = np.zeros(self.num_neurons + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.post, minlength=self.num_neurons), out=indptr[1:])
+            self._incoming = (indptr, order)
+        return self._incoming
+
+
 class SpikingNeuralNetwork:
-    """Spiking Neural Network with temporal dynamics."""
-    
+    """Spiking Neural Network with temporal dynamics.
+
+    Neurons are exposed as ``SpikingNeuron`` objects and synapses as a
+    ``(pre, post) -> {"weight", "delay", "plasticity"}`` mapping, but
+    ``simulate()`` runs on NumPy arrays: vectorized LIF updates per step,
+    CSR fan-out for the neurons that fired, and a ring buffer that delivers
+    each spike ``delay`` seconds later.
+    """
+
     def __init__(self):
         self.neurons: Dict[str, SpikingNeuron] = {}
-        self.synapses: Dict[Tuple[str, str], Dict] = {}
-        self.spike_train: List[Spike] = []
+        self.synapses = SynapseTable(self)
+        self.spike_train = SpikeTrain(self)
         self.current_time = 0.0
-    
+        self._neuron_ids: List[str] = []
+        self._neuron_index: Dict[str, int] = {}
+        self._compiled: Optional[_CompiledSynapses] = None
+        self._compiled_key: Optional[Tuple[int, int]] = None
+
     def add_neuron(self, neuron_type: str = "LIF", params: Dict = None) -> str:
         """Add spiking neuron to network."""
         neuron_id = str(uuid.uuid4())
         params = params or {}
-        
+
         neuron = SpikingNeuron(
             neuron_id=neuron_id,
             threshold=params.get("threshold", 1.0),
             leak_rate=params.get("leak_rate", 0.1),
             refractory_period=params.get("refractory_period", 0.002)
         )
-        
+
         self.neurons[neuron_id] = neuron
+        self._index_of(neuron_id)
         return neuron_id
-    
+
+    def add_neurons(self, count: int, params: Dict = None) -> List[str]:
+        """Add ``count`` LIF neurons; each param may be a scalar or a length-``count`` array."""
+        params = params or {}
+        columns = {
+            name: np.broadcast_to(np.asarray(params.get(name, default), dtype=np.float64), (count,)).tolist()
+            for name, default in (("threshold", 1.0), ("leak_rate", 0.1), ("refractory_period", 0.002))
+        }
+        neuron_ids = [str(uuid.uuid4()) for _ in range(count)]
+        for i, neuron_id in enumerate(neuron_ids):
+            self.neurons[neuron_id] = SpikingNeuron(
+                neuron_id=neuron_id,
+                threshold=columns["threshold"][i],
+                leak_rate=columns["leak_rate"][i],
+                refractory_period=columns["refractory_period"][i]
+            )
+            self._index_of(neuron_id)
+        return neuron_ids
+
     def add_synapse(self, pre_neuron: str, post_neuron: str, weight: float = 0.5, delay: float = 0.001):
         """Add synaptic connection with delay."""
-        self.synapses[(pre_neuron, post_neuron)] = {
-            "weight": weight,
-            "delay": delay,  # Axonal delay
-            "plasticity": "STDP"  # Spike-timing-dependent plasticity
-        }
-    
-    def simulate(self, duration: float, dt: float = 0.0001) -> Dict:
-        """Simulate network dynamics."""
+        self.synapses.add(self._index_of(pre_neuron), self._index_of(post_neuron), weight, delay)
+
+    def add_synapses(self, pre_neurons, post_neurons, weight=0.5, delay=0.001):
+        """Add many synapses at once.
+
+        Args:
+            pre_neurons: Neuron ids, or integer indices in the order neurons were added
+            post_neurons: Same form as ``pre_neurons``
+            weight: Scalar or per-synapse array
+            delay: Axonal delay in seconds, scalar or per-synapse array
+        """
+        pre = self._as_indices(pre_neurons)
+        post = self._as_indices(post_neurons)
+        if len(pre) != len(post):
+            raise ValueError("pre_neurons and post_neurons must have the same length")
+        count = len(pre)
+        self.synapses.extend(
+            pre, post,
+            np.broadcast_to(np.asarray(weight, dtype=np.float64), (count,)),
+            np.broadcast_to(np.asarray(delay, dtype=np.float64), (count,))
+        )
+
+    def _index_of(self, neuron_id: str) -> int:
+        index = self._neuron_index.get(neuron_id)
+        if index is None:
+            index = len(self._neuron_ids)
+            self._neuron_ids.append(neuron_id)
+            self._neuron_index[neuron_id] = index
+        return index
+
+    def _as_indices(self, neurons) -> np.ndarray:
+        array = np.asarray(neurons)
+        if array.dtype.kind in "iu":
+            if array.size and (array.min() < 0 or array.max() >= len(self._neuron_ids)):
+                raise IndexError("neuron index out of range")
+            return array.astype(np.int32, copy=False)
+        return np.fromiter((self._index_of(nid) for nid in array.tolist()), dtype=np.int32, count=array.size)
+
+    def _sync_neurons(self) -> List[str]:
+        """Register neurons that were inserted into ``self.neurons`` directly."""
+        if len(self._neuron_index) != len(self.neurons):
+            for neuron_id in self.neurons:
+                self._index_of(neuron_id)
+        return self._neuron_ids
+
+    def _compile(self) -> _CompiledSynapses:
+        key = (self.synapses.version, len(self._neuron_ids))
+        if self._compiled is None or self._compiled_key != key:
+            self._compiled = _CompiledSynapses(self.synapses, len(self._neuron_ids))
+            self._compiled_key = key
+        return self._compiled
+
+    def simulate(self, duration: float, dt: float = 0.0001, stdp: bool = False,
+                 learning_window: float = 0.020) -> Dict:
+        """Simulate network dynamics.
+
+        Each step delivers the synaptic input due now, leaks every
+        non-refractory neuron, fires those at threshold and schedules their
+        output ``max(1, round(delay / dt))`` steps ahead. Input still in
+        flight when ``duration`` ends is dropped.
+
+        Args:
+            duration: Simulated time in seconds
+            dt: Step size in seconds
+            stdp: Update weights online with exponential pre/post traces
+            learning_window: STDP trace time constant in seconds
+        """
         num_steps = int(duration / dt)
-        spike_times: Dict[str, List[float]] = {nid: [] for nid in self.neurons.keys()}
-        
+        ids = self._sync_neurons()
+        num_neurons = len(ids)
+        neurons = [self.neurons[nid] for nid in ids]
+
+        potential = np.array([n.membrane_potential for n in neurons], dtype=np.float64)
+        threshold = np.array([n.threshold for n in neurons], dtype=np.float64)
+        reset = np.array([n.reset_potential for n in neurons], dtype=np.float64)
+        refractory = np.array([n.refractory_period for n in neurons], dtype=np.float64)
+        decay = 1 - np.array([n.leak_rate for n in neurons], dtype=np.float64) * dt
+        # NaN never compares < refractory, so neurons that have not fired are never refractory
+        last_spike = np.array([np.nan if n.last_spike_time is None else n.last_spike_time for n in neurons],
+                              dtype=np.float64)
+
+        csr = self._compile()
+        weights = self.synapses.weight[csr.perm]
+        delay_steps = np.maximum(1, np.rint(self.synapses.delay[csr.perm] / dt)).astype(np.int64)
+        ring_size = int(delay_steps.max()) + 1 if len(delay_steps) else 1
+        uniform_delay = int(delay_steps[0]) if len(delay_steps) and np.all(delay_steps == delay_steps[0]) else None
+        ring: List[List[Tuple[np.ndarray, np.ndarray]]] = [[] for _ in range(ring_size)]
+
+        if stdp:
+            trace = np.zeros(num_neurons)
+            trace_decay = np.exp(-dt / learning_window)
+            in_indptr, in_order = csr.incoming()
+
+        fired_neurons: List[np.ndarray] = []
+        fired_times: List[np.ndarray] = []
+
         for step in range(num_steps):
             self.current_time = step * dt
-            
-            # Update each neuron
-            for neuron_id, neuron in self.neurons.items():
-                # Check refractory period
-                if neuron.last_spike_time and (self.current_time - neuron.last_spike_time) < neuron.refractory_period:
-                    continue
-                
-                # Leak
-                neuron.membrane_potential *= (1 - neuron.leak_rate * dt)
-                
-                # Check for spike
-                if neuron.membrane_potential >= neuron.threshold:
-                    # Spike!
-                    spike = Spike(
-                        neuron_id=neuron_id,
-                        timestamp=self.current_time
-                    )
-                    self.spike_train.append(spike)
-                    spike_times[neuron_id].append(self.current_time)
-                    
-                    # Reset
-                    neuron.membrane_potential = neuron.reset_potential
-                    neuron.last_spike_time = self.current_time
-                    
-                    # Propagate spike to connected neurons
-                    self._propagate_spike(neuron_id)
-        
+
+            # Deliver synaptic input arriving this step
+            slot = step % ring_size
+            if ring[slot]:
+                targets = np.concatenate([events[0] for events in ring[slot]])
+                amounts = np.concatenate([events[1] for events in ring[slot]])
+                ring[slot] = []
+                if len(targets) > num_neurons // 8:
+                    potential += np.bincount(targets, amounts, minlength=num_neurons)
+                else:
+                    np.add.at(potential, targets, amounts)
+
+            # Leak and threshold every neuron outside its refractory period
+            active = ~((self.current_time - last_spike) < refractory)
+            potential *= np.where(active, decay, 1.0)
+            fired = np.flatnonzero(active & (potential >= threshold))
+            if stdp:
+                trace *= trace_decay
+            if len(fired) == 0:
+                continue
+
+            potential[fired] = reset[fired]
+            last_spike[fired] = self.current_time
+            fired_neurons.append(fired)
+            fired_times.append(np.full(len(fired), self.current_time))
+
+            # Fan out through CSR rows of the neurons that fired
+            out = _concat_ranges(csr.indptr[fired], csr.indptr[fired + 1] - csr.indptr[fired])
+            if len(out):
+                targets = csr.post[out]
+                if uniform_delay is not None:
+                    ring[(step + uniform_delay) % ring_size].append((targets, weights[out]))
+                else:
+                    arrival = (step + delay_steps[out]) % ring_size
+                    for due in np.unique(arrival).tolist():
+                        mask = arrival == due
+                        ring[due].append((targets[mask], weights[out[mask]]))
+
+            if stdp:
+                # Post fired: potentiate incoming synapses by the presynaptic trace
+                incoming = in_order[_concat_ranges(in_indptr[fired], in_indptr[fired + 1] - in_indptr[fired])]
+                weights[incoming] = np.clip(weights[incoming] + 0.01 * trace[csr.pre[incoming]], 0.0, 2.0)
+                # Pre fired: depress outgoing synapses by the postsynaptic trace
+                weights[out] = np.clip(weights[out] - 0.01 * trace[csr.post[out]], 0.0, 2.0)
+                trace[fired] += 1.0
+
+        for neuron, v, t in zip(neurons, potential.tolist(), last_spike.tolist()):
+            neuron.membrane_potential = v
+            neuron.last_spike_time = None if t != t else t
+        if stdp:
+            self.synapses.weight[csr.perm] = weights
+
+        if fired_neurons:
+            run_neurons = np.concatenate(fired_neurons)
+            run_times = np.concatenate(fired_times)
+        else:
+            run_neurons, run_times = np.empty(0, dtype=np.int64), np.empty(0)
+        self.spike_train.extend_arrays(run_neurons, run_times)
+
+        order = np.argsort(run_neurons, kind="stable")
+        per_neuron = np.split(run_times[order], np.cumsum(np.bincount(run_neurons, minlength=num_neurons))[:-1])
+        spike_times = {nid: times.tolist() for nid, times in zip(ids, per_neuron)}
+
         return {
             "duration": duration,
             "total_spikes": len(self.spike_train),
             "spike_times": spike_times,
             "mean_firing_rate": self._calculate_firing_rates(spike_times, duration)
         }
-    
-    def _propagate_spike(self, pre_neuron_id: str):
-        """Propagate spike to postsynaptic neurons."""
-        for (pre, post), synapse in self.synapses.items():
-            if pre == pre_neuron_id:
-                # Add synaptic current to postsynaptic neuron
-                post_neuron = self.neurons[post]
-                post_neuron.membrane_potential += synapse["weight"]
-    
+
     def _calculate_firing_rates(self, spike_times: Dict[str, List[float]], duration: float) -> Dict[str, float]:
         """Calculate mean firing rate for each neuron."""
         rates = {}
         for neuron_id, times in spike_times.items():
             rates[neuron_id] = len(times) / duration if duration > 0 else 0
         return rates
-    
-    def apply_stdp(self, learning_window: float = 0.020):
-        """Apply Spike-Timing-Dependent Plasticity."""
-        # STDP: strengthen synapses where pre-spike precedes post-spike
-        
-        for (pre_id, post_id), synapse in self.synapses.items():
-            pre_spikes = [s.timestamp for s in self.spike_train if s.neuron_id == pre_id]
-            post_spikes = [s.timestamp for s in self.spike_train if s.neuron_id == post_id]
-            
-            # Calculate weight change
-            delta_w = 0.0
-            
-            for pre_time in pre_spikes:
-                for post_time in post_spikes:
-                    dt = post_time - pre_time
-                    
-                    if 0 < dt < learning_window:
-                        # Potentiation: pre before post
-                        delta_w += 0.01 * np.exp(-dt / learning_window)
-                    elif -learning_window < dt < 0:
-                        # Depression: post before pre
-                        delta_w -= 0.01 * np.exp(dt / learning_window)
-            
-            # Update weight
-            synapse["weight"] += delta_w
-            synapse["weight"] = np.clip(synapse["weight"], 0.0, 2.0)
+
+    def apply_stdp(self, learning_window: float = 0.020, max_pairs: int = 2_000_000):
+        """Apply Spike-Timing-Dependent Plasticity.
+
+        Every pre/post spike pair closer than ``learning_window`` contributes
+        ``±0.01 * exp(-|dt| / learning_window)``. Spikes are sorted per neuron
+        once, and each postsynaptic spike only visits the presynaptic spikes
+        inside its window (found by binary search), so the cost follows the
+        number of interacting pairs instead of pre_spikes x post_spikes.
+
+        Args:
+            learning_window: Pairing window / decay constant in seconds
+            max_pairs: Work budget per batch of synapses, bounds peak memory
+        """
+        num_synapses = len(self.synapses)
+        if num_synapses == 0:
+            return
+        pre, post = self.synapses.pre, self.synapses.post
+        delta_w = np.zeros(num_synapses)
+
+        neurons, times, _ = self.spike_train.arrays()
+        if len(neurons):
+            order = np.lexsort((times, neurons))
+            sorted_neurons, sorted_times = neurons[order], times[order]
+            indptr = np.searchsorted(sorted_neurons, np.arange(len(self._neuron_ids) + 1))
+            # One monotone key across neurons: neuron * span + time
+            origin = sorted_times.min()
+            span = sorted_times.max() - origin + 4 * learning_window + 1.0
+            keys = sorted_neurons * span + (sorted_times - origin)
+            margin = 0.5 * learning_window
+
+            post_counts = (indptr[post + 1] - indptr[post]).astype(np.int64)
+            bounds = np.searchsorted(np.cumsum(post_counts), np.arange(max_pairs, post_counts.sum(), max_pairs))
+            for start, stop in zip(np.r_[0, bounds], np.r_[bounds, num_synapses]):
+                counts = post_counts[start:stop]
+                rows = np.repeat(np.arange(start, stop), counts)
+                if len(rows) == 0:
+                    continue
+                post_times = sorted_times[_concat_ranges(indptr[post[start:stop]], counts)]
+                base = pre[rows] * span - origin + post_times
+                lo = np.searchsorted(keys, base - learning_window - margin, "left")
+                hi = np.searchsorted(keys, base + learning_window + margin, "right")
+                pairs = hi - lo
+                dt = np.repeat(post_times, pairs) - sorted_times[_concat_ranges(lo, pairs)]
+                change = np.where(
+                    (dt > 0) & (dt < learning_window), 0.01 * np.exp(-dt / learning_window),
+                    np.where((dt < 0) & (dt > -learning_window), -0.01 * np.exp(dt / learning_window), 0.0)
+                )
+                delta_w[start:stop] += np.bincount(np.repeat(rows, pairs) - start, change, minlength=stop - start)
+
+        self.synapses.weight[:] = np.clip(self.synapses.weight + delta_w, 0.0, 2.0)
 
 
 class TemporalCoder:
@@ -404,11 +823,14 @@ class LiquidStateMachine:
         
         # Random connectivity within reservoir
         connection_prob = 0.1
-        for i, pre in enumerate(reservoir_neurons):
-            for j, post in enumerate(reservoir_neurons):
-                if i != j and np.random.random() < connection_prob:
-                    weight = np.random.uniform(-1.0, 1.0)
-                    self.reservoir.add_synapse(pre, post, weight)
+        connected = np.random.random((self.reservoir_size, self.reservoir_size)) < connection_prob
+        np.fill_diagonal(connected, False)
+        pre, post = np.nonzero(connected)
+        self.reservoir.add_synapses(
+            [reservoir_neurons[i] for i in pre.tolist()],
+            [reservoir_neurons[j] for j in post.tolist()],
+            np.random.uniform(-1.0, 1.0, size=len(pre))
+        )
     
     def add_input(self, input_id: str):
         """Add input neuron."""
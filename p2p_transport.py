@@ -0,0 +1,762 @@
+#!/usr/bin/env python3
+"""
+P2P TRANSPORT - SURESH AI ORIGIN
+================================
+Asyncio transport for the decentralized AI node mesh.
+
+Wire format:
+- Every message is one frame: 4-byte big-endian payload length, 1-byte codec id, payload
+- Codec 1 = JSON (UTF-8), codec 2 = binary (msgpack wire format)
+- Receivers decode by the codec id in the header, so mixed-codec meshes interoperate
+
+Connections:
+- One persistent connection per peer, opened with a hello / hello_ack handshake
+- Multiplexed: requests carry an "id" and replies carry "reply_to", so many
+  requests can be in flight on the same connection. Pending requests belong
+  to the connection they were sent on; only a reply on that connection
+  resolves them, and they fail when it closes
+- If two peers dial each other at once, both keep the connection opened by
+  the peer with the smaller node_id
+- Keepalive pings every keepalive_interval; a peer silent for keepalive_timeout is dropped
+- Each connection has a bounded send queue drained by a writer task that awaits
+  drain(), so slow peers push back on senders instead of growing memory
+
+Usage:
+    from p2p_transport import AsyncP2PTransport
+
+    transport = AsyncP2PTransport("node_a", port=9000, codec="binary")
+    transport.register_handler("task_offer", lambda peer_id, msg: {"type": "task_ack"})
+    transport.start()
+    peer_id = transport.connect("127.0.0.1:9001")
+    transport.broadcast({"type": "announce", "load": 0.3})
+"""
+
+import asyncio
+import inspect
+import itertools
+import json
+import logging
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# ==================== FRAMING & CODECS ====================
+
+FRAME_HEADER = struct.Struct("!IB")
+MAX_FRAME_SIZE = 16 * 1024 * 1024  # 16 MiB
+
+CODEC_JSON = 1
+CODEC_BINARY = 2
+CODEC_IDS = {"json": CODEC_JSON, "binary": CODEC_BINARY, "msgpack": CODEC_BINARY}
+
+
+class FrameError(Exception):
+    """Malformed or oversized frame received from a peer."""
+
+
+def _pack_binary(obj: Any, out: bytearray):
+    """Append obj to out in msgpack wire format (pure-Python fallback)."""
+    if obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif -(1 << 63) <= obj < (1 << 63):
+            out.append(0xd3)
+            out += struct.pack(">q", obj)
+        elif 0 <= obj < (1 << 64):
+            out.append(0xcf)
+            out += struct.pack(">Q", obj)
+        else:
+            raise OverflowError(f"Integer too large for binary codec: {obj}")
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8")
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        elif size < 0x100:
+            out += bytes((0xd9, size))
+        elif size < 0x10000:
+            out.append(0xda)
+            out += struct.pack(">H", size)
+        else:
+            out.append(0xdb)
+            out += struct.pack(">I", size)
+        out += data
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        size = len(data)
+        if size < 0x100:
+            out += bytes((0xc4, size))
+        elif size < 0x10000:
+            out.append(0xc5)
+            out += struct.pack(">H", size)
+        else:
+            out.append(0xc6)
+            out += struct.pack(">I", size)
+        out += data
+    elif isinstance(obj, (list, tuple)):
+        size = len(obj)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size < 0x10000:
+            out.append(0xdc)
+            out += struct.pack(">H", size)
+        else:
+            out.append(0xdd)
+            out += struct.pack(">I", size)
+        for item in obj:
+            _pack_binary(item, out)
+    elif isinstance(obj, dict):
+        size = len(obj)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size < 0x10000:
+            out.append(0xde)
+            out += struct.pack(">H", size)
+        else:
+            out.append(0xdf)
+            out += struct.pack(">I", size)
+        for key, value in obj.items():
+            _pack_binary(key, out)
+            _pack_binary(value, out)
+    else:
+        # Same fallback as the JSON codec (default=str)
+        _pack_binary(str(obj), out)
+
+
+_FIXED_UNPACK = {
+    0xca: (">f", 4), 0xcb: (">d", 8),
+    0xcc: (">B", 1), 0xcd: (">H", 2), 0xce: (">I", 4), 0xcf: (">Q", 8),
+    0xd0: (">b", 1), 0xd1: (">h", 2), 0xd2: (">i", 4), 0xd3: (">q", 8),
+}
+
+
+def _unpack_binary(data: bytes, pos: int):
+    """Decode one msgpack value starting at pos. Returns (value, new_pos)."""
+    tag = data[pos]
+    pos += 1
+
+    if tag <= 0x7f:
+        return tag, pos
+    if tag >= 0xe0:
+        return tag - 0x100, pos
+    if 0xa0 <= tag <= 0xbf:
+        size = tag & 0x1f
+        return data[pos:pos + size].decode("utf-8"), pos + size
+    if 0x90 <= tag <= 0x9f:
+        return _unpack_array(data, pos, tag & 0x0f)
+    if 0x80 <= tag <= 0x8f:
+        return _unpack_map(data, pos, tag & 0x0f)
+    if tag == 0xc0:
+        return None, pos
+    if tag == 0xc2:
+        return False, pos
+    if tag == 0xc3:
+        return True, pos
+    if tag in _FIXED_UNPACK:
+        fmt, width = _FIXED_UNPACK[tag]
+        return struct.unpack_from(fmt, data, pos)[0], pos + width
+    if tag in (0xd9, 0xda, 0xdb, 0xc4, 0xc5, 0xc6):
+        width = {0xd9: 1, 0xc4: 1, 0xda: 2, 0xc5: 2, 0xdb: 4, 0xc6: 4}[tag]
+        size = int.from_bytes(data[pos:pos + width], "big")
+        pos += width
+        chunk = data[pos:pos + size]
+        if tag in (0xd9, 0xda, 0xdb):
+            return chunk.decode("utf-8"), pos + size
+        return bytes(chunk), pos + size
+    if tag in (0xdc, 0xdd):
+        width = 2 if tag == 0xdc else 4
+        size = int.from_bytes(data[pos:pos + width], "big")
+        return _unpack_array(data, pos + width, size)
+    if tag in (0xde, 0xdf):
+        width = 2 if tag == 0xde else 4
+        size = int.from_bytes(data[pos:pos + width], "big")
+        return _unpack_map(data, pos + width, size)
+
+    raise FrameError(f"Unsupported binary type tag: 0x{tag:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, size: int):
+    items = []
+    for _ in range(size):
+        item, pos = _unpack_binary(data, pos)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, size: int):
+    result = {}
+    for _ in range(size):
+        key, pos = _unpack_binary(data, pos)
+        value, pos = _unpack_binary(data, pos)
+        result[key] = value
+    return result, pos
+
+
+def encode_payload(message: Dict, codec: int = CODEC_JSON) -> bytes:
+    """Serialize a message dict with the given codec id."""
+    if codec == CODEC_JSON:
+        return json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+    if codec == CODEC_BINARY:
+        if MSGPACK_AVAILABLE:
+            return msgpack.packb(message, use_bin_type=True, default=str)
+        out = bytearray()
+        _pack_binary(message, out)
+        return bytes(out)
+    raise ValueError(f"Unknown codec id: {codec}")
+
+
+def decode_payload(payload: bytes, codec: int) -> Dict:
+    """Deserialize a frame payload produced by encode_payload()."""
+    try:
+        if codec == CODEC_JSON:
+            return json.loads(payload.decode("utf-8"))
+        if codec == CODEC_BINARY:
+            if MSGPACK_AVAILABLE:
+                return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+            value, pos = _unpack_binary(payload, 0)
+            if pos != len(payload):
+                raise FrameError("Trailing bytes after binary payload")
+            return value
+    except FrameError:
+        raise
+    except Exception as e:
+        raise FrameError(f"Undecodable payload: {e}") from e
+    raise FrameError(f"Unknown codec id: {codec}")
+
+
+def encode_frame(message: Dict, codec: int = CODEC_JSON) -> bytes:
+    """Encode a message as a length-prefixed frame."""
+    payload = encode_payload(message, codec)
+    if len(payload) > MAX_FRAME_SIZE:
+        raise FrameError(f"Frame too large: {len(payload)} bytes")
+    return FRAME_HEADER.pack(len(payload), codec) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Dict:
+    """Read and decode exactly one frame from the stream."""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    length, codec = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise FrameError(f"Frame too large: {length} bytes")
+    payload = await reader.readexactly(length)
+    message = decode_payload(payload, codec)
+    if not isinstance(message, dict):
+        raise FrameError("Frame payload is not a message object")
+    return message
+
+
+# ==================== PEER CONNECTION ====================
+
+class PeerConnection:
+    """One persistent, multiplexed connection to a peer."""
+
+    def __init__(
+        self,
+        transport: "AsyncP2PTransport",
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        peer_id: str,
+        address: str,
+        outbound: bool
+    ):
+        self.transport = transport
+        self.reader = reader
+        self.writer = writer
+        self.peer_id = peer_id
+        self.address = address
+        self.outbound = outbound
+        self.send_queue: asyncio.Queue = asyncio.Queue(maxsize=transport.send_queue_size)
+        self.last_seen = time.monotonic()
+        self.closed = False
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.bytes_sent = 0
+        self.dropped = 0
+        self.pending: Dict[int, asyncio.Future] = {}  # request id -> reply future, requests sent here
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """Start reader, writer and keepalive tasks."""
+        self._tasks = [
+            asyncio.ensure_future(self._reader_loop()),
+            asyncio.ensure_future(self._writer_loop()),
+            asyncio.ensure_future(self._keepalive_loop()),
+        ]
+
+    async def enqueue(self, frame: bytes, timeout: Optional[float] = None) -> bool:
+        """Queue an encoded frame. Waits up to timeout for queue space (backpressure)."""
+        if self.closed:
+            return False
+        try:
+            self.send_queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if timeout is not None and timeout <= 0:
+            self.dropped += 1
+            return False
+        try:
+            await asyncio.wait_for(self.send_queue.put(frame), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            return False
+
+    async def _writer_loop(self):
+        """Drain the send queue, coalescing queued frames into one write."""
+        try:
+            while True:
+                frame = await self.send_queue.get()
+                if frame is None:
+                    break
+                batch = [frame]
+                while len(batch) < 64 and not self.send_queue.empty():
+                    queued = self.send_queue.get_nowait()
+                    if queued is None:
+                        self.send_queue.put_nowait(None)
+                        break
+                    batch.append(queued)
+
+                data = b"".join(batch)
+                self.writer.write(data)
+                self.frames_sent += len(batch)
+                self.bytes_sent += len(data)
+                await self.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            self.transport.logger.warning(f"Writer error ({self.peer_id}): {e}")
+        finally:
+            await self.close()
+
+    async def _reader_loop(self):
+        """Read frames and hand them to the transport dispatcher."""
+        try:
+            while True:
+                message = await read_frame(self.reader)
+                self.last_seen = time.monotonic()
+                self.frames_received += 1
+                await self.transport._dispatch(self, message)
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            pass
+        except FrameError as e:
+            self.transport.logger.warning(f"Protocol error from {self.peer_id}: {e}")
+        except Exception as e:
+            self.transport.logger.warning(f"Reader error ({self.peer_id}): {e}")
+        finally:
+            await self.close()
+
+    async def _keepalive_loop(self):
+        """Ping idle peers and drop peers that stop answering."""
+        interval = self.transport.keepalive_interval
+        try:
+            while not self.closed:
+                await asyncio.sleep(interval)
+                idle = time.monotonic() - self.last_seen
+                if idle > self.transport.keepalive_timeout:
+                    self.transport.logger.info(f"⏱️ Keepalive timeout: {self.peer_id}")
+                    break
+                if idle >= interval:
+                    await self.enqueue(encode_frame({"type": "ping"}, CODEC_JSON), timeout=0)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Close the connection and unregister it from the transport."""
+        if self.closed:
+            return
+        self.closed = True
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current and not task.done():
+                task.cancel()
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Connection to {self.peer_id} closed"))
+        self.pending.clear()
+        self.transport._unregister(self)
+
+
+# ==================== TRANSPORT ====================
+
+class AsyncP2PTransport:
+    """
+    Asyncio server + persistent peer connections with framed messages.
+
+    The async API (*_async methods) runs on any event loop. The blocking API
+    (start/connect/send/request/broadcast/stop) runs the transport on its own
+    background loop thread so threaded callers such as P2PNetwork can use it.
+    """
+
+    def __init__(
+        self,
+        node_id: str,
+        host: str = "127.0.0.1",
+        port: int = 9000,
+        codec: str = "json",
+        send_queue_size: int = 1024,
+        send_timeout: float = 1.0,
+        keepalive_interval: float = 15.0,
+        keepalive_timeout: float = 45.0,
+        handshake_timeout: float = 5.0,
+        hello_info: Optional[Dict] = None
+    ):
+        if codec not in CODEC_IDS:
+            raise ValueError(f"Unknown codec '{codec}' (expected one of {sorted(CODEC_IDS)})")
+
+        self.node_id = node_id
+        self.host = host
+        self.port = port
+        self.codec_name = codec
+        self.codec = CODEC_IDS[codec]
+        self.send_queue_size = send_queue_size
+        self.send_timeout = send_timeout
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_timeout = keepalive_timeout
+        self.handshake_timeout = handshake_timeout
+        self.hello_info = hello_info or {}
+
+        self.connections: Dict[str, PeerConnection] = {}
+        self.handlers: Dict[str, Callable] = {}
+        self.on_peer_connected: Optional[Callable[[str, Dict], None]] = None
+        self.on_peer_disconnected: Optional[Callable[[str], None]] = None
+
+        self.running = False
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._owns_loop = False
+        self._ids = itertools.count(1)
+
+        self.logger = logging.getLogger(f"{__name__}.AsyncP2PTransport")
+
+    @property
+    def address(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def register_handler(self, message_type: str, handler: Callable):
+        """
+        Register handler(peer_id, message) for a message type.
+
+        Coroutine handlers run on the transport loop; plain functions run in
+        the loop's default executor so they cannot stall other peers. A
+        non-None return value is sent back to the peer as a reply.
+        """
+        self.handlers[message_type] = handler
+
+    # ---------- async API ----------
+
+    async def start_async(self):
+        """Start listening on the current event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_inbound, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.running = True
+        self.logger.info(f"✅ P2P transport listening: {self.address} (codec: {self.codec_name})")
+
+    async def connect_async(self, address: str, timeout: Optional[float] = None) -> str:
+        """Open (or reuse) a persistent connection to address. Returns the peer node_id."""
+        for conn in self.connections.values():
+            if conn.address == address and not conn.closed:
+                return conn.peer_id
+
+        host, port = address.rsplit(":", 1)
+        timeout = timeout or self.handshake_timeout
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), timeout)
+        try:
+            writer.write(encode_frame(self._hello("hello"), self.codec))
+            await writer.drain()
+            ack = await asyncio.wait_for(read_frame(reader), timeout)
+        except Exception:
+            writer.close()
+            raise
+
+        if ack.get("type") != "hello_ack" or ack.get("status") != "ok":
+            writer.close()
+            raise ConnectionError(f"Handshake rejected by {address}: {ack}")
+
+        peer_id = ack.get("node_id") or address
+        self._register(PeerConnection(self, reader, writer, peer_id, address, outbound=True), ack)
+        return peer_id
+
+    async def send_async(self, peer_id: str, message: Dict, timeout: Optional[float] = None) -> bool:
+        """Queue a message for one peer."""
+        conn = self.connections.get(peer_id)
+        if conn is None:
+            return False
+        return await conn.enqueue(encode_frame(message, self.codec), self._send_timeout(timeout))
+
+    async def request_async(self, peer_id: str, message: Dict, timeout: float = 10.0) -> Dict:
+        """Send a message and wait for the peer's reply on the same connection."""
+        conn = self.connections.get(peer_id)
+        if conn is None:
+            raise ConnectionError(f"Cannot send to peer {peer_id}")
+        msg_id = next(self._ids)
+        message = dict(message, id=msg_id)
+        future = asyncio.get_running_loop().create_future()
+        conn.pending[msg_id] = future
+        try:
+            if not await conn.enqueue(encode_frame(message, self.codec), self._send_timeout(timeout)):
+                raise ConnectionError(f"Cannot send to peer {peer_id}")
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            conn.pending.pop(msg_id, None)
+
+    async def broadcast_async(
+        self,
+        message: Dict,
+        exclude: Optional[List[str]] = None,
+        timeout: Optional[float] = None
+    ) -> int:
+        """
+        Fan a message out to every connected peer in parallel.
+
+        The frame is encoded once and queued on each peer's send queue; peers
+        whose queue stays full past the send timeout are skipped and counted
+        as dropped. Returns the number of peers the message was queued for.
+        """
+        excluded = set(exclude or ())
+        targets = [c for pid, c in self.connections.items() if pid not in excluded and not c.closed]
+        if not targets:
+            return 0
+
+        frame = encode_frame(message, self.codec)
+        send_timeout = self._send_timeout(timeout)
+
+        delivered = 0
+        blocked = []
+        for conn in targets:
+            try:
+                conn.send_queue.put_nowait(frame)
+                delivered += 1
+            except asyncio.QueueFull:
+                blocked.append(conn)
+
+        if blocked:
+            results = await asyncio.gather(*(c.enqueue(frame, send_timeout) for c in blocked))
+            delivered += sum(1 for ok in results if ok)
+
+        return delivered
+
+    async def stop_async(self):
+        """Close every connection and stop listening."""
+        self.running = False
+        for conn in list(self.connections.values()):
+            await conn.close()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    # ---------- blocking API ----------
+
+    def start(self) -> bool:
+        """Start the transport on a dedicated background event loop."""
+        if self.running:
+            return True
+        loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=loop.run_forever, daemon=True,
+                                        name=f"p2p-{self.node_id}")
+        self._thread.start()
+        self._owns_loop = True
+        self._loop = loop
+        try:
+            asyncio.run_coroutine_threadsafe(self.start_async(), loop).result(self.handshake_timeout)
+            return True
+        except Exception as e:
+            self.logger.error(f"❌ Failed to start P2P transport: {e}")
+            self._shutdown_loop()
+            return False
+
+    def connect(self, address: str, timeout: Optional[float] = None) -> str:
+        timeout = timeout or self.handshake_timeout
+        return self._call(self.connect_async(address, timeout), timeout + 1)
+
+    def send(self, peer_id: str, message: Dict, timeout: Optional[float] = None) -> bool:
+        return self._call(self.send_async(peer_id, message, timeout))
+
+    def request(self, peer_id: str, message: Dict, timeout: float = 10.0) -> Dict:
+        return self._call(self.request_async(peer_id, message, timeout), timeout + 1)
+
+    def broadcast(self, message: Dict, exclude: Optional[List[str]] = None,
+                  timeout: Optional[float] = None) -> int:
+        return self._call(self.broadcast_async(message, exclude, timeout))
+
+    def stop(self):
+        """Stop the transport and its background loop."""
+        if self._loop is None:
+            return
+        if self._owns_loop:
+            try:
+                self._call(self.stop_async(), 5.0)
+            except Exception as e:
+                self.logger.warning(f"Transport shutdown error: {e}")
+            self._shutdown_loop()
+        self.running = False
+
+    def get_stats(self) -> Dict:
+        """Per-transport traffic counters."""
+        conns = list(self.connections.values())
+        return {
+            "peers_connected": len(conns),
+            "frames_sent": sum(c.frames_sent for c in conns),
+            "frames_received": sum(c.frames_received for c in conns),
+            "bytes_sent": sum(c.bytes_sent for c in conns),
+            "dropped": sum(c.dropped for c in conns),
+            "queued": sum(c.send_queue.qsize() for c in conns),
+            "codec": self.codec_name,
+        }
+
+    # ---------- internals ----------
+
+    def _send_timeout(self, timeout: Optional[float]) -> float:
+        return self.send_timeout if timeout is None else timeout
+
+    def _call(self, coro, timeout: Optional[float] = None):
+        if self._loop is None or not self._owns_loop:
+            coro.close()
+            raise RuntimeError("Transport not started with start()")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def _shutdown_loop(self):
+        loop = self._loop
+        if loop is not None and self._owns_loop:
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread:
+                self._thread.join(timeout=5.0)
+            loop.close()
+        self._loop = None
+        self._thread = None
+        self._owns_loop = False
+
+    def _hello(self, message_type: str) -> Dict:
+        hello = {
+            "type": message_type,
+            "node_id": self.node_id,
+            "address": self.address,
+            "version": "1.0",
+        }
+        hello.update(self.hello_info)
+        return hello
+
+    async def _handle_inbound(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peername = writer.get_extra_info("peername") or ("?", 0)
+        try:
+            hello = await asyncio.wait_for(read_frame(reader), self.handshake_timeout)
+            if hello.get("type") != "hello" or not hello.get("node_id"):
+                raise FrameError("Expected hello frame")
+            ack = self._hello("hello_ack")
+            ack["status"] = "ok"
+            writer.write(encode_frame(ack, self.codec))
+            await writer.drain()
+        except Exception as e:
+            self.logger.warning(f"Handshake failed from {peername[0]}:{peername[1]}: {e}")
+            writer.close()
+            return
+
+        address = hello.get("address") or f"{peername[0]}:{peername[1]}"
+        self._register(PeerConnection(self, reader, writer, hello["node_id"], address, outbound=False), hello)
+
+    def _preferred(self, conn: PeerConnection) -> bool:
+        """True if conn was dialed by the peer with the smaller node_id (the tie-break both ends agree on)."""
+        dialer = self.node_id if conn.outbound else conn.peer_id
+        return dialer == min(self.node_id, conn.peer_id)
+
+    def _register(self, conn: PeerConnection, hello: Dict):
+        previous = self.connections.get(conn.peer_id)
+        if (previous is not None and not previous.closed and previous.outbound != conn.outbound
+                and self._preferred(previous)):
+            # Simultaneous dial: the other end keeps `previous` too, so drop this one
+            self.logger.debug(f"Duplicate connection with {conn.peer_id} closed")
+            asyncio.ensure_future(conn.close())
+            return
+        self.connections[conn.peer_id] = conn
+        conn.start()
+        if previous is not None and not previous.closed:
+            # Newest connection wins; the old one flushes its queue and closes
+            try:
+                previous.send_queue.put_nowait(None)
+            except asyncio.QueueFull:
+                asyncio.ensure_future(previous.close())
+
+        self.logger.info(f"📡 Peer connected: {conn.peer_id} ({conn.address})")
+        if self.on_peer_connected:
+            try:
+                self.on_peer_connected(conn.peer_id, hello)
+            except Exception as e:
+                self.logger.warning(f"on_peer_connected error: {e}")
+
+    def _unregister(self, conn: PeerConnection):
+        if self.connections.get(conn.peer_id) is not conn:
+            return
+        del self.connections[conn.peer_id]
+        self.logger.info(f"🔌 Peer disconnected: {conn.peer_id}")
+        if self.on_peer_disconnected:
+            try:
+                self.on_peer_disconnected(conn.peer_id)
+            except Exception as e:
+                self.logger.warning(f"on_peer_disconnected error: {e}")
+
+    async def _dispatch(self, conn: PeerConnection, message: Dict):
+        message_type = message.get("type")
+
+        reply_to = message.get("reply_to")
+        if reply_to is not None:
+            future = conn.pending.get(reply_to)
+            if future is not None and not future.done():
+                future.set_result(message)
+                return
+
+        if message_type == "ping":
+            await conn.enqueue(encode_frame({"type": "pong"}, CODEC_JSON), timeout=0)
+            return
+        if message_type == "pong":
+            return
+
+        handler = self.handlers.get(message_type) or self.handlers.get("*")
+        if handler is None:
+            self.logger.debug(f"No handler for message type '{message_type}' from {conn.peer_id}")
+            return
+
+        try:
+            if inspect.iscoroutinefunction(handler):
+                reply = await handler(conn.peer_id, message)
+            else:
+                reply = await asyncio.get_running_loop().run_in_executor(None, handler, conn.peer_id, message)
+                if inspect.isawaitable(reply):
+                    reply = await reply
+        except Exception as e:
+            self.logger.warning(f"Handler error for '{message_type}': {e}")
+            reply = {"type": "error", "error": str(e)} if "id" in message else None
+
+        if reply is not None and "id" in message:
+            reply = dict(reply)
+            reply["reply_to"] = message["id"]
+            await conn.enqueue(encode_frame(reply, self.codec), self.send_timeout)
@@ -1,5 +1,5 @@
 import time
-from typing import Dict, List
+from typing import Dict, List, Optional
 from models import get_engine, get_session, Order, Payment
 from utils import _get_db_url, reconcile_orders
 
@@ -14,8 +14,11 @@ def _window(days_back: int):
     return orders, payments
 
 
-def compute_payment_metrics(days_back: int = 90) -> Dict:
-    orders, payments = _window(days_back)
+def compute_payment_metrics(days_back: int = 90, orders: Optional[List[Order]] = None,
+                            payments: Optional[List[Payment]] = None) -> Dict:
+    """Payment KPIs over the window; pass preloaded `orders`/`payments` for that window to skip the queries."""
+    if orders is None or payments is None:
+        orders, payments = _window(days_back)
     created = len(orders)
     paid = sum(1 for o in orders if (o.status or '').lower() == 'paid')
     pay_rate = round((paid / max(created, 1)) * 100.0, 2)
@@ -6,11 +6,147 @@ Live co-editing with AI, multi-user sessions, collaborative workflows
 import json
 import time
 import uuid
-from typing import Dict, List, Optional, Set, Any
+from typing import Dict, List, Optional, Set, Any, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
 import hashlib
 
+from text_search import SearchIndex
+
+
+LEAF_SIZE = 2048  # max characters per rope leaf
+SNAPSHOT_INTERVAL = 1000  # operations between document snapshots / log compaction
+MAX_LOG_OPS = 20000  # operations kept for lagging clients; older ones force a resync
+
+
+class _Leaf:
+    __slots__ = ('text', 'length')
+    depth = 0
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+
+
+class _Node:
+    __slots__ = ('left', 'right', 'length', 'depth')
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+        self.length = left.length + right.length
+        self.depth = max(left.depth, right.depth) + 1
+
+
+def _rotate(left, right):
+    """Node over left/right, rotating once when their depths differ by two (AVL)."""
+    if left.depth > right.depth + 1:
+        if left.left.depth >= left.right.depth:
+            return _Node(left.left, _Node(left.right, right))
+        return _Node(_Node(left.left, left.right.left), _Node(left.right.right, right))
+    if right.depth > left.depth + 1:
+        if right.right.depth >= right.left.depth:
+            return _Node(_Node(left, right.left), right.right)
+        return _Node(_Node(left, right.left.left), _Node(right.left.right, right.right))
+    return _Node(left, right)
+
+
+def _join(left, right):
+    """Concatenate two balanced ropes into a balanced rope (either may be None)."""
+    if left is None or not left.length:
+        return right
+    if right is None or not right.length:
+        return left
+    if left.depth == 0 and right.depth == 0 and left.length + right.length <= LEAF_SIZE:
+        return _Leaf(left.text + right.text)
+    if left.depth > right.depth + 1:
+        return _rotate(left.left, _join(left.right, right))
+    if right.depth > left.depth + 1:
+        return _rotate(_join(left, right.left), right.right)
+    return _Node(left, right)
+
+
+def _split(node, index: int):
+    """(first `index` characters, the rest) of a rope."""
+    if node is None:
+        return None, None
+    if node.depth == 0:
+        return _Leaf(node.text[:index]), _Leaf(node.text[index:])
+    if index <= node.left.length:
+        head, tail = _split(node.left, index)
+        return head, _join(tail, node.right)
+    head, tail = _split(node.right, index - node.left.length)
+    return _join(node.left, head), tail
+
+
+def _build(text: str):
+    """Balanced rope over `text`, LEAF_SIZE characters per leaf."""
+    leaves = [_Leaf(text[i:i + LEAF_SIZE]) for i in range(0, len(text), LEAF_SIZE)]
+    if not leaves:
+        return None
+    while len(leaves) > 1:
+        paired = [_Node(leaves[i], leaves[i + 1]) for i in range(0, len(leaves) - 1, 2)]
+        if len(leaves) % 2:
+            paired.append(leaves[-1])
+        leaves = paired
+    return leaves[0]
+
+
+class Rope:
+    """Text stored as a balanced tree of short strings.
+
+    Inserts and deletes are O(log n) instead of copying the whole document.
+    Nodes are never mutated, so snapshot() is O(1) and shares structure with
+    the live document.
+    """
+
+    __slots__ = ('_root',)
+
+    def __init__(self, text: str = "", _root=None):
+        self._root = _root if _root is not None else _build(text)
+
+    def __len__(self) -> int:
+        return self._root.length if self._root is not None else 0
+
+    def __str__(self) -> str:
+        return self.slice(0, len(self))
+
+    def insert(self, index: int, text: str):
+        index = min(max(index, 0), len(self))
+        head, tail = _split(self._root, index)
+        middle = _Leaf(text) if len(text) <= LEAF_SIZE else _build(text)
+        self._root = _join(_join(head, middle), tail)
+
+    def delete(self, index: int, length: int) -> str:
+        """Remove `length` characters at `index`; returns the removed text."""
+        index = min(max(index, 0), len(self))
+        head, rest = _split(self._root, index)
+        removed, tail = _split(rest, min(length, rest.length if rest is not None else 0))
+        self._root = _join(head, tail)
+        return Rope(_root=removed).slice(0, removed.length) if removed is not None else ""
+
+    def replace(self, index: int, text: str):
+        """Overwrite len(text) characters at `index` (extending the document if needed)."""
+        self.delete(index, len(text))
+        self.insert(index, text)
+
+    def slice(self, start: int, end: int) -> str:
+        """Characters [start, end) without flattening the rest of the rope."""
+        parts, stack = [], [(self._root, 0)] if self._root is not None else []
+        while stack:
+            node, offset = stack.pop()
+            if offset >= end or offset + node.length <= start:
+                continue
+            if node.depth == 0:
+                parts.append(node.text[max(start - offset, 0):end - offset])
+            else:
+                stack.append((node.right, offset + node.left.length))
+                stack.append((node.left, offset))
+        return "".join(parts)
+
+    def snapshot(self) -> 'Rope':
+        return Rope(_root=self._root)
+
 
 @dataclass
 class CollaborativeSession:
@@ -34,7 +170,41 @@ class Operation:
     position: int
     content: str
     timestamp: float
-    version: int
+    version: int  # document revision the operation was made against / applied at
+
+
+@dataclass
+class OperationLog:
+    """Applied operations of one document, indexed by revision.
+
+    log[i] holds the operation that produced revision base + i + 1, so the
+    operations a client has not seen are a slice rather than a scan.
+    """
+    base: int = 0
+    ops: List[Operation] = field(default_factory=list)
+    snapshot: Tuple[int, Rope] = field(default_factory=lambda: (0, Rope()))
+
+    @property
+    def revision(self) -> int:
+        return self.base + len(self.ops)
+
+    def since(self, version: int) -> List[Operation]:
+        if version < self.base:
+            raise ValueError(f"Revision {version} was compacted; resync from snapshot {self.snapshot[0]}")
+        return self.ops[version - self.base:]
+
+    def compact(self, keep_from: int):
+        """Drop operations before revision `keep_from` (bounded by MAX_LOG_OPS)."""
+        keep_from = max(min(keep_from, self.revision), self.revision - MAX_LOG_OPS, self.base)
+        del self.ops[:keep_from - self.base]
+        self.base = keep_from
+
+
+def _shift_past_delete(index: int, start: int, end: int) -> int:
+    """Where `index` lands after [start, end) is deleted."""
+    if index <= start:
+        return index
+    return start if index <= end else index - (end - start)
 
 
 class CollaborativeEditEngine:
@@ -42,8 +212,9 @@ class CollaborativeEditEngine:
     
     def __init__(self):
         self.sessions: Dict[str, CollaborativeSession] = {}
-        self.documents: Dict[str, str] = {}
-        self.operation_history: Dict[str, List[Operation]] = defaultdict(list)
+        self.documents: Dict[str, Rope] = {}
+        self.operation_logs: Dict[str, OperationLog] = defaultdict(OperationLog)
+        # Last document revision each user has seen, per session
         self.version_vectors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
     
     def create_session(self, document_id: str, creator_id: str, with_ai: bool = True) -> CollaborativeSession:
@@ -62,7 +233,8 @@ class CollaborativeEditEngine:
         
         # Initialize document if needed
         if document_id not in self.documents:
-            self.documents[document_id] = ""
+            self.documents[document_id] = Rope()
+        self.version_vectors[session.session_id][creator_id] = self.operation_logs[document_id].revision
         
         return session
     
@@ -74,19 +246,34 @@ class CollaborativeEditEngine:
         
         session.participants.add(user_id)
         session.last_activity = time.time()
+        revision = self.operation_logs[session.document_id].revision
+        self.version_vectors[session_id][user_id] = revision
         
         return {
             "session": session,
-            "current_content": self.documents[session.document_id],
+            "current_content": str(self.documents[session.document_id]),
+            "version": revision,
             "participants": list(session.participants),
             "ai_assistants": list(session.ai_participants)
         }
     
-    def apply_operation(self, session_id: str, user_id: str, op_type: str, position: int, content: str) -> Dict:
-        """Apply operation with operational transformation."""
+    def apply_operation(self, session_id: str, user_id: str, op_type: str, position: int, content: str,
+                        base_version: Optional[int] = None) -> Dict:
+        """Apply operation with operational transformation.
+        
+        `base_version` is the document revision the client edited against
+        (default: the last revision this user saw). The operation is
+        transformed against everything applied since then, and only the
+        resulting delta is returned; clients catch up with operations_since().
+        """
         session = self.sessions.get(session_id)
         if not session:
             raise ValueError(f"Session {session_id} not found")
+        if op_type not in ("insert", "delete", "update"):
+            raise ValueError(f"Unknown operation type: {op_type}")
+        
+        if base_version is None:
+            base_version = self.version_vectors[session_id][user_id]
         
         # Create operation
         operation = Operation(
@@ -97,7 +284,7 @@ class CollaborativeEditEngine:
             position=position,
             content=content,
             timestamp=time.time(),
-            version=self.version_vectors[session_id][user_id]
+            version=base_version
         )
         
         # Transform against concurrent operations
@@ -107,60 +294,101 @@ class CollaborativeEditEngine:
         self._apply_to_document(session.document_id, transformed_op)
         
         # Record operation
-        self.operation_history[session_id].append(transformed_op)
-        self.version_vectors[session_id][user_id] += 1
+        log = self.operation_logs[session.document_id]
+        transformed_op.version = log.revision + 1
+        log.ops.append(transformed_op)
+        self.version_vectors[session_id][user_id] = log.revision
+        session.last_activity = transformed_op.timestamp
+        if log.revision % SNAPSHOT_INTERVAL == 0:
+            self._snapshot(session.document_id)
         
         # Broadcast to participants (in production: WebSocket)
         return {
             "operation": transformed_op,
-            "new_content": self.documents[session.document_id],
-            "version": self.version_vectors[session_id][user_id]
+            "delta": self._delta(transformed_op),
+            "version": log.revision
         }
     
-    def _transform_operation(self, operation: Operation, session_id: str) -> Operation:
-        """Operational transformation for conflict resolution."""
-        # Get concurrent operations
-        concurrent_ops = [
-            op for op in self.operation_history[session_id]
-            if op.timestamp > operation.timestamp - 0.1  # 100ms window
-            and op.user_id != operation.user_id
+    def operations_since(self, session_id: str, user_id: str, version: int) -> Dict:
+        """Deltas applied after `version`, or a snapshot when they were compacted away."""
+        session = self.sessions.get(session_id)
+        if not session:
+            raise ValueError(f"Session {session_id} not found")
+        
+        log = self.operation_logs[session.document_id]
+        self.version_vectors[session_id][user_id] = log.revision
+        try:
+            return {"deltas": [self._delta(op) for op in log.since(version)], "version": log.revision}
+        except ValueError:
+            return {"snapshot": str(self.documents[session.document_id]), "version": log.revision}
+    
+    def get_content(self, document_id: str) -> str:
+        return str(self.documents[document_id])
+    
+    def _delta(self, operation: Operation) -> Dict:
+        return {
+            "op_type": operation.op_type,
+            "position": operation.position,
+            "content": operation.content,
+            "user_id": operation.user_id,
+            "version": operation.version
+        }
+    
+    def _snapshot(self, document_id: str):
+        """Snapshot the document and compact operations every session has already seen."""
+        log = self.operation_logs[document_id]
+        log.snapshot = (log.revision, self.documents[document_id].snapshot())
+        seen = [
+            revision
+            for session_id, session in self.sessions.items() if session.document_id == document_id
+            for revision in self.version_vectors[session_id].values()
         ]
+        log.compact(min(seen, default=log.revision))
+    
+    def _transform_operation(self, operation: Operation, session_id: str) -> Operation:
+        """Operational transformation for conflict resolution.
+        
+        Only operations applied after the client's base revision are visited.
+        Earlier inserts at the same position win ties; a delete spanning a
+        concurrent insert also removes the inserted text.
+        """
+        session = self.sessions[session_id]
+        concurrent_ops = self.operation_logs[session.document_id].since(operation.version)
         
         transformed_op = operation
+        start = operation.position
+        end = start + (len(operation.content) if operation.op_type == "delete" else 0)
         
         for concurrent_op in concurrent_ops:
-            if concurrent_op.position <= operation.position:
-                if concurrent_op.op_type == "insert":
-                    # Shift position right
-                    transformed_op.position += len(concurrent_op.content)
-                elif concurrent_op.op_type == "delete":
-                    # Shift position left
-                    transformed_op.position -= len(concurrent_op.content)
-        
+            size = len(concurrent_op.content)
+            if concurrent_op.op_type == "insert":
+                if concurrent_op.position <= start:
+                    start += size
+                    end += size
+                elif concurrent_op.position < end:
+                    end += size
+            elif concurrent_op.op_type == "delete":
+                deleted_to = concurrent_op.position + size
+                start = _shift_past_delete(start, concurrent_op.position, deleted_to)
+                end = _shift_past_delete(end, concurrent_op.position, deleted_to)
+        
+        transformed_op.position = max(start, 0)
+        if operation.op_type == "delete":
+            # Positions now refer to the current document, so record exactly what goes
+            transformed_op.content = self.documents[session.document_id].slice(transformed_op.position, end)
         return transformed_op
     
     def _apply_to_document(self, document_id: str, operation: Operation):
         """Apply operation to document."""
-        content = self.documents[document_id]
+        document = self.documents[document_id]
         
         if operation.op_type == "insert":
-            self.documents[document_id] = (
-                content[:operation.position] + 
-                operation.content + 
-                content[operation.position:]
-            )
+            document.insert(operation.position, operation.content)
         elif operation.op_type == "delete":
-            self.documents[document_id] = (
-                content[:operation.position] + 
-                content[operation.position + len(operation.content):]
-            )
+            document.delete(operation.position, len(operation.content))
         elif operation.op_type == "update":
             # Replace at position
-            self.documents[document_id] = (
-                content[:operation.position] + 
-                operation.content + 
-                content[operation.position + len(operation.content):]
-            )
+            document.replace(operation.position, operation.content)
 
 
 class MultiUserAISession:
@@ -379,6 +607,7 @@ class TeamKnowledgeBase:
     def __init__(self):
         self.knowledge_bases: Dict[str, Dict] = {}
         self.documents: Dict[str, List[Dict]] = defaultdict(list)
+        self.index = SearchIndex({"title": 3.0, "tags": 2.0, "content": 1.0}, filter_fields=("kb_id", "tags"))
     
     def create_knowledge_base(self, team_id: str, name: str) -> str:
         """Create team knowledge base."""
@@ -412,29 +641,27 @@ class TeamKnowledgeBase:
         }
         
         self.documents[kb_id].append(doc)
+        self.index.add(doc["doc_id"], doc)
         
         return doc["doc_id"]
     
-    def search_knowledge_base(self, kb_id: str, query: str) -> List[Dict]:
-        """Search team knowledge base."""
-        docs = self.documents[kb_id]
-        query_terms = query.lower().split()
-        
+    def search_knowledge_base(self, kb_id: str, query: str, tags: List[str] = None, limit: int = 50) -> List[Dict]:
+        """Search team knowledge base (BM25 over title, tags and content)."""
+        filters = {"kb_id": kb_id}
+        if tags:
+            filters["tags"] = tags
+        hits = self.index.search(query, filters=filters, limit=limit)
+        
+        top = hits[0][1] if hits and hits[0][1] > 0 else 1.0
         results = []
-        for doc in docs:
-            # Simple keyword matching
-            content_lower = (doc["title"] + " " + doc["content"]).lower()
-            matches = sum(1 for term in query_terms if term in content_lower)
-            
-            if matches > 0:
-                results.append({
-                    "doc_id": doc["doc_id"],
-                    "title": doc["title"],
-                    "relevance": matches / len(query_terms),
-                    "snippet": doc["content"][:200]
-                })
-        
-        results.sort(key=lambda x: x["relevance"], reverse=True)
+        for doc_id, score in hits:
+            doc = self.index.get(doc_id)
+            results.append({
+                "doc_id": doc_id,
+                "title": doc["title"],
+                "relevance": round(score / top, 3),
+                "snippet": doc["content"][:200]
+            })
         return results
 
 
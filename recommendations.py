@@ -276,18 +276,30 @@ def get_recommendations_for_all_customers(limit=3):
     Returns:
         dict mapping receipt -> recommendations
     """
-    session = get_session()
-    try:
-        customers = session.query(Customer).all()
-        
-        results = {}
-        for customer in customers:
-            result = generate_recommendations(customer.receipt, limit)
-            results[customer.receipt] = result.to_dict()
-        
-        return results
-    finally:
-        session.close()
+    return dict(iter_recommendations_for_all_customers(limit))
+
+
+def iter_recommendations_for_all_customers(limit=3, batch_size=500):
+    """Yield (receipt, recommendations dict) per customer without loading them all.
+    
+    Receipts are read in keyset batches of `batch_size`, and the reading
+    session is closed before the batch's recommendations are generated.
+    """
+    last = None
+    while True:
+        session = get_session()
+        try:
+            query = session.query(Customer.receipt)
+            if last is not None:
+                query = query.filter(Customer.receipt > last)
+            receipts = [r for (r,) in query.order_by(Customer.receipt).limit(batch_size)]
+        finally:
+            session.close()
+        for receipt in receipts:
+            yield receipt, generate_recommendations(receipt, limit).to_dict()
+        if len(receipts) < batch_size:
+            return
+        last = receipts[-1]
 
 
 def calculate_recommendation_impact():
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Benchmark A/B variant assignment and event tracking.
+
+- assign: track_visitor() for --visitors distinct ids, then again for the
+  same ids; "flipped" counts visitors whose variant changed between passes
+- track: track_conversion() for every visitor with a stats store writing to a
+  temporary database in batches of --flush-events, plus the final flush
+- restart: a fresh manager reloading the stored counters
+
+Usage:
+    python scripts/bench_ab_assignment.py --visitors 200000 --variants 3 --flush-events 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ab_testing_engine import ExperimentManager, ExperimentStatsStore  # noqa: E402
+
+EXPERIMENT_ID = "bench_checkout"
+
+
+def make_manager(variants, store=None):
+    manager = ExperimentManager(stats_store=store)
+    manager.create_experiment(EXPERIMENT_ID, "Checkout", "Benchmark", "", "conversion_rate")
+    for i in range(variants):
+        manager.add_variant(EXPERIMENT_ID, f"variant_{i}", f"Variant {i}", "", 1 / variants)
+    return manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--visitors", type=int, default=200000)
+    parser.add_argument("--variants", type=int, default=3)
+    parser.add_argument("--flush-events", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    visitors = [f"visitor_{i}" for i in range(args.visitors)]
+    manager = make_manager(args.variants)
+    started = time.perf_counter()
+    first = [manager.track_visitor(EXPERIMENT_ID, v) for v in visitors]
+    assign_s = time.perf_counter() - started
+    second = [manager.track_visitor(EXPERIMENT_ID, v) for v in visitors]
+    flipped = sum(a != b for a, b in zip(first, second))
+    print(f"assign   {args.visitors / assign_s:>12,.0f} visitors/s   flipped {flipped}")
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DATA_DB"] = os.path.join(root, "bench.db")
+        from utils import init_db
+        init_db()
+        store = ExperimentStatsStore(flush_interval=3600, flush_events=args.flush_events)
+        manager = make_manager(args.variants, store)
+        started = time.perf_counter()
+        for visitor, variant in zip(visitors, first):
+            manager.track_conversion(EXPERIMENT_ID, variant, rng.random() < 0.1, 25.0)
+        store.flush()
+        track_s = time.perf_counter() - started
+        batches = -(-args.visitors // args.flush_events)
+        print(f"track    {args.visitors / track_s:>12,.0f} events/s     {batches} batched writes")
+
+        started = time.perf_counter()
+        restarted = make_manager(args.variants, ExperimentStatsStore())
+        results = restarted.get_experiment_results(EXPERIMENT_ID)
+        print(f"restart  {(time.perf_counter() - started) * 1000:>12.1f} ms           "
+              f"{results['total_visitors']} visitors, {results['total_conversions']} conversions restored")
+        for row in results["sequential_analysis"]:
+            print(f"  {row['variant_id']} vs {row['control_variant_id']}: always-valid p={row['p_value']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark the attribution batch job on a synthetic touchpoint history.
+
+Fills a temporary database with about --touchpoints touchpoints: customers
+with 1-8 touches over --channels channels, where some channels lift the
+conversion odds. It then times run_attribution_batch(): one streamed read
+into the path trie, followed by every model run over the distinct paths.
+
+Usage:
+    python scripts/bench_attribution_batch.py --touchpoints 10000000 --channels 10
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+CHUNK_CUSTOMERS = 20000
+
+
+def generate(touchpoints, channels, seed):
+    """Yield (touch rows, conversion rows) chunks until ~touchpoints touches are produced"""
+    rng = random.Random(seed)
+    names = [f"channel_{i}" for i in range(channels)]
+    lift = {name: rng.uniform(0.0, 0.08) for name in names}
+    produced = customer = 0
+    while produced < touchpoints:
+        touches, conversions = [], []
+        for _ in range(CHUNK_CUSTOMERS):
+            customer_id = f"cust_{customer:09d}"
+            customer += 1
+            path = [rng.choice(names) for _ in range(rng.randint(1, 8))]
+            for t, channel in enumerate(path):
+                touches.append({"customer_id": customer_id, "channel": channel, "occurred_at": t})
+            if rng.random() < 0.02 + sum(lift[c] for c in set(path)):
+                conversions.append((customer_id, rng.choice((49.0, 99.0, 199.0)), len(path)))
+            produced += len(path)
+            if produced >= touchpoints:
+                break
+        yield touches, conversions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--touchpoints", type=int, default=1000000)
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--shapley-samples", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["DATA_DB"] = os.path.join(root, "bench.db")
+        from utils import init_db
+        from attribution_batch import record_touchpoints, run_attribution_batch
+        from models import get_session, AttributionTouchpoint
+        init_db()
+
+        started = time.perf_counter()
+        stored = 0
+        for touches, conversions in generate(args.touchpoints, args.channels, args.seed):
+            stored += record_touchpoints(touches)
+            session = get_session()
+            session.bulk_insert_mappings(AttributionTouchpoint, [
+                {"customer_id": c, "occurred_at": at, "conversion_value": value} for c, value, at in conversions
+            ])
+            session.commit()
+            session.close()
+        print(f"loaded {stored:,} touchpoints in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        report = run_attribution_batch(shapley_samples=args.shapley_samples, seed=args.seed)
+        total = time.perf_counter() - started
+        print(f"batch: {report['touchpoints']:,} touchpoints, {report['conversions']:,} conversions, "
+              f"{report['distinct_paths']:,} distinct paths")
+        print(f"  read + trie {report['load_seconds']:.1f}s, models {report['model_seconds']:.2f}s, "
+              f"total {total:.1f}s")
+        results = report["results"]
+        models = ("first_touch", "last_touch", "linear", "time_decay", "markov", "shapley")
+        print(f"{'channel':<11}" + "".join(f"{m:>12}" for m in models))
+        for channel in sorted(results["shapley"]):
+            print(f"{channel:<11}" + "".join(f"{results[m].get(channel, 0):>12,.0f}" for m in models))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Benchmark the campaign dialer against simulated providers.
+
+Queues --numbers targets spread over a few countries and runs one campaign
+through --providers simulated providers, each taking --latency seconds per
+call with up to --provider-limit calls at once. Reports calls per second,
+retries and peak concurrency per provider; --baseline also times dialing
+the first --baseline-numbers one at a time with a commit per call record,
+which is what a naive loop over target_numbers would do.
+
+Runs against a throwaway SQLite file unless DATA_DB is set.
+
+Usage:
+    python scripts/bench_campaign_dialer.py --numbers 20000 --providers 3 --provider-limit 50 --latency 0.02
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+COUNTRIES = ("+91", "+1", "+44", "+971", "+61")
+
+
+def create_campaign(campaign_id, numbers):
+    from campaign_dialer import enqueue_campaign
+    from models import get_session, CallingCampaign
+    session = get_session()
+    session.add(CallingCampaign(id=campaign_id, name=campaign_id, category="ai_automated", script_template="Hello",
+                                total_numbers=len(numbers), status="scheduled", created_at=time.time()))
+    session.commit()
+    session.close()
+    return enqueue_campaign(campaign_id, numbers)
+
+
+def run_baseline(numbers, provider):
+    """Sequential dialing, one CallRecord insert and commit per call."""
+    from models import get_session, CallRecord
+    session = get_session()
+    started = time.perf_counter()
+    for number in numbers:
+        call_started = time.time()
+        outcome = provider.dial(number, "Hello")
+        session.add(CallRecord(
+            id=str(uuid.uuid4()), call_id=f"baseline_{uuid.uuid4().hex}", category="ai_automated",
+            provider=provider.name, from_number="+1-AI-CALLER", to_number=number, status=outcome.status.value,
+            duration_seconds=outcome.duration_seconds, cost_rupees=outcome.cost_rupees, started_at=call_started,
+            ended_at=time.time(), call_metadata=json.dumps({}), created_at=time.time(),
+        ))
+        session.commit()
+    elapsed = time.perf_counter() - started
+    session.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--numbers", type=int, default=20000)
+    parser.add_argument("--providers", type=int, default=3)
+    parser.add_argument("--provider-limit", type=int, default=50)
+    parser.add_argument("--country-limit", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per simulated call")
+    parser.add_argument("--cps", type=float, default=None, help="campaign pacing, calls per second")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", action="store_true", help="also time sequential per-call commits")
+    parser.add_argument("--baseline-numbers", type=int, default=200)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATA_DB", os.path.join(tempfile.mkdtemp(), "bench_dialer.db"))
+    from campaign_dialer import CampaignDialer, SimulatedProvider  # noqa: E402
+    from utils import init_db  # noqa: E402
+    init_db()
+
+    numbers = [f"{COUNTRIES[i % len(COUNTRIES)]}{i:09d}" for i in range(args.numbers)]
+    started = time.perf_counter()
+    create_campaign("bench", numbers)
+    queued = time.perf_counter() - started
+
+    providers = [SimulatedProvider(f"sim{p}", max_concurrent=args.provider_limit, latency=args.latency,
+                                   seed=args.seed + p) for p in range(args.providers)]
+    dialer = CampaignDialer("bench", providers=providers, default_country_limit=args.country_limit,
+                            calls_per_second=args.cps, retry_backoff=0, batch_size=args.batch_size)
+    started = time.perf_counter()
+    stats = dialer.run()
+    elapsed = time.perf_counter() - started
+
+    print(f"queued {args.numbers} numbers in {queued:.2f}s")
+    print(f"{'mode':>10} {'calls':>8} {'calls/sec':>10} {'seconds':>8} {'retried':>8} {'succeeded':>9} {'peak/prov':>10}")
+    print(f"{'dialer':>10} {stats['dialed']:>8} {stats['dialed'] / elapsed:>10.0f} {elapsed:>8.2f} "
+          f"{stats['retried']:>8} {stats['succeeded']:>9} {max(p.peak_active for p in providers):>10}")
+    if args.baseline:
+        sample = numbers[:args.baseline_numbers]
+        seconds = run_baseline(sample, SimulatedProvider("seq", latency=args.latency, seed=args.seed))
+        print(f"{'sequential':>10} {len(sample):>8} {len(sample) / seconds:>10.0f} {seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark the collaborative editing core with many concurrent editors.
+
+N editors share one document of the given size. Each round every editor
+submits one insert or delete against the revision it last synced to (they
+sync every --sync-every rounds), so operations are transformed against the
+edits of everyone else in between. Reports operations per second and
+per-operation latency; --baseline also times the old copy-the-string
+approach (slice per edit, full content per response) for comparison.
+
+Usage:
+    python scripts/bench_collaboration.py --editors 50 --size 1000000 --rounds 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from realtime_collaboration import CollaborativeEditEngine, Rope  # noqa: E402
+
+
+def edits(rng, editors, rounds):
+    """Per-round (editor, kind, fraction of document, text) tuples, shared by both runs."""
+    for _ in range(rounds):
+        yield [(e, "insert" if rng.random() < 0.7 else "delete", rng.random(), "".join(rng.choices("abc ", k=8)))
+               for e in range(editors)]
+
+
+def run_rope(size, editors, rounds, sync_every, seed):
+    engine = CollaborativeEditEngine()
+    engine.documents["bench"] = Rope("a" * size)
+    sid = engine.create_session("bench", "editor0", with_ai=False).session_id
+    users = [f"editor{e}" for e in range(editors)]
+    for user in users[1:]:
+        engine.join_session(sid, user)
+
+    latencies = []
+    for round_no, batch in enumerate(edits(random.Random(seed), editors, rounds)):
+        length = len(engine.documents["bench"])
+        for e, kind, where, text in batch:
+            start = time.perf_counter()
+            engine.apply_operation(sid, users[e], kind, int(where * length), text)
+            latencies.append(time.perf_counter() - start)
+        if round_no % sync_every == sync_every - 1:
+            revision = engine.operation_logs["bench"].revision
+            for user in users:
+                engine.operations_since(sid, user, engine.version_vectors[sid][user])
+            assert all(v == revision for v in engine.version_vectors[sid].values())
+    return latencies, len(engine.documents["bench"])
+
+
+def run_string(size, editors, rounds, seed):
+    """The previous approach: rebuild the string on every edit and return all of it."""
+    document = "a" * size
+    latencies = []
+    for batch in edits(random.Random(seed), editors, rounds):
+        length = len(document)
+        for e, kind, where, text in batch:
+            start = time.perf_counter()
+            at = int(where * length)
+            if kind == "insert":
+                document = document[:at] + text + document[at:]
+            else:
+                document = document[:at] + document[at + len(text):]
+            response = {"new_content": document}
+            latencies.append(time.perf_counter() - start)
+    return latencies, len(response["new_content"])
+
+
+def report(name, latencies, final_size):
+    total = sum(latencies)
+    ordered = sorted(latencies)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    print(f"{name:>8} {len(latencies):>8} {len(latencies) / total:>10.0f} "
+          f"{statistics.median(latencies) * 1e6:>9.1f} {p99 * 1e6:>9.1f} {final_size:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--editors", type=int, default=50)
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--sync-every", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", action="store_true", help="also time the string-copy implementation")
+    args = parser.parse_args()
+
+    print(f"{'engine':>8} {'ops':>8} {'ops/sec':>10} {'p50 us':>9} {'p99 us':>9} {'final len':>10}")
+    report("rope", *run_rope(args.size, args.editors, args.rounds, args.sync_every, args.seed))
+    if args.baseline:
+        report("string", *run_string(args.size, args.editors, args.rounds, args.seed))
+
+
+if __name__ == "__main__":
+    main()
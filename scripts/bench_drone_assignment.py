@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark drone-to-delivery assignment on a large simulated fleet.
+
+Builds a fleet of --drones drones spread over the seven regions (the
+build_global_fleet() setup) and queues --deliveries deliveries with pickups
+around the region hubs. It then times three ways of assigning them:
+
+- legacy: score every drone for every delivery one by one, under the
+  lock. This was the previous assign_delivery(). It is timed on
+  --legacy-sample deliveries and extrapolated.
+- indexed: assign_delivery() per delivery, using the spatial grid and
+  vectorized scoring.
+- batch: one assign_pending_batch() call over the whole queue.
+
+Usage:
+    python scripts/bench_drone_assignment.py --drones 5000 --deliveries 20000
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from drone_fleet_manager import DroneFleetManager, DroneStatus  # noqa: E402
+
+
+def make_fleet(drones, deliveries, seed):
+    random.seed(seed)
+    manager = DroneFleetManager(manager_id="bench")
+    manager.logger.setLevel(logging.WARNING)
+    manager.build_global_fleet(drones_per_region=max(1, drones // len(manager.regions)))
+    rng = random.Random(seed)
+    hubs = list(manager.regions.values())
+    for i in range(deliveries):
+        hub = rng.choice(hubs)
+        manager.submit_delivery(
+            f"order_{i}",
+            hub.center_lat + rng.uniform(-0.3, 0.3), hub.center_lon + rng.uniform(-0.3, 0.3),
+            hub.center_lat + rng.uniform(-0.3, 0.3), hub.center_lon + rng.uniform(-0.3, 0.3),
+            rng.choice([0.5, 1.0, 2.0, 4.0]), rng.uniform(0, 100),
+        )
+    return manager
+
+
+def legacy_assign(manager, delivery_id):
+    """The previous assign_delivery(): a Python loop scoring every drone while holding the lock."""
+    delivery = manager.pending_deliveries[delivery_id]
+    region = manager.regions[manager._find_closest_region(delivery.delivery_lat, delivery.delivery_lon)]
+    best_drone, best_score = None, -1
+    with manager.lock:
+        for drone in manager.drones.values():
+            if drone.status in [DroneStatus.IDLE, DroneStatus.CHARGING]:
+                score = manager.assignment_engine.score_drone_for_delivery(drone, delivery, region, manager.regions)
+                if score > best_score:
+                    best_score, best_drone = score, drone
+        if best_drone is None or best_score <= 0:
+            return None
+        manager._commit_assignment(delivery, best_drone)
+    return best_drone.drone_id
+
+
+def total_score(manager):
+    engine = manager.assignment_engine
+    total = 0.0
+    for delivery in manager.active_deliveries.values():
+        drone = manager.drones[delivery.drone_id]
+        region = manager.regions[manager._find_closest_region(delivery.delivery_lat, delivery.delivery_lon)]
+        drone.status = DroneStatus.IDLE  # score as it was when chosen
+        total += engine.score_drone_for_delivery(drone, delivery, region, manager.regions)
+        drone.status = DroneStatus.ASSIGNED
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drones", type=int, default=5000)
+    parser.add_argument("--deliveries", type=int, default=20000)
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'mode':>8} {'timed':>7} {'seconds':>8} {'deliv/s':>9} {'assigned':>9} {'avg score':>9} {'speedup':>8}")
+
+    def report(name, timed, seconds, manager, baseline=None):
+        rate = timed / seconds
+        assigned = len(manager.active_deliveries)
+        avg = total_score(manager) / assigned if assigned else 0.0
+        speedup = f"{rate / baseline:>7.1f}x" if baseline else f"{'':>8}"
+        print(f"{name:>8} {timed:>7} {seconds:>8.2f} {rate:>9.0f} {assigned:>9} {avg:>9.1f} {speedup}")
+        return rate
+
+    manager = make_fleet(args.drones, args.deliveries, args.seed)
+    sample = list(manager.pending_deliveries)[:args.legacy_sample]
+    started = time.perf_counter()
+    for delivery_id in sample:
+        legacy_assign(manager, delivery_id)
+    baseline = report("legacy", len(sample), time.perf_counter() - started, manager)
+
+    manager = make_fleet(args.drones, args.deliveries, args.seed)
+    started = time.perf_counter()
+    for delivery_id in list(manager.pending_deliveries):
+        manager.assign_delivery(delivery_id)
+    report("indexed", args.deliveries, time.perf_counter() - started, manager, baseline)
+
+    manager = make_fleet(args.drones, args.deliveries, args.seed)
+    started = time.perf_counter()
+    manager.assign_pending_batch()
+    report("batch", args.deliveries, time.perf_counter() - started, manager, baseline)
+
+
+if __name__ == "__main__":
+    main()
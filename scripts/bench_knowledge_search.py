@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark knowledge base search: substring scan vs BM25 index vs FTS5.
+
+Builds --articles synthetic articles from a Zipf-distributed vocabulary and
+runs --queries two-word queries against each backend, with and without a
+category filter. The scan baseline is the previous
+KnowledgeBaseSystem.search_knowledge_base() loop.
+
+Usage:
+    python scripts/bench_knowledge_search.py --articles 20000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from text_search import FTS5_AVAILABLE, FTS5Index, SearchIndex  # noqa: E402
+
+FIELDS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+FILTERS = ("category", "tags")
+
+
+def make_articles(rng, count, vocabulary):
+    words = [f"term{i}" for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    for i in range(count):
+        yield f"a{i}", {
+            "title": " ".join(rng.choices(words, weights, k=6)),
+            "content": " ".join(rng.choices(words, weights, k=150)),
+            "tags": rng.sample(words[:50], 3),
+            "category": f"cat{i % 20}",
+        }
+
+
+def scan(articles, query, category=None):
+    """The previous implementation: substring match over every article."""
+    query = query.lower()
+    return [doc_id for doc_id, a in articles.items()
+            if (category is None or a["category"] == category)
+            and (query in a["title"].lower() or query in a["content"].lower() or query in " ".join(a["tags"]).lower())]
+
+
+def timed(fn, queries):
+    latencies = []
+    for query, category in queries:
+        start = time.perf_counter()
+        fn(query, category)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name, build_seconds, latencies):
+    ordered = sorted(latencies)
+    print(f"{name:>8} {build_seconds:>9.2f} {len(latencies) / sum(latencies):>10.0f} "
+          f"{statistics.median(latencies) * 1e3:>9.2f} {ordered[int(len(ordered) * 0.99) - 1] * 1e3:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    articles = dict(make_articles(rng, args.articles, args.vocabulary))
+    queries = [(f"term{rng.randrange(args.vocabulary // 10)} term{rng.randrange(args.vocabulary)}",
+                f"cat{rng.randrange(20)}" if q % 2 else None) for q in range(args.queries)]
+
+    print(f"{'backend':>8} {'build s':>9} {'queries/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    report("scan", 0.0, timed(lambda q, c: scan(articles, q, c), queries))
+
+    start = time.perf_counter()
+    index = SearchIndex(FIELDS, FILTERS)
+    index.add_many(articles.items())
+    build = time.perf_counter() - start
+    report("bm25", build, timed(lambda q, c: index.search(q, {"category": c} if c else None), queries))
+
+    if FTS5_AVAILABLE:
+        start = time.perf_counter()
+        fts = FTS5Index(os.path.join(tempfile.mkdtemp(), "search.db"), "bench", FIELDS, FILTERS)
+        fts.add_many(articles.items())
+        build = time.perf_counter() - start
+        report("fts5", build, timed(lambda q, c: fts.search(q, {"category": c} if c else None), queries))
+
+
+if __name__ == "__main__":
+    main()
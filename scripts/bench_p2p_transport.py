@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Loopback benchmark for the asyncio P2P transport.
+
+Starts N transports on one event loop, connects them into a full mesh and measures:
+- throughput: every node broadcasts M messages, total deliveries per second
+- broadcast latency: time until all N-1 peers have received a broadcast (p50/p99)
+
+Usage:
+    python scripts/bench_p2p_transport.py --nodes 50 --messages 200 --codec binary
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from p2p_transport import AsyncP2PTransport  # noqa: E402
+
+
+async def build_mesh(nodes, codec):
+    transports = [AsyncP2PTransport(f"bench_{i}", port=0, codec=codec, send_queue_size=4096)
+                  for i in range(nodes)]
+    for t in transports:
+        await t.start_async()
+    for i, t in enumerate(transports):
+        for other in transports[i + 1:]:
+            await t.connect_async(other.address)
+    # Wait for inbound side of every handshake to register
+    while any(len(t.connections) < nodes - 1 for t in transports):
+        await asyncio.sleep(0.01)
+    return transports
+
+
+async def measure_throughput(transports, messages, payload_size):
+    expected = len(transports) * (len(transports) - 1) * messages
+    received = 0
+    done = asyncio.Event()
+
+    async def on_data(peer_id, message):
+        nonlocal received
+        received += 1
+        if received >= expected:
+            done.set()
+
+    for t in transports:
+        t.register_handler("bench_data", on_data)
+
+    body = "x" * payload_size
+    start = time.perf_counter()
+    for seq in range(messages):
+        await asyncio.gather(*(t.broadcast_async({"type": "bench_data", "seq": seq, "body": body})
+                               for t in transports))
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+    return expected, elapsed
+
+
+async def measure_broadcast_latency(transports, rounds):
+    source, receivers = transports[0], transports[1:]
+    latencies = []
+    arrivals = {"count": 0}
+    round_done = asyncio.Event()
+
+    async def on_ping(peer_id, message):
+        arrivals["count"] += 1
+        if arrivals["count"] >= len(receivers):
+            round_done.set()
+
+    for t in receivers:
+        t.register_handler("bench_latency", on_ping)
+
+    for seq in range(rounds):
+        arrivals["count"] = 0
+        round_done.clear()
+        start = time.perf_counter()
+        await source.broadcast_async({"type": "bench_latency", "seq": seq})
+        await asyncio.wait_for(round_done.wait(), timeout=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "max_ms": latencies[-1],
+    }
+
+
+async def run(args):
+    t0 = time.perf_counter()
+    transports = await build_mesh(args.nodes, args.codec)
+    print(f"Mesh: {args.nodes} nodes, {args.nodes * (args.nodes - 1) // 2} connections "
+          f"({time.perf_counter() - t0:.2f}s to connect, codec={args.codec})")
+
+    deliveries, elapsed = await measure_throughput(transports, args.messages, args.payload)
+    print(f"Throughput: {deliveries} deliveries in {elapsed:.2f}s = {deliveries / elapsed:,.0f} msg/s")
+
+    latency = await measure_broadcast_latency(transports, args.rounds)
+    print(f"Broadcast to {args.nodes - 1} peers: p50={latency['p50_ms']:.2f}ms "
+          f"p99={latency['p99_ms']:.2f}ms max={latency['max_ms']:.2f}ms")
+
+    dropped = sum(t.get_stats()["dropped"] for t in transports)
+    print(f"Dropped (backpressure): {dropped}")
+
+    for t in transports:
+        await t.stop_async()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=100, help="broadcasts per node")
+    parser.add_argument("--payload", type=int, default=256, help="payload body size in bytes")
+    parser.add_argument("--rounds", type=int, default=200, help="latency broadcast rounds")
+    parser.add_argument("--codec", choices=["json", "binary"], default="json")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
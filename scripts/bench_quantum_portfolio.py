@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmark parallel-tempering portfolio optimization against the sequential engine.
+
+Both engines get the same random catalog and a budget of 50 per product. The
+objective is units bought (QuantumOptimizationEngine._calculate_energy), so the
+upper bound is budget // cheapest price.
+
+Usage:
+    python scripts/bench_quantum_portfolio.py --products 100 1000 10000 --restarts 4 --workers 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from quantum_optimization_engine import QuantumOptimizationEngine  # noqa: E402
+
+
+def catalog(size, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {'id': f'sku{i}', 'price': float(rng.uniform(10, 1000)), 'demand_score': float(rng.uniform(0.1, 0.95))}
+        for i in range(size)
+    ]
+
+
+def run(engine, products, budget, **kwargs):
+    start = time.perf_counter()
+    result = engine.optimize_portfolio(products, {'budget': budget}, **kwargs)
+    elapsed = time.perf_counter() - start
+    prices = {p['id']: p['price'] for p in products}
+    spend = sum(prices[pid] * qty for pid, qty in result.optimal_solution.items())
+    return elapsed, sum(result.optimal_solution.values()), spend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--replicas", type=int, default=8)
+    parser.add_argument("--sweeps", type=int, default=400)
+    parser.add_argument("--restarts", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = QuantumOptimizationEngine()
+    print(f"{'products':>8} {'engine':>10} {'seconds':>8} {'units':>8} {'of bound':>9} {'spend/budget':>13}")
+    for size in args.products:
+        products = catalog(size, args.seed)
+        budget = 50.0 * size
+        bound = int(budget // min(p['price'] for p in products))
+
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+        rows = [("sequential", run(engine, products, budget, method='sequential'))]
+        rows.append(("tempering", run(engine, products, budget, replicas=args.replicas, sweeps=args.sweeps,
+                                      restarts=args.restarts, workers=args.workers, seed=args.seed)))
+        for name, (elapsed, units, spend) in rows:
+            print(f"{size:>8} {name:>10} {elapsed:>8.2f} {units:>8} {units / bound:>8.1%} {spend / budget:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark the sparse spiking network engine.
+
+Builds a random network (--neurons x --fanout synapses, mixed delays), kicks
+it with random initial membrane potentials and reports build, simulate and
+STDP timings plus synaptic events per second.
+
+Usage:
+    python scripts/bench_snn.py --neurons 100000 --fanout 100 --duration 0.05
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from neuromorphic_spiking import SpikingNeuralNetwork  # noqa: E402
+
+
+def build(neurons, fanout, seed):
+    rng = np.random.default_rng(seed)
+    net = SpikingNeuralNetwork()
+    net.add_neurons(neurons, {
+        "threshold": rng.uniform(0.8, 1.2, neurons),
+        "leak_rate": rng.uniform(0.05, 0.15, neurons),
+    })
+    synapses = neurons * fanout
+    pre = np.repeat(np.arange(neurons, dtype=np.int32), fanout)
+    post = rng.integers(0, neurons, synapses, dtype=np.int32)
+    weight = rng.normal(0.01, 0.05, synapses)
+    delay = rng.choice([0.0005, 0.001, 0.002, 0.005], synapses)
+    net.add_synapses(pre, post, weight, delay)
+    for neuron, v in zip(net.neurons.values(), rng.uniform(0.0, 1.1, neurons).tolist()):
+        neuron.membrane_potential = v
+    return net
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--neurons", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=100, help="synapses per neuron")
+    parser.add_argument("--duration", type=float, default=0.05, help="simulated seconds")
+    parser.add_argument("--dt", type=float, default=0.0001)
+    parser.add_argument("--stdp", action="store_true", help="also run online STDP during simulate")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    net = build(args.neurons, args.fanout, args.seed)
+    print(f"build    : {args.neurons:,} neurons, {len(net.synapses):,} synapses "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    result = net.simulate(args.duration, dt=args.dt, stdp=args.stdp)
+    elapsed = time.perf_counter() - start
+    steps = int(args.duration / args.dt)
+    neurons, _, _ = net.spike_train.arrays()
+    events = int(np.bincount(net.synapses.pre, minlength=args.neurons)[neurons].sum())
+    print(f"simulate : {steps} steps in {elapsed:.1f}s ({elapsed / steps * 1000:.2f} ms/step), "
+          f"{result['total_spikes']:,} spikes, {events:,} synaptic events "
+          f"({events / elapsed / 1e6:.1f}M events/s)")
+
+    start = time.perf_counter()
+    net.apply_stdp()
+    print(f"stdp     : pairwise window rule over all synapses in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Measure bytes and requests per page load with and without the asset build.
+
+Each page is rendered through the Flask test client. Then every local
+stylesheet and script it links is fetched the way a browser would:
+
+- first view: a GET per asset, with the given Accept-Encoding
+- repeat view: plain /static/ assets come back with no max-age, so each one
+  is revalidated (a conditional GET answered 304); fingerprinted
+  /static/dist/ assets are immutable and skipped
+
+"plain" renders with no manifest. "built" runs build_assets() into a
+temporary directory and points the app at it.
+
+Usage:
+    python scripts/bench_static_assets.py --pages / /buy?product=starter /success?product=starter
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import app  # noqa: E402
+from static_assets import build_assets  # noqa: E402
+
+ASSET_RE = re.compile(rb'<(?:link[^>]+href|script[^>]+src)="(/static/[^"]+)"')
+
+
+def page_load(client, page, encoding):
+    """Bytes and requests for a first view and a repeat view of `page`"""
+    headers = {"Accept-Encoding": encoding}
+    html = client.get(page, headers=headers)
+    first_bytes, first_requests = len(html.data), 1
+    repeat_bytes, repeat_requests = len(html.data), 1
+    for url in dict.fromkeys(m.decode() for m in ASSET_RE.findall(html.data)):
+        asset = client.get(url, headers=headers)
+        first_bytes += len(asset.data)
+        first_requests += 1
+        if "immutable" in asset.headers.get("Cache-Control", ""):
+            continue
+        validators = {"If-None-Match": asset.headers.get("ETag", ""), **headers}
+        revalidated = client.get(url, headers=validators)
+        repeat_bytes += len(revalidated.data)
+        repeat_requests += 1
+    return first_bytes, first_requests, repeat_bytes, repeat_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", default=["/", "/buy?product=starter", "/success?product=starter"])
+    parser.add_argument("--encoding", default="br, gzip", help="Accept-Encoding sent by the client")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    app.config["TESTING"] = True
+    manifest = app.extensions["static_assets"]
+    original = manifest.dist_dir
+    print(f"{'page':<28} {'build':>6} {'first KB':>9} {'reqs':>5} {'repeat KB':>10} {'reqs':>5}")
+    with tempfile.TemporaryDirectory() as dist:
+        build_assets(app.static_folder, dist)
+        try:
+            for page in args.pages:
+                for label, dist_dir in (("plain", os.path.join(dist, "absent")), ("built", dist)):
+                    manifest.dist_dir = dist_dir
+                    with app.test_client() as client:
+                        first_b, first_r, repeat_b, repeat_r = page_load(client, page, args.encoding)
+                    print(f"{page:<28} {label:>6} {first_b / 1024:>9.1f} {first_r:>5} "
+                          f"{repeat_b / 1024:>10.1f} {repeat_r:>5}")
+        finally:
+            manifest.dist_dir = original
+
+
+if __name__ == "__main__":
+    main()
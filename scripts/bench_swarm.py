@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark the vectorized swarm engine against the per-agent Python loop.
+
+The per-agent engine is O(N^2) per step, so it is timed on a small swarm and
+extrapolated. The vectorized engine is timed directly at --agents x --steps.
+By default the world is scaled so agent density matches the stock
+100-agent / 100x100 setup; pass --box 100 for the crowded case.
+
+Usage:
+    python scripts/bench_swarm.py --agents 10000 --steps 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from swarm_intelligence import SwarmSystem  # noqa: E402
+
+
+def time_steps(swarm, steps):
+    start = time.perf_counter()
+    swarm.simulate(num_steps=steps)
+    return (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=10000)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--box", type=float, default=None, help="world size (default: keep stock density)")
+    parser.add_argument("--legacy-agents", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    box = args.box or 100.0 * np.sqrt(args.agents / 100.0)
+    legacy_box = args.box or 100.0 * np.sqrt(args.legacy_agents / 100.0)
+
+    np.random.seed(args.seed)
+    legacy = SwarmSystem(args.legacy_agents, vectorized=False, box_size=legacy_box)
+    legacy_step = time_steps(legacy, 5)
+    scale = (args.agents / args.legacy_agents) ** 2
+    legacy_estimate = legacy_step * scale * args.steps
+    print(f"per-agent loop : {args.legacy_agents} agents {legacy_step * 1000:.1f} ms/step "
+          f"-> ~{legacy_estimate / 3600:.1f} h for {args.agents} x {args.steps} (extrapolated)")
+
+    np.random.seed(args.seed)
+    swarm = SwarmSystem(args.agents, box_size=box)
+    start = time.perf_counter()
+    result = swarm.simulate(num_steps=args.steps)
+    elapsed = time.perf_counter() - start
+    print(f"vectorized     : {args.agents} agents x {args.steps} steps in {elapsed:.1f}s "
+          f"({elapsed / args.steps * 1000:.1f} ms/step, box {box:.0f})")
+    print(f"speedup        : ~{legacy_estimate / elapsed:,.0f}x")
+    print(f"final spread {result['final_state']['spread']:.2f}, "
+          f"polarization {result['final_state']['polarization']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Benchmark multi-stop drone routing on synthetic instances.
+
+Each instance has one hub, stops spread uniformly within --radius-km and
+a mixed fleet with the agent's drone specs (economy, premium, elite and
+bvlos). A quarter of the stops get a 45-minute delivery window. Three
+plans are compared, all checked with the same feasibility model:
+
+- per-order: what the agent does today. Every order is its own flight
+  (optimize_route() only adds waypoints on the straight line).
+- kmeans: cluster first with KMeans, visit each cluster nearest
+  neighbour first and split it into feasible tours.
+- vrp: vrp_solver.solve_routes() within --budget seconds.
+
+Usage:
+    python scripts/bench_vrp_solver.py --sizes 100 1000 10000 --budget 30
+"""
+import argparse
+import logging
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from vrp_solver import RouteDrone, RouteStop, RoutingProblem, solve_routes  # noqa: E402
+
+try:
+    from sklearn.cluster import KMeans
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+HUB = (40.7128, -74.0060)
+# payload kg, range km, speed km/h: DroneDeliveryAgent._initialize_drone_fleet()
+SPECS = [(2, 10, 40), (5, 20, 50), (3, 15, 60), (10, 100, 70)]
+
+
+def make_problem(n, radius_km, seed):
+    rng = random.Random(seed)
+    stops = []
+    for i in range(n):
+        r, theta = radius_km * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+        lat = HUB[0] + r * math.sin(theta) / 111.19
+        lon = HUB[1] + r * math.cos(theta) / (111.19 * math.cos(math.radians(HUB[0])))
+        if rng.random() < 0.25:
+            ready = rng.uniform(0, 120)
+            window = (ready, ready + 45)
+        else:
+            window = (0.0, 240.0)
+        stops.append(RouteStop(f"s{i}", lat, lon, rng.uniform(0.2, 2.0), *window, service_min=1.0))
+    drones = [RouteDrone(f"d{v}", payload, rng.uniform(80, 100), speed, range_km)
+              for v, (payload, range_km, speed) in zip(range(n // 2), (SPECS[v % 4] for v in range(n // 2)))]
+    return RoutingProblem(HUB, stops, drones)
+
+
+def per_order(problem):
+    return sum(2 * d for d in problem.from_depot), problem.n, 0
+
+
+def kmeans_routes(problem, seed):
+    """Cluster-first baseline: KMeans clusters, nearest-neighbour order, split into feasible tours"""
+    mean_payload = sum(d.max_payload_kg for d in problem.drones) / len(problem.drones)
+    k = max(1, math.ceil(sum(problem.weight) / mean_payload))
+    points = [[s.lat, s.lon] for s in problem.stops]
+    labels = KMeans(n_clusters=k, n_init=1, random_state=seed).fit(points).labels_
+    clusters = {}
+    for i, label in enumerate(labels):
+        clusters.setdefault(label, []).append(i)
+
+    idle = sorted(range(len(problem.drones)), key=lambda v: problem.drones[v].max_payload_kg)
+    total_km, tours, unserved = 0.0, 0, 0
+    for members in clusters.values():
+        order, current, left = [], problem.n, set(members)
+        while left:
+            current = min(left, key=lambda j: problem.distance(current, j))
+            order.append(current)
+            left.remove(current)
+        tour, tour_km, drone = [], 0.0, None
+        for i in order:
+            if drone is not None:
+                km = problem.evaluate(tour + [i], drone)
+                if km is not None:
+                    tour, tour_km = tour + [i], km
+                    continue
+                total_km, tours = total_km + tour_km, tours + 1
+            drone = next((v for v in reversed(idle) if problem.evaluate([i], v) is not None), None)
+            if drone is None:
+                unserved += 1
+                tour = []
+                continue
+            idle.remove(drone)
+            tour, tour_km = [i], problem.evaluate([i], drone)
+        if drone is not None and tour:
+            total_km, tours = total_km + tour_km, tours + 1
+    return total_km, tours, unserved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--radius-km", type=float, default=5.0)
+    parser.add_argument("--budget", type=float, default=30.0, help="solver wall-clock budget (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    print(f"{'stops':>6} {'plan':>9} {'km':>10} {'tours':>6} {'unserved':>8} {'seconds':>8} {'vs plan':>8}")
+    for n in args.sizes:
+        problem = make_problem(n, args.radius_km, args.seed)
+        rows = []
+        started = time.perf_counter()
+        rows.append(("per-order",) + per_order(problem) + (time.perf_counter() - started,))
+        if SKLEARN_AVAILABLE:
+            started = time.perf_counter()
+            rows.append(("kmeans",) + kmeans_routes(problem, args.seed) + (time.perf_counter() - started,))
+        plan = solve_routes(problem, time_budget_s=args.budget, seed=args.seed)
+        rows.append(("vrp", plan.total_distance_km, len(plan.tours), len(plan.unassigned), plan.solve_seconds))
+        for name, km, tours, unserved, seconds in rows:
+            ratio = km / plan.total_distance_km if plan.total_distance_km else 0.0
+            print(f"{n:>6} {name:>9} {km:>10.1f} {tours:>6} {unserved:>8} {seconds:>8.2f} {ratio:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
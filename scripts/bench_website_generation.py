@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark batch website generation against a stubbed copy-writing model.
+
+The stub sleeps --latency-ms per call, standing in for an LLM round trip,
+and returns copy derived from the brief. The runs are:
+
+- sequential: one site after another, every page written (the old path)
+- parallel: generate_sites() on a --workers pool into an empty directory
+- rerun: the same briefs again (all unchanged, so everything is skipped)
+- edited: --edit-percent of the briefs changed, the rest skipped
+
+Usage:
+    python scripts/bench_website_generation.py --sites 500 --latency-ms 50 --workers 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from website_generator import generate_sites  # noqa: E402
+
+
+class StubModel:
+    """Thread-safe stand-in for a model-backed copy writer"""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, brief):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency_s)
+        return {
+            "headline": f"{brief['product_name']} for {brief['target_audience']}",
+            "subheader": brief["product_description"][:80],
+        }
+
+
+def make_briefs(n, edited=0):
+    return [{
+        "product_name": f"Product {i:04d}",
+        "product_description": f"Platform {i} for teams that ship" + (" (v2)" if i < edited else ""),
+        "target_audience": ("B2B SaaS", "Enterprise", "Creators")[i % 3],
+        "industry": ("Technology", "Finance", "Health")[i % 3],
+    } for i in range(n)]
+
+
+def run(label, briefs, output_dir, model, workers, force=False):
+    calls = model.calls
+    started = time.perf_counter()
+    report = generate_sites(briefs, output_dir, copy_writer=model, max_workers=workers, force=force)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<11} {elapsed:>8.2f} {model.calls - calls:>6} {report['generated']:>9} "
+          f"{report['skipped']:>7} {report['written']:>7} {report['bytes_written'] / 1024:>10.1f}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub model latency per call")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--edit-percent", type=float, default=10.0)
+    args = parser.parse_args()
+
+    model = StubModel(args.latency_ms / 1000)
+    briefs = make_briefs(args.sites)
+    print(f"{'run':<11} {'seconds':>8} {'calls':>6} {'generated':>9} {'skipped':>7} {'written':>7} {'KB written':>10}")
+    with tempfile.TemporaryDirectory() as root:
+        sequential = run("sequential", briefs, os.path.join(root, "seq"), model, 1, force=True)
+        out = os.path.join(root, "out")
+        parallel = run("parallel", briefs, out, model, args.workers)
+        run("rerun", briefs, out, model, args.workers)
+        run("edited", make_briefs(args.sites, int(args.sites * args.edit_percent / 100)), out, model, args.workers)
+    print(f"parallel speedup: {sequential / parallel:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Loopback cluster simulation for the work-stealing scheduler.
+
+All tasks are submitted to node 0; the other nodes only get work by stealing it
+over the P2P transport. Each task sleeps --task-ms to stand in for an AI call,
+so throughput should scale roughly with node count.
+
+Usage:
+    python scripts/bench_work_stealing.py --nodes 1 2 4 8 --tasks 400 --task-ms 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from decentralized_ai_node import P2PNetwork  # noqa: E402
+from distributed_scheduler import WorkStealingScheduler, attach_to_network  # noqa: E402
+
+
+def build_cluster(size, workers, task_seconds):
+    def executor(payload):
+        time.sleep(task_seconds)
+        return {"task_id": payload["task_id"], "result": f"done:{payload['prompt']}"}
+
+    nodes = []
+    for i in range(size):
+        network = P2PNetwork(f"sim_{i}", port=0)
+        network.start_server()
+        scheduler = WorkStealingScheduler(
+            f"sim_{i}", executor, num_workers=workers, max_queue_size=100000,
+            advertise_interval=0.05, idle_wait=0.01
+        )
+        attach_to_network(scheduler, network)
+        scheduler.start()
+        nodes.append((network, scheduler))
+
+    for i, (network, _) in enumerate(nodes):
+        for other, _ in nodes[i + 1:]:
+            network.connect_to_peer(other.address, other.node_id, "sim_key")
+    return nodes
+
+
+def run_once(size, tasks, workers, task_seconds):
+    nodes = build_cluster(size, workers, task_seconds)
+    origin = nodes[0][1]
+    time.sleep(0.1)
+
+    start = time.perf_counter()
+    futures = [
+        origin.submit(f"t{i}", {"task_type": "analyze", "prompt": f"job {i}"},
+                      priority=0.8 if i % 4 else 1.0, rarity_score=90 + (i % 10))
+        for i in range(tasks)
+    ]
+    for f in futures:
+        f.result(timeout=300)
+    elapsed = time.perf_counter() - start
+
+    executed = [s.stats["executed"] for _, s in nodes]
+    for network, scheduler in nodes:
+        scheduler.stop()
+        network.stop()
+    return elapsed, executed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--tasks", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=4, help="workers per node")
+    parser.add_argument("--task-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'nodes':>5} {'seconds':>8} {'tasks/s':>9} {'speedup':>8}  executed per node")
+    for size in args.nodes:
+        elapsed, executed = run_once(size, args.tasks, args.workers, args.task_ms / 1000)
+        rate = args.tasks / elapsed
+        baseline = baseline or rate
+        print(f"{size:>5} {elapsed:>8.2f} {rate:>9.1f} {rate / baseline:>7.2f}x  {executed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""Build fingerprinted, precompressed static assets into static/dist/.
+
+Templates link assets through asset_url(), which picks up the new
+manifest without a restart.
+
+Usage:
+    python scripts/build_assets.py [--source static] [--output static/dist]
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from static_assets import BROTLI_AVAILABLE, build_assets  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=os.path.join(ROOT, "static"))
+    parser.add_argument("--output", default=None, help="default: <source>/dist")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    manifest = build_assets(args.source, args.output)
+    if not BROTLI_AVAILABLE:
+        print("brotli not installed: wrote gzip variants only")
+    for name, hashed in sorted(manifest.items()):
+        print(f"{name} -> {hashed}")
+
+
+if __name__ == "__main__":
+    main()
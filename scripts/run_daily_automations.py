@@ -9,7 +9,10 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
+from attribution_batch import run_attribution_batch
 from automation_workflows import execute_all_workflows
+from customer_intelligence import rebuild_customer_features
+from delta_sync import compact as compact_sync_log
 from scripts.nightly_backup import run_once as backup_run_once, notify
 
 DAYS_BACK = int(os.getenv("AUTOMATION_DAYS_BACK", "30"))
@@ -24,6 +27,18 @@ def main() -> int:
     started = time.time()
     
     try:
+        # Rebuild the customer feature table so segments start the day fresh
+        print("🧮 Rebuilding customer features...")
+        rebuilt = rebuild_customer_features()
+        
+        # Drop expired sync tombstones and superseded change-log rows
+        print("🗜️  Compacting mobile sync log...")
+        compacted = compact_sync_log()
+        
+        # Recompute data-driven attribution over the stored touchpoints
+        print("🧭 Running attribution batch...")
+        attribution = run_attribution_batch()
+        
         # Execute all workflow automations
         print("🤖 Running workflow automations...")
         results = execute_all_workflows(days_back=DAYS_BACK)
@@ -34,6 +49,10 @@ def main() -> int:
         # Build summary
         summary = [f"✅ Daily automations completed in {time.time() - started:.1f}s"]
         summary.append(f"Total actions: {total}")
+        summary.append(f"Customer features rebuilt: {rebuilt}")
+        summary.append(f"Sync log rows compacted: {compacted}")
+        summary.append(f"Attribution paths: {attribution['distinct_paths']} "
+                       f"({attribution['touchpoints']} touchpoints)")
         summary.append("")
         
         for name, data in workflows.items():
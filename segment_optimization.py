@@ -1,5 +1,6 @@
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import case, func
 from models import get_engine, get_session, Order
 from utils import _get_db_url
 
@@ -19,13 +20,17 @@ def _classify_customer(receipt: str, orders: List) -> str:
         return 'UNKNOWN'
     
     paid_orders = [o for o in orders if o.status == 'paid']
-    order_count = len(paid_orders)
-    ltv_rupees = sum(o.amount for o in paid_orders) / 100.0  # Convert from paise
+    paid_at = [o.paid_at for o in paid_orders if o.paid_at]
+    return _classify_totals(len(paid_orders), sum(o.amount for o in paid_orders), max(paid_at) if paid_at else None)
+
+
+def _classify_totals(order_count: int, revenue_paise: int, last_paid_at: Optional[float]) -> str:
+    """Segment rules over a customer's paid-order totals in the window."""
+    ltv_rupees = revenue_paise / 100.0  # Convert from paise
     
     # Check recency for at-risk
-    if paid_orders:
-        last_purchase = max(o.paid_at for o in paid_orders if o.paid_at)
-        days_since = int((time.time() - last_purchase) / 86400.0)
+    if last_paid_at:
+        days_since = int((time.time() - last_paid_at) / 86400.0)
         if days_since > 60 and order_count >= 2:
             return 'AT_RISK'
     
@@ -54,17 +59,16 @@ def analyze_segments(days_back: int = 90) -> Dict:
     session = get_session(engine)
     
     since = time.time() - (days_back * 86400.0)
-    all_orders = session.query(Order).filter(Order.created_at >= since).all()
+    # One aggregate row per customer instead of loading every order in the window
+    is_paid = Order.status == 'paid'
+    totals = session.query(
+        Order.receipt,
+        func.sum(case((is_paid, 1), else_=0)),
+        func.coalesce(func.sum(case((is_paid, Order.amount), else_=0)), 0),
+        func.max(case((is_paid, Order.paid_at))),
+    ).filter(Order.created_at >= since).group_by(Order.receipt).all()
     session.close()
     
-    # Group by receipt
-    customers = {}
-    for order in all_orders:
-        receipt = order.receipt
-        if receipt not in customers:
-            customers[receipt] = []
-        customers[receipt].append(order)
-    
     # Classify and aggregate
     segments = {
         'VIP': {'count': 0, 'revenue': 0, 'avg_orders': 0, 'customers': []},
@@ -75,16 +79,14 @@ def analyze_segments(days_back: int = 90) -> Dict:
         'CASUAL': {'count': 0, 'revenue': 0, 'avg_orders': 0, 'customers': []},
     }
     
-    for receipt, orders in customers.items():
-        segment = _classify_customer(receipt, orders)
-        paid_orders = [o for o in orders if o.status == 'paid']
-        revenue = sum(o.amount for o in paid_orders)
+    for receipt, paid_count, revenue, last_paid_at in totals:
+        segment = _classify_totals(paid_count, revenue, last_paid_at)
         
         segments[segment]['count'] += 1
         segments[segment]['revenue'] += revenue / 100.0  # Convert to rupees
         segments[segment]['customers'].append({
             'receipt': receipt,
-            'orders': len(paid_orders),
+            'orders': paid_count,
             'revenue': revenue / 100.0,
         })
     
@@ -1,5 +1,5 @@
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 
 def _fallback_signals():
@@ -22,8 +22,9 @@ _PLATFORMS = ['Twitter', 'LinkedIn', 'Instagram']
 _PEAK_HOURS = [9, 12, 18]  # local hours for posting
 
 
-def generate_posts(days_back: int = 30) -> List[Dict]:
-    signals = _get_signals(days_back)
+def generate_posts(days_back: int = 30, signals: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    if signals is None:
+        signals = _get_signals(days_back)
     # Rank products by demand and conversion
     ranked = sorted(
         signals.items(),
@@ -47,8 +48,8 @@ def generate_posts(days_back: int = 30) -> List[Dict]:
     return posts
 
 
-def generate_schedule(days_back: int = 30) -> List[Dict]:
-    posts = generate_posts(days_back)
+def generate_schedule(days_back: int = 30, signals: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    posts = generate_posts(days_back, signals=signals)
     schedule: List[Dict] = []
     # Assign posts across platforms and peak hours for next few days
     now = time.time()
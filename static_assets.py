@@ -0,0 +1,200 @@
+"""Fingerprinted, precompressed static assets.
+
+build_assets() copies every file under static/ to static/dist/ with a content
+hash in its name (style.css -> style.3f2a9c1e0b7d.css), next to .gz and .br
+siblings, and records the mapping in static/dist/manifest.json.
+init_static_assets(app) then:
+
+- adds the `asset_url(filename)` template helper, which resolves through the
+  manifest and falls back to the plain /static/ URL for unbuilt assets
+- serves /static/dist/ with the smallest variant the client accepts,
+  `Cache-Control: immutable` and `Vary: Accept-Encoding`
+
+A changed file gets a new name, so browsers can keep the old one for a year
+without revalidating. Older fingerprinted files are kept, so pages rendered
+before a deploy still load. Brotli variants need the optional `brotli` package.
+
+Build with scripts/build_assets.py (runs as part of the deploy build).
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DIST_DIRNAME = "dist"
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".html", ".svg", ".json", ".txt", ".xml", ".map"}
+MIN_COMPRESS_BYTES = 256  # below this the encoding overhead eats the saving
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Preferred first; the suffix of the precompressed sibling
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def fingerprint(name: str, data: bytes) -> str:
+    """`css/site.css` -> `css/site.<sha256 prefix>.css`"""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp creates 0600; a fronting web server may serve these
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def precompress(path: str, data: Optional[bytes] = None) -> Dict[str, int]:
+    """
+    Write .gz (and .br when brotli is installed) siblings of `path`
+
+    A variant is only kept when it is smaller than the original.
+
+    Returns:
+        {encoding: size in bytes} for the variants written
+    """
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if BROTLI_AVAILABLE:
+        variants["br"] = brotli.compress(data, quality=11)
+    written = {}
+    for encoding, suffix in ENCODINGS:
+        encoded = variants.get(encoding)
+        if encoded is not None and len(encoded) < len(data):
+            _write_atomic(path + suffix, encoded)
+            written[encoding] = len(encoded)
+    return written
+
+
+def build_assets(source_dir: str, output_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Fingerprint and precompress every file under source_dir
+
+    Args:
+        source_dir: Static root (e.g. static/)
+        output_dir: Build output (default: <source_dir>/dist), skipped while scanning
+
+    Returns:
+        Manifest {logical name: fingerprinted name}, also written to output_dir/manifest.json
+    """
+    output_dir = output_dir or os.path.join(source_dir, DIST_DIRNAME)
+    output_real = os.path.realpath(output_dir)
+    manifest = {}
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.realpath(os.path.join(root, d)) != output_real)
+        for filename in sorted(files):
+            if filename.startswith("."):
+                continue
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, source_dir).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+            hashed = fingerprint(name, data)
+            target = os.path.join(output_dir, hashed)
+            if not os.path.exists(target):
+                _write_atomic(target, data)
+                if os.path.splitext(filename)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                    precompress(target, data)
+            manifest[name] = hashed
+    _write_atomic(
+        os.path.join(output_dir, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+    )
+    logger.info("Built %d static assets into %s", len(manifest), output_dir)
+    return manifest
+
+
+class AssetManifest:
+    """dist_dir/manifest.json, reloaded when a new build replaces it"""
+
+    def __init__(self, dist_dir: str):
+        self.dist_dir = dist_dir
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries: Dict[str, str] = {}
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.dist_dir, MANIFEST_NAME)
+
+    def get(self, name: str) -> Optional[str]:
+        try:
+            stat = os.stat(self.path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._entries = self._load() if version else {}
+                    self._version = version
+        return self._entries.get(name)
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Static asset manifest unreadable (%s); serving unfingerprinted assets", e)
+            return {}
+
+
+def init_static_assets(app, dist_dir: Optional[str] = None):
+    """Register asset_url() and the /static/dist/ route on the app"""
+    manifest = AssetManifest(dist_dir or os.path.join(app.static_folder, DIST_DIRNAME))
+
+    def asset_url(filename: str) -> str:
+        hashed = manifest.get(filename)
+        if hashed is None:
+            return url_for("static", filename=filename)
+        return url_for("static_dist", filename=hashed)
+
+    def static_dist(filename: str):
+        path = safe_join(manifest.dist_dir, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        served, encoding = path, None
+        for candidate, suffix in ENCODINGS:
+            if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+                served, encoding = path + suffix, candidate
+                break
+        response = send_file(served, mimetype=mimetype, conditional=True, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.content_encoding = encoding
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        return response
+
+    app.add_url_rule(f"{app.static_url_path}/{DIST_DIRNAME}/<path:filename>", "static_dist", static_dist)
+    app.add_template_global(asset_url, "asset_url")
+    app.extensions["static_assets"] = manifest
+    return manifest
@@ -22,25 +22,171 @@ class Agent:
     memory: List[Dict] = field(default_factory=list)
 
 
+class SpatialHashGrid:
+    """Uniform cell-list neighbour index over a (optionally periodic) box."""
+    
+    def __init__(
+        self,
+        box_size: float,
+        radius: float,
+        dimensions: int,
+        periodic: bool = True,
+        subdivisions: int = 2
+    ):
+        """
+        Args:
+            box_size: Side of the (wrap-around) world
+            radius: Neighbour cut-off distance
+            dimensions: Spatial dimensions
+            periodic: Pair agents across the wrap-around boundary (minimum image)
+            subdivisions: Cells per radius; smaller cells mean fewer wasted candidate pairs
+        """
+        self.box_size = box_size
+        self.radius = radius
+        self.dimensions = dimensions
+        self.periodic = periodic
+        
+        reach = max(1, subdivisions)
+        cells = max(1, int(box_size // (radius / reach)))
+        if periodic and cells < 2 * reach + 1:
+            # Half-stencil must not wrap onto the same cell pair twice
+            reach = 1
+            cells = max(1, int(box_size // radius))
+            if cells < 3:
+                cells = 1
+        self.cells_per_dim = cells
+        self.cell_size = box_size / cells
+        
+        # Half stencil: the zero offset plus one of each +/- offset pair
+        steps = list(range(-reach, reach + 1))
+        offsets = np.array(np.meshgrid(*[steps] * dimensions, indexing="ij")).reshape(dimensions, -1).T
+        keep = [tuple(o) > (0,) * dimensions for o in offsets]
+        self.offsets = offsets[keep] if cells > 1 else np.zeros((0, dimensions), dtype=int)
+    
+    def pairs(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Unordered neighbour pairs closer than radius, each pair once.
+        
+        Returns (i, j, diff, dist) with diff = position[i] - position[j]
+        (minimum image when periodic).
+        """
+        n, cells = len(positions), self.cells_per_dim
+        shape = (cells,) * self.dimensions
+        
+        coords = np.floor(positions / self.cell_size).astype(np.int64)
+        np.clip(coords, 0, cells - 1, out=coords)
+        cell_ids = np.ravel_multi_index(coords.T, shape)
+        
+        # Work in cell-sorted order so candidate gathers walk memory in runs
+        order = np.argsort(cell_ids, kind="stable")
+        sorted_coords = coords[order]
+        sorted_columns = [np.ascontiguousarray(positions[order, d]) for d in range(self.dimensions)]
+        counts = np.bincount(cell_ids, minlength=cells ** self.dimensions)
+        starts = np.cumsum(counts) - counts
+        slot = np.arange(n)
+        
+        # Same-cell pairs (j after i within the cell's sorted run), then neighbour cells
+        own = cell_ids[order]
+        runs = [(slot, slot + 1, starts[own] + counts[own] - slot - 1)]
+        for offset in self.offsets:
+            neighbor = sorted_coords + offset
+            if self.periodic:
+                neighbor %= cells
+                valid = slot
+            else:
+                inside = np.all((neighbor >= 0) & (neighbor < cells), axis=1)
+                valid = slot[inside]
+                neighbor = neighbor[inside]
+            target = np.ravel_multi_index(neighbor.T, shape)
+            runs.append((valid, starts[target], counts[target]))
+        
+        radius_sq = self.radius * self.radius
+        half_box = self.box_size / 2
+        i_parts, j_parts, diff_parts = [], [], []
+        for sources, first, lengths in runs:
+            i_idx, j_idx = self._expand(sources, first, lengths)
+            if len(i_idx) == 0:
+                continue
+            diffs = []
+            dist_sq = np.zeros(len(i_idx))
+            for column in sorted_columns:
+                delta = column[i_idx] - column[j_idx]
+                if self.periodic:
+                    delta[delta > half_box] -= self.box_size
+                    delta[delta < -half_box] += self.box_size
+                dist_sq += delta * delta
+                diffs.append(delta)
+            close = dist_sq < radius_sq
+            i_parts.append(i_idx[close])
+            j_parts.append(j_idx[close])
+            diff_parts.append(np.stack([delta[close] for delta in diffs], axis=1))
+        
+        if not i_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros((0, self.dimensions)), np.zeros(0)
+        
+        diff = np.concatenate(diff_parts)
+        dist = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        return order[np.concatenate(i_parts)], order[np.concatenate(j_parts)], diff, dist
+    
+    @staticmethod
+    def _expand(sources: np.ndarray, first: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Expand each source into the contiguous run [first, first + length)."""
+        lengths = np.maximum(lengths, 0)
+        total = int(lengths.sum())
+        if total == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty
+        run_starts = np.cumsum(lengths) - lengths
+        within = np.arange(total) - np.repeat(run_starts, lengths)
+        return np.repeat(sources, lengths), np.repeat(first, lengths) + within
+
+
 class SwarmSystem:
     """Multi-agent swarm with emergent behavior."""
     
-    def __init__(self, num_agents: int = 100, dimensions: int = 2):
+    def __init__(
+        self,
+        num_agents: int = 100,
+        dimensions: int = 2,
+        vectorized: bool = True,
+        periodic_neighbors: bool = True,
+        box_size: float = 100.0
+    ):
+        """
+        Args:
+            num_agents: Population size
+            dimensions: Spatial dimensions
+            vectorized: Step all agents at once with NumPy + spatial hash (False = per-agent Python loop)
+            periodic_neighbors: Vectorized engine sees neighbours across the wrap-around boundary
+            box_size: Side of the wrap-around world
+        """
         self.num_agents = num_agents
         self.dimensions = dimensions
+        self.vectorized = vectorized
+        self.periodic_neighbors = periodic_neighbors
+        self.box_size = box_size
         self.agents: Dict[str, Agent] = {}
         self.global_state = {}
+        
+        # Contiguous N x D state; Agent.position / Agent.velocity are row views
+        self.positions = np.zeros((num_agents, dimensions))
+        self.velocities = np.zeros((num_agents, dimensions))
+        self.energy = np.ones(num_agents)
         self._initialize_agents()
     
     def _initialize_agents(self):
         """Initialize agent population."""
-        for _ in range(self.num_agents):
+        for i in range(self.num_agents):
             agent_id = str(uuid.uuid4())
             
+            self.positions[i] = np.random.rand(self.dimensions) * self.box_size
+            self.velocities[i] = np.random.randn(self.dimensions) * 0.1
+            
             agent = Agent(
                 agent_id=agent_id,
-                position=np.random.rand(self.dimensions) * 100,
-                velocity=np.random.randn(self.dimensions) * 0.1,
+                position=self.positions[i],
+                velocity=self.velocities[i],
                 state={"energy": 1.0, "role": "explorer"}
             )
             
@@ -49,11 +195,15 @@ class SwarmSystem:
     def simulate(self, num_steps: int = 1000, dt: float = 0.1) -> Dict:
         """Simulate swarm dynamics."""
         history = []
+        grid = self._build_grid(radius=10.0)
         
         for step in range(num_steps):
-            # Update each agent
-            for agent in self.agents.values():
-                self._update_agent(agent, dt)
+            if self.vectorized:
+                self._step_vectorized(grid, dt)
+            else:
+                # Update each agent
+                for agent in self.agents.values():
+                    self._update_agent(agent, dt)
             
             # Record state
             if step % 10 == 0:
@@ -62,6 +212,10 @@ class SwarmSystem:
             # Update global state
             self._update_global_state()
         
+        if self.vectorized:
+            for agent, energy in zip(self.agents.values(), self.energy):
+                agent.state["energy"] = float(energy)
+        
         # Detect emergent patterns
         emergence = self._detect_emergence(history)
         
@@ -72,6 +226,59 @@ class SwarmSystem:
             "history": history[-10:]  # Last 10 snapshots
         }
     
+    def _build_grid(self, radius: float) -> SpatialHashGrid:
+        """Neighbour index; finer cells only pay off when cells are crowded."""
+        agents_per_cell = self.num_agents * (radius / self.box_size) ** self.dimensions
+        subdivisions = 2 if agents_per_cell > 8 else 1
+        return SpatialHashGrid(self.box_size, radius, self.dimensions, self.periodic_neighbors, subdivisions)
+    
+    def _step_vectorized(self, grid: SpatialHashGrid, dt: float, max_speed: float = 2.0):
+        """
+        Advance every agent one step from the same snapshot.
+        
+        Same separation / alignment / cohesion rules as _update_agent, but all
+        agents read the pre-step state (synchronous update).
+        """
+        positions, velocities = self.positions, self.velocities
+        n, dims = positions.shape
+        
+        i, j, diff, dist = grid.pairs(positions)
+        
+        count = (np.bincount(i, minlength=n) + np.bincount(j, minlength=n)).astype(float)
+        has_neighbors = (count > 0)[:, None]
+        safe_count = np.maximum(count, 1.0)[:, None]
+        
+        near = (dist < 5.0) & (dist > 0)
+        i_near, j_near = i[near], j[near]
+        inv_dist_sq = 1.0 / dist[near] ** 2
+        
+        separation = np.empty((n, dims))
+        velocity_sum = np.empty((n, dims))
+        offset_sum = np.empty((n, dims))
+        for d in range(dims):
+            column_v = velocities[:, d]
+            # Separation: sum of diff / dist^2 over neighbours closer than 5
+            push = diff[near, d] * inv_dist_sq
+            separation[:, d] = np.bincount(i_near, push, minlength=n) - np.bincount(j_near, push, minlength=n)
+            # Alignment needs neighbour velocity sums
+            velocity_sum[:, d] = np.bincount(i, column_v[j], minlength=n) + np.bincount(j, column_v[i], minlength=n)
+            # Cohesion: mean of -diff is neighbour centre of mass minus own position
+            offset_sum[:, d] = np.bincount(j, diff[:, d], minlength=n) - np.bincount(i, diff[:, d], minlength=n)
+        
+        separation *= 0.5
+        alignment = np.where(has_neighbors, (velocity_sum / safe_count - velocities) * 0.3, 0.0)
+        cohesion = np.where(has_neighbors, (offset_sum / safe_count) * 0.1, 0.0)
+        
+        velocities += (separation + alignment + cohesion) * dt
+        speed = np.sqrt(np.einsum("ij,ij->i", velocities, velocities))
+        too_fast = speed > max_speed
+        velocities[too_fast] *= (max_speed / speed[too_fast])[:, None]
+        
+        positions += velocities * dt
+        np.mod(positions, self.box_size, out=positions)
+        
+        self.energy *= 0.999
+    
     def _update_agent(self, agent: Agent, dt: float):
         """Update individual agent."""
         # Get local neighborhood
@@ -85,13 +292,13 @@ class SwarmSystem:
         # Combine forces
         total_force = separation + alignment + cohesion
         
-        # Update velocity and position
+        # Update velocity and position (in place: rows of the shared arrays)
         agent.velocity += total_force * dt
-        agent.velocity = self._limit_velocity(agent.velocity, max_speed=2.0)
+        agent.velocity[:] = self._limit_velocity(agent.velocity, max_speed=2.0)
         agent.position += agent.velocity * dt
         
         # Boundary conditions (wrap around)
-        agent.position = agent.position % 100
+        agent.position[:] = agent.position % self.box_size
         
         # Update energy
         agent.state["energy"] *= 0.999  # Slow decay
@@ -146,8 +353,8 @@ class SwarmSystem:
     
     def _get_swarm_state(self) -> Dict:
         """Get current swarm state."""
-        positions = [agent.position for agent in self.agents.values()]
-        velocities = [agent.velocity for agent in self.agents.values()]
+        positions = self.positions
+        velocities = self.velocities
         
         return {
             "center_of_mass": np.mean(positions, axis=0).tolist(),
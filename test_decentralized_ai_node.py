@@ -4,7 +4,9 @@ TEST SUITE: Decentralized AI Node
 Integration tests for 1% rare AI internet functionality
 """
 
+import asyncio
 import pytest
+import threading
 import time
 from decentralized_ai_node import (
     DecentralizedAINode,
@@ -16,6 +18,15 @@ from decentralized_ai_node import (
     TaskPriority,
     NodeInfo
 )
+from distributed_scheduler import SchedulerFull, WorkStealingScheduler
+from p2p_transport import (
+    AsyncP2PTransport,
+    CODEC_BINARY,
+    CODEC_JSON,
+    decode_payload,
+    encode_frame,
+    encode_payload
+)
 
 
 class TestP2PNetwork:
@@ -61,6 +72,275 @@ class TestP2PNetwork:
         assert network.get_peer_count() == 0
 
 
+class TestP2PTransport:
+    """Test framed asyncio transport."""
+    
+    def test_binary_codec_roundtrip(self):
+        """Test binary codec round-trips nested messages."""
+        message = {
+            "type": "task_offer",
+            "ints": [0, 127, 128, -1, -33, 2**40, -2**40],
+            "score": 93.5,
+            "flags": [True, False, None],
+            "prompt": "x" * 70000,
+            "nested": {"unicode": "नमस्ते", "blob": b"\x00\xff"}
+        }
+        
+        payload = encode_payload(message, CODEC_BINARY)
+        assert decode_payload(payload, CODEC_BINARY) == message
+    
+    def test_frame_is_length_prefixed(self):
+        """Test frame header carries payload length and codec."""
+        frame = encode_frame({"type": "ping"}, CODEC_JSON)
+        
+        assert int.from_bytes(frame[:4], "big") == len(frame) - 5
+        assert frame[4] == CODEC_JSON
+    
+    def test_persistent_connection_request_and_broadcast(self):
+        """Test handshake, multiplexed requests and broadcast over loopback."""
+        server = P2PNetwork(node_id="transport_b", port=0)
+        client = P2PNetwork(node_id="transport_a", port=0, codec="binary")
+        received = []
+        server.register_handler("echo", lambda peer_id, msg: {"type": "echo_reply", "value": msg["value"]})
+        server.register_handler("announce", lambda peer_id, msg: received.append((peer_id, msg)))
+        
+        try:
+            assert server.start_server()
+            assert client.start_server()
+            assert client.connect_to_peer(server.address, "transport_b", "key_a")
+            
+            # Same connection is reused and the handshake reports the real node id
+            assert client.address_book[server.address] == "transport_b"
+            assert client.transport.connect(server.address) == "transport_b"
+            
+            replies = [client.transport.request("transport_b", {"type": "echo", "value": i}) for i in range(10)]
+            assert [r["value"] for r in replies] == list(range(10))
+            
+            assert client.broadcast_message({"type": "announce", "load": 0.25}) == 1
+            deadline = time.time() + 2
+            while not received and time.time() < deadline:
+                time.sleep(0.01)
+            assert received == [("transport_a", {"type": "announce", "load": 0.25})]
+            assert "transport_a" in server.peers
+        finally:
+            client.stop()
+            server.stop()
+    
+    def test_reply_only_resolves_request_on_its_connection(self):
+        """Test a reply_to from another peer cannot complete a pending request."""
+        async def scenario():
+            a, b, c = (AsyncP2PTransport(name, port=0) for name in ("t_a", "t_b", "t_c"))
+            release = asyncio.Event()
+            
+            async def slow_echo(peer_id, msg):
+                await release.wait()
+                return {"type": "echo_reply", "value": msg["value"]}
+            
+            b.register_handler("echo", slow_echo)
+            for t in (a, b, c):
+                await t.start_async()
+            try:
+                await a.connect_async(b.address)
+                await c.connect_async(a.address)
+                message = {"type": "echo", "value": "from b"}
+                pending = asyncio.ensure_future(a.request_async("t_b", message, timeout=5))
+                await asyncio.sleep(0.05)
+                assert "id" not in message  # the caller's dict is not stamped
+                
+                await c.send_async("t_a", {"type": "spoof", "reply_to": 1, "value": "from c"})
+                await asyncio.sleep(0.05)
+                assert not pending.done()
+                
+                release.set()
+                assert (await pending)["value"] == "from b"
+            finally:
+                for t in (a, b, c):
+                    await t.stop_async()
+        
+        asyncio.run(scenario())
+    
+    def test_sync_handlers_run_off_the_event_loop(self):
+        """Test plain-function handlers run in the executor, not on the loop thread."""
+        async def scenario():
+            a, b = AsyncP2PTransport("h_a", port=0), AsyncP2PTransport("h_b", port=0)
+            b.register_handler("where", lambda peer_id, msg: {"type": "here", "thread": threading.get_ident()})
+            for t in (a, b):
+                await t.start_async()
+            try:
+                await a.connect_async(b.address)
+                reply = await a.request_async("h_b", {"type": "where"}, timeout=5)
+                assert reply["thread"] != threading.get_ident()
+            finally:
+                for t in (a, b):
+                    await t.stop_async()
+        
+        asyncio.run(scenario())
+    
+    def test_simultaneous_dial_keeps_one_connection(self):
+        """Test both ends keep the connection dialed by the smaller node id."""
+        async def scenario():
+            a, b = AsyncP2PTransport("d_a", port=0), AsyncP2PTransport("d_b", port=0)
+            b.register_handler("echo", lambda peer_id, msg: {"type": "echo_reply", "value": msg["value"]})
+            a.register_handler("echo", lambda peer_id, msg: {"type": "echo_reply", "value": msg["value"]})
+            for t in (a, b):
+                await t.start_async()
+            try:
+                await asyncio.gather(a.connect_async(b.address), b.connect_async(a.address))
+                await asyncio.sleep(0.1)
+                
+                assert a.connections["d_b"].outbound and not b.connections["d_a"].outbound
+                assert not a.connections["d_b"].closed and not b.connections["d_a"].closed
+                assert (await a.request_async("d_b", {"type": "echo", "value": 1}, timeout=5))["value"] == 1
+                assert (await b.request_async("d_a", {"type": "echo", "value": 2}, timeout=5))["value"] == 2
+            finally:
+                for t in (a, b):
+                    await t.stop_async()
+        
+        asyncio.run(scenario())
+    
+    def test_broadcast_without_server_is_noop(self):
+        """Test broadcast before start delivers nothing."""
+        network = P2PNetwork(node_id="idle_node", port=0)
+        network.add_peer(NodeInfo(node_id="peer_1", address="127.0.0.1:9001", public_key="key"))
+        
+        assert network.broadcast_message({"type": "announce"}) == 0
+
+
+class TestWorkStealingScheduler:
+    """Test priority scheduling, caching and work stealing."""
+    
+    def _blocked_scheduler(self, **kwargs):
+        gate = threading.Event()
+        order = []
+        
+        def executor(payload):
+            gate.wait(5)
+            order.append(payload["task_id"])
+            return {"task_id": payload["task_id"], "result": payload["prompt"].upper()}
+        
+        return WorkStealingScheduler("sched_node", executor, num_workers=1, **kwargs), gate, order
+    
+    def test_priority_then_rarity_ordering(self):
+        """Test queue runs higher priority, then higher rarity first."""
+        scheduler, gate, order = self._blocked_scheduler()
+        try:
+            first = scheduler.submit("t0", {"prompt": "warmup"}, TaskPriority.LOW.value, 10)
+            time.sleep(0.05)  # t0 occupies the only worker
+            futures = [
+                scheduler.submit("low", {"prompt": "a"}, TaskPriority.LOW.value, 99),
+                scheduler.submit("crit_low_rarity", {"prompt": "b"}, TaskPriority.CRITICAL.value, 91),
+                scheduler.submit("crit_high_rarity", {"prompt": "c"}, TaskPriority.CRITICAL.value, 97),
+                scheduler.submit("high", {"prompt": "d"}, TaskPriority.HIGH.value, 95),
+            ]
+            gate.set()
+            for future in [first] + futures:
+                future.result(timeout=5)
+            
+            assert order == ["t0", "crit_high_rarity", "crit_low_rarity", "high", "low"]
+        finally:
+            gate.set()
+            scheduler.stop()
+    
+    def test_result_cache_by_prompt_hash(self):
+        """Test identical prompts are served from cache."""
+        scheduler, gate, order = self._blocked_scheduler()
+        gate.set()
+        try:
+            payload = {"task_type": "summarize", "prompt": "same prompt"}
+            first = scheduler.submit("t1", payload, 0.8, 95).result(timeout=5)
+            second = scheduler.submit("t2", payload, 0.8, 95).result(timeout=5)
+            
+            assert second == first
+            assert order == ["t1"]
+            assert scheduler.stats["cache_hits"] == 1
+        finally:
+            scheduler.stop()
+    
+    def test_queue_is_bounded(self):
+        """Test submit raises once the queue is full."""
+        scheduler, gate, _ = self._blocked_scheduler(max_queue_size=2)
+        try:
+            scheduler.submit("running", {"prompt": "0"}, 0.8, 95)
+            time.sleep(0.05)
+            scheduler.submit("q1", {"prompt": "1"}, 0.8, 95)
+            scheduler.submit("q2", {"prompt": "2"}, 0.8, 95)
+            
+            with pytest.raises(SchedulerFull):
+                scheduler.submit("q3", {"prompt": "3"}, 0.8, 95)
+        finally:
+            gate.set()
+            scheduler.stop()
+    
+    def test_idle_node_steals_from_busy_peer(self):
+        """Test idle scheduler pulls work and returns results to origin."""
+        def slow(payload):
+            time.sleep(0.02)
+            return {"task_id": payload["task_id"], "executed": threading.current_thread().name}
+        
+        busy = WorkStealingScheduler("busy", slow, num_workers=1, idle_wait=0.01)
+        idle = WorkStealingScheduler("idle", slow, num_workers=2, idle_wait=0.01)
+        idle.steal_fn = lambda peer_id, n: busy.steal(n)
+        idle.result_fn = lambda origin, msg: busy.complete_remote(msg["task_id"], msg["result"], msg["error"])
+        
+        try:
+            futures = [busy.submit(f"t{i}", {"prompt": f"p{i}"}, 0.8, 95) for i in range(20)]
+            idle.update_peer_load("busy", busy.load_report())
+            idle.start()
+            
+            results = [f.result(timeout=10) for f in futures]
+            
+            assert len(results) == 20
+            assert idle.stats["stolen_in"] > 0
+            assert busy.stats["stolen_out"] == idle.stats["stolen_in"]
+            assert any(r["executed"].startswith("sched-idle") for r in results)
+        finally:
+            busy.stop()
+            idle.stop()
+
+
+    def test_lost_steal_grant_is_requeued_when_lease_expires(self):
+        """Test tasks stolen by a thief that never reports back run on the origin."""
+        busy, gate, order = self._blocked_scheduler(steal_lease_seconds=0.2, advertise_interval=0.02)
+        try:
+            futures = [busy.submit(f"t{i}", {"prompt": f"p{i}"}, 0.8, 95) for i in range(6)]
+            time.sleep(0.05)  # t0 occupies the only worker
+            lost = [task["task_id"] for task in busy.steal(2, thief="thief")]  # grant never reaches the thief
+            assert len(lost) == 2
+            assert busy.renew_leases("someone_else", lost) == 0
+            assert busy.renew_leases("thief", lost) == 2
+            
+            gate.set()
+            assert len([f.result(timeout=5) for f in futures]) == 6
+            assert sorted(order) == sorted(f"t{i}" for i in range(6))
+            assert busy.get_stats()["requeued"] == 2
+            assert busy.get_stats()["leased_out"] == 0
+        finally:
+            gate.set()
+            busy.stop()
+    
+    def test_stopping_thief_hands_back_unstarted_tasks(self):
+        """Test a thief's queued stolen tasks go back to the origin on stop."""
+        busy, gate, order = self._blocked_scheduler()
+        thief = WorkStealingScheduler("thief", lambda payload: None, num_workers=1)
+        thief.steal_fn = lambda peer_id, n: busy.steal(n, thief="thief")
+        thief.return_fn = lambda origin, task_ids: busy.return_stolen("thief", task_ids)
+        try:
+            futures = [busy.submit(f"t{i}", {"prompt": f"p{i}"}, 0.8, 95) for i in range(6)]
+            time.sleep(0.05)
+            thief.update_peer_load("busy", busy.load_report())
+            assert thief._try_steal()  # not started, so the stolen tasks stay queued
+            assert thief.queue_depth() == 2
+            
+            thief.stop()
+            assert thief.queue_depth() == 0
+            gate.set()
+            assert len([f.result(timeout=5) for f in futures]) == 6
+            assert busy.get_stats()["requeued"] == 2
+        finally:
+            gate.set()
+            busy.stop()
+
+
 class TestRarityFilter:
     """Test task rarity filtering."""
     
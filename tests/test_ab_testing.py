@@ -3,12 +3,15 @@ Tests for A/B Testing Engine (Feature #18)
 Tests for experiment management, statistical significance, and winner determination
 """
 
+import random
+
 import pytest
 from ab_testing_engine import (
     ExperimentManager,
     VariantAnalyzer,
     StatisticalCalculator,
     ExperimentConfig,
+    ExperimentStatsStore,
     generate_demo_experiments
 )
 
@@ -436,5 +439,198 @@ class TestStatisticalValidation:
         assert perf["revenue_per_visitor"] == pytest.approx(total_revenue / 100, rel=0.01)
 
 
+
+class TestDeterministicAssignment:
+    """Test hashed, sticky variant assignment"""
+    
+    def _manager(self, experiment_id="sticky", allocations=(0.7, 0.3)):
+        manager = ExperimentManager()
+        manager.create_experiment(experiment_id, "Sticky", "Testing", "Hypothesis", "conversion_rate")
+        for i, allocation in enumerate(allocations):
+            manager.add_variant(experiment_id, f"v{i}", f"Variant {i}", "Test", allocation)
+        return manager
+    
+    def test_same_visitor_same_variant_across_managers(self):
+        """A visitor keeps its variant on every call and in every process"""
+        first, second = self._manager(), self._manager()
+        for i in range(500):
+            visitor = f"visitor_{i}"
+            assigned = first.track_visitor("sticky", visitor)
+            assert assigned == first.track_visitor("sticky", visitor)
+            assert assigned == second.track_visitor("sticky", visitor)
+    
+    def test_weighted_buckets(self):
+        """Traffic follows the allocation; zero-allocation variants get nothing"""
+        manager = self._manager(allocations=(0.7, 0.3, 0))
+        counts = {}
+        for i in range(20000):
+            assigned = manager.track_visitor("sticky", f"visitor_{i}")
+            counts[assigned] = counts.get(assigned, 0) + 1
+        
+        assert 0.68 < counts["v0"] / 20000 < 0.72
+        assert 0.28 < counts["v1"] / 20000 < 0.32
+        assert "v2" not in counts
+    
+    def test_experiments_are_hashed_independently(self):
+        """The experiment id salts the hash, so assignments don't line up across tests"""
+        a, b = self._manager("exp_a", (0.5, 0.5)), self._manager("exp_b", (0.5, 0.5))
+        same = sum(
+            a.track_visitor("exp_a", f"visitor_{i}") == b.track_visitor("exp_b", f"visitor_{i}")
+            for i in range(2000)
+        )
+        assert 800 < same < 1200
+        assert self._manager().track_visitor("missing", "visitor_1") is None
+
+
+class TestSequentialTesting:
+    """Test the always-valid (mSPRT) p-values"""
+    
+    def test_msprt_p_value_bounds(self):
+        """No data or no difference gives 1; a large difference gives a small p-value"""
+        assert StatisticalCalculator.msprt_p_value(0, 0, 0, 0) == 1.0
+        assert StatisticalCalculator.msprt_p_value(100, 1000, 100, 1000) == 1.0
+        assert StatisticalCalculator.msprt_p_value(100, 2000, 200, 2000) < 0.001
+        
+        step = StatisticalCalculator.sequential_test(100, 2000, 200, 2000, previous_p_value=1.0)
+        assert step["is_significant"]
+        assert StatisticalCalculator.sequential_test(
+            100, 1000, 100, 1000, previous_p_value=0.01
+        )["p_value"] == 0.01  # running minimum
+    
+    def test_continuous_peeking_keeps_false_positives_low(self):
+        """A/A tests checked after every event rarely reach significance"""
+        rng = random.Random(7)
+        false_positives = 0
+        for _ in range(100):
+            analyzer = VariantAnalyzer()
+            analyzer.add_variant("control", "Control", "A", 0.5)
+            analyzer.add_variant("variant", "Variant", "A", 0.5)
+            for i in range(2000):
+                analyzer.track_conversion("control" if i % 2 else "variant", rng.random() < 0.1)
+                if analyzer.sequential_p_values.get("variant", 1.0) <= 0.05:
+                    false_positives += 1
+                    break
+        assert false_positives <= 10
+    
+    def test_real_uplift_detected_in_results(self):
+        """A real uplift shows up in sequential_analysis"""
+        rng = random.Random(3)
+        manager = ExperimentManager()
+        manager.create_experiment("seq", "Seq", "Testing", "Hypothesis", "conversion_rate")
+        manager.add_variant("seq", "control", "Control", "A", 0.5)
+        manager.add_variant("seq", "variant", "Variant", "B", 0.5)
+        for i in range(6000):
+            variant = "control" if i % 2 else "variant"
+            manager.track_conversion("seq", variant, rng.random() < (0.10 if variant == "control" else 0.16))
+        
+        sequential = manager.get_experiment_results("seq")["sequential_analysis"]
+        assert sequential == [{
+            "variant_id": "variant",
+            "control_variant_id": "control",
+            "p_value": sequential[0]["p_value"],
+            "is_significant": True,
+        }]
+
+
+class TestStatsPersistence:
+    """Test batched counter writes and reload after a restart"""
+    
+    @pytest.fixture
+    def store(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("DATA_DB", str(tmp_path / "ab.db"))
+        from utils import init_db
+        init_db()
+        return ExperimentStatsStore(flush_interval=3600, flush_events=50)
+    
+    def _manager(self, store):
+        manager = ExperimentManager(stats_store=store)
+        manager.create_experiment("persist", "Persist", "Testing", "Hypothesis", "conversion_rate")
+        manager.add_variant("persist", "control", "Control", "A", 0.5)
+        manager.add_variant("persist", "variant", "Variant", "B", 0.5)
+        return manager
+    
+    def _stored(self):
+        from models import get_session, ExperimentVariantStats
+        session = get_session()
+        try:
+            return {r.variant_id: (r.visitors, r.conversions) for r in session.query(ExperimentVariantStats)}
+        finally:
+            session.close()
+    
+    def test_counters_written_in_batches_and_reloaded(self, store):
+        manager = self._manager(store)
+        for i in range(49):
+            manager.track_conversion("persist", "control", i < 10, 5.0 if i < 10 else 0)
+        assert self._stored() == {"control": (0, 0), "variant": (0, 0)}  # still buffered
+        
+        manager.track_conversion("persist", "variant", True, 5.0)  # 50th event triggers the flush
+        assert self._stored() == {"control": (49, 10), "variant": (1, 1)}
+        
+        manager.track_conversion("persist", "variant", False)
+        store.flush()
+        
+        restarted = self._manager(ExperimentStatsStore())
+        performance = {p["variant_id"]: p for p in restarted.get_experiment_results("persist")["variants_performance"]}
+        assert (performance["control"]["visitors"], performance["control"]["conversions"]) == (49, 10)
+        assert (performance["variant"]["visitors"], performance["variant"]["conversions"]) == (2, 1)
+        assert performance["control"]["revenue"] == 50.0
+    
+    def test_load_rereads_row_inserted_concurrently(self, store, monkeypatch):
+        from models import get_session, ExperimentVariantStats
+        from sqlalchemy.orm import Session
+        session = get_session()
+        session.add(ExperimentVariantStats(experiment_id="race", variant_id="control", visitors=7,
+                                           conversions=2, revenue=0.0, updated_at=0.0))
+        session.commit()
+        session.close()
+        
+        real_get = Session.get
+        calls = []
+        
+        def stale_get(self, entity, ident, **kwargs):  # the first lookup misses the other process's insert
+            calls.append(ident)
+            return None if len(calls) == 1 else real_get(self, entity, ident, **kwargs)
+        
+        monkeypatch.setattr(Session, "get", stale_get)
+        assert store.load("race", "control") == {"visitors": 7, "conversions": 2, "revenue": 0.0, "min_p_value": 1.0}
+        assert len(calls) == 2
+    
+    def test_sequential_minimum_survives_restart(self, store):
+        manager = self._manager(store)
+        rng = random.Random(7)
+        for i in range(2000):  # a strong early effect drives the running minimum down ...
+            variant = "control" if i % 2 else "variant"
+            manager.track_conversion("persist", variant, rng.random() < (0.05 if variant == "control" else 0.20))
+        for i in range(4000):  # ... and equal rates afterwards pull the current p-value back up
+            manager.track_conversion("persist", "variant" if i % 2 else "control", rng.random() < 0.20)
+        store.flush()
+        running = manager.variant_analyzers["persist"].sequential_p_values["variant"]
+        
+        restarted = self._manager(ExperimentStatsStore())
+        assert restarted.variant_analyzers["persist"].sequential_p_values["variant"] == running
+        assert self._stored_min_p()["variant"] == running
+        
+        totals = restarted.variant_analyzers["persist"].results
+        current = StatisticalCalculator.msprt_p_value(totals["control"]["conversions"], totals["control"]["visitors"],
+                                                      totals["variant"]["conversions"], totals["variant"]["visitors"])
+        assert running < current  # without the stored minimum the reload would report the larger value
+    
+    def _stored_min_p(self):
+        from models import get_session, ExperimentVariantStats
+        session = get_session()
+        try:
+            return {r.variant_id: r.min_p_value for r in session.query(ExperimentVariantStats)}
+        finally:
+            session.close()
+    
+    def test_demo_traffic_seeded_once_with_store(self, store):
+        manager, exp_ids = generate_demo_experiments(store)
+        store.flush()
+        seeded = {e: manager.get_experiment_results(e)["total_visitors"] for e in exp_ids}
+        
+        restarted, _ = generate_demo_experiments(ExperimentStatsStore())
+        assert {e: restarted.get_experiment_results(e)["total_visitors"] for e in exp_ids} == seeded
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
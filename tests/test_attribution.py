@@ -12,6 +12,10 @@ from attribution_modeling import (
     AttributionModelComparator,
     AttributionAnalytics,
     AttributionModel,
+    PathTrie,
+    markov_attribution,
+    rule_based_attribution,
+    shapley_attribution,
     generate_demo_attribution_data,
 )
 
@@ -749,3 +753,75 @@ class TestAttributionIntegration:
         
         # Paid search should get more budget due to better ROI (0% vs -83.3%)
         assert optimization["recommendations"]["paid_search"] >= optimization["recommendations"]["social"]
+
+
+# =======================
+# Aggregate (path trie) Models Tests
+# =======================
+
+class TestPathTrieModels:
+    """Tests for attribution over compressed path aggregates"""
+
+    PATHS = [
+        (["paid_search", "email", "direct"], 120.0),
+        (["paid_search", "email", "direct"], 80.0),
+        (["social", "direct"], 50.0),
+        (["email"], 30.0),
+        (["paid_search", "email"], 70.0),
+    ]
+
+    def test_trie_counts_distinct_paths(self):
+        """Repeated journeys share one path; prefixes are stored once"""
+        trie = PathTrie()
+        for channels, value in self.PATHS:
+            trie.add(channels, value=value)
+        trie.add(["social"], converted=False, count=3)
+
+        paths = {channels: (conversions, value, nulls) for channels, conversions, value, nulls in trie.paths()}
+        assert paths[("paid_search", "email", "direct")] == (2, 200.0, 0)
+        assert paths[("social",)] == (0, 0.0, 3)
+        assert len(trie) == 5
+        assert trie.total_paths == 8
+        assert trie.most_common(1) == [("paid_search → email → direct", 2)]
+
+    def test_rule_based_models_match_per_journey_attribution(self):
+        """Rule-based models over the trie equal the per-journey ConversionAttributor totals"""
+        trie = PathTrie()
+        attributor = ConversionAttributor()
+        for i, (channels, value) in enumerate(self.PATHS):
+            trie.add(channels, value=value)
+            attributor.track_conversion_path(f"c{i}", [{"channel": c} for c in channels], value)
+
+        aggregated = rule_based_attribution(trie)
+        for model in AttributionModel:
+            expected = attributor.get_channel_revenue_by_model(model)
+            assert aggregated[model.value] == pytest.approx(expected)
+
+    def test_markov_removal_effect(self):
+        """A channel only seen on non-converting paths gets no credit"""
+        trie = PathTrie()
+        trie.add(["search", "email"], value=100.0, count=1)
+        trie.add(["search"], converted=False, count=1)
+        trie.add(["display"], converted=False, count=5)
+
+        markov = markov_attribution(trie)
+        assert markov["removal_effects"]["search"] == pytest.approx(1.0)
+        assert markov["removal_effects"]["email"] == pytest.approx(1.0)
+        assert markov["removal_effects"]["display"] == pytest.approx(0.0)
+        assert markov["conversion_probability"] == pytest.approx(1 / 7)
+        assert sum(markov["attribution"].values()) == pytest.approx(100.0)
+        assert markov["attribution"]["search"] == pytest.approx(50.0)
+
+    def test_sampled_shapley(self):
+        """Sampled Shapley values are efficient and close to the exact values"""
+        trie = PathTrie()
+        trie.add(["a", "b"], value=100.0)
+        trie.add(["a"], value=40.0)
+        trie.add(["b", "a", "a"], converted=False)
+
+        shapley = shapley_attribution(trie, samples=4000, seed=1)
+        # v({a}) = 40, v({b}) = 0, v({a, b}) = 140
+        assert sum(shapley.values()) == pytest.approx(140.0)
+        assert shapley["a"] == pytest.approx(90.0, rel=0.05)
+        assert shapley["b"] == pytest.approx(50.0, rel=0.1)
+        assert shapley_attribution(PathTrie()) == {}
@@ -0,0 +1,90 @@
+"""Tests for the stored-touchpoint attribution batch job."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def db(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "attribution.db"))
+    from utils import init_db
+    init_db()
+
+
+def test_paths_built_from_the_table(db):
+    from attribution_batch import build_path_trie, record_conversion, record_touchpoints
+
+    record_touchpoints([
+        {"customer_id": "c1", "channel": "search", "occurred_at": 1},
+        {"customer_id": "c1", "channel": "email", "occurred_at": 2},
+        {"customer_id": "c2", "channel": "social", "occurred_at": 1},
+        {"customer_id": "c1", "channel": "display", "occurred_at": 5},  # after c1's conversion
+        {"customer_id": "c3", "channel": "search", "occurred_at": 1},
+        {"customer_id": "c3", "channel": "email", "occurred_at": 2},
+    ])
+    record_conversion("c1", 100.0, order_id="o1", converted_at=3)
+    record_conversion("c3", 60.0, order_id="o2", converted_at=3)
+    record_conversion("c4", 10.0, converted_at=3)  # no recorded touches
+
+    built = build_path_trie()
+    paths = {channels: (conversions, value, nulls) for channels, conversions, value, nulls in built["trie"].paths()}
+
+    assert built["touchpoints"] == 6 and built["conversions"] == 3
+    assert paths == {
+        ("search", "email"): (2, 160.0, 0),
+        ("display",): (0, 0.0, 1),
+        ("social",): (0, 0.0, 1),
+        (): (1, 10.0, 0),
+    }
+
+
+def test_batch_run_is_stored(db):
+    from attribution_batch import latest_attribution_run, record_conversion, record_touchpoints, run_attribution_batch
+
+    assert latest_attribution_run() is None
+    rows = []
+    for i in range(50):
+        rows.append({"customer_id": f"c{i}", "channel": "search", "occurred_at": 1})
+        rows.append({"customer_id": f"c{i}", "channel": "email" if i % 2 else "social", "occurred_at": 2})
+    record_touchpoints(rows)
+    for i in range(0, 20, 2):  # social journeys only
+        record_conversion(f"c{i}", 20.0, converted_at=3)
+
+    report = run_attribution_batch(shapley_samples=500, seed=3)
+    results = report["results"]
+    assert report["touchpoints"] == 100 and report["conversions"] == 10
+    for model in ("first_touch", "last_touch", "linear", "time_decay", "markov", "shapley"):
+        assert sum(results[model].values()) == pytest.approx(200.0), model
+    assert results["first_touch"] == {"search": 200.0}
+    assert results["markov"]["email"] == 0 and results["markov"]["social"] == pytest.approx(100.0)
+    assert results["shapley"]["social"] > results["shapley"].get("email", 0)
+
+    stored = latest_attribution_run()
+    assert stored["run_id"] == report["run_id"]
+    assert stored["distinct_paths"] == report["distinct_paths"] == 2
+    assert stored["results"]["shapley"] == pytest.approx(results["shapley"])
+
+
+def test_tracked_journeys_are_stored(db, client):
+    from attribution_batch import build_path_trie
+    with client.session_transaction() as sess:
+        sess["admin_authenticated"] = True
+
+    tracked = client.post("/api/attribution/track-journey", json={
+        "customer_id": "c1", "conversion_value": 80, "order_id": "o1",
+        "touchpoints": [
+            {"channel": "email", "timestamp": "2026-01-10T10:00:00"},
+            {"channel": "paid_search", "timestamp": "2026-01-10T08:00:00"},
+        ],
+    })
+    assert tracked.status_code == 201
+    assert client.post("/api/attribution/track-journey", json={"touchpoints": []}).status_code == 400
+
+    built = build_path_trie()
+    paths = {channels: (conversions, value) for channels, conversions, value, _ in built["trie"].paths()}
+    assert paths == {("paid_search", "email"): (1, 80.0)}
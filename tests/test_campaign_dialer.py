@@ -0,0 +1,267 @@
+"""Tests for the bulk calling campaign dialer."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from global_calling_system import CallStatus
+
+
+@pytest.fixture
+def campaign(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "calls.db"))
+    from utils import init_db
+    init_db()
+    from models import get_session, CallingCampaign
+
+    def create(numbers, campaign_id="c1"):
+        from campaign_dialer import enqueue_campaign
+        session = get_session()
+        session.add(CallingCampaign(id=campaign_id, name="Survey", category="ai_automated", script_template="Hi",
+                                    total_numbers=len(numbers), status="scheduled", created_at=time.time()))
+        session.commit()
+        session.close()
+        return enqueue_campaign(campaign_id, numbers)
+    return create
+
+
+class CountingProvider:
+    """Scripted outcomes per number; records peak concurrency per destination country."""
+
+    def __init__(self, name, max_concurrent, script=None, latency=0.005):
+        self.name, self.max_concurrent, self.calls_per_second = name, max_concurrent, None
+        self.script, self.latency = script or {}, latency
+        self.lock = threading.Lock()
+        self.active, self.peak = {}, {}
+        self.dialed = []
+
+    def dial(self, to_number, script):
+        from campaign_dialer import CallOutcome, country_code
+        country = country_code(to_number)
+        with self.lock:
+            self.dialed.append(to_number)
+            attempt = self.dialed.count(to_number)
+            self.active[country] = self.active.get(country, 0) + 1
+            self.peak[country] = max(self.peak.get(country, 0), self.active[country])
+        time.sleep(self.latency)
+        with self.lock:
+            self.active[country] -= 1
+        statuses = self.script.get(to_number, [CallStatus.COMPLETED])
+        status = statuses[min(attempt, len(statuses)) - 1]
+        return CallOutcome(status, 60 if status == CallStatus.COMPLETED else 0, 2.0 if status == CallStatus.COMPLETED else 0.0)
+
+
+def test_country_codes_and_duplicate_numbers(campaign):
+    from campaign_dialer import country_code
+
+    assert country_code("+971-50-1234567") == "+971"
+    assert country_code("+91 98765 43210") == "+91"
+    assert country_code("+1-555-0123") == "+1"
+    assert country_code("+999 123") == "other"
+    assert campaign(["+15550001", "+15550001", " ", "+919800000001"]) == 2
+
+
+def test_caps_retries_and_batched_counters(campaign):
+    from campaign_dialer import CampaignDialer, campaign_progress
+    from models import get_session, CallRecord
+
+    numbers = [f"+91980000{i:04d}" for i in range(60)] + [f"+1555000{i:04d}" for i in range(60)]
+    script = {numbers[0]: [CallStatus.BUSY, CallStatus.COMPLETED],
+              numbers[1]: [CallStatus.NO_ANSWER] * 5,
+              numbers[2]: [CallStatus.FAILED]}
+    campaign(numbers)
+    a = CountingProvider("a", 4, script)
+    b = CountingProvider("b", 4, script)
+
+    stats = CampaignDialer("c1", providers=[a, b], country_limits={"+1": 2}, retry_backoff=0,
+                           max_attempts=3, batch_size=25).run()
+
+    assert stats["dialed"] == 120 + 1 + 2
+    assert (stats["succeeded"], stats["failed"], stats["retried"]) == (118, 2, 3)
+    assert max(a.peak.get("+1", 0), b.peak.get("+1", 0)) <= 2
+    assert len(a.dialed) and len(b.dialed)
+
+    progress = campaign_progress("c1")
+    assert progress["status"] == "completed"
+    assert (progress["completed_calls"], progress["successful_calls"], progress["failed_calls"]) == (120, 118, 2)
+    assert progress["total_cost_rupees"] == 236.0
+    assert progress["queue"] == {"queued": 0, "dialing": 0, "done": 118, "failed": 2}
+
+    session = get_session()
+    attempts = [r.status for r in session.query(CallRecord).filter_by(to_number=numbers[1]).all()]
+    assert attempts == ["no_answer"] * 3
+    assert session.query(CallRecord).count() == 123
+    session.close()
+
+
+def test_stop_keeps_unfinished_numbers_queued_for_resume(campaign):
+    from campaign_dialer import CampaignDialer, campaign_progress
+
+    campaign([f"+4420000{i:04d}" for i in range(200)])
+    provider = CountingProvider("a", 2, latency=0.01)
+    dialer = CampaignDialer("c1", providers=[provider], batch_size=20)
+    timer = threading.Timer(0.05, dialer.stop)
+    timer.start()
+    dialer.run()
+    timer.join()
+
+    paused = campaign_progress("c1")
+    assert paused["status"] == "paused"
+    assert paused["queue"]["dialing"] == 0
+    assert 0 < paused["queue"]["done"] < 200
+    assert paused["queue"]["queued"] == 200 - paused["queue"]["done"]
+
+    CampaignDialer("c1", providers=[provider], batch_size=50).run()
+    assert campaign_progress("c1")["queue"]["done"] == 200
+    assert len(provider.dialed) == len(set(provider.dialed)) == 200
+
+
+def test_pacing_limits_call_rate(campaign):
+    from campaign_dialer import CampaignDialer, SimulatedProvider
+
+    campaign([f"+9198{i:08d}" for i in range(10)])
+    provider = SimulatedProvider("sim", max_concurrent=10, outcomes={CallStatus.COMPLETED: 1.0}, seed=1)
+    started = time.monotonic()
+    stats = CampaignDialer("c1", providers=[provider], calls_per_second=100).run()
+    assert stats["succeeded"] == 10
+    assert time.monotonic() - started >= 0.09
+
+
+def test_campaign_api_runs_queue_in_background(client, campaign):
+    with client.session_transaction() as sess:
+        sess["admin_authenticated"] = True
+
+    created = client.post("/api/calling/campaign/create", json={
+        "name": "Reminders", "script": "Your payment is due",
+        "target_numbers": ["+919800000001", "+919800000002", "+919800000002"],
+    })
+    assert created.status_code == 201
+    body = created.get_json()
+    assert body["queued_numbers"] == 2
+
+    campaign_id = body["campaign_id"]
+    started = client.post(f"/api/calling/campaign/{campaign_id}/start", json={"max_attempts": 1})
+    assert started.status_code == 202
+    deadline = time.time() + 10
+    while True:
+        progress = client.get(f"/api/calling/campaign/{campaign_id}/progress").get_json()
+        if progress["status"] == "completed" or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert progress["completed_calls"] == 2
+    assert client.post(f"/api/calling/campaign/{campaign_id}/stop").status_code == 409
+    assert client.get("/api/calling/campaign/missing/progress").status_code == 404
+
+
+def test_country_limit_below_one_is_rejected(campaign):
+    from campaign_dialer import CampaignDialer
+
+    campaign(["+919800000001"])
+    provider = CountingProvider("a", 2)
+    with pytest.raises(ValueError):
+        CampaignDialer("c1", providers=[provider], country_limits={"+91": 0})
+    with pytest.raises(ValueError):
+        CampaignDialer("c1", providers=[provider], default_country_limit=0)
+
+
+def test_lease_blocks_second_dialer_and_stop_works_from_any_process(campaign, monkeypatch):
+    import campaign_dialer
+    from campaign_dialer import CampaignBusyError, CampaignDialer, campaign_progress, start_campaign, stop_campaign
+
+    monkeypatch.setattr(campaign_dialer, "DIALER_HEARTBEAT", 0.05)
+    campaign([f"+4420000{i:04d}" for i in range(400)])
+    provider = CountingProvider("a", 2, latency=0.01)
+    first = start_campaign("c1", providers=[provider], batch_size=20)
+
+    with pytest.raises(CampaignBusyError):
+        CampaignDialer("c1", providers=[CountingProvider("b", 2)]).acquire()
+    time.sleep(0.2)
+    assert campaign_progress("c1")["queue"]["dialing"] > 0  # the failed start requeued nothing
+
+    monkeypatch.setattr(campaign_dialer, "_RUNNING", {})  # as seen from another worker
+    assert campaign_progress("c1")["live"]["dialed"] > 0
+    assert stop_campaign("c1")
+    deadline = time.time() + 5
+    while campaign_progress("c1")["status"] != "paused" and time.time() < deadline:
+        time.sleep(0.02)
+    assert first._stop.is_set()
+    assert campaign_progress("c1")["status"] == "paused"
+    assert not stop_campaign("c1")
+    assert len(provider.dialed) == len(set(provider.dialed))
+
+
+def test_expired_lease_rows_are_reclaimed(campaign):
+    from campaign_dialer import CampaignDialer, campaign_progress
+    from models import get_session, CallingCampaign, CampaignCall
+
+    campaign(["+919800000001", "+919800000002"])
+    session = get_session()
+    session.query(CampaignCall).update({"status": "dialing"})
+    session.query(CallingCampaign).update({"dialer_owner": "dead", "dialer_lease_until": time.time() - 1})
+    session.commit()
+    session.close()
+
+    CampaignDialer("c1", providers=[CountingProvider("a", 2)]).run()
+    assert campaign_progress("c1")["queue"]["done"] == 2
+
+
+def test_claim_keeps_only_rows_it_updated(campaign, monkeypatch):
+    import campaign_dialer
+    from campaign_dialer import CampaignDialer
+    from models import get_session, CampaignCall
+
+    campaign([f"+91980000{i:04d}" for i in range(10)])
+    dialer = CampaignDialer("c1", providers=[CountingProvider("a", 2)])
+    dialer.acquire()
+    real_update = campaign_dialer.update
+
+    def racing_update(table):
+        # Another dialer claims three of the selected rows between SELECT and UPDATE
+        session = get_session()
+        ids = [i for (i,) in session.query(CampaignCall.id).order_by(CampaignCall.id).limit(3)]
+        session.query(CampaignCall).filter(CampaignCall.id.in_(ids)).update({"status": "dialing"})
+        session.commit()
+        session.close()
+        return real_update(table)
+
+    monkeypatch.setattr(campaign_dialer, "update", racing_update)
+    claimed = dialer._claim()
+    assert len(claimed) == 7
+
+
+def test_failed_result_write_keeps_results_for_the_next_flush(campaign, monkeypatch):
+    import campaign_dialer
+    from campaign_dialer import CampaignDialer, campaign_progress
+    from models import get_session, CallRecord
+
+    real_insert, failures = campaign_dialer.insert, []
+
+    def flaky_insert(table):
+        if table is CallRecord and len(failures) < 2:
+            failures.append(table)
+            raise RuntimeError("database is locked")
+        return real_insert(table)
+
+    monkeypatch.setattr(campaign_dialer, "insert", flaky_insert)
+    monkeypatch.setattr(campaign_dialer, "DIALER_FLUSH_INTERVAL", 0.05)
+    numbers = [f"+4420000{i:04d}" for i in range(30)]
+    campaign(numbers)
+    provider = CountingProvider("a", 4)
+
+    stats = CampaignDialer("c1", providers=[provider], batch_size=10).run()
+
+    assert len(failures) == 2
+    assert stats["dialed"] == 30
+    assert sorted(provider.dialed) == numbers  # nobody called twice
+    progress = campaign_progress("c1")
+    assert progress["queue"] == {"queued": 0, "dialing": 0, "done": 30, "failed": 0}
+    assert progress["completed_calls"] == 30
+    session = get_session()
+    assert session.query(CallRecord).count() == 30
+    session.close()
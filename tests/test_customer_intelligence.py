@@ -5,9 +5,9 @@ import uuid
 from customer_intelligence import (
     get_customer_ltv, get_customer_segment, get_all_customers_segmented,
     get_segment_summary, identify_marketing_opportunities, get_customer_churn_risk,
-    CustomerSegment
+    rebuild_customer_features, CustomerSegment
 )
-from models import get_session, Order
+from models import get_session, Order, CustomerFeature
 
 
 @pytest.fixture(autouse=True)
@@ -325,5 +325,88 @@ def test_ltv_ignores_unpaid_orders():
     assert ltv['order_count'] == 1
 
 
+
+def _features(receipt):
+    session = get_session()
+    try:
+        row = session.query(CustomerFeature).filter_by(receipt=receipt).first()
+        return None if row is None else (row.order_count, row.paid_revenue_paise, row.avg_order_value_paise, row.segment)
+    finally:
+        session.close()
+
+
+def test_feature_table_follows_order_changes():
+    """Feature rows are refreshed on every order insert/update and match a full rebuild."""
+    now = time.time()
+    receipt = f"TEST_{uuid.uuid4().hex[:8]}"
+    first_id, second_id = unique_order_id(), unique_order_id()
+    
+    session = get_session()
+    try:
+        session.add(Order(id=first_id, amount=100000, currency='INR', receipt=receipt,
+                          product='pro_pack', status='paid', created_at=now - 10 * 86400))
+        session.add(Order(id=second_id, amount=300000, currency='INR', receipt=receipt,
+                          product='premium_pack', status='created', created_at=now))
+        session.commit()
+        get_all_customers_segmented(days_back=30)  # builds the table if it was empty
+        assert _features(receipt) == (1, 100000, 100000, 'NEW')
+        
+        session.query(Order).filter_by(id=second_id).first().status = 'paid'
+        session.commit()
+        assert _features(receipt) == (2, 400000, 200000, 'LOYAL')
+        
+        session.delete(session.query(Order).filter_by(id=first_id).first())
+        session.commit()
+        assert _features(receipt) == (1, 300000, 300000, 'NEW')
+    finally:
+        session.close()
+    
+    incremental = _features(receipt)
+    rebuild_customer_features()
+    assert _features(receipt) == incremental
+    assert get_customer_segment(receipt)['segment'] == incremental[3]
+
+
+def test_bulk_order_delete_invalidates_features():
+    """Bulk deletes skip the flush hook, so they empty the table and the next read rebuilds it."""
+    receipt = f"TEST_{uuid.uuid4().hex[:8]}"
+    session = get_session()
+    try:
+        session.add(Order(id=unique_order_id(), amount=100000, currency='INR', receipt=receipt,
+                          product='pro_pack', status='paid', created_at=time.time()))
+        session.commit()
+        session.query(Order).filter(Order.receipt == receipt).delete()
+        session.commit()
+        assert session.query(CustomerFeature).count() == 0
+    finally:
+        session.close()
+    
+    assert all(c['receipt'] != receipt for c in get_all_customers_segmented(days_back=30))
+
+
+def test_feature_refresh_failure_keeps_the_order(monkeypatch):
+    """The refresh runs after the commit, so its errors never roll back an order write."""
+    import customer_intelligence
+    
+    def broken(connection, receipts):
+        raise RuntimeError("feature table unavailable")
+    
+    monkeypatch.setattr(customer_intelligence, 'refresh_customer_features', broken)
+    order_id = unique_order_id()
+    session = get_session()
+    try:
+        session.add(Order(id=order_id, amount=100000, currency='INR', receipt=f"TEST_{uuid.uuid4().hex[:8]}",
+                          product='pro_pack', status='paid', created_at=time.time()))
+        session.commit()
+    finally:
+        session.close()
+    
+    session = get_session()
+    try:
+        assert session.get(Order, order_id) is not None
+    finally:
+        session.close()
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
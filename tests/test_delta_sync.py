@@ -0,0 +1,108 @@
+"""Tests for the mobile delta-sync engine and /api/v2/sync endpoints."""
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def sync_db(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "sync.db"))
+    from utils import init_db
+    init_db()
+
+
+def _upsert(rid, data, base=None, resource="prompt"):
+    return {"resource": resource, "id": rid, "op": "upsert", "data": data, "base_version": base or {}}
+
+
+def test_pull_returns_only_changes_after_high_water_mark(sync_db):
+    from delta_sync import pull_changes, push_changes
+
+    push_changes("t1", "phone", [_upsert(f"p{i}", {"n": i}) for i in range(5)])
+    push_changes("t2", "phone", [_upsert("other", {})])
+
+    first = pull_changes("t1", since=0, limit=3)
+    rest = pull_changes("t1", since=first["next_since"], limit=3)
+
+    assert [c["id"] for c in first["changes"]] == ["p0", "p1", "p2"] and first["has_more"]
+    assert [c["id"] for c in rest["changes"]] == ["p3", "p4"] and not rest["has_more"]
+    assert pull_changes("t1", since=rest["next_since"])["changes"] == []
+
+    push_changes("t1", "phone", [_upsert("p1", {"n": 10}, base=first["changes"][1]["version"])])
+    update = pull_changes("t1", since=rest["next_since"])["changes"]
+    assert [(c["id"], c["data"]) for c in update] == [("p1", {"n": 10})]
+    # The superseded row is gone, so a fresh pull sees each record once
+    assert [c["id"] for c in pull_changes("t1")["changes"]] == ["p0", "p2", "p3", "p4", "p1"]
+
+
+def test_concurrent_edits_are_reported_as_conflicts(sync_db):
+    from delta_sync import push_changes
+
+    created = push_changes("t1", "phone", [_upsert("doc", {"title": "a"})])
+    base = created["applied"][0]["version"]
+    assert base == {"phone": 1}
+
+    phone = push_changes("t1", "phone", [_upsert("doc", {"title": "phone"}, base=base)])
+    tablet = push_changes("t1", "tablet", [_upsert("doc", {"title": "tablet"}, base=base)])
+
+    assert phone["applied"][0]["version"] == {"phone": 2}
+    assert tablet["applied"] == []
+    assert tablet["conflicts"][0]["server"]["data"] == {"title": "phone"}
+
+    merged = push_changes("t1", "tablet", [_upsert("doc", {"title": "both"},
+                                                   base=tablet["conflicts"][0]["server"]["version"])])
+    assert merged["applied"][0]["version"] == {"phone": 2, "tablet": 1}
+
+
+def test_record_repeated_in_a_batch_keeps_last_write(sync_db):
+    from delta_sync import pull_changes, push_changes
+
+    result = push_changes("t1", "phone", [
+        _upsert("a", {"v": 1}),
+        _upsert("a", {"v": 2}, base={"phone": 1}),
+        {"resource": "prompt", "id": "b", "op": "delete"},
+    ])
+
+    assert [(r["id"], r["version"]) for r in result["applied"]] == [("a", {"phone": 2})]
+    assert [c["data"] for c in pull_changes("t1")["changes"]] == [{"v": 2}]
+    with pytest.raises(ValueError):
+        push_changes("t1", "phone", [{"resource": "prompt", "op": "upsert"}])
+
+
+def test_tombstones_are_compacted_and_stale_devices_reset(sync_db):
+    from delta_sync import compact, pull_changes, push_changes
+
+    created = push_changes("t1", "phone", [_upsert("a", {}), _upsert("b", {})])
+    hwm = created["seq"]
+    push_changes("t1", "phone", [{"resource": "prompt", "id": "a", "op": "delete",
+                                  "base_version": created["applied"][0]["version"]}])
+
+    assert pull_changes("t1", since=hwm)["changes"][0]["deleted"] is True
+    assert [c["id"] for c in pull_changes("t1")["changes"]] == ["b"]
+
+    assert compact("t1", older_than=0) == 1
+    assert pull_changes("t1", since=hwm)["reset"] is True
+    assert [c["id"] for c in pull_changes("t1")["changes"]] == ["b"]
+
+
+def test_sync_endpoints_gzip_large_pulls(client, sync_db):
+    with client.session_transaction() as sess:
+        sess["admin_authenticated"] = True
+
+    changes = [_upsert(f"p{i}", {"body": "x" * 50}) for i in range(40)]
+    pushed = client.post("/api/v2/sync/push", json={"device_id": "phone", "tenant_id": "t9", "changes": changes})
+    assert pushed.status_code == 200
+    assert pushed.get_json()["synced_count"] == 40
+    assert client.post("/api/v2/sync/push", json={"changes": []}).status_code == 400
+
+    pulled = client.get("/api/v2/sync/pull?tenant_id=t9&limit=25", headers={"Accept-Encoding": "gzip"})
+    assert pulled.headers["Content-Encoding"] == "gzip"
+    body = json.loads(gzip.decompress(pulled.data))
+    assert len(body["changes"]) == 25 and body["has_more"]
@@ -0,0 +1,121 @@
+"""Resumable downloads: Range/If-Range, cached ETags, grants and proxy offload."""
+import os
+import sys
+
+import pytest
+from werkzeug.test import EnvironBuilder
+from werkzeug.utils import send_file
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import app as app_module
+import entitlements
+import utils
+
+PAYLOAD = bytes(range(256)) * 64  # 16 KiB
+
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    (tmp_path / app_module.PRODUCTS["pro"]).write_bytes(PAYLOAD)
+    monkeypatch.setattr(app_module, "DOWNLOAD_DIR", str(tmp_path))
+    monkeypatch.delenv("DOWNLOAD_OFFLOAD", raising=False)
+    lookups = []
+
+    def get_order(order_id):
+        lookups.append(order_id)
+        return (order_id, 99900, "INR", "rcpt", "pro", "paid", 0, 0)
+
+    monkeypatch.setattr(utils, "get_order", get_order)
+    app_module._DOWNLOAD_ETAGS.clear()
+    return lookups
+
+
+def _proxy_get(client, url, headers=None):
+    """nginx stand-in: follow X-Accel-Redirect to the aliased directory and serve it"""
+    response = client.get(url, headers=headers or {})
+    internal = response.headers.get("X-Accel-Redirect")
+    if not internal:
+        return response
+    path = os.path.join(app_module.DOWNLOAD_DIR, internal[len(app_module.DOWNLOAD_ACCEL_PREFIX_DEFAULT):])
+    environ = EnvironBuilder(path=url, headers=headers or {}).get_environ()
+    served = send_file(path, environ, conditional=True, etag=response.headers["ETag"].strip('"'))
+    served.direct_passthrough = False
+    return served
+
+
+def test_range_and_if_range(client, pack):
+    full = client.get("/download/pro?order_id=order_a")
+    assert full.status_code == 200 and full.data == PAYLOAD
+    assert full.headers["Accept-Ranges"] == "bytes"
+    etag = full.headers["ETag"]
+
+    part = client.get("/download/pro?order_id=order_a", headers={"Range": "bytes=1000-1999"})
+    assert part.status_code == 206
+    assert part.data == PAYLOAD[1000:2000]
+    assert part.headers["Content-Range"] == f"bytes 1000-1999/{len(PAYLOAD)}"
+
+    resumed = client.get("/download/pro?order_id=order_a", headers={"Range": "bytes=4096-", "If-Range": etag})
+    assert resumed.status_code == 206 and resumed.data == PAYLOAD[4096:]
+
+    stale = client.get("/download/pro?order_id=order_a", headers={"Range": "bytes=4096-", "If-Range": '"stale"'})
+    assert stale.status_code == 200 and stale.data == PAYLOAD
+
+    cached = client.get("/download/pro?order_id=order_a", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_etag_is_strong_and_hashed_once(client, pack, monkeypatch):
+    first = client.get("/download/pro?order_id=order_a").headers["ETag"]
+    assert not first.startswith("W/")
+
+    def reread(*args, **kwargs):
+        raise AssertionError("ETag recomputed for an unchanged file")
+
+    with monkeypatch.context() as m:
+        m.setattr(app_module, "open", reread, raising=False)
+        assert client.get("/download/pro?order_id=order_a").headers["ETag"] == first
+
+    path = os.path.join(app_module.DOWNLOAD_DIR, "pro_pack.zip")
+    with open(path, "ab") as f:
+        f.write(b"v2")
+    assert client.get("/download/pro?order_id=order_a").headers["ETag"] != first
+
+
+def test_grant_skips_order_lookup_until_it_expires(client, pack, monkeypatch):
+    grant = client.get("/download/pro?order_id=order_a").headers["X-Download-Grant"]
+    assert pack == ["order_a"]
+
+    part = client.get(f"/download/pro?grant={grant}", headers={"Range": "bytes=0-99"})
+    assert part.status_code == 206 and part.data == PAYLOAD[:100]
+    assert pack == ["order_a"]
+    assert client.get(f"/download/premium?grant={grant}").status_code == 402  # bound to the product
+
+    expires = int(grant.split(".")[0])
+    monkeypatch.setattr(entitlements.time, "time", lambda: expires + 1)
+    assert client.get(f"/download/pro?grant={grant}").status_code == 402
+    assert client.get(f"/download/pro?grant={grant}&order_id=order_a").status_code == 200
+    assert pack == ["order_a", "order_a"]
+
+
+def test_x_accel_offload(client, pack, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_OFFLOAD", "x-accel")
+    response = client.get("/download/pro?order_id=order_a")
+    assert response.status_code == 200 and response.data == b""
+    assert response.headers["X-Accel-Redirect"] == "/protected-downloads/pro_pack.zip"
+    assert "attachment" in response.headers["Content-Disposition"]
+
+    proxied = _proxy_get(client, "/download/pro?order_id=order_a", {"Range": "bytes=10-19"})
+    assert proxied.status_code == 206 and proxied.get_data() == PAYLOAD[10:20]
+
+    unchanged = client.get("/download/pro?order_id=order_a", headers={"If-None-Match": response.headers["ETag"]})
+    assert unchanged.status_code == 304 and "X-Accel-Redirect" not in unchanged.headers
+
+
+def test_x_sendfile_offload(client, pack, monkeypatch):
+    monkeypatch.setenv("DOWNLOAD_OFFLOAD", "x-sendfile")
+    response = client.get("/download/pro?order_id=order_a")
+    assert response.headers["X-Sendfile"] == os.path.join(app_module.DOWNLOAD_DIR, "pro_pack.zip")
+    assert response.data == b""
@@ -517,6 +517,39 @@ def test_batch_status_check(agent, test_package_standard, test_location_nyc, tes
         assert "price_usd" in status
 
 
+def test_plan_routes_multi_stop(agent, test_location_nyc, test_location_london):
+    """Test pending orders are grouped into feasible multi-stop tours from the hub"""
+    order_ids = []
+    for i in range(6):
+        pkg = Package(
+            package_id=f"pkg_route_{i}",
+            weight_kg=0.5,
+            dimensions={"length": 10, "width": 10, "height": 10},
+            contents="Documents",
+            fragile=False,
+            temperature_controlled=False,
+            value_usd=50,
+            priority=1
+        )
+        drop = Location(40.7128 + 0.01 * (i % 3), -74.0060 + 0.01 * (i // 3), f"Stop {i}", "north_america")
+        order_ids.append(agent.process_order(f"cust_route_{i}", pkg, test_location_nyc, drop)["order_id"])
+    far = agent.process_order("cust_far", Package("pkg_far", 0.5, {}, "Letter", False, False, 10, 1),
+                              test_location_nyc, test_location_london)["order_id"]
+    
+    plan = agent.plan_routes(hub=(40.7128, -74.0060), time_budget_s=1)
+    
+    assert plan["success"]
+    assert plan["unassigned"] == [far]
+    routed = [stop for tour in plan["tours"] for stop in tour["stops"]]
+    assert sorted(routed) == sorted(order_ids)
+    assert len(plan["tours"]) < len(order_ids)
+    assert len({tour["drone_id"] for tour in plan["tours"]}) == len(plan["tours"])
+    for tour in plan["tours"]:
+        drone = agent.drone_fleet[tour["drone_id"]]
+        assert tour["load_kg"] <= drone.max_payload_kg
+        assert tour["distance_km"] <= drone.max_range_km
+
+
 # ============================================================================
 # INTEGRATION TESTS
 # ============================================================================
@@ -22,7 +22,10 @@ from drone_fleet_manager import (
     DeliveryPriority,
     FlightSimulator,
     IntelligentAssignmentEngine,
-    SelfHealingEngine
+    SelfHealingEngine,
+    FleetSnapshot,
+    SpatialGrid,
+    auction_assignment
 )
 
 
@@ -444,5 +447,153 @@ class TestIntegration:
         assert success2 is True
 
 
+# ============================================================================
+# PHASE 8: SPATIAL INDEX & BATCH ASSIGNMENT TESTS
+# ============================================================================
+
+class TestSpatialAssignment:
+    """Test grid lookups, vectorized scoring and batch matching."""
+
+    def test_vectorized_scores_match_scalar_scores(self):
+        """Test score_drones() agrees with score_drone_for_delivery()."""
+        import random
+        rng = random.Random(7)
+        engine = IntelligentAssignmentEngine()
+        drones = []
+        for i in range(200):
+            drone = VirtualDrone(f'd{i}', 'us_west', 37.7 + rng.uniform(-1, 1), -122.4 + rng.uniform(-1, 1),
+                                 status=rng.choice(list(DroneStatus)), battery_percent=rng.uniform(0, 100),
+                                 max_payload_kg=rng.choice([2.0, 3.0, 5.0, 10.0]))
+            drone.metrics.reliability_score = rng.choice([0.85, 0.92, 0.97, 1.0])
+            drones.append(drone)
+        snapshot = FleetSnapshot(drones)
+        for weather, wind in ((WeatherCondition.CLEAR, 5), (WeatherCondition.SEVERE, 30)):
+            region = Region('us_west', 'US West', 37.77, -122.42, 'PST', weather=weather, wind_speed_kmh=wind)
+            for priority in (DeliveryPriority.STANDARD, DeliveryPriority.VIP_RARE):
+                delivery = FleetDelivery('x', 'o', priority=priority, pickup_lat=37.8, pickup_lon=-122.3,
+                                         delivery_lat=37.9, delivery_lon=-122.0, package_weight_kg=2.5)
+                scores, _ = engine.score_drones(snapshot, delivery, region)
+                expected = [engine.score_drone_for_delivery(d, delivery, region, {}) for d in drones]
+                assert scores == pytest.approx(expected)
+
+    def test_grid_query_covers_radius_and_antimeridian(self):
+        """Test grid returns every point within the radius, across the date line."""
+        grid = SpatialGrid()
+        sim = FlightSimulator()
+        points = {'a': (0.0, 179.9), 'b': (0.0, -179.9), 'c': (0.2, 179.7), 'd': (5.0, 179.9)}
+        for key, (lat, lon) in points.items():
+            grid.insert(key, lat, lon)
+        found = set(grid.query(0.0, 179.95, 50))
+        within = {k for k, (lat, lon) in points.items() if sim.calculate_distance(0.0, 179.95, lat, lon) <= 50}
+        assert within == {'a', 'b', 'c'} and within <= found and 'd' not in found
+
+    def test_assign_delivery_matches_full_scan(self, fleet_manager):
+        """Test indexed assignment picks a top-scoring drone, the nearest on ties."""
+        fleet_manager.build_global_fleet(drones_per_region=20)
+        _, delivery_id = fleet_manager.submit_delivery('order_1', 52.52, 13.40, 52.50, 13.30, 1.0, 50)
+        delivery = fleet_manager.pending_deliveries[delivery_id]
+        region = fleet_manager.regions['eu_central']
+        best = max(fleet_manager.assignment_engine.score_drone_for_delivery(d, delivery, region, {})
+                   for d in fleet_manager.drones.values())
+
+        success, drone_id = fleet_manager.assign_delivery(delivery_id)
+        drone = fleet_manager.drones[drone_id]
+        assert success and drone.region_id == 'eu_central' and drone.status == DroneStatus.ASSIGNED
+        assert fleet_manager.assignment_engine.score_drone_for_delivery(drone, delivery, region, {}) == best
+
+    def test_auction_finds_optimal_matching(self):
+        """Test auction beats greedy on a contested drone."""
+        # Greedy would give drone 0 to bidder 0 (10) and leave bidder 1 with 1 -> 11; optimum is 9 + 8
+        assert auction_assignment([[(0, 10.0), (1, 9.0)], [(0, 8.0), (1, 1.0)]]) == {0: 1, 1: 0}
+        assert auction_assignment([[(0, 5.0)], [(0, 7.0)], []]) == {1: 0}
+
+    def test_batch_assigns_each_drone_once_vip_first(self, fleet_manager):
+        """Test batch mode fills every drone once and serves VIP deliveries first."""
+        fleet_manager.build_global_fleet(drones_per_region=4)
+        vip = []
+        for i in range(40):
+            rarity = 95 if i % 10 == 0 else 50
+            _, delivery_id = fleet_manager.submit_delivery(f'order_{i}', 37.77 + i * 0.001, -122.42, 37.80, -122.40,
+                                                           1.0, rarity)
+            if rarity > 90:
+                vip.append(delivery_id)
+
+        assigned = fleet_manager.assign_pending_batch()
+        assert len(assigned) == len(fleet_manager.drones) == 28
+        assert len(set(assigned.values())) == 28
+        assert set(vip) <= set(assigned)
+        assert len(fleet_manager.pending_deliveries) == 12
+        us_west = {d for d in assigned.values() if fleet_manager.drones[d].region_id == 'us_west'}
+        assert len(us_west) == 4
+
+
+# ============================================================================
+# PHASE 9: EVENT-DRIVEN WORKERS & INCREMENTAL STATS TESTS
+# ============================================================================
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestEventDrivenWorkers:
+    """Test queue-driven workers, incremental fleet stats and the dashboard writer."""
+
+    def test_idle_workers_pick_up_work_immediately(self, fleet_manager):
+        """Test a delivery submitted to idle workers is assigned without a polling delay."""
+        fleet_manager.build_global_fleet(drones_per_region=2)
+        fleet_manager.start_fleet_operations(num_workers=4)
+        time.sleep(0.2)
+
+        started = time.monotonic()
+        _, delivery_id = fleet_manager.submit_delivery('order_fast', 37.7749, -122.4194, 37.80, -122.40, 1.0, 50)
+        assert _wait_for(lambda: delivery_id not in fleet_manager.pending_deliveries)
+        assert time.monotonic() - started < 0.25  # the old loop slept 0.5s between passes
+
+    def test_waiting_delivery_assigned_when_drone_added(self, fleet_manager):
+        """Test a delivery no drone could take is retried as soon as one becomes available."""
+        fleet_manager.start_fleet_operations(num_workers=2)
+        _, delivery_id = fleet_manager.submit_delivery('order_wait', 52.52, 13.405, 52.50, 13.40, 1.0, 50)
+        assert _wait_for(lambda: delivery_id in fleet_manager._awaiting_drone)
+
+        drone_id = fleet_manager.add_drone('eu_central', 'premium')
+        assert _wait_for(lambda: delivery_id not in fleet_manager.pending_deliveries)
+        assert fleet_manager.drones[drone_id].assigned_delivery_id == delivery_id
+
+    def test_incremental_stats_match_full_recount(self, fleet_manager, test_dashboard_path):
+        """Test the incrementally kept summary equals a walk over the fleet after a workload."""
+        fleet_manager.dashboard_file = test_dashboard_path
+        fleet_manager.build_global_fleet(drones_per_region=3)
+        writes = []
+        original = fleet_manager._update_dashboard
+        fleet_manager._update_dashboard = lambda data: (writes.append(time.monotonic()), original(data))
+        fleet_manager.start_fleet_operations(num_workers=4)
+        started = time.monotonic()
+        for i in range(10):
+            fleet_manager.submit_delivery(f'order_{i}', 37.7749, -122.4194, 37.80, -122.40, 1.0, 50)
+        assert _wait_for(lambda: not fleet_manager.pending_deliveries and not fleet_manager.active_deliveries)
+        time.sleep(0.3)
+        fleet_manager.stop_fleet_operations()
+        elapsed = time.monotonic() - started
+
+        drones = list(fleet_manager.drones.values())
+        fleet = fleet_manager.monitor_fleet()['fleet']
+        expected = {}
+        for drone in drones:
+            expected[drone.status.value] = expected.get(drone.status.value, 0) + 1
+        assert fleet['status_distribution'] == expected
+        assert sum(fleet['battery_histogram'].values()) == len(drones)
+        assert fleet['average_battery_percent'] == round(sum(d.battery_percent for d in drones) / len(drones), 1)
+
+        # Snapshots are coalesced and every write leaves a complete file behind
+        assert 1 <= len(writes) <= 1 + elapsed // 1.0
+        with open(test_dashboard_path) as f:
+            assert json.load(f)['fleet_manager'] == 'test_fleet_01'
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '--tb=short'])
@@ -49,3 +49,80 @@ def test_executive_dashboard_route(client, tmp_path, monkeypatch):
     assert b'Executive Dashboard' in rv.data
     assert b'Revenue' in rv.data
     assert b'MRR' in rv.data
+
+
+def test_executive_summary_timings_and_section_cache(tmp_path, monkeypatch):
+    _seed_executive(tmp_path, monkeypatch)
+    from executive_dashboard import executive_summary, SECTION_TTLS
+
+    first = executive_summary(days=30)
+    second = executive_summary(days=30)
+
+    assert set(first['timings']) == set(SECTION_TTLS)
+    assert first['timings']['revenue']['status'] == 'ok'
+    assert second['timings']['revenue'] == {'ms': 0.0, 'status': 'cached'}
+    assert second['revenue'] == first['revenue']
+    assert first['total_ms'] >= 0
+
+
+def test_slow_section_times_out_with_defaults(tmp_path, monkeypatch):
+    _seed_executive(tmp_path, monkeypatch)
+    import executive_dashboard
+
+    monkeypatch.setattr(executive_dashboard, 'aggregate_voice_sentiment', lambda days: time.sleep(1.0) or {})
+    summary = executive_dashboard.executive_summary(days=30, use_cache=False, timeout=0.3,
+                                                    sections=['revenue', 'voice'])
+
+    assert summary['timings']['voice']['status'] == 'timeout'
+    assert summary['voice'] == executive_dashboard.SECTION_DEFAULTS['voice']
+    assert summary['revenue']['paid_orders'] == 3
+    assert set(summary) >= {'period_days', 'revenue', 'voice', 'timings', 'total_ms'}
+
+
+def test_snapshot_rows_match_per_customer_queries(tmp_path, monkeypatch):
+    _seed_executive(tmp_path, monkeypatch)
+    from executive_dashboard import DataSnapshot
+    from churn_prediction import churn_stats
+    from clv import clv_stats
+
+    snapshot = DataSnapshot()
+
+    assert churn_stats(orders=snapshot.orders) == churn_stats()
+    in_memory = clv_stats(orders=snapshot.orders, customers=snapshot.customers)
+    queried = clv_stats()
+    assert {k: v for k, v in in_memory.items() if k != 'generated_at'} == \
+        {k: v for k, v in queried.items() if k != 'generated_at'}
+
+
+def test_section_deadline_starts_when_the_section_starts(tmp_path, monkeypatch):
+    _seed_executive(tmp_path, monkeypatch)
+    from concurrent.futures import ThreadPoolExecutor
+    import executive_dashboard
+
+    # One worker: voice only starts once revenue is done, but still gets its full timeout
+    monkeypatch.setattr(executive_dashboard, '_EXECUTOR', ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(executive_dashboard, 'aggregate_revenue_metrics', lambda days: time.sleep(0.2) or {'slow': 1})
+    monkeypatch.setattr(executive_dashboard, 'aggregate_voice_sentiment', lambda days: time.sleep(0.2) or {'slow': 2})
+    summary = executive_dashboard.executive_summary(days=30, use_cache=False, timeout=0.3,
+                                                    sections=['revenue', 'voice'])
+
+    assert summary['timings']['revenue']['status'] == 'ok'
+    assert summary['timings']['voice']['status'] == 'ok'
+    assert summary['voice'] == {'slow': 2}
+
+
+def test_hung_section_is_joined_not_resubmitted(tmp_path, monkeypatch):
+    _seed_executive(tmp_path, monkeypatch)
+    import threading
+    import executive_dashboard
+
+    release, calls = threading.Event(), []
+    monkeypatch.setattr(executive_dashboard, 'aggregate_voice_sentiment',
+                        lambda days: calls.append(days) or release.wait(5) and {'analysis_count': 1})
+    try:
+        for _ in range(3):
+            summary = executive_dashboard.executive_summary(days=30, use_cache=False, timeout=0.1, sections=['voice'])
+            assert summary['timings']['voice']['status'] == 'timeout'
+        assert calls == [30]
+    finally:
+        release.set()
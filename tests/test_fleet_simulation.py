@@ -0,0 +1,56 @@
+"""Tests for the discrete-event fleet simulation (fleet_simulation)."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fleet_simulation import EventLoop, FleetSimulation, simulate
+
+SMALL = dict(deliveries=300, drones_per_region=4, horizon_s=3 * 3600)
+
+
+def test_event_loop_orders_by_time_then_schedule_order():
+    loop, seen = EventLoop(), []
+    loop.schedule(5.0, seen.append, "late")
+    loop.schedule(1.0, seen.append, "first")
+    loop.schedule(1.0, seen.append, "second")
+    loop.schedule_at(1.0, lambda: loop.schedule(0.0, seen.append, "chained"))
+
+    assert loop.run(until=2.0) == 4
+    assert seen == ["first", "second", "chained"]
+    assert loop.now == 2.0 and len(loop) == 1
+    loop.run()
+    assert seen[-1] == "late" and loop.now == 5.0
+
+
+def test_same_seed_reproduces_the_run():
+    first = simulate(seed=7, **SMALL)
+    second = simulate(seed=7, **SMALL)
+    other = simulate(seed=8, **SMALL)
+
+    assert first == second
+    assert first["records_digest"] != other["records_digest"]
+
+
+@pytest.mark.parametrize("policy", ["immediate", "batch"])
+def test_every_order_settles(policy):
+    sim = FleetSimulation(seed=3, policy=policy, **SMALL)
+    summary = sim.run()
+
+    assert summary["submitted"] == SMALL["deliveries"]
+    assert summary["completed"] + summary["failed"] == summary["submitted"]
+    assert summary["in_progress"] == summary["unserved"] == 0
+    assert sum(summary["failure_reasons"].values()) == summary["failed"]
+    assert len(sim.records) == summary["submitted"]
+    assert summary["kpis"]["total_deliveries"] == summary["submitted"]
+    assert summary["fleet"]["status_distribution"] == {"idle": summary["fleet"]["total_drones"]}
+    assert summary["simulated_hours"] >= 3
+
+
+def test_unknown_policy_rejected():
+    with pytest.raises(ValueError):
+        FleetSimulation(policy="random")
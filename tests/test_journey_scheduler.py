@@ -0,0 +1,230 @@
+"""Tests for the durable journey scheduler."""
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from journey_orchestration_engine import JourneyOrchestrator, StepType
+
+T0 = 1_800_000_000.0
+HOUR = 3600.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = T0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSender:
+    """Records one entry per (channel, batch); fails the recipients in `failing` once each."""
+
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+        self.sent = threading.Event()
+
+    def __call__(self, channel, messages):
+        self.calls.append((channel, sorted(m["customer_id"] for m in messages)))
+        results = []
+        for m in messages:
+            results.append(m["customer_id"] not in self.failing)
+            self.failing.discard(m["customer_id"])
+        self.sent.set()
+        return results
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "journeys.db"))
+    from utils import init_db
+    init_db()
+    orchestrator = JourneyOrchestrator()
+    journey_id = orchestrator.builder.create_journey("Cart", "Recovery", {"type": "cart", "segment": "all"})
+    orchestrator.builder.add_step(journey_id, StepType.EMAIL, {"subject": "You left something", "content": "..."})
+    orchestrator.builder.add_step(journey_id, StepType.WAIT, {"hours": 24})
+    orchestrator.builder.add_step(journey_id, StepType.DECISION, {"condition": {"key": "vip", "value": True}})
+    orchestrator.builder.add_step(journey_id, StepType.SMS, {"message": "Use code SAVE10"})
+    orchestrator.builder.publish_journey(journey_id)
+    return orchestrator
+
+
+def make_scheduler(orchestrator, sender, clock, **kwargs):
+    from journey_scheduler import JourneyScheduler
+    return JourneyScheduler(orchestrator, sender=sender, clock=clock, **kwargs)
+
+
+def customer(i):
+    return f"c{i}", {"email": f"c{i}@example.com", "phone": f"+1555000{i:04d}"}, None
+
+
+def test_waits_wake_the_journey_and_messages_are_batched(orchestrator):
+    clock, sender = Clock(), RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    assert scheduler.enroll_many("journey_0", [customer(i) for i in range(5)]) == 5
+    assert scheduler.enroll("journey_0", "c0", customer(0)[1]) == (False, "Customer already enrolled")
+
+    first = scheduler.run_due()
+    assert sender.calls == [("email", ["c0", "c1", "c2", "c3", "c4"])]
+    assert first["sent_email"] == 5 and first["batches"] == 1
+
+    clock.now = T0 + 23 * HOUR
+    assert scheduler.run_due() == {}
+    assert scheduler.next_wakeup() == pytest.approx(HOUR / 2)  # next refill; the SMS is beyond the horizon
+
+    clock.now = T0 + 24 * HOUR
+    last = scheduler.run_due()
+    assert sender.calls[1] == ("sms", ["c0", "c1", "c2", "c3", "c4"])
+    assert last["completed"] == 5
+    assert orchestrator.builder.get_journey_stats("journey_0")["completed"] == 5
+    assert scheduler.hot_count == 0
+
+
+def test_pending_steps_recovered_after_restart(orchestrator):
+    clock, sender = Clock(), RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock, horizon=60, batch_size=2)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(3)])
+    scheduler.enroll("journey_0", "late", customer(9)[1], start_at=T0 + 48 * HOUR)
+    assert scheduler.run_due()["batches"] == 2  # batch_size=2
+    assert scheduler.hot_count == 0  # the 24h waits live only in the table
+
+    clock.now = T0 + 25 * HOUR
+    restarted = make_scheduler(orchestrator, sender, clock)
+    assert restarted.run_due()["sent_sms"] == 3
+    assert [c for c in sender.calls if c[0] == "sms"] == [("sms", ["c0", "c1", "c2"])]
+
+    clock.now = T0 + 48 * HOUR
+    assert restarted.run_due()["sent_email"] == 1
+
+
+def test_failed_send_retried_and_pause_resume(orchestrator):
+    from journey_scheduler import RETRY_DELAY
+    clock, sender = Clock(), RecordingSender(failing={"c1"})
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(3)])
+    assert scheduler.pause("journey_0", "c2")
+
+    assert scheduler.run_due() == {"sent_email": 1, "retried": 1, "advanced": 2, "batches": 1}
+
+    clock.now = T0 + RETRY_DELAY
+    assert scheduler.run_due()["sent_email"] == 1
+    assert sender.calls[-1] == ("email", ["c1"])
+
+    assert scheduler.resume("journey_0", "c2")
+    assert not scheduler.resume("journey_0", "c2")
+    scheduler.run_due()
+    assert sender.calls[-1] == ("email", ["c2"])
+
+
+def test_worker_thread_wakes_for_new_enrollments(orchestrator):
+    import time
+    sender = RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, time.time)
+    scheduler.start()
+    try:
+        assert not sender.sent.wait(0.2)
+        scheduler.enroll("journey_0", "now", customer(1)[1])
+        assert sender.sent.wait(5)
+    finally:
+        scheduler.stop()
+    assert sender.calls == [("email", ["now"])]
+
+
+def test_enrollments_follow_their_stored_definition_after_restart(orchestrator):
+    clock, sender = Clock(), RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(2)])
+    scheduler.run_due()
+
+    # After a restart the builder hands "journey_0" to a different journey
+    other = JourneyOrchestrator()
+    other.builder.create_journey("Welcome", "Other", {"type": "signup", "segment": "all"})
+    other.builder.add_step("journey_0", StepType.EMAIL, {"subject": "Hi"})
+    other.builder.publish_journey("journey_0")
+
+    clock.now = T0 + 24 * HOUR
+    restarted = make_scheduler(other, sender, clock)
+    assert restarted.run_due()["sent_sms"] == 2
+    assert sender.calls[-1] == ("sms", ["c0", "c1"])
+    assert other.builder.get_journey_stats("journey_0")["completed"] == 0
+
+
+def test_unresolvable_enrollments_fail_after_bounded_retries(orchestrator):
+    from models import get_session, JourneyEnrollment
+    from journey_scheduler import MAX_RESOLVE_ATTEMPTS, RETRY_DELAY
+    clock, sender = Clock(), RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(2)])
+    session = get_session()
+    session.query(JourneyEnrollment).filter_by(id="journey_0:c0").update({"definition_id": "journey_9@gone"})
+    session.query(JourneyEnrollment).filter_by(id="journey_0:c1").update({"step": 99})
+    session.commit()
+    session.close()
+
+    for attempt in range(1, MAX_RESOLVE_ATTEMPTS):
+        assert scheduler.run_due() == {"retried": 2, "advanced": 2, "batches": 1}
+        clock.now = T0 + attempt * RETRY_DELAY
+    assert scheduler.run_due() == {"failed": 2, "advanced": 2, "batches": 1}
+    clock.now += RETRY_DELAY
+    assert scheduler.run_due() == {}
+    assert sender.calls == []
+
+    session = get_session()
+    try:
+        assert {row.status for row in session.query(JourneyEnrollment)} == {"failed"}
+    finally:
+        session.close()
+
+
+class RaisingSender(RecordingSender):
+    """Raises on its first `raises` calls, then records like RecordingSender."""
+
+    def __init__(self, raises=1):
+        super().__init__()
+        self.raises = raises
+
+    def __call__(self, channel, messages):
+        if self.raises:
+            self.raises -= 1
+            raise ConnectionError("provider down")
+        return super().__call__(channel, messages)
+
+
+def test_raising_sender_retries_the_channel(orchestrator):
+    from journey_scheduler import RETRY_DELAY
+    clock, sender = Clock(), RaisingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(3)])
+
+    assert scheduler.run_due() == {"retried": 3, "advanced": 3, "batches": 1}
+    clock.now = T0 + RETRY_DELAY
+    assert scheduler.run_due()["sent_email"] == 3
+    assert sender.calls == [("email", ["c0", "c1", "c2"])]
+
+
+def test_failed_batch_write_is_retried(orchestrator, monkeypatch):
+    from journey_scheduler import RETRY_DELAY
+    clock, sender = Clock(), RecordingSender()
+    scheduler = make_scheduler(orchestrator, sender, clock)
+    scheduler.enroll_many("journey_0", [customer(i) for i in range(3)])
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(scheduler, "_load_definitions", broken)
+    assert scheduler.run_due() == {"deferred": 3, "batches": 1}
+    monkeypatch.delattr(scheduler, "_load_definitions")
+
+    clock.now = T0 + RETRY_DELAY / 2
+    assert scheduler.run_due() == {}
+    clock.now = T0 + RETRY_DELAY
+    assert scheduler.run_due()["sent_email"] == 3
+    clock.now = T0 + RETRY_DELAY + 24 * HOUR
+    assert scheduler.run_due()["completed"] == 3
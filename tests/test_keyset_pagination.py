@@ -0,0 +1,159 @@
+"""Tests for keyset pagination and streaming exports."""
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from cache_layer import cache
+from keyset_pagination import cached_count, decode_cursor, encode_cursor, keyset_page
+from streaming_export import csv_chunks, ndjson_chunks
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "pages.db"))
+    conn.execute("CREATE TABLE items (id TEXT PRIMARY KEY, kind TEXT, created_at REAL)")
+    rows = []
+    for i in range(23):
+        # Ties on created_at and a few NULLs exercise the (sort value, id) tiebreak
+        created = None if i % 7 == 0 else float(i // 3)
+        rows.append((f"i{i:02d}", "a" if i % 2 else "b", created))
+    conn.executemany("INSERT INTO items VALUES (?, ?, ?)", rows)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def _reference(conn, filters):
+    where = " AND ".join(f"{c} = ?" for c in filters)
+    sql = "SELECT id, kind, created_at FROM items " + (f"WHERE {where} " if where else "")
+    return conn.execute(sql + "ORDER BY created_at DESC, id DESC", list(filters.values())).fetchall()
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    assert decode_cursor(encode_cursor(12.5, "abc")) == (12.5, "abc")
+    assert decode_cursor(encode_cursor(None, "x")) == (None, "x")
+    for bad in ["not-a-cursor", encode_cursor(1, "a")[:-3], "W251bGwsIDFd"]:
+        with pytest.raises(ValueError):
+            decode_cursor(bad)
+
+
+@pytest.mark.parametrize("filters", [{}, {"kind": "a"}])
+def test_walking_forward_and_back_matches_offset_order(conn, filters):
+    expected = _reference(conn, filters)
+    columns = ["id", "kind", "created_at"]
+
+    pages, cursor = [], None
+    while True:
+        page = keyset_page(conn, "items", columns, "created_at", filters, 4, cursor=cursor)
+        pages.append(page)
+        if not page["next_cursor"]:
+            break
+        cursor = page["next_cursor"]
+
+    assert [row for page in pages for row in page["rows"]] == expected
+    assert pages[0]["prev_cursor"] is None
+
+    # Walk back from the last page using the prev cursors
+    back = pages[-1]
+    for earlier in reversed(pages[:-1]):
+        back = keyset_page(conn, "items", columns, "created_at", filters, 4,
+                           cursor=back["prev_cursor"], direction="prev")
+        assert back["rows"] == earlier["rows"]
+    assert back["prev_cursor"] is None
+
+
+def test_legacy_offset_matches_keyset_page(conn):
+    columns = ["id", "kind", "created_at"]
+    second = keyset_page(conn, "items", columns, "created_at", {}, 5, offset=5)
+
+    assert second["rows"] == _reference(conn, {})[5:10]
+    assert second["prev_cursor"] and second["next_cursor"]
+
+
+def test_count_is_cached_until_expiry(conn, tmp_path):
+    cache.clear_pattern("cache:count:*")
+    assert cached_count(conn, str(tmp_path), "items", {"kind": "b"}) == 12
+
+    conn.execute("DELETE FROM items WHERE kind = 'b'")
+    assert cached_count(conn, str(tmp_path), "items", {"kind": "b"}) == 12
+    cache.clear_pattern("cache:count:*")
+    assert cached_count(conn, str(tmp_path), "items", {"kind": "b"}) == 0
+
+
+def test_chunked_csv_and_ndjson():
+    rows = [{"a": i, "b": f"x{i}"} for i in range(7)]
+
+    csv_parts = list(csv_chunks(["a", "b"], iter(rows), header=["A", "B"], chunk_rows=3))
+    ndjson_parts = list(ndjson_chunks(iter(rows), chunk_rows=3))
+
+    assert len(csv_parts) == 3
+    assert "".join(csv_parts).splitlines() == ["A,B"] + [f"{i},x{i}" for i in range(7)]
+    assert len(ndjson_parts) == 3
+    assert [json.loads(line) for line in "".join(ndjson_parts).splitlines()] == rows
+
+
+def test_recommendations_export_streams_csv(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "export.db"))
+    from utils import init_db
+    init_db()
+    with client.session_transaction() as sess:
+        sess["admin_authenticated"] = True
+
+    resp = client.get("/api/recommendations/export")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    assert resp.get_data(as_text=True).splitlines()[0].startswith("Customer Receipt,")
+    assert client.get("/api/recommendations/export?format=xml").status_code == 400
+
+
+def test_init_db_adds_keyset_indexes_to_existing_tables(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    legacy = sqlite3.connect(str(path))
+    legacy.execute("CREATE TABLE orders (id TEXT PRIMARY KEY, amount INTEGER, currency TEXT, receipt TEXT, "
+                   "product TEXT, status TEXT, created_at REAL, paid_at REAL)")
+    legacy.commit()
+    legacy.close()
+    monkeypatch.setenv("DATA_DB", str(path))
+    from utils import init_db
+    init_db()
+
+    conn = sqlite3.connect(str(path))
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(orders)")}
+    conn.close()
+    assert "ix_orders_created_at_id" in indexes
+
+
+def test_bad_cursor_gets_a_fixed_message(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "cursor.db"))
+    from utils import init_db
+    init_db()
+    with client.session_transaction() as sess:
+        sess["admin_authenticated"] = True
+
+    resp = client.get("/admin/orders?cursor=not-a-cursor")
+    assert resp.status_code == 400
+    assert resp.get_data(as_text=True) == "Invalid page or cursor"
+
+
+def test_recommendations_iterate_in_batches(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "recs.db"))
+    from utils import init_db
+    from models import get_session, Customer
+    import recommendations
+    init_db()
+    session = get_session()
+    session.add_all([Customer(receipt=f"r{i:02d}", order_count=1) for i in range(7)])
+    session.commit()
+    session.close()
+    monkeypatch.setattr(recommendations, "generate_recommendations",
+                        lambda receipt, limit: type("R", (), {"to_dict": lambda self: {"receipt": receipt}})())
+
+    receipts = [r for r, _ in recommendations.iter_recommendations_for_all_customers(batch_size=3)]
+    assert receipts == [f"r{i:02d}" for i in range(7)]
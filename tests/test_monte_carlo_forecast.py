@@ -0,0 +1,83 @@
+"""Tests for the vectorized Monte Carlo forecast engine and its callers."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from monte_carlo_forecast import (
+    cached_forecast, clear_forecast_cache, quantile_bands, series_hash, simulate_paths,
+)
+from quantum_optimization_engine import QuantumOptimizationEngine
+
+
+def test_paths_match_step_by_step_reference():
+    paths = simulate_paths(100.0, 6, 5, growth=1.01, drift=[0, 1, 2, 3, 4], volatility=0.1,
+                           seasonal_amplitude=0.1, floor_ratio=0.7, seed=4)
+
+    shocks = np.random.default_rng(4).standard_normal((5, 6)) * 0.1
+    for row in range(5):
+        level = 100.0
+        for t in range(6):
+            following = level * (1.01 + np.sin(t * np.pi / 4) * 0.1 + shocks[row, t]) + row
+            level = max(following, level * 0.7)
+            assert paths[row, t] == pytest.approx(level)
+
+
+def test_seeded_paths_are_reproducible_and_floored():
+    a = simulate_paths(50.0, 30, 1000, volatility=0.5, floor_ratio=0.0, seed=7)
+    b = simulate_paths(50.0, 30, 1000, volatility=0.5, floor_ratio=0.0, seed=7)
+
+    assert a.shape == (1000, 30)
+    assert np.array_equal(a, b)
+    assert a.min() >= 0.0
+    assert not np.array_equal(a, simulate_paths(50.0, 30, 1000, volatility=0.5, seed=8))
+
+
+def test_quantile_bands_are_ordered():
+    bands = quantile_bands(simulate_paths(10.0, 12, 2000, volatility=0.2, seed=1), decimals=2)
+
+    assert list(bands) == ["p5", "p25", "p50", "p75", "p95"]
+    for t in range(12):
+        column = [bands[name][t] for name in bands]
+        assert column == sorted(column)
+    assert quantile_bands(np.empty((0, 0)))["p50"] == []
+
+
+def test_cache_keyed_on_series_hash():
+    clear_forecast_cache("test")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    first = cached_forecast("test", [1, 2, 3], {"p": 1}, compute)
+    again = cached_forecast("test", [1, 2, 3], {"p": 1}, compute)
+    changed = cached_forecast("test", [1, 2, 4], {"p": 1}, compute)
+
+    assert (first, again) == ({"value": 1, "cached": False}, {"value": 1, "cached": True})
+    assert changed == {"value": 2, "cached": False}
+    assert series_hash([1, 2, 3], p=1) != series_hash([1, 2, 3], p=2)
+    clear_forecast_cache("test")
+
+
+def test_superposition_forecast_returns_bands_for_all_universes():
+    engine = QuantumOptimizationEngine()
+    history = [{"value": 100 + 3 * i} for i in range(24)]
+
+    result = engine.superposition_forecast(history, 12, num_paths=2000, seed=3, use_cache=False)
+    repeat = engine.superposition_forecast(history, 12, num_paths=2000, seed=3, use_cache=False)
+
+    assert len(result["superposition_forecasts"]) == 8
+    assert sum(s["paths"] for s in result["superposition_forecasts"]) == result["simulated_paths"]
+    assert result["simulated_paths"] == pytest.approx(2000, abs=8)
+    assert result["expected_forecast"] == repeat["expected_forecast"]
+    assert all(len(band) == 12 for band in result["quantile_bands"].values())
+    assert result["uncertainty_range"]["lower_bound"] == result["quantile_bands"]["p5"]
+    assert 0 < result["quantum_confidence"] <= 95
+    assert engine.superposition_forecast([]) == {"forecasts": [], "collapse_strategy": "insufficient_data"}
@@ -0,0 +1,146 @@
+"""Tests for cached RBAC checks and buffered usage metering in multi_tenant_system."""
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import multi_tenant_system as mts
+from multi_tenant_system import MultiTenantManager, Permission, WorkspaceMember
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_DB", str(tmp_path / "tenants.db"))
+    from utils import init_db
+    init_db()
+    mts.permission_cache.clear()
+    mts.usage_meter.reset()
+    monkeypatch.setattr(mts.usage_meter, "flush_interval", 3600)
+    manager = MultiTenantManager()
+    workspace = manager.create_workspace("Acme", "owner-1", plan="free")["workspace"]
+    yield manager, workspace["id"]
+    mts.usage_meter.reset()
+
+
+class _NoDatabase:
+    def __getattr__(self, name):
+        raise AssertionError("permission check hit the database")
+
+
+def test_compiled_masks_match_role_table():
+    for role, permissions in mts.ROLE_PERMISSIONS.items():
+        mask = mts.compile_permissions(role.value)
+        assert {p for p in Permission if mask & mts.PERMISSION_BITS[p]} == permissions
+
+    custom = mts.compile_permissions("viewer", json.dumps(["data:export", "bogus"]))
+    assert custom & mts.PERMISSION_BITS[Permission.DATA_EXPORT]
+    assert mts.compile_permissions("nobody") == 0
+
+
+def test_unknown_custom_permission_skips_only_itself():
+    viewer = mts.compile_permissions("viewer")
+    mixed = mts.compile_permissions("viewer", json.dumps(["bogus", "data:export", 7, ["x"], "workspace:billing"]))
+    assert mixed == viewer | mts.PERMISSION_BITS[Permission.DATA_EXPORT] | mts.PERMISSION_BITS[Permission.WORKSPACE_BILLING]
+    assert mts.compile_permissions("viewer", "not json") == viewer
+    assert mts.compile_permissions("viewer", json.dumps({"data:export": True})) == viewer
+
+
+def test_repeat_checks_are_served_from_cache(manager):
+    manager, ws = manager
+    assert manager.check_permission(ws, "owner-1", Permission.WORKSPACE_DELETE)
+    assert not manager.check_permission(ws, "stranger", Permission.DATA_READ)
+
+    cached = MultiTenantManager()
+    cached._session = _NoDatabase()
+    assert cached.check_permission(ws, "owner-1", Permission.DATA_EXPORT)
+    assert not cached.check_permission(ws, "stranger", Permission.DATA_READ)
+
+
+def test_invite_role_change_and_removal_invalidate(manager):
+    manager, ws = manager
+    assert not manager.check_permission(ws, "user-2", Permission.DATA_READ)  # cached as non-member
+
+    assert manager.invite_member(ws, "owner-1", "user-2", role="viewer")["success"]
+    assert manager.check_permission(ws, "user-2", Permission.DATA_READ)
+    assert not manager.check_permission(ws, "user-2", Permission.DATA_WRITE)
+
+    assert manager.update_member_role(ws, "owner-1", "user-2", "admin")["success"]
+    assert manager.check_permission(ws, "user-2", Permission.DATA_WRITE)
+
+    # Direct edits through any session are picked up as well
+    member = manager.session.query(WorkspaceMember).filter_by(workspace_id=ws, user_id="user-2").one()
+    member.custom_permissions = json.dumps(["workspace:billing"])
+    manager.session.commit()
+    assert manager.check_permission(ws, "user-2", Permission.WORKSPACE_BILLING)
+
+    assert manager.remove_member(ws, "owner-1", "user-2")["success"]
+    assert not manager.check_permission(ws, "user-2", Permission.DATA_READ)
+    assert not manager.update_member_role(ws, "user-2", "owner-1", "viewer")["success"]
+
+
+def test_usage_is_buffered_and_flushed_in_batches(manager):
+    manager, ws = manager
+    for _ in range(999):
+        assert manager.track_usage(ws, "api_calls")["over_limit"] is False
+    manager.track_usage(ws, "ai_requests", 3)
+
+    stored = manager.session.query(mts.WorkspaceUsage).filter_by(workspace_id=ws).all()
+    assert sum(u.api_calls or 0 for u in stored) == 0
+
+    over = manager.track_usage(ws, "api_calls")
+    assert over == {"success": True, "over_limit": True, "current": 1000, "limit": 1000}
+
+    info = manager.get_workspace_info(ws)
+    assert info["usage"]["api_calls"] == 1000
+    assert info["usage"]["ai_requests"] == 3
+    assert manager.track_usage("missing", "api_calls")["success"] is False
+
+
+def test_removal_reaches_other_processes_through_the_version(manager, monkeypatch):
+    manager, ws = manager
+    assert manager.invite_member(ws, "owner-1", "user-2", role="admin")["success"]
+    here = mts.permission_cache
+    elsewhere = mts.PermissionCache(version_ttl=0)  # another worker's cache
+
+    monkeypatch.setattr(mts, "permission_cache", elsewhere)
+    assert manager.check_permission(ws, "user-2", Permission.DATA_WRITE)
+
+    monkeypatch.setattr(mts, "permission_cache", here)
+    assert manager.update_member_role(ws, "owner-1", "user-2", "viewer")["success"]
+
+    monkeypatch.setattr(mts, "permission_cache", elsewhere)
+    assert not manager.check_permission(ws, "user-2", Permission.DATA_WRITE)
+    assert manager.check_permission(ws, "user-2", Permission.DATA_READ)
+
+
+def test_flush_writes_outside_the_lock(manager, monkeypatch):
+    import threading
+    manager, ws = manager
+    manager.track_usage(ws, "api_calls", 5)
+    meter = mts.usage_meter
+    open_session = mts._meter_session
+    free_during_write = []
+
+    class Probe:
+        def __init__(self, session):
+            self._session = session
+
+        def execute(self, *args, **kwargs):
+            thread = threading.Thread(target=lambda: free_during_write.append(
+                meter._lock.acquire(timeout=1) and (meter._lock.release() or True)))
+            thread.start()
+            thread.join()
+            return self._session.execute(*args, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self._session, name)
+
+    monkeypatch.setattr(mts, "_meter_session", lambda url: Probe(open_session(url)))
+    assert meter.flush() == 1
+    assert free_during_write == [True]
+    assert manager.get_workspace_info(ws)["usage"]["api_calls"] == 5
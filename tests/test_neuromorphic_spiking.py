@@ -0,0 +1,159 @@
+"""Tests for the array-backed spiking network engine."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from neuromorphic_spiking import LiquidStateMachine, Spike, SpikingNeuralNetwork
+
+
+def _random_network(seed, size=40, density=0.15):
+    rng = np.random.default_rng(seed)
+    net = SpikingNeuralNetwork()
+    ids = [net.add_neuron(params={"threshold": rng.uniform(0.8, 1.2), "leak_rate": rng.uniform(0.05, 0.5)})
+           for _ in range(size)]
+    for i, pre in enumerate(ids):
+        for j, post in enumerate(ids):
+            if i != j and rng.random() < density:
+                net.add_synapse(pre, post, rng.uniform(-0.4, 0.9), delay=rng.choice([0.0001, 0.0005, 0.001, 0.002]))
+    for nid in ids:
+        net.neurons[nid].membrane_potential = rng.uniform(0.0, 1.5)
+    return net, ids
+
+
+def _reference_simulate(net, ids, duration, dt):
+    """Per-neuron loop with a per-step inbox, one synapse at a time."""
+    num_steps = int(duration / dt)
+    state = {nid: [net.neurons[nid].membrane_potential, None] for nid in ids}
+    outgoing = {nid: [] for nid in ids}
+    for (pre, post), synapse in net.synapses.items():
+        outgoing[pre].append((post, synapse["weight"], max(1, int(round(synapse["delay"] / dt)))))
+    inbox = {}
+    spikes = {nid: [] for nid in ids}
+    for step in range(num_steps):
+        t = step * dt
+        for post, weight in inbox.pop(step, []):
+            state[post][0] += weight
+        for nid in ids:
+            neuron = net.neurons[nid]
+            v, last = state[nid]
+            if last is not None and t - last < neuron.refractory_period:
+                continue
+            v *= 1 - neuron.leak_rate * dt
+            if v >= neuron.threshold:
+                spikes[nid].append(t)
+                v, state[nid][1] = neuron.reset_potential, t
+                for post, weight, delay in outgoing[nid]:
+                    inbox.setdefault(step + delay, []).append((post, weight))
+            state[nid][0] = v
+    return spikes, {nid: s[0] for nid, s in state.items()}
+
+
+def _reference_stdp_delta(pre_spikes, post_spikes, window):
+    delta_w = 0.0
+    for pre_time in pre_spikes:
+        for post_time in post_spikes:
+            dt = post_time - pre_time
+            if 0 < dt < window:
+                delta_w += 0.01 * np.exp(-dt / window)
+            elif -window < dt < 0:
+                delta_w -= 0.01 * np.exp(dt / window)
+    return delta_w
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_simulate_matches_per_neuron_reference(seed):
+    net, ids = _random_network(seed)
+    expected_spikes, expected_potential = _reference_simulate(net, ids, duration=0.02, dt=0.0001)
+
+    result = net.simulate(duration=0.02, dt=0.0001)
+
+    assert sum(map(len, expected_spikes.values())) > len(ids)
+    for nid in ids:
+        assert result["spike_times"][nid] == pytest.approx(expected_spikes[nid])
+        assert net.neurons[nid].membrane_potential == pytest.approx(expected_potential[nid])
+    assert result["total_spikes"] == sum(map(len, expected_spikes.values()))
+
+
+def test_spike_arrives_after_synaptic_delay():
+    net = SpikingNeuralNetwork()
+    a, b = net.add_neuron(), net.add_neuron()
+    net.add_synapse(a, b, weight=1.5, delay=0.003)
+    net.neurons[a].membrane_potential = 2.0
+
+    result = net.simulate(duration=0.01, dt=0.0001)
+
+    assert result["spike_times"][a] == [0.0]
+    assert result["spike_times"][b] == [pytest.approx(0.003)]
+    assert [s.neuron_id for s in net.spike_train] == [a, b]
+
+
+def test_apply_stdp_matches_pairwise_rule():
+    rng = np.random.default_rng(5)
+    net = SpikingNeuralNetwork()
+    ids = [net.add_neuron() for _ in range(12)]
+    for pre in ids:
+        for post in ids:
+            if pre != post and rng.random() < 0.5:
+                net.add_synapse(pre, post, rng.uniform(0.0, 2.0))
+    spikes = {nid: np.sort(rng.uniform(0, 0.2, rng.integers(0, 15))).tolist() for nid in ids}
+    for nid, times in spikes.items():
+        for t in times:
+            net.spike_train.append(Spike(nid, t))
+    before = {key: synapse["weight"] for key, synapse in net.synapses.items()}
+
+    net.apply_stdp(learning_window=0.02, max_pairs=7)
+
+    for (pre, post), weight in before.items():
+        expected = np.clip(weight + _reference_stdp_delta(spikes[pre], spikes[post], 0.02), 0.0, 2.0)
+        assert net.synapses[(pre, post)]["weight"] == pytest.approx(expected, abs=1e-12)
+
+
+def test_online_stdp_follows_spike_order():
+    net = SpikingNeuralNetwork()
+    a, b = net.add_neuron(), net.add_neuron()
+    net.add_synapse(a, b, weight=1.5, delay=0.002)
+    net.add_synapse(b, a, weight=0.5, delay=0.002)
+    net.neurons[a].membrane_potential = 2.0
+
+    net.simulate(duration=0.01, dt=0.0001, stdp=True)
+
+    assert net.synapses[(a, b)]["weight"] > 1.5
+    assert net.synapses[(b, a)]["weight"] < 0.5
+
+
+def test_synapse_mapping_behaves_like_dict():
+    net = SpikingNeuralNetwork()
+    a, b, c = (net.add_neuron() for _ in range(3))
+    net.add_synapse(a, b, 0.3)
+    net.add_synapse(a, b, 0.7)
+    net.add_synapses([b, c], [c, a], weight=[0.1, 0.2], delay=0.004)
+
+    assert len(net.synapses) == 3
+    assert (a, b) in net.synapses and (b, a) not in net.synapses
+    assert dict(net.synapses[(a, b)]) == {"weight": 0.7, "delay": 0.001, "plasticity": "STDP"}
+    net.synapses[(c, a)]["weight"] += 0.5
+    assert net.synapses[(c, a)]["weight"] == pytest.approx(0.7)
+    assert list(net.synapses) == [(a, b), (b, c), (c, a)]
+
+    net.add_synapses(np.array([0]), np.array([2]))
+    assert net.synapses[(a, c)]["weight"] == 0.5
+    with pytest.raises(IndexError):
+        net.add_synapses(np.array([0]), np.array([9]))
+
+
+def test_liquid_state_machine_runs_on_sparse_engine():
+    np.random.seed(0)
+    lsm = LiquidStateMachine(reservoir_size=200)
+    lsm.add_input("sensor")
+
+    result = lsm.process_input([0.0], duration=0.02)
+
+    assert result["reservoir_spikes"] > 0
+    assert result["reservoir_state"].shape == (201,)
+    assert 0.05 < len(lsm.reservoir.synapses) / (200 * 199) < 0.15
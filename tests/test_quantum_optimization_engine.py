@@ -0,0 +1,184 @@
+"""Tests for quantum_optimization_engine: sparse entanglement clustering and the portfolio annealer."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from quantum_optimization_engine import QuantumOptimizationEngine, _union_find_components
+
+
+def _customers(seed, n, catalog=25, days=20):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'purchases': [f"sku{p}" for p in rng.choice(catalog, rng.integers(0, 5), replace=False)],
+            'last_purchase_time': float(rng.uniform(0, 86400 * days)),
+        }
+        for _ in range(n)
+    ]
+
+
+def _dense_reference(engine, customers, threshold):
+    """The original O(n^2) matrix + BFS implementation."""
+    n = len(customers)
+    matrix = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            matrix[i][j] = matrix[j][i] = engine._calculate_behavior_similarity(customers[i], customers[j])
+
+    visited, clusters = set(), []
+    for i in range(n):
+        if i in visited:
+            continue
+        cluster, queue = [i], [i]
+        visited.add(i)
+        while queue:
+            current = queue.pop(0)
+            for j in range(n):
+                if j not in visited and matrix[current][j] >= threshold:
+                    cluster.append(j)
+                    queue.append(j)
+                    visited.add(j)
+        if len(cluster) >= 2:
+            avg = np.mean([matrix[a][b] for a in cluster for b in cluster if a < b])
+            clusters.append((sorted(cluster), avg))
+    clusters.sort(key=lambda c: len(c[0]), reverse=True)
+    strength = min(np.mean(matrix[matrix > 0]) * 100, 100)
+    return matrix, clusters, strength
+
+
+@pytest.mark.parametrize("threshold", [0.7, 0.5, 0.25])
+def test_matches_dense_implementation(threshold):
+    engine = QuantumOptimizationEngine()
+    customers = _customers(0, 150)
+    matrix, expected_clusters, expected_strength = _dense_reference(engine, customers, threshold)
+
+    result = engine.detect_customer_entanglement(customers, threshold=threshold)
+
+    assert result['entanglement_strength'] == pytest.approx(expected_strength)
+    assert [(c['customer_ids'], c['avg_correlation']) for c in result['entangled_clusters']] == [
+        (ids, pytest.approx(avg)) for ids, avg in expected_clusters
+    ]
+    edges = {(e['source'], e['target']): e['correlation'] for e in result['correlation_edges']}
+    i, j = np.nonzero(np.triu(matrix >= threshold, k=1))
+    assert set(edges) == set(zip(i.tolist(), j.tolist()))
+    assert all(edges[key] == pytest.approx(matrix[key]) for key in edges)
+    assert 'correlation_matrix' not in result
+
+
+def test_minhash_candidates_recover_exact_edges():
+    engine = QuantumOptimizationEngine()
+    customers = _customers(1, 3000, catalog=120, days=60)
+    for group in range(40):
+        basket = [f"bundle{group}_{k}" for k in range(4)]
+        for member in range(5):
+            customers[group * 5 + member]['purchases'] = basket + [f"extra{member}"] * (member % 2)
+
+    exact = engine.detect_customer_entanglement(customers, max_exact_pairs=10 ** 9)
+    approximate = engine.detect_customer_entanglement(customers, max_exact_pairs=0)
+
+    assert exact['candidate_method'] == 'exact'
+    assert approximate['candidate_method'] == 'minhash_lsh'
+    exact_edges = {(e['source'], e['target']) for e in exact['correlation_edges']}
+    found = {(e['source'], e['target']) for e in approximate['correlation_edges']}
+    assert found <= exact_edges
+    assert len(found) >= 0.95 * len(exact_edges)
+    assert approximate['entanglement_strength'] == pytest.approx(exact['entanglement_strength'], rel=0.05)
+
+
+def test_proximity_sum_spans_distant_blocks():
+    engine = QuantumOptimizationEngine()
+    rng = np.random.default_rng(2)
+    times = np.concatenate([rng.uniform(0, 3, 40), rng.uniform(600, 603, 40), [1500.0]]) * 86400
+
+    diffs = np.abs(times[:, None] - times[None, :])
+    expected = np.exp(-diffs / 86400)[np.triu_indices(len(times), k=1)].sum()
+
+    assert engine._proximity_sum(times, block_days=2.0) == pytest.approx(expected)
+    assert engine._proximity_sum(np.array([])) == 0.0
+
+
+def test_union_find_labels_components_by_smallest_member():
+    edges_i = np.array([5, 1, 7, 3])
+    edges_j = np.array([2, 4, 8, 5])
+
+    labels = _union_find_components(9, edges_i, edges_j)
+
+    assert labels.tolist() == [0, 1, 2, 2, 1, 2, 6, 7, 7]
+
+
+def test_empty_and_single_customer():
+    engine = QuantumOptimizationEngine()
+
+    assert engine.detect_customer_entanglement([]) == {'entangled_clusters': [], 'entanglement_strength': 0}
+    single = engine.detect_customer_entanglement([{'purchases': ['a'], 'last_purchase_time': 0}])
+    assert single['entangled_clusters'] == [] and single['entanglement_strength'] == 0
+
+
+def _catalog(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {'id': f'sku{i}', 'price': float(rng.uniform(10, 1000)), 'demand_score': float(rng.uniform(0.1, 0.95))}
+        for i in range(size)
+    ]
+
+
+def _spend(products, solution):
+    prices = {p['id']: p['price'] for p in products}
+    return sum(prices[pid] * qty for pid, qty in solution.items())
+
+
+def test_parallel_tempering_finds_unit_optimum_under_budget():
+    engine = QuantumOptimizationEngine()
+    products = [
+        {'id': 'starter', 'price': 99, 'demand_score': 0.9},
+        {'id': 'pro', 'price': 499, 'demand_score': 0.7},
+        {'id': 'premium', 'price': 999, 'demand_score': 0.5},
+    ]
+
+    result = engine.optimize_portfolio(products, {'budget': 10000}, seed=3)
+
+    assert result.optimal_solution == {'starter': 101}
+    assert _spend(products, result.optimal_solution) <= 10000
+    assert engine._calculate_energy(result.optimal_solution, 'revenue') == -10100
+
+
+def test_parallel_tempering_beats_sequential_engine_and_respects_budget():
+    engine = QuantumOptimizationEngine()
+    products = _catalog(500)
+    budget = 25000
+    np.random.seed(0)
+
+    sequential = engine.optimize_portfolio(products, {'budget': budget}, method='sequential')
+    tempered = engine.optimize_portfolio(products, {'budget': budget}, seed=0)
+
+    assert _spend(products, tempered.optimal_solution) <= budget
+    assert sum(tempered.optimal_solution.values()) > sum(sequential.optimal_solution.values())
+    assert all(isinstance(qty, int) and qty > 0 for qty in tempered.optimal_solution.values())
+
+
+def test_restarts_on_process_pool_are_reproducible():
+    engine = QuantumOptimizationEngine()
+    products = _catalog(60, seed=1)
+
+    pooled = engine.optimize_portfolio(products, {'budget': 3000}, restarts=2, workers=2, sweeps=50, seed=9)
+    serial = engine.optimize_portfolio(products, {'budget': 3000}, restarts=2, workers=1, sweeps=50, seed=9)
+
+    assert pooled.optimal_solution == serial.optimal_solution
+    assert pooled.iterations == serial.iterations
+
+
+def test_max_quantity_bounds_unbudgeted_search():
+    engine = QuantumOptimizationEngine()
+    products = _catalog(5, seed=2)
+
+    result = engine.optimize_portfolio(products, {'max_quantity': 4}, seed=0)
+
+    assert result.optimal_solution == {p['id']: 4 for p in products}
+    with pytest.raises(ValueError):
+        engine.optimize_portfolio(products, {}, method='gradient')
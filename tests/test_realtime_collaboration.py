@@ -0,0 +1,108 @@
+"""Tests for the rope-backed collaborative editing core."""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import realtime_collaboration
+from realtime_collaboration import CollaborativeEditEngine, Rope
+
+
+def test_rope_matches_string_edits(monkeypatch):
+    monkeypatch.setattr(realtime_collaboration, "LEAF_SIZE", 16)
+    rng = random.Random(0)
+    text = "".join(rng.choice("abcdef") for _ in range(2000))
+    rope = Rope(text)
+
+    for _ in range(3000):
+        at = rng.randint(0, len(text))
+        kind = rng.random()
+        if kind < 0.4:
+            piece = "x" * rng.randint(0, 40)
+            rope.insert(at, piece)
+            text = text[:at] + piece + text[at:]
+        elif kind < 0.8:
+            size = rng.randint(0, 40)
+            assert rope.delete(at, size) == text[at:at + size]
+            text = text[:at] + text[at + size:]
+        else:
+            piece = "Q" * rng.randint(0, 5)
+            rope.replace(at, piece)
+            text = text[:at] + piece + text[at + len(piece):]
+        start = rng.randint(0, len(text))
+        assert rope.slice(start, start + 50) == text[start:start + 50]
+
+    assert str(rope) == text
+    assert rope._root.depth <= 2 * max(len(text) // 16, 1).bit_length() + 2
+
+
+def test_snapshot_is_unaffected_by_later_edits():
+    rope = Rope("hello world")
+    frozen = rope.snapshot()
+
+    rope.delete(0, 6)
+    rope.insert(0, "brave new ")
+
+    assert str(frozen) == "hello world"
+    assert str(rope) == "brave new world"
+
+
+def _session(engine, *users):
+    session = engine.create_session("doc", users[0], with_ai=False)
+    for user in users[1:]:
+        engine.join_session(session.session_id, user)
+    return session.session_id
+
+
+def test_concurrent_operations_transform_against_base_version():
+    engine = CollaborativeEditEngine()
+    sid = _session(engine, "alice", "bob")
+    engine.apply_operation(sid, "alice", "insert", 0, "The quick fox")
+    engine.operations_since(sid, "bob", 0)
+
+    # Both edit revision 1 without seeing each other
+    engine.apply_operation(sid, "alice", "insert", 4, "very ", base_version=1)
+    engine.apply_operation(sid, "bob", "insert", 10, "brown ", base_version=1)
+    result = engine.apply_operation(sid, "bob", "delete", 0, "The ", base_version=1)
+
+    assert engine.get_content("doc") == "very quick brown fox"
+    assert result["delta"] == {"op_type": "delete", "position": 0, "content": "The ", "user_id": "bob",
+                               "version": 4}
+    assert "new_content" not in result
+
+
+def test_delete_overlapping_concurrent_delete_removes_only_remaining_text():
+    engine = CollaborativeEditEngine()
+    sid = _session(engine, "alice", "bob")
+    engine.apply_operation(sid, "alice", "insert", 0, "abcdefgh")
+
+    engine.apply_operation(sid, "alice", "delete", 2, "cde", base_version=1)
+    result = engine.apply_operation(sid, "bob", "delete", 3, "defg", base_version=1)
+
+    assert engine.get_content("doc") == "abh"
+    assert result["operation"].content == "fg"
+
+
+def test_operations_since_and_compaction(monkeypatch):
+    monkeypatch.setattr(realtime_collaboration, "SNAPSHOT_INTERVAL", 10)
+    engine = CollaborativeEditEngine()
+    sid = _session(engine, "writer", "reader")
+
+    for i in range(25):
+        engine.apply_operation(sid, "writer", "insert", i, "x")
+    deltas = engine.operations_since(sid, "reader", 0)
+    assert [d["version"] for d in deltas["deltas"]] == list(range(1, 26))
+
+    # Everyone has now seen revision 25, so the next snapshot drops the log
+    for i in range(5):
+        engine.apply_operation(sid, "writer", "insert", 0, "y")
+    log = engine.operation_logs["doc"]
+    assert log.base == 25 and log.snapshot[0] == 30
+    assert engine.operations_since(sid, "reader", 3) == {"snapshot": "y" * 5 + "x" * 25, "version": 30}
+    with pytest.raises(ValueError):
+        engine.apply_operation(sid, "writer", "insert", 0, "z", base_version=3)
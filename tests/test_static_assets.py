@@ -0,0 +1,83 @@
+"""Tests for the fingerprinted, precompressed static asset pipeline."""
+import gzip
+import json
+import os
+import sys
+
+import pytest
+from flask import Flask, render_template_string
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from static_assets import build_assets, init_static_assets
+
+CSS = b"body { color: #111; }\n" * 200
+
+
+@pytest.fixture
+def site(tmp_path):
+    static = tmp_path / "static"
+    (static / "js").mkdir(parents=True)
+    (static / "style.css").write_bytes(CSS)
+    (static / "js" / "tiny.js").write_bytes(b"x()")
+    app = Flask(__name__, static_folder=str(static))
+    init_static_assets(app)
+    return app, static
+
+
+def test_build_fingerprints_and_precompresses(site):
+    _, static = site
+    manifest = build_assets(str(static))
+    dist = static / "dist"
+
+    assert set(manifest) == {"style.css", "js/tiny.js"}
+    assert manifest["style.css"].startswith("style.") and manifest["style.css"].endswith(".css")
+    assert (dist / manifest["style.css"]).read_bytes() == CSS
+    assert gzip.decompress((dist / (manifest["style.css"] + ".gz")).read_bytes()) == CSS
+    assert not (dist / (manifest["js/tiny.js"] + ".gz")).exists()  # too small to be worth it
+    assert json.loads((dist / "manifest.json").read_text()) == manifest
+
+    (static / "style.css").write_bytes(CSS + b"a { }\n")
+    rebuilt = build_assets(str(static))
+    assert rebuilt["style.css"] != manifest["style.css"]
+    assert (dist / manifest["style.css"]).exists()  # pages rendered before the rebuild still resolve
+    assert rebuilt["js/tiny.js"] == manifest["js/tiny.js"]
+
+
+def test_asset_url_follows_the_manifest(site):
+    app, static = site
+    with app.test_request_context():
+        assert render_template_string("{{ asset_url('style.css') }}") == "/static/style.css"
+        manifest = build_assets(str(static))
+        assert render_template_string("{{ asset_url('style.css') }}") == f"/static/dist/{manifest['style.css']}"
+        assert render_template_string("{{ asset_url('missing.css') }}") == "/static/missing.css"
+
+
+def test_dist_serves_encoded_immutable_variants(site):
+    app, static = site
+    name = build_assets(str(static))["style.css"]
+    client = app.test_client()
+
+    encoded = client.get(f"/static/dist/{name}", headers={"Accept-Encoding": "gzip, deflate"})
+    assert encoded.status_code == 200
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(encoded.data) == CSS
+    assert encoded.mimetype == "text/css"
+    assert "immutable" in encoded.headers["Cache-Control"]
+    assert "max-age=31536000" in encoded.headers["Cache-Control"]
+    assert encoded.headers["Vary"] == "Accept-Encoding"
+
+    identity = client.get(f"/static/dist/{name}", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers and identity.data == CSS
+    assert identity.headers["ETag"] != encoded.headers["ETag"]
+
+    assert client.get("/static/dist/../style.css").status_code == 404
+    assert client.get("/static/dist/nope.css").status_code == 404
+
+
+def test_app_templates_use_asset_url(client):
+    page = client.get("/")
+    assert page.status_code == 200
+    assert b"/static/" in page.data and b"style" in page.data
@@ -0,0 +1,97 @@
+"""Tests for the vectorized swarm engine against the per-agent implementation."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from swarm_intelligence import SpatialHashGrid, SwarmSystem
+
+
+def _reference_step(swarm, dt=0.1):
+    """One synchronous step computed with the per-agent force functions."""
+    agents = list(swarm.agents.values())
+    forces = []
+    for agent in agents:
+        neighbors = swarm._get_neighbors(agent, radius=10.0)
+        forces.append(
+            swarm._separation_force(agent, neighbors)
+            + swarm._alignment_force(agent, neighbors)
+            + swarm._cohesion_force(agent, neighbors)
+        )
+    velocities = swarm.velocities + np.array(forces) * dt
+    velocities = np.array([swarm._limit_velocity(v, max_speed=2.0) for v in velocities])
+    positions = (swarm.positions + velocities * dt) % swarm.box_size
+    return positions, velocities
+
+
+def _brute_force_pairs(positions, radius, box_size, periodic):
+    diff = positions[:, None, :] - positions[None, :, :]
+    if periodic:
+        diff -= box_size * np.round(diff / box_size)
+    dist = np.linalg.norm(diff, axis=2)
+    i, j = np.nonzero(np.triu(dist < radius, k=1))
+    return set(zip(i.tolist(), j.tolist()))
+
+
+@pytest.mark.parametrize("periodic", [False, True])
+@pytest.mark.parametrize("subdivisions", [1, 2])
+def test_spatial_hash_finds_every_pair_once(periodic, subdivisions):
+    rng = np.random.default_rng(7)
+    positions = rng.random((600, 2)) * 100
+
+    grid = SpatialHashGrid(100, 10.0, 2, periodic=periodic, subdivisions=subdivisions)
+    i, j, diff, dist = grid.pairs(positions)
+
+    found = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+    assert len(found) == len(i)
+    assert found == _brute_force_pairs(positions, 10.0, 100, periodic)
+    assert np.allclose(np.linalg.norm(diff, axis=1), dist)
+
+
+def test_periodic_grid_pairs_across_boundary():
+    positions = np.array([[0.5, 50.0], [99.5, 50.0], [50.0, 50.0]])
+    grid = SpatialHashGrid(100, 10.0, 2, periodic=True)
+
+    i, j, diff, dist = grid.pairs(positions)
+
+    assert {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())} == {(0, 1)}
+    assert dist[0] == pytest.approx(1.0)
+
+
+def test_vectorized_step_matches_per_agent_forces():
+    np.random.seed(3)
+    swarm = SwarmSystem(num_agents=300, periodic_neighbors=False)
+    expected_positions, expected_velocities = _reference_step(swarm)
+
+    swarm._step_vectorized(swarm._build_grid(radius=10.0), dt=0.1)
+
+    assert np.allclose(swarm.velocities, expected_velocities, atol=1e-12)
+    assert np.allclose(swarm.positions, expected_positions, atol=1e-12)
+
+
+def test_agents_are_views_of_state_arrays():
+    np.random.seed(4)
+    swarm = SwarmSystem(num_agents=50)
+    swarm.simulate(num_steps=5)
+
+    for row, agent in enumerate(swarm.agents.values()):
+        assert np.array_equal(agent.position, swarm.positions[row])
+        assert np.array_equal(agent.velocity, swarm.velocities[row])
+        assert agent.state["energy"] == pytest.approx(0.999 ** 5)
+
+
+def test_simulate_result_shape_matches_legacy_engine():
+    np.random.seed(5)
+    fast = SwarmSystem(num_agents=60).simulate(num_steps=100)
+    np.random.seed(5)
+    legacy = SwarmSystem(num_agents=60, vectorized=False).simulate(num_steps=100)
+
+    assert fast.keys() == legacy.keys()
+    assert fast["final_state"].keys() == legacy["final_state"].keys()
+    assert fast["emergence_detected"]["emerged"] == legacy["emergence_detected"]["emerged"]
+    assert 0 <= fast["final_state"]["spread"] < 100
@@ -0,0 +1,95 @@
+"""Tests for the shared BM25 / FTS5 knowledge search index."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from text_search import FTS5_AVAILABLE, FTS5Index, SearchIndex, stem, tokenize
+
+FIELDS = {"title": 3.0, "tags": 2.0, "content": 1.0}
+ARTICLES = {
+    "a1": {"title": "Configuring webhooks", "content": "Webhooks are configured per workspace.",
+           "tags": ["api", "webhooks"], "category": "guides"},
+    "a2": {"title": "Billing FAQ", "content": "Invoices are emailed monthly. Configure billing alerts in settings.",
+           "tags": ["billing"], "category": "faq"},
+    "a3": {"title": "API rate limits", "content": "The API allows 100 requests per minute per key.",
+           "tags": ["api"], "category": "guides"},
+}
+
+
+def _index(cls=SearchIndex, *args):
+    index = cls(*args, FIELDS, ("category", "tags"))
+    for doc_id, doc in ARTICLES.items():
+        index.add(doc_id, doc)
+    return index
+
+
+def test_tokenize_stems_and_drops_stop_words():
+    assert tokenize("The configured Webhooks, configuring!") == ["configur", "webhook", "configur"]
+    assert stem("relational") == "relat" and stem("ponies") == "poni" and stem("hopping") == "hop"
+
+
+def test_bm25_prefers_title_and_rare_terms():
+    index = _index()
+    assert [d for d, _ in index.search("configure webhook")] == ["a1", "a2"]
+    assert index.search("api limits")[0][0] == "a3"
+    assert [d for d, _ in index.search("configure webhook", require_all=True)] == ["a1"]
+    assert index.search("nothing matches this") == []
+
+
+def test_filters_intersect_posting_sets():
+    index = _index()
+    assert [d for d, _ in index.search("configure", filters={"category": "guides"})] == ["a1"]
+    assert {d for d, _ in index.search("", filters={"tags": "api", "category": "Guides"})} == {"a1", "a3"}
+    assert {d for d, _ in index.search("", filters={"tags": ["billing", "webhooks"]})} == {"a1", "a2"}
+    with pytest.raises(ValueError):
+        index.search("api", filters={"author": "x"})
+
+
+def test_incremental_replace_and_remove():
+    index = _index()
+    index.add("a2", dict(ARTICLES["a2"], title="Refund policy", content="Refunds within 30 days.", tags=["refunds"]))
+    assert [d for d, _ in index.search("configure")] == ["a1"]
+    assert index.search("refund")[0][0] == "a2"
+    assert index.search("", filters={"tags": "billing"}) == []
+
+    assert index.remove("a1") and not index.remove("a1")
+    assert index.search("webhooks") == [] and len(index) == 2
+
+
+@pytest.mark.skipif(not FTS5_AVAILABLE, reason="SQLite built without FTS5")
+def test_fts5_index_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "search.db")
+    _index(FTS5Index, path, "kb")
+
+    reopened = FTS5Index(path, "kb", FIELDS, ("category", "tags"))
+    assert len(reopened) == 3
+    assert [d for d, _ in reopened.search("configuring webhooks")][0] == "a1"
+    assert {d for d, _ in reopened.search("api", filters={"category": "guides", "tags": "api"})} == {"a1", "a3"}
+    assert reopened.get("a2")["tags"] == ["billing"]
+
+    reopened.add("a2", dict(ARTICLES["a2"], category="guides"))
+    assert {d for d, _ in reopened.search("", filters={"category": "guides"})} == {"a1", "a2", "a3"}
+    assert reopened.remove("a2") and reopened.search("invoices") == []
+
+
+def test_knowledge_bases_use_the_index():
+    from enterprise_systems import KnowledgeBaseSystem
+    from realtime_collaboration import TeamKnowledgeBase
+
+    kb = KnowledgeBaseSystem()
+    for doc in ARTICLES.values():
+        kb.create_article(doc["title"], doc["content"], doc["category"], "docs@company.com", doc["tags"])
+    results = kb.search_knowledge_base("webhook configuration")
+    assert results[0]["title"] == "Configuring webhooks" and results[0]["relevance"] == 1.0
+    assert [r["title"] for r in kb.search_knowledge_base("api", category="guides", tags=["api"])][0] == "API rate limits"
+
+    team = TeamKnowledgeBase()
+    kb_a, kb_b = team.create_knowledge_base("t1", "A"), team.create_knowledge_base("t2", "B")
+    team.add_document(kb_a, "Deploy guide", "How we deploy services", "u1", ["ops"])
+    team.add_document(kb_b, "Deploy checklist", "Steps before deploying", "u2", ["ops"])
+    assert [r["title"] for r in team.search_knowledge_base(kb_a, "deploying")] == ["Deploy guide"]
@@ -0,0 +1,85 @@
+"""Tests for the multi-stop drone routing solver (vrp_solver)."""
+import itertools
+import math
+import os
+import random
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from vrp_solver import RouteDrone, RouteStop, RoutingProblem, solve_routes
+
+HUB = (40.7128, -74.0060)
+
+
+def _offset(north_km, east_km):
+    return (HUB[0] + north_km / 111.19,
+            HUB[1] + east_km / (111.19 * math.cos(math.radians(HUB[0]))))
+
+
+def _random_problem(n, drones, seed=3):
+    rng = random.Random(seed)
+    stops = []
+    for i in range(n):
+        lat, lon = _offset(rng.uniform(-4, 4), rng.uniform(-4, 4))
+        ready = rng.uniform(0, 60) if i % 4 == 0 else 0.0
+        stops.append(RouteStop(f"s{i}", lat, lon, rng.uniform(0.2, 1.5), ready, ready + 45 if i % 4 == 0 else 240))
+    fleet = [RouteDrone(f"d{v}", payload, 100.0, 50.0, 30.0) for v, payload in zip(range(drones), itertools.cycle([5, 3]))]
+    return RoutingProblem(HUB, stops, fleet)
+
+
+def test_evaluate_enforces_payload_range_battery_and_windows():
+    north = RouteStop("n", *_offset(5, 0), weight_kg=1.0)
+    east = RouteStop("e", *_offset(0, 5), weight_kg=1.0, due_min=12)
+    problem = RoutingProblem(HUB, [north, east], [
+        RouteDrone("big", 5.0),
+        RouteDrone("small", 1.5),
+        RouteDrone("short", 5.0, max_range_km=12),
+        RouteDrone("low", 5.0, battery_percent=30),
+    ])
+    km = problem.evaluate([0], 0)
+    assert abs(km - 10.0) < 0.01
+    assert problem.evaluate([1, 0], 0) is not None
+    assert problem.evaluate([0, 1], 0) is None  # reaches "e" after its window closes
+    assert problem.evaluate([1, 0], 1) is None  # 2 kg on a 1.5 kg drone
+    assert problem.evaluate([1, 0], 2) is None  # ~17 km on a 12 km range
+    assert problem.evaluate([1], 3) is None  # 10 km + payload + 20% reserve > 30%
+
+
+def test_plan_is_feasible_and_beats_one_trip_per_stop():
+    problem = _random_problem(60, drones=20)
+    plan = solve_routes(problem, time_budget_s=5, seed=1)
+    assert not plan.unassigned
+
+    served = [stop for tour in plan.tours for stop in tour.stop_ids]
+    assert sorted(served) == sorted(s.stop_id for s in problem.stops)
+    index = {s.stop_id: i for i, s in enumerate(problem.stops)}
+    drones = {d.drone_id: v for v, d in enumerate(problem.drones)}
+    for tour in plan.tours:
+        km = problem.evaluate([index[s] for s in tour.stop_ids], drones[tour.drone_id])
+        assert km is not None and abs(km - tour.distance_km) < 1e-9
+        for stop_id, arrival in zip(tour.stop_ids, tour.arrival_min):
+            assert arrival <= problem.stops[index[stop_id]].due_min
+
+    assert plan.total_distance_km < 0.5 * sum(2 * d for d in problem.from_depot)
+    assert plan.total_distance_km <= plan.stats["construction_km"]
+    assert solve_routes(problem, time_budget_s=5, seed=1).to_dict()["tours"] == plan.to_dict()["tours"]
+
+
+def test_single_tour_matches_brute_force_optimum():
+    rng = random.Random(7)
+    stops = [RouteStop(f"s{i}", *_offset(rng.uniform(-3, 3), rng.uniform(-3, 3)), 0.5) for i in range(6)]
+    problem = RoutingProblem(HUB, stops, [RouteDrone("d0", 5.0)])
+    plan = solve_routes(problem, time_budget_s=5)
+    best = min(problem.evaluate(list(p), 0) for p in itertools.permutations(range(6)))
+    assert len(plan.tours) == 1
+    assert abs(plan.total_distance_km - best) < 1e-6
+
+
+def test_stops_no_drone_can_take_are_unassigned():
+    stops = [RouteStop("light", *_offset(1, 1), 1.0), RouteStop("heavy", *_offset(1, 2), 8.0)]
+    plan = solve_routes(RoutingProblem(HUB, stops, [RouteDrone("d0", 5.0)]), time_budget_s=1)
+    assert plan.unassigned == ["heavy"]
+    assert [t.stop_ids for t in plan.tours] == [["light"]]
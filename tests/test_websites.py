@@ -3,6 +3,7 @@ Tests for Website Generator (Feature #16)
 Tests for futuristic 1% tier website generation, performance optimization, and tier analysis
 """
 
+import os
 import pytest
 import json
 from website_generator import (
@@ -462,3 +463,103 @@ class TestIntegration:
         
         # Should have variety (very unlikely all same)
         assert len(set(tiers)) > 1 or len(set(templates)) > 1
+
+
+class TestParallelIncrementalGeneration:
+    """Test pooled copy writing, section reuse and incremental site output"""
+    
+    @staticmethod
+    def _briefs(n, suffix=""):
+        return [{"product_name": f"Site {i}", "product_description": f"Product {i}{suffix}"} for i in range(n)]
+    
+    def test_copy_writer_runs_concurrently(self):
+        """Copy writer calls overlap on the pool and their copy is used"""
+        import threading
+        import time
+        active, peak, lock = [0], [0], threading.Lock()
+        
+        def writer(brief):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {"headline": f"Written for {brief['product_name']}"}
+        
+        websites = batch_generate_websites("Pooled", "Test pooled copy", count=8, copy_writer=writer, max_workers=4)
+        
+        assert len(websites) == 8
+        assert all(w['copy']['headline'] == "Written for Pooled" for w in websites)
+        assert all(w['copy']['cta_button'] for w in websites)  # library fills what the writer omits
+        assert 1 < peak[0] <= 4
+    
+    def test_style_section_shared_between_sites(self):
+        """Sites with the same design reuse one rendered style block"""
+        from website_generator import generate_glow_html, _style_section
+        first = generate_website("Alpha", "First", template="quantum_grid", tier="ELITE")
+        second = generate_website("Beta", "Second", template="quantum_grid", tier="ELITE")
+        hits = _style_section.cache_info().hits
+        
+        html_a, html_b = generate_glow_html(first), generate_glow_html(second)
+        
+        assert _style_section.cache_info().hits >= hits + 1
+        assert "Alpha" in html_a and "Beta" in html_b
+        assert html_a.startswith("<!DOCTYPE html>") and html_a.endswith("</html>")
+    
+    def test_generate_sites_skips_unchanged_briefs(self, tmp_path):
+        """Unchanged briefs are skipped; only edited ones are regenerated"""
+        from website_generator import generate_sites
+        calls = []
+        
+        def writer(brief):
+            calls.append(brief['product_name'])
+            return {}
+        
+        briefs = self._briefs(6)
+        first = generate_sites(briefs, str(tmp_path), copy_writer=writer, max_workers=3)
+        assert (first['generated'], first['written'], first['skipped']) == (6, 6, 0)
+        assert first['bytes_written'] == sum(os.path.getsize(p) for p in first['files'])
+        
+        again = generate_sites(briefs, str(tmp_path), copy_writer=writer)
+        assert (again['generated'], again['skipped'], again['bytes_written']) == (0, 6, 0)
+        assert len(calls) == 6
+        
+        briefs[2]["product_description"] = "Edited"
+        os.remove(first['files'][4])
+        edited = generate_sites(briefs, str(tmp_path), copy_writer=writer)
+        assert (edited['generated'], edited['skipped'], edited['written']) == (2, 4, 2)
+        assert sorted(calls[6:]) == ["Site 2", "Site 4"]
+    
+    def test_precompress_added_to_pages_built_without_it(self, tmp_path):
+        """Enabling precompress later still writes .gz siblings for unchanged pages"""
+        import gzip
+        from website_generator import _write_html, generate_sites
+        briefs = self._briefs(2)
+        first = generate_sites(briefs, str(tmp_path))
+        assert not any(os.path.exists(p + ".gz") for p in first['files'])
+        
+        again = generate_sites(briefs, str(tmp_path), precompress=True)
+        assert (again['skipped'], again['bytes_written']) == (2, 0)
+        for path in first['files']:
+            with open(path, 'rb') as f, gzip.open(path + ".gz") as gz:
+                assert gz.read() == f.read()
+        
+        page = str(tmp_path / "page.html")
+        html = "<!DOCTYPE html>" + "<p>unchanged</p>" * 50
+        assert _write_html(page, html) > 0
+        assert _write_html(page, html, precompress=True) == 0
+        assert os.path.exists(page + ".gz")
+    
+    def test_generate_sites_is_reproducible(self, tmp_path):
+        """A brief always renders the same page, so forced reruns rewrite nothing"""
+        from website_generator import generate_sites
+        briefs = self._briefs(4)
+        generate_sites(briefs, str(tmp_path / "a"))
+        generate_sites(briefs, str(tmp_path / "b"))
+        forced = generate_sites(briefs, str(tmp_path / "a"), force=True)
+        
+        assert (forced['generated'], forced['unchanged'], forced['bytes_written']) == (4, 4, 0)
+        for name in os.listdir(tmp_path / "a"):
+            if name.endswith(".html"):
+                assert (tmp_path / "a" / name).read_text() == (tmp_path / "b" / name).read_text()
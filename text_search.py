@@ -0,0 +1,431 @@
+"""Full-text search shared by the knowledge base modules.
+
+enterprise_systems.KnowledgeBaseSystem and
+realtime_collaboration.TeamKnowledgeBase index their articles here instead of
+substring-scanning every article per query.
+
+- Tokenization: lowercase alphanumeric words, stop words dropped, Porter
+  stemmed ("configuring" and "configured" both match "configure").
+- SearchIndex: in-memory inverted index {term: {doc_id: weighted tf}}
+  ranked with BM25 (field weights fold into the term frequency, as in
+  BM25F). Filters such as category or tags are posting sets intersected
+  smallest first before scoring. Documents are added, replaced and removed
+  incrementally.
+- FTS5Index: the same interface persisted to a SQLite FTS5 table, so the
+  index survives restarts and is shared by every worker using the file.
+  Set SEARCH_INDEX_DB to a file path to use it.
+"""
+import functools
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+SEARCH_INDEX_DB = os.getenv('SEARCH_INDEX_DB')  # path of a shared FTS5 index; unset = in memory
+
+try:
+    _probe = sqlite3.connect(':memory:')
+    _probe.execute('CREATE VIRTUAL TABLE probe USING fts5(body)')
+    _probe.close()
+    FTS5_AVAILABLE = True
+except sqlite3.OperationalError:
+    FTS5_AVAILABLE = False
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i in is it its of on or that the this to
+was were what when where which who why will with you your
+""".split())
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+# ============================================================================
+# TOKENIZATION
+# ============================================================================
+
+def _is_consonant(word: str, i: int) -> bool:
+    ch = word[i]
+    if ch in 'aeiou':
+        return False
+    if ch == 'y':
+        return i == 0 or not _is_consonant(word, i - 1)
+    return True
+
+
+def _measure(stem: str) -> int:
+    """Number of vowel-consonant sequences (Porter's m)."""
+    m, previous_vowel = 0, False
+    for i in range(len(stem)):
+        consonant = _is_consonant(stem, i)
+        if consonant and previous_vowel:
+            m += 1
+        previous_vowel = not consonant
+    return m
+
+
+def _has_vowel(stem: str) -> bool:
+    return any(not _is_consonant(stem, i) for i in range(len(stem)))
+
+
+def _ends_cvc(word: str) -> bool:
+    n = len(word)
+    return (n >= 3 and _is_consonant(word, n - 3) and not _is_consonant(word, n - 2)
+            and _is_consonant(word, n - 1) and word[-1] not in 'wxy')
+
+
+_STEP2 = (
+    ('ational', 'ate'), ('tional', 'tion'), ('enci', 'ence'), ('anci', 'ance'), ('izer', 'ize'),
+    ('abli', 'able'), ('alli', 'al'), ('entli', 'ent'), ('eli', 'e'), ('ousli', 'ous'),
+    ('ization', 'ize'), ('ation', 'ate'), ('ator', 'ate'), ('alism', 'al'), ('iveness', 'ive'),
+    ('fulness', 'ful'), ('ousness', 'ous'), ('aliti', 'al'), ('iviti', 'ive'), ('biliti', 'ble'),
+)
+_STEP3 = (
+    ('icate', 'ic'), ('ative', ''), ('alize', 'al'), ('iciti', 'ic'), ('ical', 'ic'), ('ful', ''), ('ness', ''),
+)
+_STEP4 = (
+    'al', 'ance', 'ence', 'er', 'ic', 'able', 'ible', 'ant', 'ement', 'ment', 'ent', 'ion', 'ou',
+    'ism', 'ate', 'iti', 'ous', 'ive', 'ize',
+)
+
+
+@functools.lru_cache(maxsize=100000)
+def stem(word: str) -> str:
+    """Porter stemmer (steps 1-5) for lowercase ASCII words (memoized: vocabularies are small)."""
+    if len(word) <= 2:
+        return word
+
+    # Step 1a: plurals
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('ies'):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith('ss'):
+        word = word[:-1]
+
+    # Step 1b: -ed / -ing
+    if word.endswith('eed'):
+        if _measure(word[:-3]) > 0:
+            word = word[:-1]
+    else:
+        for suffix in ('ed', 'ing'):
+            if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]):
+                word = word[:-len(suffix)]
+                if word.endswith(('at', 'bl', 'iz')):
+                    word += 'e'
+                elif len(word) > 1 and word[-1] == word[-2] and word[-1] not in 'lsz' and _is_consonant(word, len(word) - 1):
+                    word = word[:-1]
+                elif _measure(word) == 1 and _ends_cvc(word):
+                    word += 'e'
+                break
+
+    # Step 1c: y -> i
+    if word.endswith('y') and _has_vowel(word[:-1]):
+        word = word[:-1] + 'i'
+
+    # Steps 2-3: map double suffixes to single ones
+    for rules in (_STEP2, _STEP3):
+        for suffix, replacement in rules:
+            if word.endswith(suffix):
+                if _measure(word[:-len(suffix)]) > 0:
+                    word = word[:-len(suffix)] + replacement
+                break
+
+    # Step 4: drop suffixes from long stems
+    for suffix in _STEP4:
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if _measure(base) > 1 and (suffix != 'ion' or base.endswith(('s', 't'))):
+                word = base
+            break
+
+    # Step 5: trailing e and double l
+    if word.endswith('e'):
+        base = word[:-1]
+        if _measure(base) > 1 or (_measure(base) == 1 and not _ends_cvc(base)):
+            word = base
+    if word.endswith('ll') and _measure(word) > 1:
+        word = word[:-1]
+    return word
+
+
+def words(text: str) -> List[str]:
+    """Lowercase words of `text` without stop words (not stemmed)."""
+    return [w for w in _WORD.findall(str(text or '').lower()) if w not in STOP_WORDS]
+
+
+def tokenize(text: str) -> List[str]:
+    """Index terms of `text`: lowercase, stop words dropped, stemmed."""
+    return [stem(w) for w in words(text)]
+
+
+def _field_text(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return ' '.join(str(v) for v in value)
+    return '' if value is None else str(value)
+
+
+def _filter_values(value) -> List[str]:
+    values = value if isinstance(value, (list, tuple, set)) else [value]
+    return [str(v).lower() for v in values if v is not None and v != '']
+
+
+# ============================================================================
+# IN-MEMORY INDEX
+# ============================================================================
+
+class SearchIndex:
+    """In-memory inverted index with BM25 ranking and filter posting sets.
+
+    Args:
+        fields: searchable field -> weight (e.g. {'title': 3, 'content': 1})
+        filter_fields: fields usable as exact-match filters (lists match any element)
+    """
+
+    def __init__(self, fields: Dict[str, float], filter_fields: Iterable[str] = (),
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.fields = dict(fields)
+        self.filter_fields = tuple(filter_fields)
+        self.k1, self.b = k1, b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)  # term -> {doc_id: weighted tf}
+        self._filters: Dict[str, Dict[str, set]] = {f: defaultdict(set) for f in self.filter_fields}
+        self._lengths: Dict[str, float] = {}  # doc_id -> weighted length
+        self._terms: Dict[str, List[str]] = {}  # doc_id -> its terms, for removal
+        self._docs: Dict[str, Dict] = {}
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        return self._docs.get(doc_id)
+
+    def add(self, doc_id: str, doc: Dict):
+        """Index `doc` under `doc_id`, replacing any previous version."""
+        frequencies = defaultdict(float)
+        for field, weight in self.fields.items():
+            for term in tokenize(_field_text(doc.get(field))):
+                frequencies[term] += weight
+        with self._lock:
+            self._remove(doc_id)
+            for term, tf in frequencies.items():
+                self._postings[term][doc_id] = tf
+            for field in self.filter_fields:
+                for value in _filter_values(doc.get(field)):
+                    self._filters[field][value].add(doc_id)
+            length = sum(frequencies.values())
+            self._lengths[doc_id] = length
+            self._total_length += length
+            self._terms[doc_id] = list(frequencies)
+            self._docs[doc_id] = doc
+
+    def add_many(self, docs: Iterable[Tuple[str, Dict]]):
+        for doc_id, doc in docs:
+            self.add(doc_id, doc)
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock:
+            return self._remove(doc_id)
+
+    def _remove(self, doc_id: str) -> bool:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return False
+        for term in self._terms.pop(doc_id):
+            postings = self._postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+        for field in self.filter_fields:
+            for value in _filter_values(doc.get(field)):
+                docs = self._filters[field].get(value)
+                if docs is not None:
+                    docs.discard(doc_id)
+                    if not docs:
+                        del self._filters[field][value]
+        self._total_length -= self._lengths.pop(doc_id)
+        return True
+
+    def _allowed(self, filters: Optional[Dict]) -> Optional[set]:
+        """Doc ids passing every filter (None = no filters). A list value matches any of its elements."""
+        if not filters:
+            return None
+        sets = []
+        for field, value in filters.items():
+            if field not in self._filters:
+                raise ValueError(f"Not a filter field: {field}")
+            matching = set()
+            for v in _filter_values(value):
+                matching |= self._filters[field].get(v, set())
+            sets.append(matching)
+        sets.sort(key=len)
+        allowed = set(sets[0])
+        for other in sets[1:]:
+            if not allowed:
+                break
+            allowed &= other
+        return allowed
+
+    def search(self, query: str, filters: Optional[Dict] = None, limit: int = 20,
+               require_all: bool = False) -> List[Tuple[str, float]]:
+        """Best `limit` (doc_id, score) pairs for `query`, highest score first.
+
+        With an empty query, filtered documents are returned unranked (score 0).
+        require_all keeps only documents containing every query term.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            allowed = self._allowed(filters)
+            if not terms:
+                ids = self._docs if allowed is None else [d for d in self._docs if d in allowed]
+                return [(doc_id, 0.0) for doc_id in list(ids)[:limit]]
+
+            n = len(self._docs)
+            average = self._total_length / n if n else 0.0
+            postings = sorted((self._postings.get(t, {}) for t in terms), key=len)
+            if require_all:
+                if not postings[0]:
+                    return []
+                candidates = set(postings[0])
+                for p in postings[1:]:
+                    candidates.intersection_update(p)
+                if allowed is not None:
+                    candidates &= allowed
+
+            scores = defaultdict(float)
+            for p in postings:
+                if not p:
+                    continue
+                idf = math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+                for doc_id, tf in p.items():
+                    if allowed is not None and doc_id not in allowed:
+                        continue
+                    if require_all and doc_id not in candidates:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average) if average else self.k1
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+# ============================================================================
+# SQLITE FTS5 INDEX
+# ============================================================================
+
+class FTS5Index:
+    """SearchIndex interface backed by a SQLite FTS5 table (porter tokenizer, bm25 ranking).
+
+    Documents are stored as JSON in {name}_docs, whose integer key is the
+    FTS rowid, so any process opening the same file can search and return
+    them and replacing a document is a keyed delete.
+    """
+
+    def __init__(self, path: str, name: str, fields: Dict[str, float], filter_fields: Iterable[str] = ()):
+        if not FTS5_AVAILABLE:
+            raise RuntimeError("This SQLite build has no FTS5 support")
+        if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', name) or not all(
+                re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', f) for f in fields):
+            raise ValueError("Index and field names must be identifiers")
+        self.path, self.name = path, name
+        self.fields = dict(fields)
+        self.filter_fields = tuple(filter_fields)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {name}_docs ("
+                         f"rid INTEGER PRIMARY KEY, doc_id TEXT NOT NULL UNIQUE, doc TEXT)")
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5("
+                         f"{', '.join(self.fields)}, tokenize='porter unicode61')")
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {name}_filters ("
+                         f"field TEXT NOT NULL, value TEXT NOT NULL, rid INTEGER NOT NULL, "
+                         f"PRIMARY KEY (field, value, rid)) WITHOUT ROWID")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{name}_filters_rid ON {name}_filters (rid)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA synchronous=NORMAL')  # WAL stays consistent; skips an fsync per add
+        return conn
+
+    def __len__(self):
+        return self._connect().execute(f"SELECT count(*) FROM {self.name}_docs").fetchone()[0]
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        row = self._connect().execute(f"SELECT doc FROM {self.name}_docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def add(self, doc_id: str, doc: Dict):
+        self.add_many([(doc_id, doc)])
+
+    def add_many(self, docs: Iterable[Tuple[str, Dict]]):
+        """Index several documents in one transaction (bulk loads)."""
+        with self._connect() as conn:
+            for doc_id, doc in docs:
+                self._delete(conn, doc_id)
+                rid = conn.execute(f"INSERT INTO {self.name}_docs (doc_id, doc) VALUES (?, ?)",
+                                   (doc_id, json.dumps(doc, default=str))).lastrowid
+                conn.execute(
+                    f"INSERT INTO {self.name} (rowid, {', '.join(self.fields)}) "
+                    f"VALUES (?, {', '.join('?' for _ in self.fields)})",
+                    [rid] + [_field_text(doc.get(f)) for f in self.fields],
+                )
+                conn.executemany(
+                    f"INSERT OR IGNORE INTO {self.name}_filters (field, value, rid) VALUES (?, ?, ?)",
+                    [(f, v, rid) for f in self.filter_fields for v in _filter_values(doc.get(f))],
+                )
+
+    def remove(self, doc_id: str) -> bool:
+        with self._connect() as conn:
+            return self._delete(conn, doc_id)
+
+    def _delete(self, conn, doc_id: str) -> bool:
+        row = conn.execute(f"SELECT rid FROM {self.name}_docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return False
+        for table, key in ((self.name, 'rowid'), (f"{self.name}_filters", 'rid'), (f"{self.name}_docs", 'rid')):
+            conn.execute(f"DELETE FROM {table} WHERE {key} = ?", row)
+        return True
+
+    def search(self, query: str, filters: Optional[Dict] = None, limit: int = 20,
+               require_all: bool = False) -> List[Tuple[str, float]]:
+        where, params = [], []
+        for field, value in (filters or {}).items():
+            if field not in self.filter_fields:
+                raise ValueError(f"Not a filter field: {field}")
+            values = _filter_values(value)
+            where.append(f"d.rid IN (SELECT rid FROM {self.name}_filters WHERE field = ? "
+                         f"AND value IN ({', '.join('?' for _ in values) or 'NULL'}))")
+            params += [field] + values
+
+        terms = list(dict.fromkeys(words(query)))
+        if terms:
+            where.insert(0, f"{self.name} MATCH ?")
+            params.insert(0, (' AND ' if require_all else ' OR ').join(f'"{t}"' for t in terms))
+            # bm25() is lower-is-better, with one weight per column
+            weights = ', '.join(str(w) for w in self.fields.values())
+            sql = (f"SELECT d.doc_id, -bm25({self.name}, {weights}) AS score FROM {self.name} "
+                   f"JOIN {self.name}_docs d ON d.rid = {self.name}.rowid WHERE {' AND '.join(where)} "
+                   f"ORDER BY score DESC LIMIT ?")
+        else:
+            sql = (f"SELECT d.doc_id, 0.0 FROM {self.name}_docs d"
+                   f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY d.rid LIMIT ?")
+        return [(doc_id, float(score)) for doc_id, score in self._connect().execute(sql, params + [int(limit)])]
+
+
+def create_index(name: str, fields: Dict[str, float], filter_fields: Iterable[str] = ()):
+    """FTS5Index on SEARCH_INDEX_DB when it is set, else an in-memory SearchIndex."""
+    if SEARCH_INDEX_DB:
+        if FTS5_AVAILABLE:
+            return FTS5Index(SEARCH_INDEX_DB, name, fields, filter_fields)
+        logger.warning("SEARCH_INDEX_DB is set but SQLite has no FTS5; using an in-memory index")
+    return SearchIndex(fields, filter_fields)
@@ -6,6 +6,7 @@ import smtplib
 import ssl
 from email.message import EmailMessage
 from models import get_engine, get_session, Webhook, Order, Payment, Base
+from sqlalchemy import inspect, text
 from sqlalchemy.exc import IntegrityError
 
 # Backwards compatible path helper used in some parts of the codebase
@@ -24,10 +25,39 @@ def _get_db_url():
     return f"sqlite:///{DB_PATH}"
 
 
+# Columns added to tables that databases may already have (create_all skips those)
+_ADDED_COLUMNS = {
+    'calling_campaigns': ('dialer_owner', 'dialer_lease_until', 'dialer_stats'),
+    'journey_enrollments': ('definition_id',),
+    'experiment_variant_stats': ('min_p_value',),
+}
+_UPGRADED_URLS = set()  # databases already brought up to date by this process
+
+
+def _upgrade_schema(engine):
+    """Add the indexes and columns create_all skips on tables that already exist."""
+    for index in (*Order.__table__.indexes, *Webhook.__table__.indexes):  # keyset pagination
+        index.create(engine, checkfirst=True)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, names in _ADDED_COLUMNS.items():
+            if not inspector.has_table(table_name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table_name)}
+            for name in names:
+                if name not in existing:
+                    column_type = Base.metadata.tables[table_name].c[name].type.compile(engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_type}'))
+
+
 def init_db():
     # Initialize models (creates tables if missing)
-    engine = get_engine(_get_db_url())
+    url = _get_db_url()
+    engine = get_engine(url)
     Base.metadata.create_all(engine)
+    if url not in _UPGRADED_URLS:
+        _upgrade_schema(engine)
+        _UPGRADED_URLS.add(url)
 
 
 def save_order(order_id: str, amount: int, currency: str, receipt: str, product: str, status: str = 'created') -> bool:
@@ -0,0 +1,472 @@
+"""Multi-stop drone tours: capacitated vehicle routing with time windows.
+
+Every drone leaves the hub once, serves a sequence of stops and flies
+back. A tour is feasible when it stays within the drone's payload, range
+and battery and reaches every stop inside its time window. Battery use,
+flight time and wind come from the fleet's FlightSimulator model, and a
+reserve is kept on landing. Stops that no drone can take are returned as
+unassigned.
+
+- Construction: cheapest insertion, farthest stops first. Only positions
+  next to a stop's nearest neighbours are tried (granular
+  neighbourhoods), which keeps it close to linear in the number of
+  stops. When nothing fits, a tour is opened on the largest idle drone.
+- Improvement: relocate and or-opt (segments of 1-3 stops, within and
+  between tours) plus intra-tour 2-opt, taking the first improving move.
+  The search stops at a local optimum or when the wall-clock budget runs
+  out.
+"""
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from drone_fleet_manager import FlightSimulator
+
+NEIGHBORS = 12  # nearest stops considered per move (granular neighbourhood)
+BATTERY_RESERVE_PERCENT = 20.0  # left on landing, as the assignment engine requires
+MAX_SEGMENT = 3  # longest run of stops moved by or-opt
+EPS = 1e-9
+EARTH_DIAMETER_KM = 2 * 6371
+
+
+@dataclass
+class RouteStop:
+    """A delivery point; times are minutes after the tours start"""
+    stop_id: str
+    lat: float
+    lon: float
+    weight_kg: float = 0.0
+    ready_min: float = 0.0
+    due_min: float = math.inf
+    service_min: float = 0.0
+
+
+@dataclass
+class RouteDrone:
+    """A drone available for one tour from the hub"""
+    drone_id: str
+    max_payload_kg: float
+    battery_percent: float = 100.0
+    speed_kmh: float = 50.0
+    max_range_km: float = math.inf
+
+
+@dataclass
+class Tour:
+    drone_id: str
+    stop_ids: List[str]
+    distance_km: float
+    load_kg: float
+    battery_used_percent: float
+    arrival_min: List[float]
+
+    def to_dict(self) -> Dict:
+        return {
+            "drone_id": self.drone_id,
+            "stops": self.stop_ids,
+            "distance_km": round(self.distance_km, 3),
+            "load_kg": round(self.load_kg, 3),
+            "battery_used_percent": round(self.battery_used_percent, 1),
+            "arrival_min": [round(t, 1) for t in self.arrival_min],
+        }
+
+
+@dataclass
+class RoutePlan:
+    tours: List[Tour]
+    unassigned: List[str]
+    solve_seconds: float = 0.0
+    stats: Dict = field(default_factory=dict)
+
+    @property
+    def total_distance_km(self) -> float:
+        return sum(t.distance_km for t in self.tours)
+
+    def to_dict(self) -> Dict:
+        return {
+            "tours": [t.to_dict() for t in self.tours],
+            "unassigned": self.unassigned,
+            "total_distance_km": round(self.total_distance_km, 3),
+            "solve_seconds": round(self.solve_seconds, 3),
+            "stats": self.stats,
+        }
+
+
+class RoutingProblem:
+    """
+    Stops, drones and flight conditions for one hub
+
+    Stops are indexed 0..n-1 and the hub is index n. evaluate() is the single
+    feasibility and cost check, used by the solver and by baselines alike.
+    """
+
+    def __init__(
+        self,
+        depot: Tuple[float, float],
+        stops: Sequence[RouteStop],
+        drones: Sequence[RouteDrone],
+        weather_severity: int = 0,
+        wind_kmh: float = 0.0,
+        reserve_percent: float = BATTERY_RESERVE_PERCENT,
+        start_min: float = 0.0
+    ):
+        self.depot = depot
+        self.stops = list(stops)
+        self.drones = list(drones)
+        self.weather_severity = weather_severity
+        self.wind_kmh = wind_kmh
+        self.reserve_percent = reserve_percent
+        self.start_min = start_min
+
+        self.n = len(self.stops)
+        lats = [s.lat for s in self.stops] + [depot[0]]
+        lons = [s.lon for s in self.stops] + [depot[1]]
+        self._lat = [math.radians(v) for v in lats]
+        self._lon = [math.radians(v) for v in lons]
+        self._cos = [math.cos(v) for v in self._lat]
+        self.weight = [s.weight_kg for s in self.stops]
+        self.ready = [s.ready_min for s in self.stops]
+        self.due = [s.due_min for s in self.stops]
+        self.service = [s.service_min for s in self.stops]
+        self.from_depot = [self.distance(i, self.n) for i in range(self.n)]
+        self._neighbors = None
+
+    def distance(self, i: int, j: int) -> float:
+        """Haversine km between stops (or the hub, index n)"""
+        a = (math.sin((self._lat[j] - self._lat[i]) / 2) ** 2
+             + self._cos[i] * self._cos[j] * math.sin((self._lon[j] - self._lon[i]) / 2) ** 2)
+        return EARTH_DIAMETER_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+    def neighbors(self, k: int = NEIGHBORS) -> List[List[int]]:
+        """k nearest stops of each stop, nearest first"""
+        if self._neighbors is None:
+            k = min(k, self.n - 1)
+            lat = np.array([s.lat for s in self.stops])
+            lon = np.array([s.lon for s in self.stops])
+            # Rank in a local projection (km), chunked to bound memory; exact distances come from distance()
+            x = lon * math.cos(math.radians(self.depot[0])) * 111.32
+            y = lat * 110.57
+            out = []
+            for start in range(0, self.n, 512):
+                dx = x[start:start + 512, None] - x[None, :]
+                dy = y[start:start + 512, None] - y[None, :]
+                d2 = dx * dx + dy * dy
+                d2[np.arange(len(d2)), np.arange(start, start + len(d2))] = np.inf
+                if k <= 0:
+                    out.extend([] for _ in range(len(d2)))
+                    continue
+                top = np.argpartition(d2, k - 1, axis=1)[:, :k]
+                order = np.take_along_axis(d2, top, axis=1).argsort(axis=1)
+                out.extend(np.take_along_axis(top, order, axis=1).tolist())
+            self._neighbors = out
+        return self._neighbors
+
+    def evaluate(self, route: Sequence[int], drone_index: int) -> Optional[float]:
+        """Tour distance in km, or None if the drone cannot fly it"""
+        if not route:
+            return 0.0
+        drone = self.drones[drone_index]
+        load = 0.0
+        for i in route:
+            load += self.weight[i]
+        if load > drone.max_payload_kg + EPS:
+            return None
+        t = self.start_min
+        prev = self.n
+        km = 0.0
+        for i in route:
+            leg = self.distance(prev, i)
+            km += leg
+            t += FlightSimulator.calculate_flight_time(leg, drone.speed_kmh, self.wind_kmh)
+            if t < self.ready[i]:
+                t = self.ready[i]
+            if t > self.due[i] + EPS:
+                return None
+            t += self.service[i]
+            prev = i
+        km += self.from_depot[prev]
+        if km > drone.max_range_km + EPS:
+            return None
+        battery = FlightSimulator.battery_consumption(km, load, self.weather_severity)
+        if battery + self.reserve_percent > drone.battery_percent + EPS:
+            return None
+        return km
+
+    def build_plan(self, routes: Sequence[Tuple[int, Sequence[int]]], unassigned: Sequence[int]) -> RoutePlan:
+        """RoutePlan from (drone index, stop indices) pairs"""
+        tours = []
+        for drone_index, route in routes:
+            if not route:
+                continue
+            drone = self.drones[drone_index]
+            km, load, arrivals = 0.0, 0.0, []
+            t, prev = self.start_min, self.n
+            for i in route:
+                leg = self.distance(prev, i)
+                km += leg
+                load += self.weight[i]
+                t = max(t + FlightSimulator.calculate_flight_time(leg, drone.speed_kmh, self.wind_kmh), self.ready[i])
+                arrivals.append(t)
+                t += self.service[i]
+                prev = i
+            km += self.from_depot[prev]
+            tours.append(Tour(
+                drone_id=drone.drone_id,
+                stop_ids=[self.stops[i].stop_id for i in route],
+                distance_km=km,
+                load_kg=load,
+                battery_used_percent=FlightSimulator.battery_consumption(km, load, self.weather_severity),
+                arrival_min=arrivals,
+            ))
+        return RoutePlan(tours=tours, unassigned=[self.stops[i].stop_id for i in unassigned])
+
+
+class _Solution:
+    """Mutable tours: one per drone, empty while the drone is unused"""
+
+    def __init__(self, problem: RoutingProblem):
+        self.problem = problem
+        self.routes: List[List[int]] = [[] for _ in problem.drones]
+        self.km = [0.0] * len(problem.drones)
+        self.load = [0.0] * len(problem.drones)
+        self.where = [-1] * problem.n
+        # Largest drones are opened first (from the end), so fewer tours are needed
+        self.idle = sorted(range(len(problem.drones)), key=self._size)
+
+    def _size(self, v: int) -> tuple:
+        drone = self.problem.drones[v]
+        return drone.max_payload_kg, drone.battery_percent, drone.max_range_km
+
+    def set_route(self, v: int, route: List[int], km: float):
+        for i in self.routes[v]:
+            self.where[i] = -1
+        was_empty = not self.routes[v]
+        self.routes[v] = route
+        self.km[v] = km
+        self.load[v] = sum(self.problem.weight[i] for i in route)
+        for i in route:
+            self.where[i] = v
+        if was_empty and route:
+            self.idle.remove(v)
+        elif route == [] and not was_empty:
+            self.idle.append(v)
+            self.idle.sort(key=self._size)
+
+    def unassigned(self) -> List[int]:
+        return [i for i, v in enumerate(self.where) if v < 0]
+
+
+class _Search:
+    def __init__(self, problem: RoutingProblem, deadline: float, seed: int):
+        self.p = problem
+        self.s = _Solution(problem)
+        self.deadline = deadline
+        self.rng = random.Random(seed)
+        self.nbrs = problem.neighbors()
+        self.moves = 0
+
+    def out_of_time(self) -> bool:
+        return time.monotonic() > self.deadline
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    def insert(self, i: int, routes) -> bool:
+        """Cheapest feasible insertion of stop i into one of `routes`"""
+        p, s, d = self.p, self.s, self.p.distance
+        options = []
+        for v in routes:
+            if s.load[v] + p.weight[i] > p.drones[v].max_payload_kg + EPS:
+                continue
+            route = s.routes[v]
+            prev = p.n
+            for pos in range(len(route) + 1):
+                nxt = route[pos] if pos < len(route) else p.n
+                options.append((d(prev, i) + d(i, nxt) - d(prev, nxt), v, pos))
+                prev = nxt
+        options.sort()
+        for delta, v, pos in options[:2 * NEIGHBORS]:
+            route = s.routes[v][:pos] + [i] + s.routes[v][pos:]
+            km = p.evaluate(route, v)
+            if km is not None:
+                s.set_route(v, route, km)
+                return True
+        return False
+
+    def open_tour(self, i: int) -> bool:
+        for v in reversed(self.s.idle):
+            km = self.p.evaluate([i], v)
+            if km is not None:
+                self.s.set_route(v, [i], km)
+                return True
+        return False
+
+    def construct(self):
+        p, s = self.p, self.s
+        for i in sorted(range(p.n), key=lambda i: -p.from_depot[i]):
+            near = {s.where[j] for j in self.nbrs[i] if s.where[j] >= 0}
+            if not (self.insert(i, near) or self.open_tour(i)):
+                self.insert(i, [v for v in range(len(p.drones)) if s.routes[v] and v not in near])
+
+    def repair(self) -> bool:
+        """Insert unassigned stops anywhere they fit"""
+        s = self.s
+        placed = False
+        for i in s.unassigned():
+            busy = [v for v in range(len(self.p.drones)) if s.routes[v]]
+            if self.insert(i, busy) or self.open_tour(i):
+                placed = True
+        return placed
+
+    # ------------------------------------------------------------------
+    # Local search
+    # ------------------------------------------------------------------
+
+    def move_segment(self, i: int) -> bool:
+        """Relocate / or-opt: move the segment starting at i next to a neighbour, either direction"""
+        p, s, d = self.p, self.s, self.p.distance
+        r = s.where[i]
+        route = s.routes[r]
+        at = route.index(i)
+        for length in range(1, MAX_SEGMENT + 1):
+            if at + length > len(route):
+                break
+            seg = route[at:at + length]
+            prev = route[at - 1] if at else p.n
+            nxt = route[at + length] if at + length < len(route) else p.n
+            gain = d(prev, seg[0]) + d(seg[-1], nxt) - d(prev, nxt)
+            if gain <= EPS:
+                continue
+            seg_load = sum(p.weight[j] for j in seg)
+            orientations = [seg] if length == 1 else [seg, seg[::-1]]
+            for j in self.nbrs[seg[0]]:
+                r2 = s.where[j]
+                if r2 < 0 or j in seg:
+                    continue
+                if r2 != r and s.load[r2] + seg_load > p.drones[r2].max_payload_kg + EPS:
+                    continue
+                route2 = s.routes[r2]
+                q = route2.index(j)
+                before = route2[q - 1] if q else p.n
+                after = route2[q + 1] if q + 1 < len(route2) else p.n
+                for a, b, after_j in ((j, after, True), (before, j, False)):
+                    if r2 == r and (a in seg or b in seg):
+                        continue
+                    for ordered in orientations:
+                        if d(a, ordered[0]) + d(ordered[-1], b) - d(a, b) >= gain - EPS:
+                            continue
+                        if self.apply_move(r, r2, seg, ordered, j, after_j):
+                            return True
+        return False
+
+    def apply_move(self, r: int, r2: int, seg: List[int], ordered: List[int], j: int, after_j: bool) -> bool:
+        p, s = self.p, self.s
+        remaining = [k for k in s.routes[r] if k not in seg]
+        target = remaining if r2 == r else list(s.routes[r2])
+        pos = target.index(j) + (1 if after_j else 0)
+        target[pos:pos] = ordered
+        if r2 == r:
+            km = p.evaluate(target, r)
+            if km is None or km >= s.km[r] - EPS:
+                return False
+            s.set_route(r, target, km)
+        else:
+            km1 = p.evaluate(remaining, r)
+            if km1 is None:
+                return False
+            km2 = p.evaluate(target, r2)
+            if km2 is None or km1 + km2 >= s.km[r] + s.km[r2] - EPS:
+                return False
+            s.set_route(r, remaining, km1)
+            s.set_route(r2, target, km2)
+        self.moves += 1
+        return True
+
+    def two_opt(self, i: int) -> bool:
+        """Reverse the stretch between i and a neighbour on the same tour so they become adjacent"""
+        p, s, d = self.p, self.s, self.p.distance
+        r = s.where[i]
+        route = s.routes[r]
+        at = route.index(i)
+        for j in self.nbrs[i]:
+            if s.where[j] != r:
+                continue
+            q = route.index(j)
+            if q > at + 1:
+                after = route[q + 1] if q + 1 < len(route) else p.n
+                delta = d(i, j) + d(route[at + 1], after) - d(i, route[at + 1]) - d(j, after)
+                lo, hi = at + 1, q
+            elif q < at - 1:
+                before = route[q - 1] if q else p.n
+                delta = d(before, route[at - 1]) + d(j, i) - d(before, j) - d(route[at - 1], i)
+                lo, hi = q, at - 1
+            else:
+                continue
+            if delta >= -EPS:
+                continue
+            candidate = route[:lo] + route[lo:hi + 1][::-1] + route[hi + 1:]
+            km = p.evaluate(candidate, r)
+            if km is not None and km < s.km[r] - EPS:
+                s.set_route(r, candidate, km)
+                self.moves += 1
+                return True
+        return False
+
+    def improve(self) -> bool:
+        """Local search to a local optimum; False if the budget ran out first"""
+        s = self.s
+        improved = True
+        while improved:
+            improved = False
+            order = list(range(self.p.n))
+            self.rng.shuffle(order)
+            for count, i in enumerate(order):
+                if count % 64 == 0 and self.out_of_time():
+                    return False
+                if s.where[i] < 0:
+                    continue
+                if self.move_segment(i) or self.two_opt(i):
+                    improved = True
+            if self.repair():
+                improved = True
+        return True
+
+
+def solve_routes(problem: RoutingProblem, time_budget_s: float = 5.0, seed: int = 0) -> RoutePlan:
+    """
+    Plan tours for every drone in the problem
+
+    Args:
+        problem: Stops, drones and conditions
+        time_budget_s: Wall-clock budget; construction always completes,
+            local search stops early when the budget is spent
+        seed: Local search visiting order (same seed, same plan)
+
+    Returns:
+        RoutePlan with one tour per drone used and the stops left unassigned
+    """
+    started = time.monotonic()
+    search = _Search(problem, started + time_budget_s, seed)
+    if problem.n and problem.drones:
+        search.construct()
+        constructed_km = sum(search.s.km)
+        converged = search.improve()
+    else:
+        constructed_km, converged = 0.0, True
+    s = search.s
+    plan = problem.build_plan(
+        [(v, route) for v, route in enumerate(s.routes)],
+        s.unassigned(),
+    )
+    plan.solve_seconds = time.monotonic() - started
+    plan.stats = {
+        "construction_km": round(constructed_km, 3),
+        "improving_moves": search.moves,
+        "converged": converged,
+    }
+    return plan
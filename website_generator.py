@@ -5,9 +5,21 @@ Generates futuristic, 1% tier landing pages with AI copy and performance optimiz
 
 import json
 import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import random
+from functools import lru_cache
+
+# Batch generation fans copy writing (the slow, I/O-bound part) out over this many threads
+MAX_GENERATION_WORKERS = 16
+SITE_MANIFEST = ".sites.json"  # per output_dir: filename -> brief/content digests
+
+# copy_writer(brief) -> {"headline", "subheader", "cta_button"} (any subset); brief has
+# product_name, product_description, target_audience, industry and tier
+CopyWriter = Callable[[Dict], Dict]
 
 # ============================================================================
 # WEBSITE TIER CLASSIFICATION
@@ -251,9 +263,11 @@ def calculate_performance_score(
     return final_score, tier
 
 
-def generate_performance_metrics(template_tier: str) -> Dict:
+def generate_performance_metrics(template_tier: str, rng: Optional[random.Random] = None) -> Dict:
     """Generate realistic performance metrics for a website tier"""
     
+    rng = rng or random  # module-level functions share the global generator
+    
     tier_baselines = {
         "BREAKTHROUGH": {"base_speed": 95, "var": 3},
         "ELITE": {"base_speed": 85, "var": 5},
@@ -266,10 +280,10 @@ def generate_performance_metrics(template_tier: str) -> Dict:
     variance = baseline["var"]
     
     # Generate metrics with bounds (0-100)
-    page_speed = min(100, max(0, base + random.randint(-variance, variance)))
-    mobile_score = min(100, max(0, base + 5 + random.randint(-variance, variance)))
-    seo_score = min(100, max(0, base + 2 + random.randint(-variance, variance)))
-    accessibility = min(100, max(0, base + random.randint(-variance, variance)))
+    page_speed = min(100, max(0, base + rng.randint(-variance, variance)))
+    mobile_score = min(100, max(0, base + 5 + rng.randint(-variance, variance)))
+    seo_score = min(100, max(0, base + 2 + rng.randint(-variance, variance)))
+    accessibility = min(100, max(0, base + rng.randint(-variance, variance)))
     
     return {
         "page_speed": page_speed,
@@ -277,10 +291,10 @@ def generate_performance_metrics(template_tier: str) -> Dict:
         "seo_score": seo_score,
         "accessibility": accessibility,
         "conversion_factors": {
-            "form_optimization": random.randint(6, 10),
-            "design_quality": random.randint(8, 10),
-            "copy_quality": random.randint(7, 10),
-            "trust_signals": random.randint(3, 5)
+            "form_optimization": rng.randint(6, 10),
+            "design_quality": rng.randint(8, 10),
+            "copy_quality": rng.randint(7, 10),
+            "trust_signals": rng.randint(3, 5)
         }
     }
 
@@ -294,7 +308,9 @@ def generate_website(
     target_audience: str = "B2B SaaS",
     industry: str = "Technology",
     template: Optional[str] = None,
-    tier: Optional[str] = None
+    tier: Optional[str] = None,
+    copy_writer: Optional[CopyWriter] = None,
+    rng: Optional[random.Random] = None
 ) -> Dict:
     """
     Generate a complete futuristic website
@@ -306,16 +322,20 @@ def generate_website(
         industry: Industry vertical
         template: Optional template name
         tier: Optional tier override
+        copy_writer: Optional model-backed copy source; AI_COPY_LIBRARY fills whatever it omits
+        rng: Random source (default: the global one); seed it for reproducible sites
     
     Returns:
         Complete website configuration
     """
     
+    rng = rng or random
+    
     # Select template
     if template and template in FUTURISTIC_TEMPLATES:
         selected_template = FUTURISTIC_TEMPLATES[template]
     else:
-        selected_template = random.choice(list(FUTURISTIC_TEMPLATES.values()))
+        selected_template = rng.choice(list(FUTURISTIC_TEMPLATES.values()))
         template = list(FUTURISTIC_TEMPLATES.keys())[
             list(FUTURISTIC_TEMPLATES.values()).index(selected_template)
         ]
@@ -325,23 +345,35 @@ def generate_website(
     tier_config = WEBSITE_TIERS[website_tier]
     
     # Generate AI copy
-    headline = random.choice(
+    headline = rng.choice(
         AI_COPY_LIBRARY["hero_headlines"].get(website_tier, 
         AI_COPY_LIBRARY["hero_headlines"]["ELITE"])
     ).format(product=product_name)
     
-    subheader = random.choice(
+    subheader = rng.choice(
         AI_COPY_LIBRARY["subheaders"].get(website_tier, 
         AI_COPY_LIBRARY["subheaders"]["ELITE"])
     )
     
-    cta_text = random.choice(
+    cta_text = rng.choice(
         AI_COPY_LIBRARY["cta_buttons"].get(website_tier, 
         AI_COPY_LIBRARY["cta_buttons"]["ELITE"])
     )
     
+    if copy_writer:
+        written = copy_writer({
+            "product_name": product_name,
+            "product_description": product_description,
+            "target_audience": target_audience,
+            "industry": industry,
+            "tier": website_tier
+        }) or {}
+        headline = written.get("headline") or headline
+        subheader = written.get("subheader") or subheader
+        cta_text = written.get("cta_button") or cta_text
+    
     # Generate performance metrics
-    perf_metrics = generate_performance_metrics(website_tier)
+    perf_metrics = generate_performance_metrics(website_tier, rng)
     performance_score, assigned_tier = calculate_performance_score(**perf_metrics)
     
     # Create website configuration
@@ -380,7 +412,7 @@ def generate_website(
         },
         "estimated_conversion_rate": 0.08 + (tier_config["conversion_lift"] / 1000),
         "created_at": datetime.now().isoformat(),
-        "estimated_revenue_impact": f"${random.randint(50, 500)}k/month"
+        "estimated_revenue_impact": f"${rng.randint(50, 500)}k/month"
     }
     
     return website_config
@@ -390,18 +422,31 @@ def batch_generate_websites(
     product_name: str,
     product_description: str,
     count: int = 5,
-    target_audience: str = "B2B SaaS"
+    target_audience: str = "B2B SaaS",
+    copy_writer: Optional[CopyWriter] = None,
+    max_workers: int = MAX_GENERATION_WORKERS
 ) -> List[Dict]:
-    """Generate multiple website variations"""
+    """
+    Generate multiple website variations
     
-    websites = []
-    for _ in range(count):
-        website = generate_website(
+    With a copy_writer the variations are generated on a pool of up to
+    max_workers threads, so model calls overlap; without one, generation
+    is pure CPU and stays in the calling thread.
+    """
+    
+    def generate(_):
+        return generate_website(
             product_name=product_name,
             product_description=product_description,
-            target_audience=target_audience
+            target_audience=target_audience,
+            copy_writer=copy_writer
         )
-        websites.append(website)
+    
+    if copy_writer and count > 1 and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, count), thread_name_prefix='sitegen') as pool:
+            websites = list(pool.map(generate, range(count)))
+    else:
+        websites = [generate(i) for i in range(count)]
     
     # Sort by performance score
     return sorted(websites, key=lambda x: x["performance"]["score"], reverse=True)
@@ -543,77 +588,76 @@ def simulate_conversion_impact(website_config: Dict, baseline_conversion: float
 # HTML GENERATION (ULTRA-PREMIUM GLOW WEBSITES)
 # ============================================================================
 
-def generate_glow_html(website_config: Dict, include_animations: bool = True) -> str:
-    """
-    Generate ultra-premium HTML with glowing effects, animations, and stunning visuals
-    
-    Args:
-        website_config: Website configuration from generate_website()
-        include_animations: Include advanced animations (default: True)
-    
-    Returns:
-        Complete HTML string ready to save/deploy
-    """
-    
-    design = website_config['design']
-    copy = website_config['copy']
-    product_name = website_config['product_name']
-    tier = website_config['tier']
-    tier_color = website_config['tier_color']
+# Page sections, each an f-string compiled once with the module. The style block
+# depends only on the design, so identical designs share one rendered copy.
+# Bump SECTION_TEMPLATE_VERSION when changing any of them: generate_sites()
+# then regenerates every site instead of skipping unchanged briefs.
+SECTION_TEMPLATE_VERSION = 1
+
+_GLASS_OPACITY = {
+    'BREAKTHROUGH': 0.05,
+    'ELITE': 0.08,
+    'PREMIUM': 0.12,
+    'GROWTH': 0.15
+}
+
+
+def _head_section(description: str, product_name: str, tier_description: str) -> str:
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <meta name="description" content="{description}">
+    <title>{product_name} - {tier_description}</title>
     
-    # Advanced animations based on tier
-    animations_css = ""
-    if include_animations and tier in ['BREAKTHROUGH', 'ELITE']:
-        animations_css = """
-        @keyframes float {
-            0%, 100% { transform: translateY(0px); }
-            50% { transform: translateY(-20px); }
-        }
+"""
+
+
+@lru_cache(maxsize=256)
+def _style_section(
+    hero_bg: str,
+    text_color: str,
+    accent_color: str,
+    tier_color: str,
+    glass_opacity: float,
+    animated: bool
+) -> str:
+    """Style block for one design (memoized: a batch reuses a handful of designs)"""
+    animations_css = f"""
+        @keyframes float {{
+            0%, 100% {{ transform: translateY(0px); }}
+            50% {{ transform: translateY(-20px); }}
+        }}
         
-        @keyframes pulse-glow {
-            0%, 100% { 
-                box-shadow: 0 0 20px """ + tier_color + """, 
-                            0 0 40px """ + tier_color + """; 
-            }
-            50% { 
-                box-shadow: 0 0 40px """ + tier_color + """, 
-                            0 0 60px """ + tier_color + """,
-                            0 0 80px """ + tier_color + """; 
-            }
-        }
+        @keyframes pulse-glow {{
+            0%, 100% {{ 
+                box-shadow: 0 0 20px {tier_color}, 
+                            0 0 40px {tier_color}; 
+            }}
+            50% {{ 
+                box-shadow: 0 0 40px {tier_color}, 
+                            0 0 60px {tier_color},
+                            0 0 80px {tier_color}; 
+            }}
+        }}
         
-        @keyframes gradient-shift {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
+        @keyframes gradient-shift {{
+            0% {{ background-position: 0% 50%; }}
+            50% {{ background-position: 100% 50%; }}
+            100% {{ background-position: 0% 50%; }}
+        }}
         
-        @keyframes slide-up {
-            from { opacity: 0; transform: translateY(30px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
+        @keyframes slide-up {{
+            from {{ opacity: 0; transform: translateY(30px); }}
+            to {{ opacity: 1; transform: translateY(0); }}
+        }}
         
-        .animate-float { animation: float 3s ease-in-out infinite; }
-        .animate-on-scroll { animation: slide-up 0.8s ease-out; }
-        """
-    
-    # Glassmorphism intensity based on tier
-    glass_opacity = {
-        'BREAKTHROUGH': 0.05,
-        'ELITE': 0.08,
-        'PREMIUM': 0.12,
-        'GROWTH': 0.15
-    }.get(tier, 0.1)
-    
-    html = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <meta name="description" content="{copy['description'][:160]}">
-    <title>{product_name} - {website_config['tier_description']}</title>
+        .animate-float {{ animation: float 3s ease-in-out infinite; }}
+        .animate-on-scroll {{ animation: slide-up 0.8s ease-out; }}
+        """ if animated else ""
     
-    <style>
+    return f"""    <style>
         * {{
             margin: 0;
             padding: 0;
@@ -622,10 +666,10 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         
         body {{
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Roboto', 'Oxygen', sans-serif;
-            background: {design['hero_bg']};
+            background: {hero_bg};
             background-size: 400% 400%;
             animation: gradient-shift 15s ease infinite;
-            color: {design['text_color']};
+            color: {text_color};
             min-height: 100vh;
             overflow-x: hidden;
         }}
@@ -659,7 +703,7 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
             position: absolute;
             width: 400px;
             height: 400px;
-            background: radial-gradient(circle, {design['accent_color']}22 0%, transparent 70%);
+            background: radial-gradient(circle, {accent_color}22 0%, transparent 70%);
             border-radius: 50%;
             bottom: -200px;
             left: -200px;
@@ -722,13 +766,13 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         .cta {{
             display: inline-block;
             padding: 1.25rem 3.5rem;
-            background: {design['accent_color']};
+            background: {accent_color};
             color: #000;
             font-size: 1.25rem;
             font-weight: 700;
             text-decoration: none;
             border-radius: 50px;
-            box-shadow: 0 0 40px {design['accent_color']};
+            box-shadow: 0 0 40px {accent_color};
             transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
             position: relative;
             overflow: hidden;
@@ -749,7 +793,7 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         
         .cta:hover {{
             transform: scale(1.05) translateY(-2px);
-            box-shadow: 0 0 60px {design['accent_color']},
+            box-shadow: 0 0 60px {accent_color},
                         0 10px 40px rgba(0, 0, 0, 0.3);
         }}
         
@@ -796,7 +840,7 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         .stat-number {{
             font-size: 3rem;
             font-weight: 900;
-            background: linear-gradient(135deg, {tier_color}, {design['accent_color']});
+            background: linear-gradient(135deg, {tier_color}, {accent_color});
             -webkit-background-clip: text;
             -webkit-text-fill-color: transparent;
             background-clip: text;
@@ -838,30 +882,43 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         {animations_css}
     </style>
 </head>
-<body>
+"""
+
+
+def _body_section(
+    tier_description: str,
+    headline: str,
+    subheader: str,
+    cta_button: str,
+    features: str,
+    score: int,
+    conversion_lift: int,
+    page_speed: int
+) -> str:
+    return f"""<body>
     <div class="hero">
         <div class="hero-content">
             <div class="glassmorphism animate-on-scroll">
-                <div class="tier-badge">{website_config['tier_description']}</div>
-                <h1>{copy['headline']}</h1>
-                <p>{copy['subheader']}</p>
-                <a href="#signup" class="cta">{copy['cta_button']}</a>
+                <div class="tier-badge">{tier_description}</div>
+                <h1>{headline}</h1>
+                <p>{subheader}</p>
+                <a href="#signup" class="cta">{cta_button}</a>
                 
                 <div class="features">
-                    {''.join(f'<div class="feature-pill">✨ {feature}</div>' for feature in website_config['features'])}
+                    {features}
                 </div>
                 
                 <div class="stats">
                     <div class="stat">
-                        <div class="stat-number">{website_config['performance']['score']}</div>
+                        <div class="stat-number">{score}</div>
                         <div class="stat-label">Performance Score</div>
                     </div>
                     <div class="stat">
-                        <div class="stat-number">+{website_config['conversion_lift']}%</div>
+                        <div class="stat-number">+{conversion_lift}%</div>
                         <div class="stat-label">Conversion Lift</div>
                     </div>
                     <div class="stat">
-                        <div class="stat-number">{website_config['performance']['page_speed']}</div>
+                        <div class="stat-number">{page_speed}</div>
                         <div class="stat-label">Page Speed</div>
                     </div>
                 </div>
@@ -869,38 +926,86 @@ def generate_glow_html(website_config: Dict, include_animations: bool = True) ->
         </div>
     </div>
     
-    <script>
+"""
+
+
+_SCRIPT_SECTION = """    <script>
         // Smooth scroll for CTA
-        document.querySelector('.cta').addEventListener('click', (e) => {{
+        document.querySelector('.cta').addEventListener('click', (e) => {
             e.preventDefault();
             // Add your signup logic here
             console.log('CTA clicked!');
-        }});
+        });
         
         // Animate elements on scroll
-        const observer = new IntersectionObserver((entries) => {{
-            entries.forEach(entry => {{
-                if (entry.isIntersecting) {{
+        const observer = new IntersectionObserver((entries) => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) {
                     entry.target.classList.add('animate-on-scroll');
-                }}
-            }});
-        }});
+                }
+            });
+        });
         
         document.querySelectorAll('.glassmorphism').forEach(el => observer.observe(el));
     </script>
 </body>
 </html>"""
+
+
+def generate_glow_html(website_config: Dict, include_animations: bool = True) -> str:
+    """
+    Generate ultra-premium HTML with glowing effects, animations, and stunning visuals
     
-    return html
+    Args:
+        website_config: Website configuration from generate_website()
+        include_animations: Include advanced animations (default: True)
+    
+    Returns:
+        Complete HTML string ready to save/deploy
+    """
+    
+    design = website_config['design']
+    copy = website_config['copy']
+    tier = website_config['tier']
+    tier_color = website_config['tier_color']
+    
+    # Advanced animations for the top tiers; glassmorphism intensity by tier
+    style = _style_section(
+        design['hero_bg'],
+        design['text_color'],
+        design['accent_color'],
+        tier_color,
+        _GLASS_OPACITY.get(tier, 0.1),
+        include_animations and tier in ['BREAKTHROUGH', 'ELITE']
+    )
+    
+    head = _head_section(
+        description=copy['description'][:160],
+        product_name=website_config['product_name'],
+        tier_description=website_config['tier_description']
+    )
+    body = _body_section(
+        tier_description=website_config['tier_description'],
+        headline=copy['headline'],
+        subheader=copy['subheader'],
+        cta_button=copy['cta_button'],
+        features=''.join(f'<div class="feature-pill">✨ {feature}</div>' for feature in website_config['features']),
+        score=website_config['performance']['score'],
+        conversion_lift=website_config['conversion_lift'],
+        page_speed=website_config['performance']['page_speed']
+    )
+    
+    return ''.join((head, style, body, _SCRIPT_SECTION))
 
 
-def save_website_html(website_config: Dict, filename: Optional[str] = None) -> str:
+def save_website_html(website_config: Dict, filename: Optional[str] = None, precompress: bool = False) -> str:
     """
     Generate and save ultra-premium glow website HTML to file
     
     Args:
         website_config: Website configuration from generate_website()
         filename: Optional filename (auto-generated if not provided)
+        precompress: Also write .gz/.br siblings for static hosting
     
     Returns:
         Path to saved HTML file
@@ -909,21 +1014,65 @@ def save_website_html(website_config: Dict, filename: Optional[str] = None) -> s
     html = generate_glow_html(website_config)
     
     if not filename:
-        safe_name = website_config['product_name'].lower().replace(' ', '_').replace('-', '_')
-        filename = f"{safe_name}_glow_website.html"
+        filename = _site_filename(website_config['product_name'])
     
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html)
+    _write_html(filename, html, precompress)
     
     return filename
 
 
+def _site_filename(product_name: str) -> str:
+    safe_name = product_name.lower().replace(' ', '_').replace('-', '_')
+    return f"{safe_name}_glow_website.html"
+
+
+def _refresh_precompressed(path: str):
+    """Write the .gz/.br siblings of path if any is missing or older than the file"""
+    from static_assets import BROTLI_AVAILABLE, ENCODINGS, MIN_COMPRESS_BYTES, precompress as precompress_file
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    if stat.st_size < MIN_COMPRESS_BYTES:
+        return  # precompress() writes nothing for these
+    for encoding, suffix in ENCODINGS:
+        if encoding == 'br' and not BROTLI_AVAILABLE:
+            continue
+        try:
+            if os.stat(path + suffix).st_mtime >= stat.st_mtime:
+                continue
+        except OSError:
+            pass
+        precompress_file(path)
+        return
+
+
+def _write_html(path: str, html: str, precompress: bool = False) -> int:
+    """Write html unless the file already holds it; returns the bytes written
+    
+    With precompress the .gz/.br siblings are brought up to date either way,
+    so a page written before precompression was enabled still gets them.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            unchanged = f.read() == html
+    except (OSError, UnicodeDecodeError):
+        unchanged = False
+    if not unchanged:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+    if precompress:
+        _refresh_precompressed(path)
+    return 0 if unchanged else len(html.encode('utf-8'))
+
+
 def generate_and_save_best_website(
     product_name: str,
     product_description: str,
     target_audience: str = "B2B SaaS",
     count: int = 5,
-    output_dir: str = "."
+    output_dir: str = ".",
+    precompress: bool = False
 ) -> Dict:
     """
     Generate multiple websites, pick the best, and save as HTML
@@ -934,13 +1083,12 @@ def generate_and_save_best_website(
         target_audience: Target audience
         count: Number of variations to generate
         output_dir: Directory to save HTML file
+        precompress: Also write .gz/.br siblings for static hosting
     
     Returns:
         Dict with website config and saved file path
     """
     
-    import os
-    
     # Generate multiple variations
     websites = batch_generate_websites(
         product_name=product_name,
@@ -952,16 +1100,9 @@ def generate_and_save_best_website(
     # Pick the best (already sorted by performance)
     best_website = websites[0]
     
-    # Generate filename
-    safe_name = product_name.lower().replace(' ', '_').replace('-', '_')
-    filename = f"{safe_name}_glow_website.html"
-    filepath = os.path.join(output_dir, filename)
-    
     # Generate and save HTML
-    html = generate_glow_html(best_website)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+    filepath = os.path.join(output_dir, _site_filename(product_name))
+    _write_html(filepath, generate_glow_html(best_website), precompress)
     
     return {
         'website_config': best_website,
@@ -973,3 +1114,102 @@ def generate_and_save_best_website(
         'alternatives_generated': len(websites),
         'template': best_website['template']
     }
+
+
+# ============================================================================
+# PARALLEL, INCREMENTAL SITE GENERATION
+# ============================================================================
+
+def _brief_digest(brief: Dict) -> str:
+    payload = json.dumps(brief, sort_keys=True, default=str) + f"|sections:{SECTION_TEMPLATE_VERSION}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _load_site_manifest(output_dir: str) -> Dict[str, Dict]:
+    try:
+        with open(os.path.join(output_dir, SITE_MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_site_manifest(output_dir: str, manifest: Dict[str, Dict]):
+    fd, tmp = tempfile.mkstemp(dir=output_dir, prefix='.sites-')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(output_dir, SITE_MANIFEST))
+
+
+def generate_sites(
+    briefs: List[Dict],
+    output_dir: str,
+    copy_writer: Optional[CopyWriter] = None,
+    max_workers: int = MAX_GENERATION_WORKERS,
+    precompress: bool = False,
+    force: bool = False
+) -> Dict:
+    """
+    Generate and save one site per brief, in parallel and incrementally
+    
+    Each brief holds generate_website() keyword arguments (product_name and
+    product_description at least) plus an optional "filename". A site's
+    randomness is seeded from its brief, so an unchanged brief reproduces the
+    same page: it is skipped outright (no copy writer call, no render) while
+    its file is still there, per the SITE_MANIFEST kept in output_dir. Pages
+    that render to what is already on disk are not rewritten.
+    
+    Args:
+        briefs: Site briefs
+        output_dir: Where the HTML files and the manifest live
+        copy_writer: Optional model-backed copy source, called concurrently
+        max_workers: Thread pool bound
+        precompress: Also write .gz/.br siblings for static hosting
+        force: Regenerate every brief (e.g. after switching copy writers)
+    
+    Returns:
+        Counts (generated, skipped, written, unchanged), bytes_written and the files
+    """
+    
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = _load_site_manifest(output_dir)
+    report = {"generated": 0, "skipped": 0, "written": 0, "unchanged": 0, "bytes_written": 0, "files": []}
+    
+    pending = []
+    for brief in briefs:
+        kwargs = {k: v for k, v in brief.items() if k != "filename"}
+        filename = brief.get("filename") or _site_filename(brief["product_name"])
+        path = os.path.join(output_dir, filename)
+        digest = _brief_digest(brief)
+        report["files"].append(path)
+        entry = manifest.get(filename)
+        if not force and entry and entry.get("brief") == digest and os.path.exists(path):
+            if precompress:
+                _refresh_precompressed(path)
+            report["skipped"] += 1
+            continue
+        pending.append((filename, path, digest, kwargs, entry or {}))
+    
+    def build(item):
+        filename, path, digest, kwargs, entry = item
+        rng = random.Random(int(digest[:16], 16))
+        html = generate_glow_html(generate_website(copy_writer=copy_writer, rng=rng, **kwargs))
+        content = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        if entry.get("content") == content and os.path.exists(path):
+            written = 0
+            if precompress:
+                _refresh_precompressed(path)
+        else:
+            written = _write_html(path, html, precompress)
+        return filename, digest, content, written
+    
+    if pending:
+        workers = max(1, min(max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sitegen') as pool:
+            for filename, digest, content, written in pool.map(build, pending):
+                manifest[filename] = {"brief": digest, "content": content}
+                report["generated"] += 1
+                report["written" if written else "unchanged"] += 1
+                report["bytes_written"] += written
+        _save_site_manifest(output_dir, manifest)
+    
+    return report